@@ -8,10 +8,11 @@ import os
 import sys
 import json
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 
 # Import the original LangGraph agent functionality
-from langgraph_agent.langgraph_agent import run_enhanced_agent
+from langgraph_agent.langgraph_agent import run_enhanced_agent, stream_enhanced_agent
+from langgraph_agent.agent_events import iter_sse_events
 from config.settings import ENABLE_SCREEN_LOGGING, str_to_bool, DISABLE_DATABASES
 import logging
 
@@ -122,6 +123,49 @@ class AIAgentClient:
                 disable_databases=disable_databases
             )
     
+    def stream_agent(self, user_request: str, disable_sql_blocking: bool = False,
+                     disable_databases: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Query the AI agent, yielding its progress events as they happen
+        
+        Args:
+            user_request: Natural language request to process
+            disable_sql_blocking: Whether to disable SQL blocking
+            disable_databases: Whether to disable database operations
+            
+        Returns:
+            Iterator of agent events (see langgraph_agent.agent_events), ending with a "result" event
+        """
+        if not self.use_backend:
+            # Use standalone agent
+            yield from stream_enhanced_agent(
+                user_request=user_request,
+                disable_sql_blocking=disable_sql_blocking,
+                disable_databases=disable_databases
+            )
+            return
+
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        }
+        if self.auth_token:
+            headers['Authorization'] = f'Bearer {self.auth_token}'
+
+        url = f"{self.backend_url.rstrip('/')}/api/agent/query/stream"
+        data = {
+            'user_request': user_request,
+            'disable_sql_blocking': disable_sql_blocking,
+            'disable_databases': disable_databases
+        }
+
+        try:
+            with requests.post(url, json=data, headers=headers, stream=True) as response:
+                response.raise_for_status()
+                yield from iter_sse_events(response.iter_lines(decode_unicode=True))
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Backend API request failed: {str(e)}")
+    
     def query_rag(self, query: str) -> Dict[str, Any]:
         """
         Query the RAG component
@@ -213,6 +257,49 @@ class AIAgentClient:
             return rag_orchestrator.retrieve_documents(query, top_k=top_k)
 
 
+def render_agent_events(events: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Print agent progress events as they arrive: node transitions and MCP tool calls on stderr,
+    answer tokens on stdout.
+    
+    Args:
+        events: Events from AIAgentClient.stream_agent
+        
+    Returns:
+        The final result (same format as query_agent)
+    """
+    result = {}
+    streamed_answer = False
+    for event in events:
+        kind = event.get('event')
+        if kind == 'node_start':
+            print(f"-> {event.get('node')}", file=sys.stderr, flush=True)
+        elif kind == 'node_end' and event.get('error'):
+            print(f"   {event.get('node')} failed: {event.get('error')}", file=sys.stderr, flush=True)
+        elif kind == 'tool_call_start':
+            print(f"   [{event.get('index')}] {event.get('service_id')}.{event.get('action')} ...", file=sys.stderr, flush=True)
+        elif kind == 'tool_call_end':
+            detail = f": {event.get('error')}" if event.get('status') == 'error' else ''
+            print(f"   [{event.get('index')}] {event.get('service_id')}.{event.get('action')} {event.get('status')} in {event.get('duration_ms')} ms{detail}", file=sys.stderr, flush=True)
+        elif kind == 'token':
+            if not streamed_answer:
+                print("\nFinal Response:")
+                streamed_answer = True
+            sys.stdout.write(event.get('text', ''))
+            sys.stdout.flush()
+        elif kind == 'error':
+            print(f"Agent error: {event.get('error')}", file=sys.stderr, flush=True)
+        elif kind == 'result':
+            result = event.get('result') or {}
+
+    if streamed_answer:
+        print()
+    else:
+        print("\nFinal Response:")
+        print_markdown(result.get("final_answer") or "No response generated")
+    return result
+
+
 def main():
     parser = argparse.ArgumentParser(description='AI Agent Client - Enhanced command-line client with backend support')
     parser.add_argument('--request', type=str, help='Natural language request to process')
@@ -222,6 +309,7 @@ def main():
     parser.add_argument('--auth-token', type=str, help='Authentication token for backend API')
     parser.add_argument('--disable-sql-blocking', action='store_true', help='Disable SQL blocking for safety')
     parser.add_argument('--disable-databases', action='store_true', help='Disable database operations')
+    parser.add_argument('--stream', action='store_true', help='Show agent progress and the answer as they are produced')
     parser.add_argument('--rag-query', type=str, help='Query the RAG component instead of the main agent')
     parser.add_argument('--ingest-documents', nargs='+', help='Ingest documents into the RAG component')
     
@@ -263,6 +351,13 @@ def main():
                 result = client.query_rag(args.request)
                 print("RAG Response:")
                 print(json.dumps(result, indent=2, default=str))
+            elif args.stream:
+                # Query main agent, rendering progress as it happens
+                result = render_agent_events(client.stream_agent(
+                    user_request=args.request,
+                    disable_sql_blocking=args.disable_sql_blocking,
+                    disable_databases=args.disable_databases or DISABLE_DATABASES
+                ))
             else:
                 # Query main agent
                 result = client.query_agent(
@@ -323,13 +418,20 @@ def main():
                 else:
                     # Process as main agent query
                     try:
-                        result = client.query_agent(
-                            user_request=user_input,
-                            disable_sql_blocking=args.disable_sql_blocking,
-                            disable_databases=args.disable_databases or DISABLE_DATABASES
-                        )
-                        print("\nFinal Response:")
-                        print_markdown(result.get("final_response", "No response generated"))
+                        if args.stream:
+                            result = render_agent_events(client.stream_agent(
+                                user_request=user_input,
+                                disable_sql_blocking=args.disable_sql_blocking,
+                                disable_databases=args.disable_databases or DISABLE_DATABASES
+                            ))
+                        else:
+                            result = client.query_agent(
+                                user_request=user_input,
+                                disable_sql_blocking=args.disable_sql_blocking,
+                                disable_databases=args.disable_databases or DISABLE_DATABASES
+                            )
+                            print("\nFinal Response:")
+                            print_markdown(result.get("final_response", "No response generated"))
                         
                         # Print additional information if in verbose mode
                         if os.getenv("VERBOSE_OUTPUT", "").lower() == "true":
@@ -4,18 +4,52 @@ Handles AI agent requests and processing
 """
 import os
 import json
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import logging
 from datetime import datetime
 import time
 
 # Import the LangGraph agent
-from langgraph_agent.langgraph_agent import run_enhanced_agent
+from langgraph_agent.langgraph_agent import run_enhanced_agent, stream_enhanced_agent
+from langgraph_agent.agent_events import format_sse
+from utils.deadline import request_deadline
+from utils.planner_cache import get_planner_cache
+from utils.mcp_resilience import get_circuit_breakers
+from config.settings import AGENT_REQUEST_TIMEOUT_SECONDS
 
 # Import security components
 from backend.security import require_permission, validate_input, Permission
 
+# Request body accepted by /query (shared with the ASGI variant in asgi_app.py)
+AGENT_QUERY_SCHEMA = {
+    'user_request': {
+        'type': str,
+        'required': True,
+        'min_length': 1,
+        'max_length': 2000,
+        'sanitize': True
+    },
+    'disable_sql_blocking': {
+        'type': bool,
+        'required': False
+    },
+    'disable_databases': {
+        'type': bool,
+        'required': False
+    },
+    'custom_system_prompt': {
+        'type': str,
+        'required': False,
+        'max_length': 10000,  # Increased from 5000 to accommodate longer custom prompts
+        'sanitize': True
+    },
+    'skip_final_response_generation': {
+        'type': bool,
+        'required': False
+    }
+}
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -38,6 +72,13 @@ def health_check():
     }), 200
 
 
+def agent_request_deadline():
+    """Deadline set by the gateway (X-Request-Deadline), AGENT_REQUEST_TIMEOUT_SECONDS when called directly"""
+    return request_deadline(
+        request.headers, default_timeout=AGENT_REQUEST_TIMEOUT_SECONDS, max_timeout=AGENT_REQUEST_TIMEOUT_SECONDS
+    )
+
+
 @app.route('/query', methods=['POST'])
 @require_permission(Permission.WRITE_AGENT)
 def agent_query(current_user_id):
@@ -46,35 +87,7 @@ def agent_query(current_user_id):
         data = request.get_json()
         
         # Validate input
-        schema = {
-            'user_request': {
-                'type': str,
-                'required': True,
-                'min_length': 1,
-                'max_length': 2000,
-                'sanitize': True
-            },
-            'disable_sql_blocking': {
-                'type': bool,
-                'required': False
-            },
-            'disable_databases': {
-                'type': bool,
-                'required': False
-            },
-            'custom_system_prompt': {
-                'type': str,
-                'required': False,
-                'max_length': 10000,  # Increased from 5000 to accommodate longer custom prompts
-                'sanitize': True
-            },
-            'skip_final_response_generation': {
-                'type': bool,
-                'required': False
-            }
-        }
-        
-        validation_errors = validate_input(data, schema)
+        validation_errors = validate_input(data, AGENT_QUERY_SCHEMA)
         if validation_errors:
             return jsonify({'error': f'Validation error: {validation_errors}'}), 400
         
@@ -104,7 +117,8 @@ def agent_query(current_user_id):
             disable_databases=disable_databases,
             custom_system_prompt=custom_system_prompt,
             skip_final_response_generation=skip_final_response_generation,
-            registry_url=registry_url
+            registry_url=registry_url,
+            deadline=agent_request_deadline()
         )
         
         # Add execution time to result
@@ -116,6 +130,56 @@ def agent_query(current_user_id):
         return jsonify({'error': f'Agent query failed: {str(e)}'}), 500
 
 
+@app.route('/query/stream', methods=['POST'])
+@require_permission(Permission.WRITE_AGENT)
+def agent_query_stream(current_user_id):
+    """
+    Streaming variant of /query: sends the run's progress events (node transitions, MCP tool calls,
+    answer tokens) as server-sent events, ending with a "result" event.
+    """
+    try:
+        data = request.get_json()
+
+        # Validate input
+        validation_errors = validate_input(data, AGENT_QUERY_SCHEMA)
+        if validation_errors:
+            return jsonify({'error': f'Validation error: {validation_errors}'}), 400
+
+        user_request = data.get('user_request')
+        logger.info(f"[AGENT_SERVICE] Received streamed user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
+
+        events = stream_enhanced_agent(
+            user_request=user_request,
+            mcp_servers=[],
+            disable_sql_blocking=data.get('disable_sql_blocking', False),
+            disable_databases=data.get('disable_databases', False),
+            custom_system_prompt=data.get('custom_system_prompt', None),
+            skip_final_response_generation=data.get('skip_final_response_generation', False),
+            registry_url=data.get('registry_url', os.getenv('MCP_REGISTRY_URL', 'http://127.0.0.1:8080')),
+            deadline=agent_request_deadline()
+        )
+    except Exception as e:
+        logger.error(f"Agent stream query error: {str(e)}")
+        return jsonify({'error': f'Agent query failed: {str(e)}'}), 500
+
+    def generate():
+        start_time = time.time()
+        try:
+            for event in events:
+                if event['event'] == 'result':
+                    event['result']['execution_time'] = time.time() - start_time
+                yield format_sse(event)
+        except Exception as e:
+            logger.error(f"Agent stream query error: {str(e)}")
+            yield format_sse({'event': 'error', 'error': f'Agent query failed: {str(e)}'})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/status', methods=['GET'])
 @require_permission(Permission.READ_AGENT)
 def agent_status():
@@ -124,6 +188,10 @@ def agent_status():
         'status': 'running',
         'service': 'agent',
         'message': 'AI Agent is operational',
+        # Planner LLM calls avoided by reusing plans of repeated requests
+        'planner_cache': get_planner_cache().stats(),
+        # Circuit breakers of the MCP services the agent calls (merged into the gateway's /api/services)
+        'mcp_circuit_breakers': get_circuit_breakers().snapshot(),
         'timestamp': datetime.utcnow().isoformat(),
         'version': '0.5.0'
     }), 200
@@ -0,0 +1,308 @@
+"""
+ASGI variant of the Agent Service.
+Same endpoints, authentication and responses as app.py, but /query awaits arun_enhanced_agent,
+so one worker process serves many concurrent agent runs instead of one run per sync worker.
+/query/stream sends the run's progress as server-sent events (see langgraph_agent.agent_events).
+
+Usage:
+    python -m backend.services.agent.asgi_app
+    uvicorn backend.services.agent.asgi_app:app --host 0.0.0.0 --port 5002 --workers 2
+"""
+import os
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# Import the async LangGraph agent
+from langgraph_agent.agent_events import format_sse
+from langgraph_agent.async_agent import arun_enhanced_agent, astream_enhanced_agent
+from langgraph_agent.async_mcp_client import get_async_mcp_client
+from utils.deadline import request_deadline
+from utils.planner_cache import get_planner_cache
+from utils.mcp_resilience import get_circuit_breakers
+from config.settings import AGENT_REQUEST_TIMEOUT_SECONDS
+
+# Import security components
+from backend.security import security_manager, validate_input, Permission
+from backend.services.agent.app import AGENT_QUERY_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+async def _send_json(send, status: int, body: Dict[str, Any]) -> None:
+    payload = json.dumps(body, default=str).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode()),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError('Request body too large')
+        if not message.get('more_body'):
+            break
+    return body
+
+
+def _authorize(scope, permission: Permission) -> Tuple[Optional[str], Optional[Tuple[int, Dict[str, Any]]]]:
+    """
+    Check the Authorization header the same way require_permission does.
+
+    Returns:
+        Tuple of (user_id, None) when allowed, or (None, (status, body)) with the error response
+    """
+    headers = dict(scope.get('headers') or [])
+    token = headers.get(b'authorization', b'').decode('latin-1')
+    if not token:
+        return None, (401, {'message': 'Token is missing!'})
+
+    user_info = security_manager.verify_token(token)
+    if not user_info:
+        return None, (401, {'message': 'Token is invalid or expired!'})
+
+    if not security_manager.has_permission(user_info, permission):
+        return None, (403, {'message': 'Insufficient permissions!'})
+
+    client = scope.get('client') or ('', 0)
+    security_manager.log_audit_event(
+        user_info['user_id'],
+        permission.value.split(':')[0],
+        permission.value.split(':')[1],
+        client[0],
+        success=True
+    )
+    return user_info['user_id'], None
+
+
+async def health_check(scope, receive, send):
+    """Health check endpoint"""
+    await _send_json(send, 200, {
+        'status': 'healthy',
+        'service': 'agent',
+        'timestamp': datetime.utcnow().isoformat(),
+        'version': '0.5.0'
+    })
+
+
+async def _read_query(scope, receive, send) -> Optional[Dict[str, Any]]:
+    """
+    Authorize and validate a /query or /query/stream request.
+
+    Returns:
+        The request data, or None after sending the error response
+    """
+    user_id, error = _authorize(scope, Permission.WRITE_AGENT)
+    if error:
+        await _send_json(send, *error)
+        return None
+
+    try:
+        data = json.loads(await _read_body(receive) or b'null')
+    except ValueError as e:
+        await _send_json(send, 400, {'error': f'Invalid request body: {str(e)}'})
+        return None
+    if not isinstance(data, dict):
+        await _send_json(send, 400, {'error': 'Request body must be a JSON object'})
+        return None
+
+    validation_errors = validate_input(data, AGENT_QUERY_SCHEMA)
+    if validation_errors:
+        await _send_json(send, 400, {'error': f'Validation error: {validation_errors}'})
+        return None
+
+    user_request = data.get('user_request')
+    logger.info(f"[AGENT_SERVICE] Received user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
+    return data
+
+
+def _agent_arguments(scope, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for arun_enhanced_agent / astream_enhanced_agent from the request and its data"""
+    headers = {key.decode('latin-1').title(): value.decode('latin-1') for key, value in scope.get('headers') or []}
+    return {
+        'user_request': data.get('user_request'),
+        'mcp_servers': [],
+        'disable_sql_blocking': data.get('disable_sql_blocking', False),
+        'disable_databases': data.get('disable_databases', False),
+        'custom_system_prompt': data.get('custom_system_prompt', None),
+        'skip_final_response_generation': data.get('skip_final_response_generation', False),
+        # Get registry URL from environment or data
+        'registry_url': data.get('registry_url', os.getenv('MCP_REGISTRY_URL', 'http://127.0.0.1:8080')),
+        # Deadline set by the gateway (X-Request-Deadline), AGENT_REQUEST_TIMEOUT_SECONDS when called directly
+        'deadline': request_deadline(
+            headers, default_timeout=AGENT_REQUEST_TIMEOUT_SECONDS, max_timeout=AGENT_REQUEST_TIMEOUT_SECONDS
+        )
+    }
+
+
+async def agent_query(scope, receive, send):
+    """Endpoint for the main AI agent functionality"""
+    try:
+        data = await _read_query(scope, receive, send)
+        if data is None:
+            return
+
+        start_time = time.time()
+
+        result = await arun_enhanced_agent(**_agent_arguments(scope, data))
+
+        # Add execution time to result
+        result['execution_time'] = time.time() - start_time
+
+        await _send_json(send, 200, result)
+    except Exception as e:
+        logger.error(f"Agent query error: {str(e)}")
+        await _send_json(send, 500, {'error': f'Agent query failed: {str(e)}'})
+
+
+async def agent_query_stream(scope, receive, send):
+    """
+    Streaming variant of /query: sends the run's progress events (node transitions, MCP tool calls,
+    answer tokens) as server-sent events, ending with a "result" event.
+    """
+    try:
+        data = await _read_query(scope, receive, send)
+    except Exception as e:
+        logger.error(f"Agent stream query error: {str(e)}")
+        await _send_json(send, 500, {'error': f'Agent query failed: {str(e)}'})
+        return
+    if data is None:
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+
+    async def relay():
+        start_time = time.time()
+        events = astream_enhanced_agent(**_agent_arguments(scope, data))
+        try:
+            async for event in events:
+                if event['event'] == 'result':
+                    event['result']['execution_time'] = time.time() - start_time
+                await send({'type': 'http.response.body', 'body': format_sse(event), 'more_body': True})
+        except Exception as e:
+            logger.error(f"Agent stream query error: {str(e)}")
+            await send({'type': 'http.response.body', 'body': format_sse({'event': 'error', 'error': f'Agent query failed: {str(e)}'}), 'more_body': True})
+        finally:
+            await events.aclose()
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    # Stop the run when the client goes away instead of finishing it for nobody
+    relay_task = asyncio.ensure_future(relay())
+    disconnect_task = asyncio.ensure_future(wait_for_disconnect())
+    await asyncio.wait({relay_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    if relay_task.done():
+        disconnect_task.cancel()
+        relay_task.result()
+    else:
+        logger.info("[AGENT_SERVICE] Client disconnected, cancelling streamed agent run")
+        relay_task.cancel()
+
+
+async def agent_status(scope, receive, send):
+    """Get the status of the AI agent"""
+    user_id, error = _authorize(scope, Permission.READ_AGENT)
+    if error:
+        await _send_json(send, *error)
+        return
+    await _send_json(send, 200, {
+        'status': 'running',
+        'service': 'agent',
+        'message': 'AI Agent is operational',
+        # Planner LLM calls avoided by reusing plans of repeated requests
+        'planner_cache': get_planner_cache().stats(),
+        # Circuit breakers of the MCP services the agent calls (merged into the gateway's /api/services)
+        'mcp_circuit_breakers': get_circuit_breakers().snapshot(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'version': '0.5.0'
+    })
+
+
+ROUTES = {
+    ('GET', '/health'): health_check,
+    ('POST', '/query'): agent_query,
+    ('POST', '/query/stream'): agent_query_stream,
+    ('GET', '/status'): agent_status,
+}
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await get_async_mcp_client().close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path'].rstrip('/') or '/'
+    if method == 'OPTIONS':
+        await send({
+            'type': 'http.response.start',
+            'status': 204,
+            'headers': [
+                (b'access-control-allow-origin', b'*'),
+                (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+                (b'access-control-allow-headers', b'Authorization, Content-Type'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        allowed = any(route_path == path for _, route_path in ROUTES)
+        await _send_json(send, 405 if allowed else 404, {'error': 'Method not allowed' if allowed else 'Not found'})
+        return
+    await handler(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # Get port from environment variable or default to 5002
+    port = int(os.getenv('AGENT_SERVICE_PORT', 5002))
+    workers = int(os.getenv('AGENT_SERVICE_WORKERS', 1))
+
+    uvicorn.run(
+        'backend.services.agent.asgi_app:app',
+        host='0.0.0.0',
+        port=port,
+        workers=workers,
+        timeout_keep_alive=10,
+    )
@@ -4,7 +4,7 @@ Routes requests to appropriate services
 """
 import os
 import requests
-from flask import Flask, request, jsonify, Response, render_template, send_from_directory
+from flask import Flask, request, jsonify, Response, render_template, send_from_directory, stream_with_context
 from flask_cors import CORS
 import logging
 from datetime import datetime
@@ -12,6 +12,11 @@ import json
 
 # Import security components
 from backend.security import require_permission, validate_input, Permission
+from utils.mcp_transport import get_mcp_transport
+from utils.mcp_result_cache import get_mcp_result_cache
+from utils.mcp_resilience import get_circuit_breakers, get_load_balancer, get_resilient_caller
+from utils.deadline import DEADLINE_HEADER, deadline_headers, remaining_seconds, request_deadline
+from config.settings import AGENT_REQUEST_TIMEOUT_SECONDS
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -30,10 +35,32 @@ AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://localhost:5001')
 AGENT_SERVICE_URL = os.getenv('AGENT_SERVICE_URL', 'http://localhost:5002')
 RAG_SERVICE_URL = os.getenv('RAG_SERVICE_URL', 'http://localhost:5003')
 
+# Extra time the gateway waits past an agent request's deadline for the agent to report it
+AGENT_DEADLINE_GRACE_SECONDS = 5
+
 # Web client directory
 WEB_CLIENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'web_client')
 
 
+def agent_request_deadline():
+    """
+    Deadline of the current agent request: AGENT_REQUEST_TIMEOUT_SECONDS from now, or earlier when
+    the client asks for less (X-Request-Timeout in seconds, or X-Request-Deadline).
+
+    Returns:
+        Tuple of (headers forwarding the deadline, requests timeout in seconds)
+    """
+    deadline = request_deadline(
+        request.headers, default_timeout=AGENT_REQUEST_TIMEOUT_SECONDS, max_timeout=AGENT_REQUEST_TIMEOUT_SECONDS
+    )
+    return deadline_headers(deadline), max(remaining_seconds(deadline), 0) + AGENT_DEADLINE_GRACE_SECONDS
+
+
+def agent_timeout_response():
+    """Response for an agent request the agent service did not answer before its deadline"""
+    return jsonify({'error': 'Agent request deadline exceeded'}), 504
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -137,8 +164,10 @@ def proxy_agent(path=''):
     """Proxy requests to the agent service"""
     url = f"{AGENT_SERVICE_URL}/{path}"
     
-    headers = {key: value for (key, value) in request.headers if key.lower() != 'host'}
+    headers = {key: value for (key, value) in request.headers if key.lower() not in ('host', DEADLINE_HEADER.lower())}
     headers['Host'] = AGENT_SERVICE_URL.replace('http://', '').replace('https://', '')
+    forwarded_deadline, timeout = agent_request_deadline()
+    headers.update(forwarded_deadline)
     
     try:
         resp = requests.request(
@@ -148,7 +177,7 @@ def proxy_agent(path=''):
             data=request.get_data(),
             cookies=request.cookies,
             allow_redirects=False,
-            timeout=43200  # Increased timeout to 12 hours for AI model responses
+            timeout=timeout  # The request's deadline (AGENT_REQUEST_TIMEOUT_SECONDS at most)
         )
         
         excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
@@ -157,6 +186,9 @@ def proxy_agent(path=''):
         
         response = Response(resp.content, resp.status_code, headers)
         return response
+    except requests.exceptions.Timeout:
+        logger.error(f"Agent service proxy timed out after {timeout:.0f}s")
+        return agent_timeout_response()
     except Exception as e:
         logger.error(f"Agent service proxy error: {str(e)}")
         return jsonify({'error': 'Agent service unavailable'}), 503
@@ -203,18 +235,71 @@ def agent_query(current_user_id):
     try:
         # Forward to agent service
         url = f"{AGENT_SERVICE_URL}/query"
+        forwarded_deadline, timeout = agent_request_deadline()
         headers = {
             'Content-Type': 'application/json',
-            'Authorization': request.headers.get('Authorization', '')
+            'Authorization': request.headers.get('Authorization', ''),
+            **forwarded_deadline
         }
 
-        resp = requests.post(url, json=request.get_json(), headers=headers, timeout=43200)  # Increased timeout to 12 hours for AI model responses
+        resp = requests.post(url, json=request.get_json(), headers=headers, timeout=timeout)  # The request's deadline
         return Response(resp.content, resp.status_code, resp.headers.items())
+    except requests.exceptions.Timeout:
+        logger.error("Agent query convenience route timed out")
+        return agent_timeout_response()
     except Exception as e:
         logger.error(f"Agent query convenience route error: {str(e)}")
         return jsonify({'error': 'Agent service unavailable'}), 503
 
 
+@app.route('/api/agent/query/stream', methods=['POST'])
+@require_permission(Permission.WRITE_AGENT)
+def agent_query_stream(current_user_id):
+    """Convenience route for streamed agent queries: relays the agent service's server-sent events as they arrive"""
+    try:
+        # Forward to agent service
+        url = f"{AGENT_SERVICE_URL}/query/stream"
+        forwarded_deadline, timeout = agent_request_deadline()
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'Authorization': request.headers.get('Authorization', ''),
+            **forwarded_deadline
+        }
+
+        # 10s to connect; until the request's deadline between events while a long AI model call runs
+        resp = requests.post(url, json=request.get_json(), headers=headers, stream=True, timeout=(10, timeout))
+    except requests.exceptions.Timeout:
+        logger.error("Agent stream convenience route timed out")
+        return agent_timeout_response()
+    except Exception as e:
+        logger.error(f"Agent stream convenience route error: {str(e)}")
+        return jsonify({'error': 'Agent service unavailable'}), 503
+
+    if resp.status_code != 200:
+        # Authentication and validation errors come back as plain JSON
+        content = resp.content
+        resp.close()
+        return Response(content, resp.status_code, resp.headers.items())
+
+    def relay():
+        try:
+            # chunk_size=None yields data as soon as it arrives instead of waiting to fill a buffer
+            for chunk in resp.iter_content(chunk_size=None):
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Agent stream relay error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'event': 'error', 'error': 'Agent service connection lost'})}\n\n".encode('utf-8')
+        finally:
+            resp.close()
+
+    return Response(
+        stream_with_context(relay()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/rag/query', methods=['POST'])
 @require_permission(Permission.READ_RAG)
 def rag_query(current_user_id):
@@ -349,8 +434,17 @@ def mcp_search(current_user_id):
         if not search_services:
             return jsonify({'error': 'No MCP search services available'}), 404
 
-        # Use the first available search service
-        search_service = search_services[0]
+        # Any search instance can serve the query: the load balancer picks the least loaded one
+        search_instances = [
+            {
+                'id': search_service.id,
+                'host': search_service.host,
+                'port': search_service.port,
+                'type': search_service.type,
+                'metadata': search_service.metadata
+            }
+            for search_service in search_services
+        ]
 
         # Create MCP model instance
         mcp_model = DedicatedMCPModel()
@@ -362,16 +456,8 @@ def mcp_search(current_user_id):
         }
 
         # Call the MCP search service
-        search_result = mcp_model._call_mcp_service(
-            {
-                'id': search_service.id,
-                'host': search_service.host,
-                'port': search_service.port,
-                'type': search_service.type,
-                'metadata': search_service.metadata
-            },
-            "search",
-            search_params
+        search_result = get_resilient_caller().call_any(
+            search_instances, "search", search_params, mcp_model._call_mcp_service
         )
 
         # Extract results from the search
@@ -458,8 +544,16 @@ def mcp_search(current_user_id):
                             download_services = registry_client.discover_services(service_type="download")
 
                             if download_services:
-                                # Use the first available download service
-                                download_service = download_services[0]
+                                download_instances = [
+                                    {
+                                        'id': download_service.id,
+                                        'host': download_service.host,
+                                        'port': download_service.port,
+                                        'type': download_service.type,
+                                        'metadata': download_service.metadata
+                                    }
+                                    for download_service in download_services
+                                ]
 
                                 # Prepare parameters for downloading the URL
                                 download_params = {
@@ -470,17 +564,9 @@ def mcp_search(current_user_id):
                                 from models.dedicated_mcp_model import DedicatedMCPModel
                                 mcp_model = DedicatedMCPModel()
 
-                                # Call the download service to get the full content
-                                download_result = mcp_model._call_mcp_service(
-                                    {
-                                        'id': download_service.id,
-                                        'host': download_service.host,
-                                        'port': download_service.port,
-                                        'type': download_service.type,
-                                        'metadata': download_service.metadata
-                                    },
-                                    "download",
-                                    download_params
+                                # Call the least loaded download instance to get the full content
+                                download_result = get_resilient_caller().call_any(
+                                    download_instances, "download", download_params, mcp_model._call_mcp_service
                                 )
 
                                 # If successful, update the content with the full content
@@ -586,6 +672,66 @@ def rag_clear(current_user_id):
         return jsonify({'error': 'RAG service unavailable'}), 503
 
 
+@app.route('/api/rag/delete', methods=['POST'])
+@require_permission(Permission.WRITE_RAG)
+def rag_delete(current_user_id):
+    """Convenience route for deleting a single document from RAG"""
+    try:
+        # Forward to RAG service
+        url = f"{RAG_SERVICE_URL}/delete"
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': request.headers.get('Authorization', '')
+        }
+
+        resp = requests.post(url, json=request.get_json(), headers=headers, timeout=43200)  # Increased timeout to 12 hours for AI model responses
+        # Return the response from the RAG service with its original status code
+        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+        headers = [(name, value) for (name, value) in resp.raw.headers.items()
+                   if name.lower() not in excluded_headers]
+        response = Response(resp.content, resp.status_code, headers)
+        return response
+    except Exception as e:
+        logger.error(f"RAG delete convenience route error: {str(e)}")
+        return jsonify({'error': 'RAG service unavailable'}), 503
+
+
+@app.route('/api/rag/replace', methods=['POST'])
+@require_permission(Permission.WRITE_RAG)
+def rag_replace(current_user_id):
+    """Convenience route for replacing a document in RAG with a new version"""
+    try:
+        # Forward to RAG service
+        url = f"{RAG_SERVICE_URL}/replace"
+
+        files = []
+        file_storage = request.files.get('file')
+        if file_storage and file_storage.filename != '':
+            # Read the file content to avoid stream issues
+            file_content = file_storage.read()
+            files.append(('file', (file_storage.filename, file_content, file_storage.content_type or 'application/octet-stream')))
+
+        # Prepare headers (excluding Content-Type which will be set by requests for multipart)
+        forwarded_headers = {}
+        for key, value in request.headers:
+            if key.lower() not in ['content-type', 'content-length']:
+                forwarded_headers[key] = value
+
+        # Add authorization header
+        forwarded_headers['Authorization'] = request.headers.get('Authorization', '')
+
+        resp = requests.post(url, files=files, data=request.form.to_dict(), headers=forwarded_headers, timeout=43200)  # 12 hour timeout for large uploads and processing
+        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+        headers = [(name, value) for (name, value) in resp.raw.headers.items()
+                   if name.lower() not in excluded_headers]
+        return Response(resp.content, resp.status_code, headers)
+    except Exception as e:
+        logger.error(f"RAG replace convenience route error: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return jsonify({'error': 'RAG service unavailable'}), 503
+
+
 @app.route('/api/rag/upload_progress/<session_id>', methods=['GET'])
 @require_permission(Permission.WRITE_RAG)
 def rag_upload_progress(current_user_id, session_id):
@@ -792,6 +938,21 @@ def auth_validate():
         return jsonify({'error': 'Auth service unavailable'}), 503
 
 
+def _agent_circuit_breakers():
+    """Circuit breaker snapshot from the agent service's /status, or None if it is unavailable."""
+    try:
+        resp = requests.get(
+            f"{AGENT_SERVICE_URL}/status",
+            headers={'Authorization': request.headers.get('Authorization', '')},
+            timeout=5
+        )
+        resp.raise_for_status()
+        return resp.json().get('mcp_circuit_breakers')
+    except Exception as e:
+        logger.warning(f"Could not fetch circuit breakers from the agent service: {str(e)}")
+        return None
+
+
 @app.route('/api/services', methods=['GET'])
 @require_permission(Permission.READ_SYSTEM)
 def get_services(current_user_id):
@@ -808,6 +969,15 @@ def get_services(current_user_id):
             {'name': 'Health Check', 'endpoint': '/health', 'method': 'GET', 'permission': 'none'},
             {'name': 'System Config', 'endpoint': '/api/config', 'method': 'GET', 'permission': 'read:system'}
         ],
+        # Latency, bytes and connections of this gateway's calls to MCP services
+        'mcp_transport': get_mcp_transport().stats(),
+        'mcp_result_cache': get_mcp_result_cache().stats(),
+        # Breakers of the gateway's own calls and of the agent, which makes most MCP calls
+        'mcp_circuit_breakers': {
+            'gateway': get_circuit_breakers().snapshot(),
+            'agent': _agent_circuit_breakers()
+        },
+        'mcp_load_balancer': get_load_balancer().snapshot(),
         'timestamp': datetime.utcnow().isoformat(),
         'version': '0.5.0'
     }), 200
@@ -13,6 +13,8 @@ import time
 
 # Import RAG components
 from rag_component.main import RAGOrchestrator
+from rag_component.embedding_migration import get_migration_status
+from rag_component.ingestion_metrics import IngestionMetrics
 from config.settings import RESPONSE_LLM_PROVIDER, RESPONSE_LLM_MODEL
 from models.response_generator import ResponseGenerator
 
@@ -157,7 +159,10 @@ def rag_ingest(current_user_id):
         success = rag_orchestrator.ingest_documents(file_paths)
 
         if success:
-            return jsonify({'message': 'Documents ingested successfully'}), 200
+            return jsonify({
+                'message': 'Documents ingested successfully',
+                'ingestion_metrics': rag_orchestrator.last_ingestion_metrics
+            }), 200
         else:
             return jsonify({'error': 'Document ingestion failed - check file paths and permissions'}), 400
     except Exception as e:
@@ -186,6 +191,10 @@ def rag_retrieve(current_user_id):
                 'required': False,
                 'min_value': 1,
                 'max_value': 100
+            },
+            'filter': {
+                'type': dict,
+                'required': False
             }
         }
 
@@ -195,6 +204,14 @@ def rag_retrieve(current_user_id):
 
         query = data.get('query')
         top_k = data.get('top_k', 5)  # Default to 5 results
+        metadata_filter = data.get('filter')
+        if metadata_filter:
+            # Reject malformed filters before touching the vector store
+            from rag_component.metadata_filter import normalize_filter
+            try:
+                normalize_filter(metadata_filter)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid filter: {str(e)}'}), 400
 
         # Initialize RAG orchestrator with appropriate LLM
         response_generator = ResponseGenerator()
@@ -206,7 +223,7 @@ def rag_retrieve(current_user_id):
         rag_orchestrator = RAGOrchestrator(llm=llm)
 
         # Retrieve documents
-        documents = rag_orchestrator.retrieve_documents(query, top_k=top_k)
+        documents = rag_orchestrator.retrieve_documents(query, top_k=top_k, filter=metadata_filter)
 
         # Enhance documents with download links if they have file IDs
         enhanced_documents = []
@@ -252,6 +269,10 @@ def rag_lookup(current_user_id):
                 'required': False,
                 'min_value': 1,
                 'max_value': 100
+            },
+            'filter': {
+                'type': dict,
+                'required': False
             }
         }
 
@@ -261,6 +282,14 @@ def rag_lookup(current_user_id):
 
         query = data.get('query')
         top_k = data.get('top_k', 5)  # Default to 5 results
+        metadata_filter = data.get('filter')
+        if metadata_filter:
+            # Reject malformed filters before touching the vector store
+            from rag_component.metadata_filter import normalize_filter
+            try:
+                normalize_filter(metadata_filter)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid filter: {str(e)}'}), 400
 
         # Initialize RAG orchestrator with appropriate LLM
         response_generator = ResponseGenerator()
@@ -272,7 +301,7 @@ def rag_lookup(current_user_id):
         rag_orchestrator = RAGOrchestrator(llm=llm)
 
         # Retrieve documents
-        documents = rag_orchestrator.retrieve_documents(query, top_k=top_k)
+        documents = rag_orchestrator.retrieve_documents(query, top_k=top_k, filter=metadata_filter)
 
         return jsonify({'documents': documents}), 200
     except Exception as e:
@@ -369,7 +398,8 @@ def rag_upload(current_user_id):
         if success:
             return jsonify({
                 'message': f'{len(file_paths)} document(s) uploaded and ingested successfully',
-                'file_count': len(file_paths)
+                'file_count': len(file_paths),
+                'ingestion_metrics': rag_orchestrator.last_ingestion_metrics
             }), 200
         else:
             return jsonify({'error': 'Document ingestion failed'}), 500
@@ -437,7 +467,8 @@ def get_upload_progress(current_user_id, session_id):
             'current_file': session_data.get('current_file', ''),
             'total_files': session_data.get('total_files', 0),
             'completed_files': session_data.get('completed_files', 0),
-            'results': session_data.get('results', {})  # Include all file statuses from session data
+            'results': session_data.get('results', {}),  # Include all file statuses from session data
+            'ingestion_metrics': session_data.get('ingestion_metrics')  # Per-stage throughput once ingestion starts
         }
 
         return jsonify(formatted_response), 200
@@ -878,6 +909,126 @@ def rag_clear(current_user_id):
         return jsonify({'error': f'RAG clear failed: {str(e)}'}), 500
 
 
+@app.route('/delete', methods=['POST'])
+@require_permission(Permission.WRITE_RAG)
+def rag_delete_document(current_user_id):
+    """Endpoint for deleting a single document (by file_id, source or chunk ids) from the RAG store"""
+    try:
+        data = request.get_json() or {}
+
+        # Validate input
+        schema = {
+            'file_id': {
+                'type': str,
+                'required': False,
+                'min_length': 1,
+                'max_length': 255
+            },
+            'source': {
+                'type': str,
+                'required': False,
+                'min_length': 1,
+                'max_length': 1000
+            },
+            'ids': {
+                'type': list,
+                'required': False
+            },
+            'delete_files': {
+                'type': bool,
+                'required': False
+            }
+        }
+
+        validation_errors = validate_input(data, schema)
+        if validation_errors:
+            return jsonify({'error': f'Validation error: {validation_errors}'}), 400
+
+        file_id = data.get('file_id')
+        source = data.get('source')
+        ids = data.get('ids')
+        if not file_id and not source and not ids:
+            return jsonify({'error': 'One of file_id, source or ids is required'}), 400
+
+        # Initialize RAG orchestrator with appropriate LLM
+        response_generator = ResponseGenerator()
+        llm = response_generator._get_llm_instance(
+            provider=RESPONSE_LLM_PROVIDER,
+            model=RESPONSE_LLM_MODEL
+        )
+
+        rag_orchestrator = RAGOrchestrator(llm=llm)
+
+        result = rag_orchestrator.delete_document(
+            file_id=file_id,
+            source=source,
+            ids=ids,
+            delete_files=data.get('delete_files', True)
+        )
+
+        if result['deleted_chunks'] == 0 and result['deleted_linked_chunks'] == 0:
+            return jsonify({'error': 'No matching document found', **result}), 404
+
+        return jsonify({
+            'message': f"Deleted {result['deleted_chunks']} chunks and {result['deleted_linked_chunks']} linked duplicates",
+            **result
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"RAG delete error: {str(e)}")
+        return jsonify({'error': f'RAG delete failed: {str(e)}'}), 500
+
+
+@app.route('/replace', methods=['POST'])
+@require_permission(Permission.WRITE_RAG)
+def rag_replace_document(current_user_id):
+    """Endpoint for atomically replacing an uploaded document with a new version"""
+    temp_dir = None
+    try:
+        import tempfile
+
+        file_id = request.form.get('file_id', '')
+        if not file_id:
+            return jsonify({'error': 'file_id is required'}), 400
+
+        file = request.files.get('file')
+        if file is None or file.filename == '':
+            return jsonify({'error': 'No file provided'}), 400
+
+        # Validate file type
+        file_ext = Path(secure_filename(file.filename)).suffix.lower()
+        allowed_extensions = ['.txt', '.pdf', '.docx', '.html', '.md']
+        if file_ext not in allowed_extensions:
+            return jsonify({'error': f'File type {file_ext} not allowed. Allowed types: {allowed_extensions}'}), 400
+
+        temp_dir = tempfile.mkdtemp()
+        file_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{secure_filename(file.filename)}")
+        file.save(file_path)
+
+        # Initialize RAG orchestrator with appropriate LLM
+        response_generator = ResponseGenerator()
+        llm = response_generator._get_llm_instance(
+            provider=RESPONSE_LLM_PROVIDER,
+            model=RESPONSE_LLM_MODEL
+        )
+
+        rag_orchestrator = RAGOrchestrator(llm=llm)
+
+        result = rag_orchestrator.replace_document(file_id, file_path, file.filename)
+
+        return jsonify({'message': f'Document {file_id} replaced successfully', **result}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"RAG replace error: {str(e)}")
+        return jsonify({'error': f'RAG replace failed: {str(e)}'}), 500
+    finally:
+        if temp_dir and os.path.exists(temp_dir):
+            import shutil
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
 @app.route('/status', methods=['GET'])
 @require_permission(Permission.READ_RAG)
 def rag_status(current_user_id):
@@ -887,7 +1038,8 @@ def rag_status(current_user_id):
         'service': 'rag',
         'message': 'RAG component is operational',
         'timestamp': datetime.utcnow().isoformat(),
-        'version': '0.5.0'
+        'version': '0.5.0',
+        'embedding_migration': get_migration_status()
     }), 200
 
 
@@ -985,12 +1137,32 @@ def rag_ingest_from_session(current_user_id):
         filename_to_path_map = session_data.get('filename_to_path_map', {})
         original_filenames = list(filename_to_path_map.keys())
 
+        session_lock = threading.Lock()
+
+        def publish_ingestion_metrics(summary):
+            # Expose live per-stage throughput through /upload_progress while ingestion runs.
+            # Called from the uploader threads, so updates of the shared session data are serialized.
+            with session_lock:
+                session_data['ingestion_metrics'] = summary
+                redis_client.setex(key, timedelta(hours=1), json.dumps(session_data))
+
+        metrics = IngestionMetrics(run_id=session_id, on_update=publish_ingestion_metrics)
+
         # Ingest the files from the session
-        success = rag_orchestrator.ingest_documents_from_upload(file_paths, filenames if filenames else original_filenames)
+        success = rag_orchestrator.ingest_documents_from_upload(
+            file_paths,
+            filenames if filenames else original_filenames,
+            metrics=metrics
+        )
+        with session_lock:
+            session_data['ingestion_metrics'] = rag_orchestrator.last_ingestion_metrics
 
         if success:
             # Update session status to indicate ingestion is complete
-            session_data['status'] = 'Ingestion completed successfully'
+            if (session_data['ingestion_metrics'] or {}).get('status') == 'completed_with_errors':
+                session_data['status'] = 'Ingestion completed with errors'
+            else:
+                session_data['status'] = 'Ingestion completed successfully'
             session_data['ingestion_completed'] = datetime.now().isoformat()
 
             # Clean up the temporary directory after successful ingestion
@@ -1011,9 +1183,12 @@ def rag_ingest_from_session(current_user_id):
             return jsonify({
                 'message': f'Documents from session {session_id} ingested successfully',
                 'session_id': session_id,
-                'filenames': filenames if filenames else original_filenames
+                'filenames': filenames if filenames else original_filenames,
+                'ingestion_metrics': session_data['ingestion_metrics']
             }), 200
         else:
+            session_data['status'] = 'Ingestion failed'
+            redis_client.setex(key, timedelta(hours=1), json.dumps(session_data))
             return jsonify({'error': 'Document ingestion failed'}), 500
     except Exception as e:
         logger.error(f"RAG ingestion from session error: {str(e)}")
@@ -1137,6 +1312,7 @@ def import_processed_documents(current_user_id):
                         'contains_formula': chunk.get('contains_formula', False),
                         'contains_table': chunk.get('contains_table', False),
                         'upload_method': 'Processed JSON Import',
+                        'ingested_at': time.time(),
                         'user_id': current_user_id,
                         # Add stored file path and file ID for download capability
                         'stored_file_path': stored_file_path,
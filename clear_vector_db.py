@@ -46,6 +46,11 @@ def clear_vector_db():
             else:
                 print(f"Persistent directory does not exist: {persist_dir}")
 
+            # The near-duplicate index would otherwise still point at the deleted chunks
+            from rag_component.chunk_deduplicator import clear_dedup_index
+            clear_dedup_index(collection_name)
+            print(f"Near-duplicate index cleared for collection: {collection_name}")
+
             # Re-initialize the vector store to create a fresh one
             vector_store_manager = VectorStoreManager()
         else:
@@ -171,5 +171,79 @@ RAG_FILE_STORAGE_DIR = os.getenv("RAG_FILE_STORAGE_DIR", "./data/rag_uploaded_fi
 # Download Timeout Configuration
 DOWNLOAD_TIMEOUT_SECONDS = int(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "30"))
 
+# Download Content Extraction Configuration
+DOWNLOAD_EXTRACT_MAX_CHARS = int(os.getenv("DOWNLOAD_EXTRACT_MAX_CHARS", "8000"))
+DOWNLOAD_EXTRACT_MAX_BYTES = int(os.getenv("DOWNLOAD_EXTRACT_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Download Cache Configuration
+DOWNLOAD_CACHE_ENABLED = str_to_bool(os.getenv("DOWNLOAD_CACHE_ENABLED"), True)
+DOWNLOAD_CACHE_DIR = os.getenv("DOWNLOAD_CACHE_DIR") or None  # Defaults to <download dir>/cache
+DOWNLOAD_CACHE_TTL_SECONDS = int(os.getenv("DOWNLOAD_CACHE_TTL_SECONDS", "3600"))
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Download Engine Configuration
+DOWNLOAD_ENGINE = os.getenv("DOWNLOAD_ENGINE", "async")  # "async" (aiohttp) or "threads" (requests)
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+DOWNLOAD_MAX_CONNECTIONS = int(os.getenv("DOWNLOAD_MAX_CONNECTIONS", "100"))
+DOWNLOAD_PER_HOST_LIMIT = int(os.getenv("DOWNLOAD_PER_HOST_LIMIT", "4"))
+DOWNLOAD_POLITENESS_DELAY_SECONDS = float(os.getenv("DOWNLOAD_POLITENESS_DELAY_SECONDS", "0"))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+DOWNLOAD_BATCH_MAX_URLS = int(os.getenv("DOWNLOAD_BATCH_MAX_URLS", "100"))
+
+# Search Server Configuration
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "10"))
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "900"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+BRAVE_RATE_LIMIT_PER_SECOND = float(os.getenv("BRAVE_RATE_LIMIT_PER_SECOND", "1"))  # Free plan: 1 query per second
+BRAVE_RATE_LIMIT_BURST = int(os.getenv("BRAVE_RATE_LIMIT_BURST", "1"))
+SEARCH_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("SEARCH_MAX_QUEUE_WAIT_SECONDS", "15"))
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "10"))
+SEARCH_BATCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_BATCH_MAX_CONCURRENCY", "6"))
+
+# DNS Server Configuration
+DNS_NAMESERVERS = [ns.strip() for ns in os.getenv("DNS_NAMESERVERS", "").split(",") if ns.strip()] or None  # None = /etc/resolv.conf
+DNS_TIMEOUT_SECONDS = float(os.getenv("DNS_TIMEOUT_SECONDS", "2"))
+DNS_ATTEMPTS = int(os.getenv("DNS_ATTEMPTS", "2"))
+DNS_CACHE_MAX_ENTRIES = int(os.getenv("DNS_CACHE_MAX_ENTRIES", "10000"))
+DNS_CACHE_MIN_TTL_SECONDS = int(os.getenv("DNS_CACHE_MIN_TTL_SECONDS", "0"))
+DNS_CACHE_MAX_TTL_SECONDS = int(os.getenv("DNS_CACHE_MAX_TTL_SECONDS", "3600"))
+DNS_NEGATIVE_TTL_SECONDS = int(os.getenv("DNS_NEGATIVE_TTL_SECONDS", "300"))
+DNS_MAX_CONCURRENCY = int(os.getenv("DNS_MAX_CONCURRENCY", "64"))
+DNS_BATCH_MAX_NAMES = int(os.getenv("DNS_BATCH_MAX_NAMES", "1000"))
+
+# Agent Instrumentation Configuration
+AGENT_STATE_SIZE_LOGGING = str_to_bool(os.getenv("AGENT_STATE_SIZE_LOGGING"), False)  # Log state field sizes after each graph node
+AGENT_RUNTIME_REUSE = str_to_bool(os.getenv("AGENT_RUNTIME_REUSE"), True)  # Compile the graph once and share model instances across runs
+AGENT_RUNTIME_CHECK_INTERVAL_SECONDS = float(os.getenv("AGENT_RUNTIME_CHECK_INTERVAL_SECONDS", "5"))  # How often to check settings/prompt files for changes
+AGENT_ASYNC_MAX_CONCURRENT_CALLS = int(os.getenv("AGENT_ASYNC_MAX_CONCURRENT_CALLS", "50"))  # MCP calls in flight per worker (async agent)
+AGENT_ASYNC_LIMIT_PER_HOST = int(os.getenv("AGENT_ASYNC_LIMIT_PER_HOST", "10"))  # Open connections per MCP service (async agent)
+AGENT_ASYNC_MAX_BLOCKING_CALLS = int(os.getenv("AGENT_ASYNC_MAX_BLOCKING_CALLS", "16"))  # Threads for LLM calls and result enhancement (async agent)
+AGENT_REQUEST_TIMEOUT_SECONDS = float(os.getenv("AGENT_REQUEST_TIMEOUT_SECONDS", "43200"))  # Deadline of an agent request, set at the gateway and passed to every node, MCP and LLM call
+
+# Planner cache (utils/planner_cache.py): reuse DedicatedMCPModel plans for repeated requests
+PLANNER_CACHE_ENABLED = str_to_bool(os.getenv("PLANNER_CACHE_ENABLED"), True)  # Reuse the plan of an identical request instead of calling the planner LLM
+PLANNER_CACHE_TTL_SECONDS = float(os.getenv("PLANNER_CACHE_TTL_SECONDS", "300"))  # How long a plan is reused
+PLANNER_CACHE_MAX_ENTRIES = int(os.getenv("PLANNER_CACHE_MAX_ENTRIES", "500"))  # Cached plans kept before LRU eviction
+PLANNER_CACHE_SIMILARITY_ENABLED = str_to_bool(os.getenv("PLANNER_CACHE_SIMILARITY_ENABLED"), False)  # Also reuse plans of near-identical requests (embeds every request)
+PLANNER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("PLANNER_CACHE_SIMILARITY_THRESHOLD", "0.97"))  # Cosine similarity a request needs to reuse another request's plan
+
 # MCP Service Call Timeout Configuration
-MCP_SERVICE_CALL_TIMEOUT = int(os.getenv("MCP_SERVICE_CALL_TIMEOUT", "30"))
\ No newline at end of file
+MCP_SERVICE_CALL_TIMEOUT = int(os.getenv("MCP_SERVICE_CALL_TIMEOUT", "30"))
+
+# MCP transport (utils/mcp_transport.py): connection reuse for calls to MCP services
+MCP_TRANSPORT_KEEPALIVE = str_to_bool(os.getenv("MCP_TRANSPORT_KEEPALIVE"), True)  # Keep connections to MCP services open between calls
+MCP_TRANSPORT_POOL_MAXSIZE = int(os.getenv("MCP_TRANSPORT_POOL_MAXSIZE", "10"))  # Idle connections kept per MCP service
+MCP_RESULT_CACHE_ENABLED = str_to_bool(os.getenv("MCP_RESULT_CACHE_ENABLED"), True)  # Reuse results of actions services declare cacheable
+MCP_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("MCP_RESULT_CACHE_MAX_ENTRIES", "1000"))  # Cached MCP results kept before LRU eviction
+
+# MCP call resilience (utils/mcp_resilience.py): per-instance circuit breakers and hedged requests
+MCP_CIRCUIT_BREAKER_ENABLED = str_to_bool(os.getenv("MCP_CIRCUIT_BREAKER_ENABLED"), True)  # Stop calling MCP service instances that keep failing
+MCP_CIRCUIT_BREAKER_WINDOW = int(os.getenv("MCP_CIRCUIT_BREAKER_WINDOW", "20"))  # Recent calls per instance the failure rate is computed over
+MCP_CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("MCP_CIRCUIT_BREAKER_MIN_CALLS", "5"))  # Calls needed in the window before a breaker can open
+MCP_CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("MCP_CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))  # Share of failed calls that opens the breaker
+MCP_CIRCUIT_BREAKER_SLOW_CALL_MS = float(os.getenv("MCP_CIRCUIT_BREAKER_SLOW_CALL_MS", "0"))  # Successful calls slower than this count as failures (0: only errors and timeouts count)
+MCP_CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv("MCP_CIRCUIT_BREAKER_OPEN_SECONDS", "30"))  # Time an open breaker waits before letting one probe call through
+MCP_HEDGE_ENABLED = str_to_bool(os.getenv("MCP_HEDGE_ENABLED"), False)  # Retry slow idempotent calls on another instance of the same service type
+MCP_HEDGE_DELAY_MS = float(os.getenv("MCP_HEDGE_DELAY_MS", "1000"))  # Hedge delay until an instance has latency history (then its p95 is used)
+MCP_HEDGE_MIN_DELAY_MS = float(os.getenv("MCP_HEDGE_MIN_DELAY_MS", "50"))  # Lower bound for the p95-based hedge delay
+MCP_LOAD_BALANCING = str_to_bool(os.getenv("MCP_LOAD_BALANCING"), True)  # Spread calls over all registered instances of an MCP service type
@@ -0,0 +1,345 @@
+"""
+Asyncio download engine for the MCP download server.
+Runs an aiohttp client on a dedicated event loop thread, so many downloads share a small pool of
+keep-alive connections. Concurrency is capped per host (with an optional politeness delay between
+request starts), bodies are streamed to disk with a byte ceiling that aborts the transfer early,
+and batches of URLs report each result as soon as it completes.
+
+Every download is bounded as a whole by total_timeout, or less when the caller's request deadline
+(utils.deadline) is closer, and DownloadCache index calls run on the default executor so SQLite
+never blocks the event loop.
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from utils.deadline import current_deadline, remaining_seconds
+
+logger = logging.getLogger(__name__)
+
+# Serialises unique filename selection in the download directory
+_file_name_lock = threading.Lock()
+
+
+def unique_download_path(download_dir: str, url: str) -> str:
+    """
+    Reserve a file path in the download directory named after the URL.
+
+    Args:
+        download_dir: Download directory
+        url: Source URL
+
+    Returns:
+        A path that did not exist when it was reserved (an empty file is created to hold it)
+    """
+    filename = os.path.basename(urlparse(url).path)
+    if not filename or '.' not in filename:
+        filename = f"download_{int(datetime.now().timestamp())}.dat"
+    with _file_name_lock:
+        file_path = os.path.join(download_dir, filename)
+        name, ext = os.path.splitext(file_path)
+        counter = 1
+        while os.path.exists(file_path):
+            file_path = f"{name}_{counter}{ext}"
+            counter += 1
+        open(file_path, 'wb').close()
+    return file_path
+
+
+def effective_cap(*caps: Optional[int]) -> Optional[int]:
+    """Smallest of the given byte caps, ignoring None and 0 (None if there is no cap)."""
+    caps = [cap for cap in caps if cap]
+    return min(caps) if caps else None
+
+
+class AsyncDownloadEngine:
+    """Class responsible for running downloads on a shared asyncio event loop."""
+
+    def __init__(self, download_dir: str, cache=None, max_connections: int = 100, per_host_limit: int = 4,
+                 politeness_delay: float = 0.0, chunk_size: int = 64 * 1024, timeout: float = 30,
+                 max_bytes: Optional[int] = None, total_timeout: Optional[float] = None):
+        """
+        Initialize the engine (the event loop starts on first use).
+
+        Args:
+            download_dir: Directory for downloads when no cache is used
+            cache: Optional DownloadCache that stores bodies and supplies conditional headers
+            max_connections: Maximum open connections in total
+            per_host_limit: Maximum concurrent requests to a single host
+            politeness_delay: Minimum seconds between the starts of two requests to one host
+            chunk_size: Bytes read per streaming write
+            timeout: Connect and read timeout in seconds
+            max_bytes: Ceiling on the size of any body (None or 0 = unlimited)
+            total_timeout: Upper bound on a whole download in seconds (defaults to timeout, the
+                budget the MCP server waits for a download); cut to the request deadline if closer
+        """
+        self.download_dir = download_dir
+        self.cache = cache
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.politeness_delay = politeness_delay
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.total_timeout = total_timeout or timeout
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._start_lock = threading.Lock()
+        # Per-host state; only touched from the event loop thread
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._host_next_start: Dict[str, float] = {}
+        self._in_flight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    def start(self):
+        """Start the event loop thread and open the connection pool."""
+        with self._start_lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name="download-engine", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._open_session(), loop).result()
+            self.loop = loop
+            logger.info(
+                f"Async download engine started ({self.max_connections} connections, "
+                f"{self.per_host_limit} per host, {self.politeness_delay}s politeness delay)"
+            )
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host_limit,
+            keepalive_timeout=30,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.total_timeout, sock_connect=self.timeout, sock_read=self.timeout),
+            auto_decompress=True
+        )
+
+    def close(self):
+        """Close the connection pool and stop the event loop thread."""
+        with self._start_lock:
+            if self.loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._session.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self.loop.close()
+            self.loop = None
+
+    def download(self, url: str, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Download a URL from a synchronous caller.
+
+        Args:
+            url: URL to download
+            max_bytes: Stop reading after this many bytes (None or 0 = only the engine ceiling applies)
+
+        Returns:
+            Result dictionary (see fetch)
+        """
+        self.start()
+        # The loop thread does not see the caller's context, so pass its deadline along
+        deadline = current_deadline()
+        return asyncio.run_coroutine_threadsafe(self.fetch(url, max_bytes, deadline), self.loop).result()
+
+    def download_batch(self, urls: List[str], max_bytes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Download many URLs concurrently, yielding each result as soon as it completes.
+
+        Args:
+            urls: URLs to download
+            max_bytes: Per-URL byte cap
+
+        Yields:
+            Result dictionaries (see fetch) with an added "index" into urls, in completion order
+        """
+        self.start()
+        completed: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        deadline = current_deadline()
+
+        async def fetch_one(index: int, url: str):
+            try:
+                result = await self.fetch(url, max_bytes, deadline)
+            except BaseException as e:
+                result = self._failure(url, f"Unexpected error downloading {url}: {str(e)}", time.monotonic())
+            result["index"] = index
+            completed.put(result)
+
+        async def fetch_all():
+            await asyncio.gather(*(fetch_one(index, url) for index, url in enumerate(urls)))
+
+        asyncio.run_coroutine_threadsafe(fetch_all(), self.loop)
+        for _ in urls:
+            yield completed.get()
+
+    async def fetch(self, url: str, max_bytes: Optional[int] = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Download a URL on the event loop; concurrent fetches of one URL share a single transfer.
+
+        Args:
+            url: URL to download
+            max_bytes: Stop reading after this many bytes (None or 0 = only the engine ceiling applies)
+            deadline: Request deadline (epoch seconds) the download must finish by, if any
+
+        Returns:
+            Dictionary with url, success, file_path, error, status, content_type, bytes,
+            truncated, seconds and, with a cache, cache and sha256
+        """
+        cap = effective_cap(max_bytes, self.max_bytes)
+        key = (url, cap or 0)
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            result = dict(await asyncio.shield(shared))
+            if self.cache is not None and result["success"]:
+                result["cache"] = "shared"
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._fetch(url, cap, deadline)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters get the exception; mark it retrieved so it is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _fetch(self, url: str, cap: Optional[int], deadline: Optional[float] = None) -> Dict[str, Any]:
+        started = time.monotonic()
+        parsed_url = urlparse(url)
+        if parsed_url.scheme not in ("http", "https") or not parsed_url.netloc:
+            return self._failure(url, f"Invalid URL: {url}", started)
+
+        entry = await self._cache_call(self.cache.lookup, url, cap) if self.cache is not None else None
+        if entry and self.cache.is_fresh(entry):
+            return self._success(url, await self._cache_call(self.cache.hit, entry), started, status=200)
+
+        host = parsed_url.netloc.lower()
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        total = self.total_timeout
+        try:
+            async with semaphore:
+                await self._wait_politeness_delay(host)
+                # Whatever is left of the request budget after waiting for a slot bounds the transfer
+                remaining = remaining_seconds(deadline) if deadline is not None else None
+                if remaining is not None:
+                    if remaining <= 0:
+                        return self._failure(url, f"Deadline exceeded before downloading {url}", started)
+                    total = min(total, remaining)
+                headers = self.cache.conditional_headers(entry) if self.cache is not None else {}
+                timeout = aiohttp.ClientTimeout(total=total, sock_connect=self.timeout, sock_read=self.timeout)
+                async with self._session.get(url, headers=headers, timeout=timeout) as response:
+                    if entry and headers and response.status == 304:
+                        cached = await self._cache_call(
+                            self.cache.revalidated,
+                            url, entry, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                        )
+                        return self._success(url, cached, started, status=304)
+                    response.raise_for_status()
+                    return await self._stream_to_disk(url, response, cap, started)
+        except asyncio.TimeoutError:
+            return self._failure(
+                url, f"Timeout downloading {url} after {time.monotonic() - started:.1f}s (limit {total:.1f}s)", started
+            )
+        except aiohttp.ClientError as e:
+            return self._failure(url, f"Network error downloading {url}: {str(e)}", started)
+        except Exception as e:
+            return self._failure(url, f"Unexpected error downloading {url}: {str(e)}", started)
+
+    @staticmethod
+    async def _cache_call(method, *args):
+        """Run a blocking DownloadCache call (SQLite, file moves) on the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args))
+
+    async def _wait_politeness_delay(self, host: str):
+        """Space out the starts of requests to one host by politeness_delay seconds."""
+        if self.politeness_delay <= 0:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait = self._host_next_start.get(host, 0.0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._host_next_start[host] = loop.time() + self.politeness_delay
+
+    async def _stream_to_disk(self, url: str, response: aiohttp.ClientResponse, cap: Optional[int],
+                              started: float) -> Dict[str, Any]:
+        """Write the body in chunks, stopping (and dropping the connection) once cap is reached."""
+        if self.cache is not None:
+            fd, file_path = self.cache.temp_file()
+            f = os.fdopen(fd, 'wb')
+        else:
+            file_path = unique_download_path(self.download_dir, url)
+            f = open(file_path, 'wb')
+
+        digest = hashlib.sha256()
+        size = 0
+        truncated = False
+        try:
+            with f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    if cap and size + len(chunk) > cap:
+                        chunk = chunk[:cap - size]
+                        truncated = True
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                    if truncated:
+                        # Unread data cannot be reused on a keep-alive connection, so drop it
+                        response.close()
+                        break
+        except BaseException:
+            os.remove(file_path)
+            raise
+
+        if truncated:
+            logger.info(f"Stopped reading {url} at {cap} bytes")
+        content_type = response.headers.get("Content-Type")
+        if self.cache is not None:
+            cached = await self._cache_call(
+                self.cache.commit,
+                url, file_path, digest.hexdigest(), size, content_type,
+                response.headers.get("ETag"), response.headers.get("Last-Modified"), truncated
+            )
+            return self._success(url, cached, started, status=response.status)
+        return self._success(url, {
+            "file_path": file_path, "content_type": content_type, "bytes": size, "truncated": truncated
+        }, started, status=response.status)
+
+    @staticmethod
+    def _success(url: str, download: Dict[str, Any], started: float, status: int) -> Dict[str, Any]:
+        result = {"url": url, "success": True, "error": None, "status": status}
+        result.update(download)
+        result["seconds"] = round(time.monotonic() - started, 4)
+        return result
+
+    @staticmethod
+    def _failure(url: str, error: str, started: float) -> Dict[str, Any]:
+        logger.error(error)
+        return {
+            "url": url, "success": False, "file_path": "", "error": error, "status": None,
+            "content_type": None, "bytes": 0, "truncated": False,
+            "seconds": round(time.monotonic() - started, 4)
+        }
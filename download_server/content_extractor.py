@@ -0,0 +1,314 @@
+"""
+Content extraction for the MCP download server.
+Turns a downloaded file into cleaned main text: boilerplate removal for HTML, text extraction for
+PDF/DOCX through the same LangChain loaders the RAG component uses, and charset detection for
+text content, so callers get the text in the response instead of a path on the server's disk.
+"""
+
+import codecs
+import logging
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Elements whose content is never main text
+SKIPPED_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "nav", "aside", "form", "button", "select", "option", "menu", "dialog"
+}
+# Page headers and footers are chrome, but an <article> header usually holds its title
+PAGE_CHROME_TAGS = {"header", "footer"}
+# Elements that end a text block
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section",
+    "table", "tbody", "td", "th", "thead", "tr", "ul", "body", "html"
+}
+# Page and content roots, which are never skipped whatever their class/id says (e.g. <body class="has-sidebar">)
+CONTENT_ROOT_TAGS = {"html", "body", "main", "article"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# class/id fragments that mark navigation and page chrome
+BOILERPLATE_HINT = re.compile(
+    r"(^|[\s_-])(nav|navbar|navigation|menu|breadcrumbs?|sidebar|footer|header|cookies?|banner|"
+    r"share|social|related|comments?|advert|ads|promo|newsletter|subscribe|popup|modal)($|[\s_-])",
+    re.IGNORECASE
+)
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
+PDF_TYPES = {"application/pdf"}
+DOCX_TYPES = {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+TEXT_TYPES = {"application/json", "application/xml", "application/javascript"}
+
+# Blocks shorter than this (in words) are kept only inside <main>/<article> or next to longer text
+MIN_BLOCK_WORDS = 8
+# Blocks whose text is mostly link text are navigation
+MAX_LINK_DENSITY = 0.5
+
+
+class _MainTextParser(HTMLParser):
+    """Split an HTML page into text blocks, dropping page chrome."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[Dict] = []
+        self._stack: List[Tuple[str, bool, bool]] = []  # (tag, skipped, main content)
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._link_depth = 0
+        self._in_title = False
+        self._text: List[str] = []
+        self._link_chars = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._flush()
+            return
+        attributes = dict(attrs)
+        hint = f"{attributes.get('class') or ''} {attributes.get('id') or ''} {attributes.get('role') or ''}"
+        main_content = tag in ("main", "article") or (attributes.get("role") or "").lower() == "main"
+        content_root = tag in CONTENT_ROOT_TAGS or main_content
+        skipped = not content_root and (
+            tag in SKIPPED_TAGS
+            or (tag in PAGE_CHROME_TAGS and not self._main_depth)
+            or attributes.get("aria-hidden") == "true"
+            or "hidden" in attributes
+            or bool(BOILERPLATE_HINT.search(hint))
+        )
+        if tag in BLOCK_TAGS:
+            self._flush()
+        self._stack.append((tag, skipped, main_content))
+        if skipped:
+            self._skip_depth += 1
+        if main_content:
+            self._main_depth += 1
+        if tag == "a":
+            self._link_depth += 1
+        elif tag == "title":
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return
+        # Close everything up to the matching tag, tolerating unclosed inner elements
+        while self._stack:
+            open_tag, skipped, main_content = self._stack.pop()
+            if open_tag in BLOCK_TAGS:
+                self._flush()
+            if skipped:
+                self._skip_depth -= 1
+            if main_content:
+                self._main_depth -= 1
+            if open_tag == "a":
+                self._link_depth -= 1
+            elif open_tag == "title":
+                self._in_title = False
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        self._text.append(data)
+        if self._link_depth:
+            self._link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = " ".join("".join(self._text).split())
+        if text:
+            self.blocks.append({
+                "text": text,
+                "words": len(text.split()),
+                "link_density": min(1.0, self._link_chars / len(text)),
+                "in_main": self._main_depth > 0
+            })
+        self._text = []
+        self._link_chars = 0
+
+
+def extract_html_text(html: str) -> Tuple[str, str]:
+    """
+    Extract the main text of an HTML page.
+
+    Navigation, headers, footers, scripts and other page chrome are dropped. If the page marks
+    its content with <main>, <article> or role="main", only that is kept; otherwise text blocks are kept
+    when they are long enough and not mostly links (short blocks such as headings survive
+    when they sit next to kept text).
+
+    Args:
+        html: Decoded HTML
+
+    Returns:
+        Tuple of (main text with one block per line, page title)
+    """
+    parser = _MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.warning(f"HTML parsing stopped early: {str(e)}")
+
+    blocks = [block for block in parser.blocks if block["link_density"] <= MAX_LINK_DENSITY]
+    main_blocks = [block for block in blocks if block["in_main"]]
+    if main_blocks:
+        kept = main_blocks
+    else:
+        long_block = [block["words"] >= MIN_BLOCK_WORDS for block in blocks]
+        kept = [
+            block for i, block in enumerate(blocks)
+            if long_block[i] or (i + 1 < len(blocks) and long_block[i + 1])
+        ]
+    return "\n".join(block["text"] for block in kept), " ".join(parser.title.split())
+
+
+def detect_charset(raw: bytes, declared: Optional[str] = None, html: bool = False) -> str:
+    """
+    Work out the character encoding of downloaded text.
+
+    Order of precedence: byte order mark, charset from the Content-Type header, <meta> charset
+    (HTML only), statistical detection, then UTF-8.
+
+    Args:
+        raw: Raw content
+        declared: Charset from the Content-Type header, if any
+        html: Whether to look for a <meta> charset declaration
+
+    Returns:
+        A Python codec name
+    """
+    for bom, name in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if raw.startswith(bom):
+            return name
+
+    candidates = [declared]
+    if html:
+        match = META_CHARSET.search(raw[:4096])
+        if match:
+            candidates.append(match.group(1).decode("ascii", errors="ignore"))
+    for candidate in candidates:
+        if candidate:
+            try:
+                return codecs.lookup(candidate.strip().strip("\"'")).name
+            except LookupError:
+                logger.debug(f"Ignoring unknown charset {candidate}")
+
+    try:
+        raw.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A byte cap can cut a multi-byte character in half at the very end
+        if e.start >= len(raw) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(raw[:65536]).best()
+        if best is not None:
+            return codecs.lookup(best.encoding).name
+    except ImportError:
+        logger.debug("charset_normalizer not installed, defaulting to utf-8")
+    return "utf-8"
+
+
+def parse_content_type(header: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Split a Content-Type header into (media type, charset)."""
+    if not header:
+        return "", None
+    parts = [part.strip() for part in header.split(";")]
+    charset = None
+    for part in parts[1:]:
+        if part.lower().startswith("charset="):
+            charset = part.split("=", 1)[1].strip("\"'") or None
+    return parts[0].lower(), charset
+
+
+def guess_kind(media_type: str, file_path: str, head: bytes) -> str:
+    """Classify content as html, pdf, docx or text from the media type, extension and magic bytes."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if media_type in PDF_TYPES or extension == ".pdf" or head.startswith(b"%PDF"):
+        return "pdf"
+    if media_type in DOCX_TYPES or extension == ".docx":
+        return "docx"
+    if media_type in HTML_TYPES or extension in (".html", ".htm"):
+        return "html"
+    if media_type.startswith("text/") or media_type in TEXT_TYPES or media_type.endswith("+json"):
+        return "text"
+    sniff = head[:512].lstrip().lower()
+    if sniff.startswith(b"<!doctype html") or sniff.startswith(b"<html"):
+        return "html"
+    return "binary"
+
+
+def _load_with_langchain(kind: str, file_path: str) -> str:
+    """Extract PDF/DOCX text with the loaders used by rag_component.document_loader."""
+    from langchain_community.document_loaders import Docx2txtLoader, PyPDFLoader
+
+    loader = PyPDFLoader(file_path) if kind == "pdf" else Docx2txtLoader(file_path)
+    return "\n\n".join(doc.page_content.strip() for doc in loader.load() if doc.page_content.strip())
+
+
+def extract_file_content(file_path: str, content_type: Optional[str] = None,
+                         max_chars: Optional[int] = None) -> Dict:
+    """
+    Extract cleaned text from a downloaded file.
+
+    Args:
+        file_path: Path of the downloaded file
+        content_type: Content-Type header of the response, if known
+        max_chars: Maximum number of characters of text to return (None or 0 = unlimited)
+
+    Returns:
+        Dictionary with text, title, content_type, kind, charset, chars, truncated and error
+        (error is None unless the text could not be extracted)
+    """
+    media_type, declared_charset = parse_content_type(content_type)
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    kind = guess_kind(media_type, file_path, raw[:1024])
+    result = {
+        "text": "",
+        "title": "",
+        "content_type": media_type,
+        "kind": kind,
+        "charset": None,
+        "chars": 0,
+        "truncated": False,
+        "error": None
+    }
+
+    try:
+        if kind in ("pdf", "docx"):
+            text = _load_with_langchain(kind, file_path)
+        elif kind in ("html", "text"):
+            charset = detect_charset(raw, declared_charset, html=kind == "html")
+            result["charset"] = charset
+            decoded = raw.decode(charset, errors="replace")
+            if kind == "html":
+                text, result["title"] = extract_html_text(decoded)
+            else:
+                text = decoded.strip()
+        else:
+            result["error"] = f"No text extractor for content type '{media_type or 'unknown'}'"
+            return result
+    except Exception as e:
+        result["error"] = f"Text extraction failed for {kind} content: {str(e)}"
+        logger.warning(result["error"])
+        return result
+
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+        result["truncated"] = True
+    result["text"] = text
+    result["chars"] = len(text)
+    return result
@@ -0,0 +1,225 @@
+"""
+Download throughput benchmark for the MCP download server.
+Serves synthetic files from a local HTTP stand-in with configurable latency and size, then
+downloads them with the threaded engine (a PARALLELISM-sized pool around blocking requests.get,
+as the server worked before the async engine) and with the async engine's batch API, and
+reports throughput, completion-time percentiles (from the start of the run until each URL is
+done) and how many TCP connections each one opened.
+
+Usage:
+    python -m download_server.download_benchmark --urls 200 --size-kb 64 --latency-ms 50
+    python -m download_server.download_benchmark --parallelism 4 --per-host 32 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from download_server.download_mcp_server import MCPDownloadServer
+
+logger = logging.getLogger(__name__)
+
+
+class StandInFileServer(ThreadingHTTPServer):
+    """Local HTTP/1.1 server that serves fixed-size files after a fixed latency."""
+
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when many pooled connections open at once
+    request_queue_size = 256
+
+    def __init__(self, size_bytes: int = 64 * 1024, latency_ms: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _StandInFileHandler)
+        self.body = (b"0123456789abcdef" * (size_bytes // 16 + 1))[:size_bytes]
+        self.latency = latency_ms / 1000.0
+        self.connections = 0
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def process_request_thread(self, request, client_address):
+        with self._count_lock:
+            self.connections += 1
+        super().process_request_thread(request, client_address)
+
+
+class _StandInFileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server._count_lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _report(name: str, seconds: float, completions: List[float], results: List[Dict[str, Any]],
+            origin: StandInFileServer) -> Dict[str, Any]:
+    succeeded = [result for result in results if result["success"]]
+    total_bytes = sum(result["bytes"] for result in succeeded)
+    return {
+        "engine": name,
+        "urls": len(results),
+        "succeeded": len(succeeded),
+        "seconds": round(seconds, 3),
+        "urls_per_second": round(len(succeeded) / seconds, 1) if seconds else 0.0,
+        "mb_per_second": round(total_bytes / seconds / 1e6, 2) if seconds else 0.0,
+        "completion_p50_ms": round(_percentile(completions, 0.5) * 1000, 1),
+        "completion_p95_ms": round(_percentile(completions, 0.95) * 1000, 1),
+        "connections": origin.connections
+    }
+
+
+def _run_threads(urls: List[str], download_dir: str, parallelism: int, origin: StandInFileServer) -> Dict[str, Any]:
+    server = MCPDownloadServer(download_dir=download_dir, log_level="ERROR", cache_enabled=False, engine="threads")
+    completions = []
+
+    def timed_download(url):
+        success, file_path, error = server.download_file(url)
+        completions.append(time.monotonic() - started)
+        return {"success": success, "bytes": os.path.getsize(file_path) if success else 0}
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        results = list(pool.map(timed_download, urls))
+    return _report("threads", time.monotonic() - started, completions, results, origin)
+
+
+def _run_async(urls: List[str], download_dir: str, per_host: int, max_connections: int,
+               origin: StandInFileServer) -> Dict[str, Any]:
+    server = MCPDownloadServer(download_dir=download_dir, log_level="ERROR", cache_enabled=False, engine="async")
+    server.engine.per_host_limit = per_host
+    server.engine.max_connections = max_connections
+    server.engine.start()
+    try:
+        started = time.monotonic()
+        results = list(server.download_batch(urls))
+        seconds = time.monotonic() - started
+    finally:
+        server.engine.close()
+    return _report("async", seconds, [result["seconds"] for result in results], results, origin)
+
+
+def run_download_benchmark(
+    num_urls: int = 200,
+    size_kb: int = 64,
+    latency_ms: float = 50.0,
+    parallelism: int = 4,
+    per_host: int = 16,
+    max_connections: int = 100
+) -> Dict[str, Any]:
+    """
+    Download the same synthetic URLs with both engines and compare them.
+
+    Args:
+        num_urls: Number of distinct URLs
+        size_kb: Size of each file in KiB
+        latency_ms: Server-side delay before each response
+        parallelism: Worker threads for the threaded engine (the server's PARALLELISM)
+        per_host: Per-host concurrency of the async engine (all URLs share one host)
+        max_connections: Connection pool size of the async engine
+
+    Returns:
+        Dictionary with the configuration, one report per engine and the async speedup
+    """
+    reports = []
+    for engine in ("threads", "async"):
+        with StandInFileServer(size_kb * 1024, latency_ms) as origin, tempfile.TemporaryDirectory() as temp_dir:
+            urls = [origin.url(f"/files/{engine}/{i}.bin") for i in range(num_urls)]
+            if engine == "threads":
+                reports.append(_run_threads(urls, temp_dir, parallelism, origin))
+            else:
+                reports.append(_run_async(urls, temp_dir, per_host, max_connections, origin))
+
+    threads, async_ = reports
+    return {
+        "config": {
+            "urls": num_urls, "size_kb": size_kb, "latency_ms": latency_ms, "parallelism": parallelism,
+            "per_host": per_host, "max_connections": max_connections
+        },
+        "threads": threads,
+        "async": async_,
+        "speedup": round(threads["seconds"] / async_["seconds"], 2) if async_["seconds"] else None
+    }
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """Human-readable comparison table."""
+    lines = [
+        f"{'engine':<8} {'urls/s':>8} {'MB/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'conns':>6} {'seconds':>8}"
+    ]
+    for name in ("threads", "async"):
+        report = summary[name]
+        lines.append(
+            f"{name:<8} {report['urls_per_second']:>8} {report['mb_per_second']:>8} {report['completion_p50_ms']:>8} "
+            f"{report['completion_p95_ms']:>8} {report['connections']:>6} {report['seconds']:>8}"
+        )
+    lines.append(f"async speedup: {summary['speedup']}x")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download engine throughput benchmark against a local HTTP stand-in')
+    parser.add_argument('--urls', type=int, default=200, help="Number of URLs to download")
+    parser.add_argument('--size-kb', type=int, default=64, help="Size of each file in KiB")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Server-side delay per response")
+    parser.add_argument('--parallelism', type=int, default=4, help="Threads for the threaded engine")
+    parser.add_argument('--per-host', type=int, default=16, help="Per-host concurrency of the async engine")
+    parser.add_argument('--max-connections', type=int, default=100, help="Connection pool size of the async engine")
+    parser.add_argument('--json', action='store_true', help="Print the full summary as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    summary = run_download_benchmark(
+        num_urls=args.urls,
+        size_kb=args.size_kb,
+        latency_ms=args.latency_ms,
+        parallelism=args.parallelism,
+        per_host=args.per_host,
+        max_connections=args.max_connections
+    )
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
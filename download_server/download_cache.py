@@ -0,0 +1,345 @@
+"""
+Content-addressed URL cache for the MCP download server.
+Bodies are stored once per sha256 digest, URLs map to digests together with their ETag and
+Last-Modified validators, stale entries are revalidated with conditional GETs, concurrent
+requests for the same URL share a single fetch, and total disk usage is bounded by LRU eviction.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    truncated INTEGER NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_urls_sha256 ON urls(sha256);
+CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs(last_access);
+"""
+
+# Blobs used this recently are never evicted, so a path handed to a caller stays readable
+EVICTION_GRACE_SECONDS = 30
+
+
+class DownloadCache:
+    """Class responsible for caching downloaded URLs by content hash."""
+
+    def __init__(self, cache_dir: str, ttl_seconds: int = 3600, max_bytes: int = 1024 ** 3,
+                 timeout: Optional[int] = None):
+        """
+        Open (or create) the cache.
+
+        Args:
+            cache_dir: Directory holding the blobs and the SQLite index
+            ttl_seconds: Seconds an entry is served without revalidation
+            max_bytes: Upper bound on the total size of stored blobs (0 = unlimited)
+            timeout: Timeout for remote requests in seconds
+        """
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.eviction_grace_seconds = EVICTION_GRACE_SECONDS
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(_SCHEMA)
+
+        self.session = requests.Session()
+        self._in_flight: Dict[Tuple[str, int], Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "shared": 0, "evicted": 0}
+
+    def get(self, url: str, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Return the cached content of a URL, fetching or revalidating it as needed.
+
+        Concurrent calls for the same URL wait for a single fetch instead of downloading it again.
+
+        Args:
+            url: URL to download
+            max_bytes: Stop reading the response after this many bytes (None or 0 = unlimited)
+
+        Returns:
+            Dictionary with file_path, sha256, content_type, bytes, truncated and cache
+            ("hit", "revalidated", "miss" or "shared")
+
+        Raises:
+            requests.exceptions.RequestException: If the remote request fails
+        """
+        key = (url, max_bytes or 0)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            with self.lock:
+                self.stats["shared"] += 1
+            return dict(future.result(), cache="shared")
+
+        try:
+            result = self._get(url, max_bytes)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+
+    def _get(self, url: str, max_bytes: Optional[int]) -> Dict[str, Any]:
+        """Serve a URL from the cache, revalidating or fetching it when needed."""
+        entry = self.lookup(url, max_bytes)
+        if entry and self.is_fresh(entry):
+            return self.hit(entry)
+
+        headers = self.conditional_headers(entry)
+        response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+        try:
+            if entry and headers and response.status_code == 304:
+                return self.revalidated(url, entry, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            size = 0
+            truncated = False
+            fd, temp_path = self.temp_file()
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        if max_bytes and size + len(chunk) > max_bytes:
+                            chunk = chunk[:max_bytes - size]
+                            truncated = True
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                        if truncated:
+                            break
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        finally:
+            response.close()
+
+        return self.commit(
+            url, temp_path, digest.hexdigest(), size, response.headers.get("Content-Type"),
+            response.headers.get("ETag"), response.headers.get("Last-Modified"), truncated
+        )
+
+    def lookup(self, url: str, max_bytes: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Stored entry that can serve a request for url, or None.
+
+        Args:
+            url: Requested URL
+            max_bytes: Byte cap of the request; a body cut at a smaller cap cannot satisfy it
+
+        Returns:
+            Entry dictionary (sha256, path, size, content_type, etag, last_modified, truncated,
+            fetched_at) or None
+        """
+        entry = self._lookup(url)
+        if entry and entry["truncated"] and (not max_bytes or max_bytes > entry["size"]):
+            return None
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether an entry can be served without revalidation."""
+        return time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating an entry."""
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def hit(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Serve a fresh entry."""
+        self._touch(entry["sha256"])
+        with self.lock:
+            self.stats["hits"] += 1
+        return self._result(entry, "hit")
+
+    def revalidated(self, url: str, entry: Dict[str, Any], etag: Optional[str],
+                    last_modified: Optional[str]) -> Dict[str, Any]:
+        """Record a 304 Not Modified answer and serve the stored entry."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE urls SET fetched_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), etag, last_modified, url)
+            )
+            self.stats["revalidated"] += 1
+        self._touch(entry["sha256"])
+        logger.info(f"Revalidated cached copy of {url}")
+        return self._result(entry, "revalidated")
+
+    def temp_file(self) -> Tuple[int, str]:
+        """Open a temporary file in the blob directory, to be passed to commit()."""
+        return tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+
+    def commit(self, url: str, temp_path: str, sha256: str, size: int, content_type: Optional[str],
+               etag: Optional[str], last_modified: Optional[str], truncated: bool = False) -> Dict[str, Any]:
+        """
+        File a downloaded body under its digest and point the URL at it.
+
+        Args:
+            url: Downloaded URL
+            temp_path: Temporary file from temp_file() holding the body (moved or removed)
+            sha256: Hex digest of the body
+            size: Body size in bytes
+            content_type: Content-Type header
+            etag: ETag header
+            last_modified: Last-Modified header
+            truncated: Whether the body was cut at a byte cap
+
+        Returns:
+            Result dictionary as returned by get()
+        """
+        now = time.time()
+        try:
+            with self.lock, self.connection:
+                row = self.connection.execute("SELECT path FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+                if row and os.path.exists(row[0]):
+                    path = row[0]
+                    os.remove(temp_path)
+                    logger.info(f"Content of {url} is already cached as {sha256[:12]}")
+                else:
+                    path = os.path.join(self.blob_dir, sha256[:2], sha256 + _extension(url, content_type))
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO blobs (sha256, path, size, last_access) VALUES (?, ?, ?, ?)",
+                    (sha256, path, size, now)
+                )
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO urls (url, sha256, content_type, etag, last_modified, truncated, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, sha256, content_type, etag, last_modified, int(truncated), now)
+                )
+                self.stats["misses"] += 1
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self._evict()
+        entry = {
+            "sha256": sha256, "path": path, "size": size, "content_type": content_type,
+            "truncated": truncated, "fetched_at": now
+        }
+        return self._result(entry, "miss")
+
+    def _lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Index entry for a URL, or None if it is missing or its blob is gone."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT u.sha256, b.path, b.size, u.content_type, u.etag, u.last_modified, u.truncated, u.fetched_at "
+                "FROM urls u JOIN blobs b ON b.sha256 = u.sha256 WHERE u.url = ?",
+                (url,)
+            ).fetchone()
+        if row is None or not os.path.exists(row[1]):
+            return None
+        keys = ["sha256", "path", "size", "content_type", "etag", "last_modified", "truncated", "fetched_at"]
+        entry = dict(zip(keys, row))
+        entry["truncated"] = bool(entry["truncated"])
+        return entry
+
+    def _touch(self, sha256: str):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (time.time(), sha256))
+
+    def _evict(self):
+        """Delete least recently used blobs (and the URLs pointing at them) until under max_bytes."""
+        if not self.max_bytes:
+            return
+        with self.lock, self.connection:
+            total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            candidates = self.connection.execute(
+                "SELECT sha256, path, size FROM blobs WHERE last_access < ? ORDER BY last_access",
+                (time.time() - self.eviction_grace_seconds,)
+            ).fetchall()
+            for sha256, path, size in candidates:
+                if total <= self.max_bytes:
+                    break
+                self.connection.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+                self.connection.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.stats["evicted"] += 1
+            if total > self.max_bytes:
+                logger.warning(f"Download cache holds {total} bytes, over its {self.max_bytes} byte limit, "
+                               f"because all remaining blobs were used in the last {self.eviction_grace_seconds}s")
+
+    def total_bytes(self) -> int:
+        """Total size of stored blobs."""
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    @staticmethod
+    def _result(entry: Dict[str, Any], cache: str) -> Dict[str, Any]:
+        return {
+            "file_path": entry["path"],
+            "sha256": entry["sha256"],
+            "content_type": entry["content_type"],
+            "bytes": entry["size"],
+            "truncated": entry["truncated"],
+            "cache": cache
+        }
+
+    def close(self):
+        """Close the index and the HTTP session."""
+        self.session.close()
+        with self.lock:
+            self.connection.close()
+
+
+def _extension(url: str, content_type: Optional[str]) -> str:
+    """File extension for a blob, so loaders that look at extensions still work."""
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if extension and len(extension) <= 6 and extension[1:].isalnum():
+        return extension
+    if content_type:
+        return mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
+    return ""
@@ -7,10 +7,12 @@ import json
 import sys
 import os
 import threading
+import time
 import logging
 import argparse
+import contextvars
 import requests
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -33,7 +35,28 @@ class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
 
 # Import settings to check if screen logging is enabled
 sys.path.insert(0, os.path.join(project_root, 'config'))
-from settings import ENABLE_SCREEN_LOGGING, DOWNLOAD_TIMEOUT_SECONDS
+from settings import (
+    str_to_bool,
+    ENABLE_SCREEN_LOGGING,
+    DOWNLOAD_TIMEOUT_SECONDS,
+    DOWNLOAD_EXTRACT_MAX_CHARS,
+    DOWNLOAD_EXTRACT_MAX_BYTES,
+    DOWNLOAD_CACHE_ENABLED,
+    DOWNLOAD_CACHE_DIR,
+    DOWNLOAD_CACHE_TTL_SECONDS,
+    DOWNLOAD_CACHE_MAX_BYTES,
+    DOWNLOAD_ENGINE,
+    DOWNLOAD_MAX_BYTES,
+    DOWNLOAD_MAX_CONNECTIONS,
+    DOWNLOAD_PER_HOST_LIMIT,
+    DOWNLOAD_POLITENESS_DELAY_SECONDS,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_BATCH_MAX_URLS
+)
+from download_server.async_download_engine import AsyncDownloadEngine, effective_cap
+from download_server.content_extractor import extract_file_content
+from download_server.download_cache import DownloadCache
+from utils.deadline import bounded_timeout, deadline_passed, request_deadline, set_deadline
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path=os.path.join(project_root, '.env'))
@@ -48,14 +71,24 @@ file_operation_lock = threading.Lock()
 class DownloadRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for download requests"""
 
-    # Class variables to hold the download function and thread pool
+    # Class variables to hold the download functions and thread pool
     download_func = None
+    extract_func = None
+    batch_func = None
     thread_pool = None
 
     @classmethod
     def set_download_func(cls, func):
         cls.download_func = func
 
+    @classmethod
+    def set_extract_func(cls, func):
+        cls.extract_func = func
+
+    @classmethod
+    def set_batch_func(cls, func):
+        cls.batch_func = func
+
     @classmethod
     def set_thread_pool(cls, pool):
         cls.thread_pool = pool
@@ -75,16 +108,23 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(400, "Invalid JSON", "unknown")
                 return
 
+            # Give up on requests whose caller has stopped waiting (X-Request-Deadline); otherwise
+            # the download below is only waited for until the deadline
+            deadline = request_deadline(self.headers, request_data)
+            if deadline_passed(deadline):
+                self.logger_error("Deadline exceeded before the request was processed")
+                self._send_error_response(408, "Deadline exceeded before the request was processed", "unknown")
+                return
+            set_deadline(deadline)
+
             # Extract URL from request - the parameters might be at the top level
             # or nested inside a 'parameters' field depending on how the client sends it
-            if 'url' in request_data:
-                download_url = request_data['url']
+            if 'url' in request_data or 'urls' in request_data:
+                params = request_data
             elif 'parameters' in request_data:
                 # If parameters are nested, check inside that object
                 params = request_data['parameters']
-                if 'url' in params:
-                    download_url = params['url']
-                else:
+                if 'url' not in params and 'urls' not in params:
                     self.logger_error("Missing 'url' in request parameters")
                     self._send_error_response(400, "Missing 'url' in request parameters", "unknown")
                     return
@@ -92,11 +132,26 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 self.logger_error("Missing 'url' or 'parameters' in request")
                 self._send_error_response(400, "Missing 'url' or 'parameters' in request", "unknown")
                 return
+            download_url = params.get('url', 'batch')
+
+            # Extract mode returns the cleaned text of the page in the response
+            extract = str_to_bool(str(params.get('extract', False)))
+            try:
+                max_chars = int(params['max_chars']) if params.get('max_chars') is not None else None
+                max_bytes = int(params['max_bytes']) if params.get('max_bytes') is not None else None
+            except (TypeError, ValueError):
+                self.logger_error("Invalid 'max_chars' or 'max_bytes' in request")
+                self._send_error_response(400, "'max_chars' and 'max_bytes' must be integers", download_url)
+                return
+
+            if 'urls' in params:
+                self._handle_batch(params, extract, max_chars, max_bytes)
+                return
 
-            self.logger_info(f"Submitting download request for URL: {download_url}")
+            self.logger_info(f"Submitting {'extract' if extract else 'download'} request for URL: {download_url}")
 
             # Perform download using the bound function via thread pool
-            if DownloadRequestHandler.download_func is None:
+            if DownloadRequestHandler.download_func is None or (extract and DownloadRequestHandler.extract_func is None):
                 self.logger_error("Download function not set")
                 self._send_error_response(500, "Server configuration error", "unknown")
                 return
@@ -106,23 +161,35 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(500, "Server configuration error", "unknown")
                 return
 
-            # Submit the download task to the thread pool
-            future = DownloadRequestHandler.thread_pool.submit(DownloadRequestHandler.download_func, download_url)
+            # Submit the download task to the thread pool, in a copy of this request's context
+            wait_seconds = bounded_timeout(DOWNLOAD_TIMEOUT_SECONDS + 10, "the download")  # Add buffer to timeout
+            if extract:
+                future = DownloadRequestHandler.thread_pool.submit(
+                    contextvars.copy_context().run, DownloadRequestHandler.extract_func, download_url, max_chars, max_bytes
+                )
+            else:
+                future = DownloadRequestHandler.thread_pool.submit(
+                    contextvars.copy_context().run, DownloadRequestHandler.download_func, download_url, max_bytes
+                )
 
             # Wait for the result (this will block this request handler thread, but that's OK since
             # each request gets its own thread from the HTTP server's internal thread pool)
             try:
-                success, file_path, error_msg = future.result(timeout=DOWNLOAD_TIMEOUT_SECONDS + 10)  # Add buffer to timeout
-
-                # Create response
-                response = {
-                    "success": True,
-                    "result": {
+                if extract:
+                    result = future.result(timeout=wait_seconds)
+                else:
+                    success, file_path, error_msg = future.result(timeout=wait_seconds)
+                    result = {
                         "success": success,
                         "url": download_url,
                         "file_path": file_path,
                         "error": error_msg
                     }
+
+                # Create response
+                response = {
+                    "success": True,
+                    "result": result
                 }
 
                 # Send successful response
@@ -130,7 +197,10 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
 
             except TimeoutError:
                 self.logger_error(f"Download timed out for URL: {download_url}")
-                self._send_error_response(408, f"Download timed out after {DOWNLOAD_TIMEOUT_SECONDS + 10}s", download_url)
+                if wait_seconds < DOWNLOAD_TIMEOUT_SECONDS + 10:
+                    self._send_error_response(408, f"Deadline exceeded after waiting {wait_seconds:.0f}s for the download", download_url)
+                else:
+                    self._send_error_response(408, f"Download timed out after {DOWNLOAD_TIMEOUT_SECONDS + 10}s", download_url)
             except Exception as e:
                 self.logger_error(f"Error during download execution: {str(e)}")
                 self._send_error_response(500, f"Download execution error: {str(e)}", download_url)
@@ -139,6 +209,63 @@ class DownloadRequestHandler(BaseHTTPRequestHandler):
             self.logger_error(f"Error handling request: {str(e)}")
             self._send_error_response(500, f"Internal server error: {str(e)}", "unknown")
 
+    def _handle_batch(self, params: dict, extract: bool, max_chars: Optional[int], max_bytes: Optional[int]):
+        """
+        Download many URLs in one call
+        With "stream": true, one JSON line is written per URL as soon as it completes, followed by
+        a summary line; otherwise all results are returned together, in request order.
+        """
+        urls = params['urls']
+        if not isinstance(urls, list) or not urls or not all(isinstance(url, str) for url in urls):
+            self._send_error_response(400, "'urls' must be a non-empty list of strings", "batch")
+            return
+        if len(urls) > DOWNLOAD_BATCH_MAX_URLS:
+            self._send_error_response(400, f"At most {DOWNLOAD_BATCH_MAX_URLS} URLs per batch", "batch")
+            return
+        if DownloadRequestHandler.batch_func is None:
+            self.logger_error("Batch download function not set")
+            self._send_error_response(500, "Server configuration error", "batch")
+            return
+
+        self.logger_info(f"Submitting batch {'extract' if extract else 'download'} request for {len(urls)} URLs")
+        started = time.monotonic()
+        results = DownloadRequestHandler.batch_func(urls, max_bytes, extract, max_chars)
+        summary = {"urls": len(urls), "succeeded": 0, "failed": 0, "bytes": 0}
+
+        if not str_to_bool(str(params.get('stream', False))):
+            collected = []
+            for result in results:
+                self._count_batch_result(summary, result)
+                collected.append(result)
+            summary["seconds"] = round(time.monotonic() - started, 3)
+            collected.sort(key=lambda result: result["index"])
+            self._send_json_response(200, {
+                "success": True,
+                "result": {"success": summary["failed"] == 0, "results": collected, "summary": summary}
+            })
+            return
+
+        # Newline-delimited JSON; the connection is closed after the summary line
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            for result in results:
+                self._count_batch_result(summary, result)
+                self.wfile.write((json.dumps(result) + "\n").encode('utf-8'))
+                self.wfile.flush()
+            summary["seconds"] = round(time.monotonic() - started, 3)
+            self.wfile.write((json.dumps({"done": True, "summary": summary}) + "\n").encode('utf-8'))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.logger_error("Client disconnected during a streamed batch download")
+
+    @staticmethod
+    def _count_batch_result(summary: dict, result: dict):
+        summary["succeeded" if result.get("success") else "failed"] += 1
+        summary["bytes"] += result.get("bytes") or 0
+
     def _send_json_response(self, status_code: int, data: dict):
         """Send a JSON response with appropriate headers"""
         self.send_response(status_code)
@@ -185,7 +312,9 @@ class MCPDownloadServer:
 
     def __init__(self, host: str = '127.0.0.1', port: int = 8093, registry_url: str = 'http://127.0.0.1:8080',
                  service_id: Optional[str] = None, service_ttl: int = 60, log_level: str = 'INFO',
-                 download_dir: str = './downloads', download_timeout: int = DOWNLOAD_TIMEOUT_SECONDS):
+                 download_dir: str = './downloads', download_timeout: int = DOWNLOAD_TIMEOUT_SECONDS,
+                 cache_enabled: bool = DOWNLOAD_CACHE_ENABLED, cache_dir: Optional[str] = DOWNLOAD_CACHE_DIR,
+                 engine: str = DOWNLOAD_ENGINE):
         self.host = host
         self.port = port
         self.registry_url = registry_url
@@ -200,6 +329,33 @@ class MCPDownloadServer:
         # Ensure download directory exists
         os.makedirs(self.download_dir, exist_ok=True)
 
+        # Content-addressed cache: repeated downloads of a URL are served (or revalidated) from disk
+        self.cache: Optional[DownloadCache] = None
+        if cache_enabled:
+            self.cache = DownloadCache(
+                cache_dir or os.path.join(self.download_dir, 'cache'),
+                ttl_seconds=DOWNLOAD_CACHE_TTL_SECONDS,
+                max_bytes=DOWNLOAD_CACHE_MAX_BYTES,
+                timeout=self.download_timeout
+            )
+
+        # Async engine: pooled keep-alive connections with per-host limits; "threads" keeps the
+        # blocking requests.get path, one PARALLELISM thread per download
+        if engine not in ('async', 'threads'):
+            raise ValueError(f"Unknown download engine '{engine}', expected 'async' or 'threads'")
+        self.engine: Optional[AsyncDownloadEngine] = None
+        if engine == 'async':
+            self.engine = AsyncDownloadEngine(
+                self.download_dir,
+                cache=self.cache,
+                max_connections=DOWNLOAD_MAX_CONNECTIONS,
+                per_host_limit=DOWNLOAD_PER_HOST_LIMIT,
+                politeness_delay=DOWNLOAD_POLITENESS_DELAY_SECONDS,
+                chunk_size=DOWNLOAD_CHUNK_SIZE,
+                timeout=self.download_timeout,
+                max_bytes=DOWNLOAD_MAX_BYTES
+            )
+
         # Set up logging
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(getattr(logging, log_level.upper()))
@@ -211,18 +367,143 @@ class MCPDownloadServer:
             handler.addFilter(HeartbeatFilter())
             self.logger.addHandler(handler)
 
-    def download_file(self, url: str) -> Tuple[bool, str, Optional[str]]:
+    def download_file(self, url: str, max_bytes: Optional[int] = None) -> Tuple[bool, str, Optional[str]]:
         """
         Download a file from the given URL
+        Args:
+            url: URL to download
+            max_bytes: Stop reading the response after this many bytes (None or 0 = unlimited)
         Returns: (success, file_path, error_message)
         """
+        success, file_path, error_msg, _ = self._download(url, max_bytes)
+        return success, file_path, error_msg
+
+    def download_and_extract(self, url: str, max_chars: Optional[int] = None,
+                             max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Download a file and extract its cleaned main text
+        HTML pages are stripped of navigation and other boilerplate, PDF and DOCX text is extracted
+        with the RAG document loaders and text content is decoded with the detected charset, so
+        callers get the text without access to this server's disk.
+        Args:
+            url: URL to download
+            max_chars: Maximum characters of text to return (defaults to DOWNLOAD_EXTRACT_MAX_CHARS)
+            max_bytes: Maximum bytes read from the remote server (defaults to DOWNLOAD_EXTRACT_MAX_BYTES)
+        Returns: Result dictionary with success, url, file_path, error, text, title, content_type,
+            kind, charset, chars, bytes and truncated
+        """
+        max_chars = DOWNLOAD_EXTRACT_MAX_CHARS if max_chars is None else max_chars
+        max_bytes = DOWNLOAD_EXTRACT_MAX_BYTES if max_bytes is None else max_bytes
+
+        success, file_path, error_msg, info = self._download(url, max_bytes)
+        return self._extract_text(self._result(url, success, file_path, error_msg, info), max_chars)
+
+    def download_batch(self, urls: List[str], max_bytes: Optional[int] = None, extract: bool = False,
+                       max_chars: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Download many URLs concurrently
+        Args:
+            urls: URLs to download
+            max_bytes: Per-URL byte cap
+            extract: Whether to add the extracted text to each result (see download_and_extract)
+            max_chars: Maximum characters of text per URL in extract mode
+        Yields: Result dictionaries with an "index" into urls, as soon as each URL completes
+        """
+        if extract:
+            max_chars = DOWNLOAD_EXTRACT_MAX_CHARS if max_chars is None else max_chars
+            max_bytes = DOWNLOAD_EXTRACT_MAX_BYTES if max_bytes is None else max_bytes
+
+        if self.engine is not None:
+            completed = self.engine.download_batch(urls, effective_cap(max_bytes, DOWNLOAD_MAX_BYTES))
+        else:
+            completed = self._download_batch_with_threads(urls, max_bytes)
+
+        for result in completed:
+            if extract:
+                result = self._extract_text(result, max_chars)
+            yield result
+
+    def _download_batch_with_threads(self, urls: List[str], max_bytes: Optional[int]) -> Iterator[Dict[str, Any]]:
+        pool = self.thread_pool or ThreadPoolExecutor(max_workers=PARALLELISM)
+        try:
+            futures = {pool.submit(self._download, url, max_bytes): (index, url) for index, url in enumerate(urls)}
+            for future in as_completed(futures):
+                index, url = futures[future]
+                result = self._result(url, *future.result())
+                result["index"] = index
+                yield result
+        finally:
+            if pool is not self.thread_pool:
+                pool.shutdown(wait=False)
+
+    @staticmethod
+    def _result(url: str, success: bool, file_path: str, error_msg: Optional[str],
+                info: Dict[str, Any]) -> Dict[str, Any]:
+        """Response dictionary for one download"""
+        result = {
+            "success": success,
+            "url": url,
+            "file_path": file_path,
+            "error": error_msg,
+            "bytes": info.get("bytes", 0),
+            "truncated": info.get("truncated", False),
+            "content_type": info.get("content_type")
+        }
+        if "cache" in info:
+            result["cache"] = info["cache"]
+        return result
+
+    def _extract_text(self, result: Dict[str, Any], max_chars: Optional[int]) -> Dict[str, Any]:
+        """Add the extracted text of a completed download to its result dictionary"""
+        result["text"] = ""
+        if not result["success"]:
+            return result
+
+        url = result["url"]
+        extracted = extract_file_content(result["file_path"], result.get("content_type"), max_chars)
+        if extracted["error"]:
+            self.logger.warning(f"Could not extract text from {url}: {extracted['error']}")
+            result["error"] = extracted["error"]
+        result.update({
+            "text": extracted["text"],
+            "title": extracted["title"],
+            "content_type": extracted["content_type"],
+            "kind": extracted["kind"],
+            "charset": extracted["charset"],
+            "chars": extracted["chars"],
+            "truncated": result["truncated"] or extracted["truncated"]
+        })
+        self.logger.info(
+            f"Extracted {extracted['chars']} characters of {extracted['kind']} text from {result['bytes']} bytes at {url}"
+        )
+        return result
+
+    def _download(self, url: str, max_bytes: Optional[int] = None) -> Tuple[bool, str, Optional[str], Dict[str, Any]]:
+        """
+        Stream a URL to a unique file in the download directory, or fetch it through the cache
+        Returns: (success, file_path, error_message, info) where info holds content_type, bytes,
+            whether the body was truncated at max_bytes and, with the cache, the cache status
+        """
+        info: Dict[str, Any] = {}
+        max_bytes = effective_cap(max_bytes, DOWNLOAD_MAX_BYTES)
         try:
             # Validate URL
             parsed_url = urlparse(url)
             if not parsed_url.scheme or not parsed_url.netloc:
                 error_msg = f"Invalid URL: {url}"
                 self.logger.error(error_msg)
-                return False, "", error_msg
+                return False, "", error_msg, info
+
+            if self.engine is not None:
+                result = self.engine.download(url, max_bytes)
+                info.update({key: value for key, value in result.items() if key not in ("success", "file_path", "error")})
+                return result["success"], result["file_path"], result["error"], info
+
+            if self.cache is not None:
+                cached = self.cache.get(url, max_bytes)
+                info.update(cached)
+                self.logger.info(f"Download of {url} served from cache ({cached['cache']}): {cached['file_path']}")
+                return True, cached['file_path'], None, info
 
             # Create a safe filename from the URL
             filename = os.path.basename(parsed_url.path)
@@ -248,32 +529,48 @@ class MCPDownloadServer:
             response.raise_for_status()
 
             # Write the file (this is now thread-safe as each thread gets its own unique file path)
+            written = 0
+            truncated = False
             with open(file_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
+                    if max_bytes and written + len(chunk) > max_bytes:
+                        chunk = chunk[:max_bytes - written]
+                        truncated = True
                     f.write(chunk)
-
+                    written += len(chunk)
+                    if truncated:
+                        break
+            response.close()
+
+            info.update({"content_type": response.headers.get('Content-Type'), "bytes": written, "truncated": truncated})
+            if truncated:
+                self.logger.info(f"Stopped reading {url} at {max_bytes} bytes")
             self.logger.info(f"Successfully downloaded file to {file_path}")
-            return True, file_path, None
+            return True, file_path, None, info
 
         except requests.exceptions.Timeout as e:
             error_msg = f"Timeout downloading {url} after {self.download_timeout}s: {str(e)}"
             self.logger.error(error_msg)
-            return False, "", error_msg
+            return False, "", error_msg, info
         except requests.exceptions.RequestException as e:
             error_msg = f"Network error downloading {url}: {str(e)}"
             self.logger.error(error_msg)
-            return False, "", error_msg
+            return False, "", error_msg, info
         except Exception as e:
             error_msg = f"Unexpected error downloading {url}: {str(e)}"
             self.logger.error(error_msg)
-            return False, "", error_msg
+            return False, "", error_msg, info
 
     def start(self):
         """Start the download server"""
         try:
-            # Initialize the thread pool with the configured parallelism
-            self.thread_pool = ThreadPoolExecutor(max_workers=PARALLELISM)
-            self.logger.info(f"Initialized thread pool with {PARALLELISM} workers")
+            # Initialize the thread pool with the configured parallelism; with the async engine the
+            # workers only wait for the event loop, so concurrency is bounded by its connection limits
+            pool_size = self.engine.max_connections if self.engine is not None else PARALLELISM
+            self.thread_pool = ThreadPoolExecutor(max_workers=pool_size)
+            if self.engine is not None:
+                self.engine.start()
+            self.logger.info(f"Initialized thread pool with {pool_size} workers")
 
             # Register with the service registry
             service_id = f"download-server-{self.host}-{self.port}".replace('.', '-').replace(':', '-')
@@ -287,10 +584,12 @@ class MCPDownloadServer:
                 type="mcp_download",
                 metadata={
                     "service_type": "file_downloader",
-                    "capabilities": ["url_download", "file_transfer"],
+                    "capabilities": ["url_download", "file_transfer", "content_extraction", "batch_download"],
                     "download_dir": self.download_dir,
+                    "cache_enabled": self.cache is not None,
                     "started_at": datetime.now().isoformat(),
-                    "max_concurrent_downloads": PARALLELISM
+                    "max_concurrent_downloads": pool_size,
+                    "download_engine": "async" if self.engine is not None else "threads"
                 }
             )
 
@@ -310,6 +609,8 @@ class MCPDownloadServer:
 
             # Set the download function and thread pool for the DownloadRequestHandler class
             DownloadRequestHandler.set_download_func(self.download_file)
+            DownloadRequestHandler.set_extract_func(self.download_and_extract)
+            DownloadRequestHandler.set_batch_func(self.download_batch)
             DownloadRequestHandler.set_thread_pool(self.thread_pool)
 
             # Create threaded HTTP server with our custom request handler
@@ -357,6 +658,11 @@ class MCPDownloadServer:
             self.thread_pool.shutdown(wait=True)  # Wait for all threads to complete
             self.logger.info("Thread pool shut down successfully")
 
+        if self.engine is not None:
+            self.engine.close()
+        if self.cache is not None:
+            self.cache.close()
+
 
 def main():
     """Main function to start the download server"""
@@ -374,6 +680,11 @@ def main():
     parser.add_argument('--download-timeout', type=int, default=DOWNLOAD_TIMEOUT_SECONDS,
                         help=f'Download timeout in seconds (default: {DOWNLOAD_TIMEOUT_SECONDS})')
 
+    parser.add_argument('--engine', type=str, default=DOWNLOAD_ENGINE, choices=['async', 'threads'],
+                        help=f'Download engine (default: {DOWNLOAD_ENGINE})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always download into the download directory instead of using the content cache')
+
     args = parser.parse_args()
 
     # Set up logging based on global setting
@@ -395,7 +706,9 @@ def main():
         service_ttl=args.service_ttl,
         log_level=args.log_level,
         download_dir=args.download_dir,
-        download_timeout=args.download_timeout
+        download_timeout=args.download_timeout,
+        cache_enabled=DOWNLOAD_CACHE_ENABLED and not args.no_cache,
+        engine=args.engine
     )
 
     try:
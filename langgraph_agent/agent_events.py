@@ -0,0 +1,177 @@
+"""
+Progress events for streamed agent runs.
+
+A streamed run (stream_enhanced_agent / astream_enhanced_agent) yields one dictionary per event,
+each with an "event" key:
+- node_start / node_end: a graph node began or finished (node_end carries duration_ms and error);
+- tool_call_start / tool_call_end: an MCP tool call began or finished (index, service_id, action,
+  and on end status and duration_ms);
+- token: a piece of the final answer as the response LLM produces it (text);
+- result: the final result, same format as run_enhanced_agent (result);
+- error: the run failed (error); a result event with the failed state follows.
+
+Nodes report tool calls and tokens with emit_agent_event, which goes through LangGraph's "custom"
+stream mode and does nothing when the graph is run with invoke or without that mode. The services
+send the events to clients as server-sent events (format_sse), and clients read them back with
+iter_sse_events.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langgraph.config import get_config, get_stream_writer
+
+logger = logging.getLogger(__name__)
+
+# Stream modes a streamed run asks LangGraph for
+AGENT_EVENT_STREAM_MODES = ["tasks", "updates", "values", "custom"]
+
+
+def emit_agent_event(event: str, **data) -> None:
+    """
+    Report a progress event from inside a graph node.
+
+    Args:
+        event: Event name (e.g. "tool_call_start")
+        **data: Event fields, must be JSON serializable
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (e.g. a node called directly)
+        return
+    writer({"event": event, **data})
+
+
+def token_streaming_requested() -> bool:
+    """
+    Whether the current graph run asked for the final answer token by token
+    (configurable "stream_tokens", set by the streamed runners).
+    """
+    try:
+        return bool(get_config().get("configurable", {}).get("stream_tokens"))
+    except RuntimeError:
+        return False
+
+
+def token_emitter() -> Optional[Callable[[str], None]]:
+    """
+    Callback passing answer tokens to the client, or None when the run is not streamed.
+    """
+    if not token_streaming_requested():
+        return None
+    return lambda text: emit_agent_event("token", text=text)
+
+
+class AgentEventStream:
+    """
+    Turns (mode, chunk) pairs from graph.stream/astream with AGENT_EVENT_STREAM_MODES into agent
+    events, reports the state after every node to the monitoring callback (like stream_agent_graph)
+    and keeps the latest state.
+    """
+
+    def __init__(self, initial_state: Dict[str, Any], callback_handler):
+        self.final_state = initial_state
+        self.callback_handler = callback_handler
+        self._pending_node = None
+        self._node_started = {}
+
+    def feed(self, mode: str, chunk: Any) -> List[Dict[str, Any]]:
+        """
+        Process one stream chunk.
+
+        Returns:
+            Events to send to the client (possibly none)
+        """
+        if mode == "custom":
+            return [chunk] if isinstance(chunk, dict) and "event" in chunk else []
+
+        if mode == "tasks":
+            if "input" in chunk:
+                self._node_started[chunk["id"]] = time.monotonic()
+                return [{"event": "node_start", "node": chunk["name"]}]
+            started = self._node_started.pop(chunk["id"], None)
+            event = {
+                "event": "node_end",
+                "node": chunk["name"],
+                "duration_ms": round((time.monotonic() - started) * 1000, 1) if started is not None else None
+            }
+            if chunk.get("error"):
+                event["error"] = str(chunk["error"])
+            return [event]
+
+        if mode == "updates":
+            # A node that changed nothing is not followed by a values chunk
+            if self._pending_node is not None:
+                self.callback_handler.on_node_end(self._pending_node, self.final_state)
+            self._pending_node = next(iter(chunk), None)
+        elif mode == "values":
+            self.final_state = chunk
+            # The first values chunk is the input state, before any node ran
+            if self._pending_node is not None:
+                self.callback_handler.on_node_end(self._pending_node, self.final_state)
+                self._pending_node = None
+        return []
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Flush the last node to the callback.
+
+        Returns:
+            The final state
+        """
+        if self._pending_node is not None:
+            self.callback_handler.on_node_end(self._pending_node, self.final_state)
+            self._pending_node = None
+        return self.final_state
+
+
+def format_sse(event: Dict[str, Any]) -> bytes:
+    """
+    Encode an agent event as one server-sent event.
+
+    Args:
+        event: Agent event dictionary
+
+    Returns:
+        The "event:"/"data:" block, terminated by a blank line
+    """
+    data = json.dumps(event, default=str)
+    return f"event: {event.get('event', 'message')}\ndata: {data}\n\n".encode('utf-8')
+
+
+def iter_sse_events(lines: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse server-sent events produced by format_sse.
+
+    Args:
+        lines: Response lines without line endings (str or bytes), e.g. requests' iter_lines()
+
+    Returns:
+        Iterator of agent event dictionaries
+    """
+    data_lines = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r')
+        if not line:
+            if data_lines:
+                try:
+                    yield json.loads("\n".join(data_lines))
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping malformed server-sent event: {str(e)}")
+                data_lines = []
+            continue
+        if line.startswith(':'):
+            continue  # comment / keep-alive
+        field, _, value = line.partition(':')
+        if field == 'data':
+            data_lines.append(value[1:] if value.startswith(' ') else value)
+    if data_lines:
+        try:
+            yield json.loads("\n".join(data_lines))
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed server-sent event: {str(e)}")
@@ -0,0 +1,234 @@
+"""
+Process-level runtime for the LangGraph agent.
+
+Holds the compiled agent graph and shared instances of the heavy components the nodes use
+(DedicatedMCPModel, ResponseGenerator, RAGOrchestrator). Building these reads every prompt file
+and creates a new LLM client, so doing it per request and per tool call dominated the agent's
+own overhead.
+
+Components are keyed by their class and a configuration fingerprint (public values in
+config.settings plus the name, size and mtime of every prompt file). When the fingerprint
+changes, cached components are dropped and rebuilt on next use; invalidate() does the same
+explicitly, e.g. after editing prompts or reloading settings. Components are built outside the
+runtime lock, one build per class at a time, so a slow constructor only blocks the callers
+waiting for that same component.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from config.settings import AGENT_RUNTIME_REUSE, AGENT_RUNTIME_CHECK_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_PROMPTS_DIR = "./core/prompts"
+
+
+def config_fingerprint(prompts_dir: str = DEFAULT_PROMPTS_DIR) -> str:
+    """
+    Hash the current settings and prompt files.
+
+    Args:
+        prompts_dir: Directory holding the prompt .txt files
+
+    Returns:
+        Hex digest that changes whenever a setting or prompt file changes
+    """
+    import config.settings as settings
+
+    digest = hashlib.sha256()
+    for name in sorted(vars(settings)):
+        if name.isupper():
+            digest.update(f"{name}={getattr(settings, name)!r}\n".encode("utf-8"))
+    for prompt_file in sorted(Path(prompts_dir).glob("*.txt")):
+        try:
+            stat = prompt_file.stat()
+        except OSError:
+            continue
+        digest.update(f"{prompt_file.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AgentRuntime:
+    """
+    Compiled graph and shared components, reused across agent runs.
+
+    Components must not keep per-request state, as one instance serves concurrent requests.
+    DedicatedMCPModel and ResponseGenerator only set attributes in __init__.
+    """
+
+    def __init__(
+        self,
+        prompts_dir: str = DEFAULT_PROMPTS_DIR,
+        reuse: bool = AGENT_RUNTIME_REUSE,
+        check_interval: float = AGENT_RUNTIME_CHECK_INTERVAL_SECONDS
+    ):
+        """
+        Args:
+            prompts_dir: Directory holding the prompt files included in the fingerprint
+            reuse: Share instances between requests (False builds everything per call, as before)
+            check_interval: Seconds between fingerprint checks
+        """
+        self.prompts_dir = prompts_dir
+        self.reuse = reuse
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._graphs: Dict[Callable, Any] = {}
+        self._components: Dict[Any, Any] = {}
+        # Components being built (factory -> event set when the build ends) and a counter bumped
+        # whenever cached components are dropped, so a build started before is not published
+        self._building: Dict[Any, threading.Event] = {}
+        self._generation = 0
+        self._fingerprint: Optional[str] = None
+        self._checked_at = 0.0
+        self._stats = {"builds": {}, "reuses": {}, "build_seconds": {}, "invalidations": 0}
+
+    def graph(self, builder: Callable[[], Any]):
+        """
+        Get the compiled graph, compiling it on first use.
+
+        Args:
+            builder: Function returning the compiled graph (create_enhanced_agent_graph or
+                create_async_agent_graph); each builder's graph is cached separately
+
+        Returns:
+            The compiled graph
+        """
+        with self._lock:
+            if self.reuse and builder in self._graphs:
+                self._count("reuses", "graph")
+                return self._graphs[builder]
+            graph = self._build("graph", builder)
+            if self.reuse:
+                self._graphs[builder] = graph
+            return graph
+
+    def component(self, factory: Callable[[], T]) -> T:
+        """
+        Get the shared instance built by factory for the current configuration.
+
+        Args:
+            factory: Class (or function) building the component with no arguments
+
+        Returns:
+            The cached instance, or a new one if none exists or the configuration changed
+        """
+        name = self._name(factory)
+        if not self.reuse:
+            return self._build(name, factory)
+        while True:
+            with self._lock:
+                self._check_fingerprint()
+                if factory in self._components:
+                    self._count("reuses", name)
+                    return self._components[factory]
+                building = self._building.get(factory)
+                if building is None:
+                    building = self._building[factory] = threading.Event()
+                    generation = self._generation
+                    break
+            # Another caller is building it; use its instance (or build it if that build failed)
+            building.wait()
+
+        try:
+            instance = self._build(name, factory)
+        except BaseException:
+            with self._lock:
+                del self._building[factory]
+                building.set()
+            raise
+        with self._lock:
+            if generation == self._generation:
+                self._components[factory] = instance
+            del self._building[factory]
+            building.set()
+        return instance
+
+    def invalidate(self, reason: str = "explicit") -> None:
+        """
+        Drop the compiled graphs and all cached components; they are rebuilt on next use.
+
+        Args:
+            reason: Why the cache is dropped, for the log
+        """
+        with self._lock:
+            self._graphs.clear()
+            self._components.clear()
+            self._generation += 1
+            self._fingerprint = None
+            self._checked_at = 0.0
+            self._stats["invalidations"] += 1
+        logger.info(f"[AGENT_RUNTIME] Cache invalidated ({reason})")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Build and reuse counts per component.
+
+        Returns:
+            Dictionary with builds, reuses, last build time per component, invalidations and
+            the time saved by reuse (reuses x last build time)
+        """
+        with self._lock:
+            build_seconds = dict(self._stats["build_seconds"])
+            reuses = dict(self._stats["reuses"])
+            return {
+                "reuse_enabled": self.reuse,
+                "builds": dict(self._stats["builds"]),
+                "reuses": reuses,
+                "build_ms": {name: round(seconds * 1000, 2) for name, seconds in build_seconds.items()},
+                "invalidations": self._stats["invalidations"],
+                "estimated_ms_saved": round(
+                    sum(count * build_seconds.get(name, 0.0) for name, count in reuses.items()) * 1000, 2
+                ),
+                "fingerprint": self._fingerprint
+            }
+
+    def _check_fingerprint(self) -> None:
+        now = time.monotonic()
+        if self._fingerprint is not None and now - self._checked_at < self.check_interval:
+            return
+        fingerprint = config_fingerprint(self.prompts_dir)
+        self._checked_at = now
+        if self._fingerprint is not None and fingerprint != self._fingerprint:
+            self._components.clear()
+            self._generation += 1
+            self._stats["invalidations"] += 1
+            logger.info("[AGENT_RUNTIME] Settings or prompt files changed, rebuilding components on next use")
+        self._fingerprint = fingerprint
+
+    def _build(self, name: str, factory: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        instance = factory()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._count("builds", name)
+            self._stats["build_seconds"][name] = elapsed
+        logger.info(f"[AGENT_RUNTIME] Built {name} in {elapsed * 1000:.1f}ms")
+        return instance
+
+    def _count(self, kind: str, name: str) -> None:
+        self._stats[kind][name] = self._stats[kind].get(name, 0) + 1
+
+    @staticmethod
+    def _name(factory: Callable) -> str:
+        return getattr(factory, "__name__", repr(factory))
+
+
+_runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_agent_runtime() -> AgentRuntime:
+    """Get the process-wide agent runtime, creating it on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = AgentRuntime()
+    return _runtime
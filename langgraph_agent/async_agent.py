@@ -0,0 +1,248 @@
+"""
+Asyncio execution path for the LangGraph agent.
+
+Same workflow as run_enhanced_agent, run with graph.astream:
+- registry discovery and MCP tool calls go through AsyncMCPClient (one shared aiohttp session,
+  bounded concurrency), so waiting on MCP services does not hold a thread;
+- the planner and response LLM calls and the heavier result enhancement (search, RAG) are
+  still blocking library code and run on a bounded thread pool shared by all runs.
+
+A single ASGI worker (backend/services/agent/asgi_app.py) can therefore serve many concurrent
+agent runs instead of one per gunicorn sync worker.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from config.settings import AGENT_ASYNC_MAX_BLOCKING_CALLS
+from langgraph_agent.agent_events import AGENT_EVENT_STREAM_MODES, AgentEventStream
+from langgraph_agent.agent_runtime import get_agent_runtime
+from langgraph_agent.async_mcp_client import get_async_mcp_client
+from langgraph_agent.langgraph_agent import (
+    AgentMonitoringCallback,
+    AgentState,
+    build_failed_state,
+    build_initial_state,
+    create_enhanced_agent_graph,
+    emit_tool_call_end,
+    emit_tool_call_start,
+    enhanced_results_collection_node,
+    format_agent_result,
+    input_reception_node,
+    make_result_enhancer,
+    mcp_model_query_node,
+    planning_and_filtering_node,
+)
+
+logger = logging.getLogger(__name__)
+
+# Services whose enhancement downloads pages or calls an LLM; the others only annotate the result
+BLOCKING_ENHANCEMENT_SERVICES = ('search', 'web', 'rag')
+
+_blocking_pool = ThreadPoolExecutor(max_workers=AGENT_ASYNC_MAX_BLOCKING_CALLS, thread_name_prefix="agent-blocking")
+
+
+async def run_blocking(func: Callable, *args) -> Any:
+    """
+    Run blocking code (LLM calls, RAG enhancement) on the shared bounded thread pool.
+    The code runs in a copy of the caller's context, so nodes can still report progress events.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_blocking_pool, context.run, func, *args)
+
+
+async def ainput_reception_node(state: AgentState) -> Dict[str, Any]:
+    """Async version of input_reception_node."""
+    return input_reception_node(state)
+
+
+async def amcp_registry_call_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Async version of mcp_registry_call_node: discovers services over the shared session.
+    """
+    start_time = time.time()
+    try:
+        registry_url = state.get("registry_url")
+        if not registry_url:
+            logger.warning("[MCP_REGISTRY_CALL] No registry URL provided, skipping service discovery")
+            return {"mcp_servers": [], "discovered_services": []}
+
+        services = await get_async_mcp_client().discover_services(registry_url)
+        logger.info(f"[MCP_REGISTRY_CALL] Discovered {len(services)} services in {time.time() - start_time:.2f}s")
+        return {"mcp_servers": services, "discovered_services": services}
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        error_msg = f"MCP registry call failed: {str(e)}"
+        logger.error(f"[MCP_REGISTRY_CALL] {error_msg} after {elapsed_time:.2f}s")
+
+        # Same as the sync node: carry on without services and record the error
+        return {
+            "mcp_servers": [],
+            "discovered_services": [],
+            "error_message": error_msg
+        }
+
+
+async def amcp_model_query_node(state: AgentState) -> Dict[str, Any]:
+    """Async version of mcp_model_query_node: the planner LLM call runs on the blocking pool."""
+    return await run_blocking(mcp_model_query_node, state)
+
+
+async def aplanning_and_filtering_node(state: AgentState) -> Dict[str, Any]:
+    """Async version of planning_and_filtering_node."""
+    return planning_and_filtering_node(state)
+
+
+async def aparallel_execution_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Async version of parallel_execution_node: all tool calls run concurrently on the event loop.
+    """
+    start_time = time.time()
+    tool_calls = state.get("mcp_tool_calls", [])
+    mcp_servers = state.get("mcp_servers", [])
+
+    logger.info(f"[PARALLEL_EXECUTION] Executing {len(tool_calls)} tool calls concurrently")
+    if not tool_calls:
+        logger.info("[PARALLEL_EXECUTION] No tool calls to execute, leaving state unchanged")
+        return {}
+
+    client = get_async_mcp_client()
+    enhance_result = make_result_enhancer(state)
+
+    async def execute_and_enhance_single_call(index, tool_call):
+        call_started = time.monotonic()
+        emit_tool_call_start(index, tool_call)
+        try:
+            results = await client.execute_tool_calls([tool_call], mcp_servers)
+            emit_tool_call_end(index, tool_call, results[0], call_started)
+            service_id = tool_call.get("service_id", "").lower()
+            if any(name in service_id for name in BLOCKING_ENHANCEMENT_SERVICES):
+                enhanced_result = await run_blocking(enhance_result, tool_call, results[0])
+            else:
+                enhanced_result = enhance_result(tool_call, results[0])
+            return {"tool_call": tool_call, "result": enhanced_result, "status": "success"}
+        except Exception as e:
+            logger.error(f"[PARALLEL_EXECUTION] Failed to execute or enhance tool call {tool_call.get('service_id', 'unknown')}: {str(e)}")
+            emit_tool_call_end(index, tool_call, {"status": "error", "error": str(e)}, call_started)
+            return {"tool_call": tool_call, "result": None, "status": "error", "error": str(e)}
+
+    results = await asyncio.gather(*(execute_and_enhance_single_call(index, call) for index, call in enumerate(tool_calls)))
+
+    successful_results = [result["result"] for result in results if result["status"] == "success" and result["result"]]
+    errors = [result for result in results if not (result["status"] == "success" and result["result"])]
+
+    logger.info(f"[PARALLEL_EXECUTION] Parallel execution with enhancement completed in {time.time() - start_time:.2f}s")
+    logger.info(f"[PARALLEL_EXECUTION] Successful results: {len(successful_results)}, Errors: {len(errors)}")
+    return {"mcp_results": successful_results, "mcp_execution_errors": errors}
+
+
+async def aenhanced_results_collection_node(state: AgentState) -> Dict[str, Any]:
+    """Async version of enhanced_results_collection_node: the response LLM call runs on the blocking pool."""
+    return await run_blocking(enhanced_results_collection_node, state)
+
+
+def create_async_agent_graph():
+    """
+    Creates the agent workflow with async node implementations (run it with ainvoke/astream).
+    """
+    return create_enhanced_agent_graph({
+        "input_reception": ainput_reception_node,
+        "mcp_registry_call": amcp_registry_call_node,
+        "mcp_model_query": amcp_model_query_node,
+        "planning_and_filtering": aplanning_and_filtering_node,
+        "parallel_execution": aparallel_execution_node,
+        "enhanced_results_collection": aenhanced_results_collection_node
+    })
+
+
+async def astream_agent_graph(graph, initial_state: AgentState, config: Dict[str, Any],
+                              callback_handler: AgentMonitoringCallback) -> Dict[str, Any]:
+    """
+    Async version of stream_agent_graph.
+
+    Returns:
+        The final state
+    """
+    events = AgentEventStream(initial_state, callback_handler)
+    async for mode, chunk in graph.astream(initial_state, config=config, stream_mode=["updates", "values"]):
+        events.feed(mode, chunk)
+    return events.finish()
+
+
+async def arun_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = None, disable_sql_blocking: bool = False, disable_databases: bool = False, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Async version of run_enhanced_agent; takes the same arguments and returns the same result.
+    """
+    from config.settings import MCP_REGISTRY_URL
+    effective_registry_url = registry_url or MCP_REGISTRY_URL
+
+    logger.info(f"[ARUN_ENHANCED_AGENT] Initial user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
+
+    graph = get_agent_runtime().graph(create_async_agent_graph)
+    initial_state = build_initial_state(
+        user_request, mcp_servers, disable_sql_blocking, disable_databases,
+        custom_system_prompt, skip_final_response_generation, effective_registry_url
+    )
+
+    callback_handler = AgentMonitoringCallback()
+    callback_handler.on_graph_start(initial_state)
+
+    try:
+        result = await astream_agent_graph(
+            graph, initial_state, {"configurable": {"thread_id": "default", "deadline": deadline}, "recursion_limit": 50},
+            callback_handler
+        )
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Error in async graph execution: {error_msg}")
+        result = build_failed_state(
+            user_request, error_msg, mcp_servers, custom_system_prompt,
+            skip_final_response_generation, effective_registry_url
+        )
+
+    callback_handler.on_graph_end(result)
+
+    return format_agent_result(user_request, result)
+
+
+async def astream_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = None, disable_sql_blocking: bool = False, disable_databases: bool = False, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None, deadline: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async version of stream_enhanced_agent: yields progress events, ending with the "result" event.
+    """
+    from config.settings import MCP_REGISTRY_URL
+    effective_registry_url = registry_url or MCP_REGISTRY_URL
+
+    logger.info(f"[ASTREAM_ENHANCED_AGENT] Initial user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
+
+    graph = get_agent_runtime().graph(create_async_agent_graph)
+    initial_state = build_initial_state(
+        user_request, mcp_servers, disable_sql_blocking, disable_databases,
+        custom_system_prompt, skip_final_response_generation, effective_registry_url
+    )
+
+    callback_handler = AgentMonitoringCallback()
+    callback_handler.on_graph_start(initial_state)
+    events = AgentEventStream(initial_state, callback_handler)
+    config = {"configurable": {"thread_id": "default", "stream_tokens": True, "deadline": deadline}, "recursion_limit": 50}
+
+    try:
+        async for mode, chunk in graph.astream(initial_state, config=config, stream_mode=AGENT_EVENT_STREAM_MODES):
+            for event in events.feed(mode, chunk):
+                yield event
+        result = events.finish()
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Error in streamed async graph execution: {error_msg}")
+        yield {"event": "error", "error": error_msg}
+        result = build_failed_state(
+            user_request, error_msg, mcp_servers, custom_system_prompt,
+            skip_final_response_generation, effective_registry_url
+        )
+
+    callback_handler.on_graph_end(result)
+
+    yield {"event": "result", "result": format_agent_result(user_request, result)}
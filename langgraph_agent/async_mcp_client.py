@@ -0,0 +1,250 @@
+"""
+Asyncio MCP client for the async agent.
+
+Calls MCP services over one shared aiohttp session per event loop, so concurrent agent runs
+reuse keep-alive connections instead of opening one per requests.post. A semaphore bounds the
+calls in flight and the connector bounds connections per service. Results have the same shape
+as DedicatedMCPModel._call_mcp_service and execute_mcp_tool_calls. TCP services use the wire
+formats of utils.mcp_transport; "http2" services are called over HTTP/1.1 (aiohttp has no HTTP/2).
+Like MCPTransport, calls inside a request with a deadline are cut short and forward the deadline.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from utils.deadline import DeadlineExceeded, bounded_timeout, deadline_headers
+from utils.mcp_transport import FRAME_HEADER, encode_frame, parse_complete_json, request_payload, timeout_error
+from utils.mcp_result_cache import get_mcp_result_cache
+from utils.mcp_resilience import get_resilient_caller
+from config.settings import (
+    MCP_SERVICE_CALL_TIMEOUT,
+    AGENT_ASYNC_MAX_CONCURRENT_CALLS,
+    AGENT_ASYNC_LIMIT_PER_HOST
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_tool_call(call: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Dict[str, Any]]:
+    """
+    Read the service, action and parameters from a planner tool call.
+    Accepts the same variants as DedicatedMCPModel.execute_mcp_tool_calls: service/service_id,
+    action/method, and parameters given in 'parameters', 'params' or at the top level.
+
+    Returns:
+        Tuple of (service_id, action, parameters)
+    """
+    service_id = call.get('service_id') or call.get('service')
+    action = call.get('action') or call.get('method')
+    parameters = dict(call.get('parameters', {}))
+    if 'params' in call:
+        parameters.update(call['params'])
+    for key, value in call.items():
+        if key not in ['service_id', 'service', 'action', 'method', 'parameters', 'params']:
+            parameters[key] = value
+    return service_id, action, parameters
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class AsyncMCPClient:
+    """
+    MCP client sharing one aiohttp session and one concurrency limit per event loop.
+    """
+
+    def __init__(
+        self,
+        timeout: float = MCP_SERVICE_CALL_TIMEOUT,
+        max_concurrency: int = AGENT_ASYNC_MAX_CONCURRENT_CALLS,
+        limit_per_host: int = AGENT_ASYNC_LIMIT_PER_HOST
+    ):
+        """
+        Args:
+            timeout: Seconds allowed per MCP call
+            max_concurrency: MCP calls in flight at once
+            limit_per_host: Open connections per MCP service
+        """
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # A session and semaphore belong to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.limit_per_host),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session of the current event loop."""
+        if self._session is not None and not self._session.closed and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    async def discover_services(self, registry_url: str, service_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Discover services from the MCP registry.
+
+        Args:
+            registry_url: Registry base URL
+            service_type: Optional service type filter
+
+        Returns:
+            List of service dictionaries (id, host, port, type, metadata); empty on failure
+        """
+        session = self._ensure_session()
+        params = {'type': service_type} if service_type else {}
+        try:
+            async with self._semaphore:
+                async with session.get(f"{registry_url.rstrip('/')}/discover", params=params) as response:
+                    if response.status != 200:
+                        logger.error(f"Failed to discover services: HTTP {response.status}")
+                        return []
+                    result = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Network error discovering services: {str(e)}")
+            return []
+        if not result.get('success'):
+            logger.error(f"Failed to discover services: {result.get('message')}")
+            return []
+        return [
+            {
+                "id": service['id'],
+                "host": service['host'],
+                "port": service['port'],
+                "type": service['type'],
+                "metadata": service.get('metadata')
+            }
+            for service in result.get('services', [])
+        ]
+
+    async def call_service(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call one MCP service over HTTP or TCP, depending on its metadata protocol.
+
+        Args:
+            service: Service dictionary from the registry
+            action: Action to perform (also the HTTP path)
+            parameters: Action parameters
+
+        Returns:
+            Result dictionary with status "success" or "error"
+        """
+        session = self._ensure_session()
+        base = {"service_id": service['id'], "action": action, "parameters": parameters}
+        protocol = ((service.get('metadata') or {}).get('protocol') or 'http').lower()
+        try:
+            timeout = bounded_timeout(self.timeout, f"calling {service['id']}")
+        except DeadlineExceeded as e:
+            return {**base, "status": "error", "error": str(e), "timestamp": _timestamp()}
+        try:
+            async with self._semaphore:
+                if protocol in ('tcp', 'tcp-framed'):
+                    result_data = await asyncio.wait_for(
+                        self._call_tcp(service, action, parameters, framed=protocol == 'tcp-framed'), timeout
+                    )
+                    return {**base, "status": "success", "result": result_data, "timestamp": _timestamp()}
+
+                if protocol not in ('http', 'http2'):
+                    logger.warning(f"Unknown protocol '{protocol}' for service {service['id']}, defaulting to HTTP")
+                endpoint = f"http://{service['host']}:{service['port']}"
+                if action:
+                    endpoint = f"{endpoint}/{action.lstrip('/')}"
+                payload = request_payload(action, parameters)
+                async with session.post(endpoint, json=payload, headers=deadline_headers(),
+                                        timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status != 200:
+                        text = await response.text()
+                        return {**base, "status": "error", "error": f"HTTP {response.status}: {text}", "timestamp": _timestamp()}
+                    result_data = await response.json(content_type=None)
+                    return {**base, "status": "success", "result": result_data, "timestamp": _timestamp()}
+        except asyncio.TimeoutError:
+            error = timeout_error(timeout, self.timeout, tcp=protocol.startswith('tcp'))
+        except aiohttp.ClientError as e:
+            error = f"HTTP request failed: {str(e)}"
+        except json.JSONDecodeError as e:
+            error = f"Invalid JSON response: {str(e)}"
+        except (OSError, asyncio.IncompleteReadError) as e:
+            error = f"TCP connection failed: {str(e)}"
+        except Exception as e:
+            error = f"Unexpected error calling MCP service: {str(e)}"
+        return {**base, "status": "error", "error": error, "timestamp": _timestamp()}
+
+    async def _call_tcp(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any], framed: bool = False) -> Any:
+        # Same wire formats as utils.mcp_transport; one connection per call
+        reader, writer = await asyncio.open_connection(service['host'], service['port'])
+        try:
+            payload = request_payload(action, parameters, service_id=service['id'])
+            if framed:
+                writer.write(encode_frame(payload))
+                await writer.drain()
+                (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                return json.loads(await reader.readexactly(size))
+
+            writer.write(json.dumps(payload).encode('utf-8'))
+            await writer.drain()
+            buffer = bytearray()
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return json.loads(bytes(buffer).decode('utf-8'))
+                buffer += chunk
+                complete, value = parse_complete_json(buffer)
+                if complete:
+                    return value
+        finally:
+            writer.close()
+
+    async def execute_tool_calls(self, tool_calls: List[Dict[str, Any]], mcp_services: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute planner tool calls concurrently.
+
+        Args:
+            tool_calls: Tool calls from the planner
+            mcp_services: Available MCP services
+
+        Returns:
+            One result per tool call, in the same order
+        """
+        service_lookup = {service['id']: service for service in mcp_services}
+
+        async def execute(call):
+            service_id, action, parameters = normalize_tool_call(call)
+            if service_id not in service_lookup:
+                logger.warning(f"Service {service_id} not found in available services")
+                return {"service_id": service_id, "status": "error", "error": f"Service {service_id} not found"}
+            service = service_lookup[service_id]
+            return await get_mcp_result_cache().acall(
+                service, action, parameters,
+                lambda: get_resilient_caller().acall(service, action, parameters, self.call_service, mcp_services)
+            )
+
+        return list(await asyncio.gather(*(execute(call) for call in tool_calls)))
+
+
+_client: Optional[AsyncMCPClient] = None
+
+
+def get_async_mcp_client() -> AsyncMCPClient:
+    """Get the process-wide async MCP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncMCPClient()
+    return _client
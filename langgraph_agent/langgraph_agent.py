@@ -3,7 +3,7 @@ Simplified LangGraph implementation of the AI Agent focused on MCP service orche
 All nodes have been removed for reconstruction.
 """
 
-from typing import TypedDict, List, Dict, Any, Literal, Optional
+from typing import TypedDict, List, Dict, Any, Iterator, Literal, Optional
 from langchain_core.messages import BaseMessage
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, END
@@ -18,7 +18,14 @@ from sql_mcp_server.client import SQLMCPClient
 from models.prompt_generator import PromptGenerator
 from models.response_generator import ResponseGenerator
 from models.security_sql_detector import SecuritySQLDetector
-from config.settings import TERMINATE_ON_POTENTIALLY_HARMFUL_SQL
+from config.settings import TERMINATE_ON_POTENTIALLY_HARMFUL_SQL, AGENT_STATE_SIZE_LOGGING
+from langgraph_agent.agent_runtime import get_agent_runtime
+from langgraph_agent.agent_events import AGENT_EVENT_STREAM_MODES, AgentEventStream, emit_agent_event, token_emitter
+from utils.mcp_result_cache import describe_cache_status
+from utils.mcp_resilience import get_resilient_caller
+from utils.deadline import check_deadline, deadline_scope, run_before_deadline
+from langchain_core.runnables import RunnableConfig
+import asyncio
 import os
 from config.settings import str_to_bool
 import logging
@@ -32,6 +39,10 @@ logger = logging.getLogger(__name__)
 class AgentState(TypedDict):
     """
     State definition for the MCP-focused LangGraph agent.
+
+    Nodes return only the keys they change and LangGraph merges them into the state with the
+    reducers below. A node must not return {**state, ...}: every operator.add field it passes
+    back would be appended to itself again, doubling those lists after each node.
     """
     user_request: Annotated[str, lambda x, y: y]          # Original user request - always replace with new value
     mcp_queries: Annotated[List[Dict[str, Any]], lambda x, y: y]           # Planned MCP queries to execute - use new value
@@ -74,6 +85,10 @@ class AgentState(TypedDict):
     mcp_capable_response: Annotated[str, lambda x, y: y]
     return_mcp_results_to_llm: Annotated[bool, lambda x, y: y]
     is_final_answer: Annotated[bool, lambda x, y: y]  # Use new value
+    has_sufficient_info: Annotated[bool, lambda x, y: y]  # Use new value
+    confidence_level: Annotated[float, lambda x, y: y]  # Use new value
+    filtered_mcp_tool_calls: Annotated[List[Dict[str, Any]], lambda x, y: y]  # Tool calls left after filtering
+    response_generated: Annotated[bool, lambda x, y: y]  # Whether the final answer came from the response LLM
 
     enhancement_errors: Annotated[List[Dict[str, Any]], operator.add]  # Errors from enhancement process - append
     # RAG-specific fields
@@ -88,7 +103,7 @@ class AgentState(TypedDict):
     skip_final_response_generation: Annotated[bool, lambda x, y: y]  # Flag to skip response generation
 
 
-def input_reception_node(state: AgentState) -> AgentState:
+def input_reception_node(state: AgentState) -> Dict[str, Any]:
     """
     Node to receive and store the user query in the state.
     This is the first step in the workflow.
@@ -101,14 +116,22 @@ def input_reception_node(state: AgentState) -> AgentState:
     logger.info(f"[INPUT_RECEPTION] Received user request: '{user_request}' (length: {len(user_request) if user_request else 0})")
 
     # Return the state with the user_request (which is already there)
-    result_state = {
-        **state
-    }
+    # Nothing changes; returning the full state would re-append every operator.add field
+    return {}
+
 
-    return result_state
+def registered_service_dict(service) -> Dict[str, Any]:
+    """Convert a registry ServiceInfo to the service dictionary MCP calls take."""
+    return {
+        "id": service.id,
+        "host": service.host,
+        "port": service.port,
+        "type": service.type,
+        "metadata": service.metadata
+    }
 
 
-def mcp_registry_call_node(state: AgentState) -> AgentState:
+def mcp_registry_call_node(state: AgentState) -> Dict[str, Any]:
     """
     Node to call the MCP registry and discover available services.
     This is the second step in the workflow.
@@ -127,7 +150,6 @@ def mcp_registry_call_node(state: AgentState) -> AgentState:
         if not registry_url:
             logger.warning("[MCP_REGISTRY_CALL] No registry URL provided, skipping service discovery")
             result_state = {
-                **state,
                 "mcp_servers": [],
                 "discovered_services": []
             }
@@ -145,23 +167,13 @@ def mcp_registry_call_node(state: AgentState) -> AgentState:
         services = client.discover_services()
 
         # Convert ServiceInfo objects to dictionaries for compatibility with the rest of the system
-        services_as_dicts = []
-        for service in services:
-            service_dict = {
-                "id": service.id,
-                "host": service.host,
-                "port": service.port,
-                "type": service.type,
-                "metadata": service.metadata
-            }
-            services_as_dicts.append(service_dict)
+        services_as_dicts = [registered_service_dict(service) for service in services]
 
         elapsed_time = time.time() - start_time
         logger.info(f"[MCP_REGISTRY_CALL] Discovered {len(services_as_dicts)} services in {elapsed_time:.2f}s")
 
         # Update the state with discovered services
         result_state = {
-            **state,
             "mcp_servers": services_as_dicts,
             "discovered_services": services_as_dicts
         }
@@ -175,14 +187,13 @@ def mcp_registry_call_node(state: AgentState) -> AgentState:
 
         # Return state with empty service lists in case of error
         return {
-            **state,
             "mcp_servers": [],
             "discovered_services": [],
             "error_message": error_msg
         }
 
 
-def mcp_model_query_node(state: AgentState) -> AgentState:
+def mcp_model_query_node(state: AgentState) -> Dict[str, Any]:
     """
     Node to send request to MCP capable model using the prompt template
     and populate both {user_request} and {mcp_services_json} variables with actual values.
@@ -206,7 +217,7 @@ def mcp_model_query_node(state: AgentState) -> AgentState:
 
         # Import and call the MCP capable model
         from models.dedicated_mcp_model import DedicatedMCPModel
-        mcp_model = DedicatedMCPModel()
+        mcp_model = get_agent_runtime().component(DedicatedMCPModel)
 
         # Check if a custom system prompt is provided in the state
         custom_system_prompt = state.get("custom_system_prompt", None)
@@ -258,7 +269,6 @@ def mcp_model_query_node(state: AgentState) -> AgentState:
             mcp_capable_response = json.dumps(str(result), ensure_ascii=False)
 
         result_state = {
-            **state,
             "mcp_tool_calls": validated_tool_calls,
             "mcp_capable_response": mcp_capable_response,
             "is_final_answer": result.get("is_final_answer", False) if isinstance(result, dict) else False,
@@ -274,7 +284,6 @@ def mcp_model_query_node(state: AgentState) -> AgentState:
 
         # Return state with error information
         result_state = {
-            **state,
             "error_message": error_msg,
             "mcp_tool_calls": [],
             "mcp_capable_response": "",
@@ -286,7 +295,7 @@ def mcp_model_query_node(state: AgentState) -> AgentState:
         return result_state
 
 
-def planning_and_filtering_node(state: AgentState) -> AgentState:
+def planning_and_filtering_node(state: AgentState) -> Dict[str, Any]:
     """
     Node to plan MCP tool calls and filter based on environment variables.
     This is the fourth step in the workflow.
@@ -351,7 +360,6 @@ def planning_and_filtering_node(state: AgentState) -> AgentState:
 
         # Store the filtered tool calls in the state
         result_state = {
-            **state,
             "mcp_tool_calls": filtered_tool_calls,
             "filtered_mcp_tool_calls": filtered_tool_calls  # Keep original for reference too
         }
@@ -364,7 +372,6 @@ def planning_and_filtering_node(state: AgentState) -> AgentState:
 
         # Return state with error information but keep original tool calls
         result_state = {
-            **state,
             "error_message": error_msg,
             "filtered_mcp_tool_calls": []
         }
@@ -372,505 +379,457 @@ def planning_and_filtering_node(state: AgentState) -> AgentState:
         return result_state
 
 
-def parallel_execution_node(state: AgentState) -> AgentState:
-    """
-    Node to execute all requested MCP tool calls simultaneously in parallel and enhance them immediately.
-    This is the fifth step in the workflow.
+def make_result_enhancer(state: AgentState):
     """
-    import time
-    import concurrent.futures
-    from models.dedicated_mcp_model import DedicatedMCPModel
+    Build the function that enhances one tool call result according to its service type.
+    Shared by the sync and async parallel execution nodes.
 
+    Args:
+        state: Agent state (search and RAG enhancement use the user request)
 
-    start_time = time.time()
-    logger.info("[PARALLEL_EXECUTION] Starting parallel execution of MCP tool calls with immediate enhancement")
+    Returns:
+        Function (tool_call, result) -> enhanced result
+    """
+    # Enhancement functions for different MCP tool types
+
+    def enhance_sql_result(result):
+        """Enhance SQL-type results"""
+        if result and isinstance(result, dict):
+            enhanced = result.copy()
+            # Add any SQL-specific enhancements
+            enhanced['enhanced_at'] = time.time()
+            enhanced['type'] = 'sql_enhanced'
+            return enhanced
+        else:
+            # Log the error when enhancement is not possible
+            logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance SQL result: {result}")
+            # Return an error indication when enhancement is not possible
+            return {
+                "error": "Cannot enhance: result is not a valid dictionary",
+                "enhanced_at": time.time(),
+                "type": "enhancement_error"
+            }
 
-    try:
-        # Get the filtered tool calls and MCP servers from the state
-        tool_calls = state.get("mcp_tool_calls", [])
-        mcp_servers = state.get("mcp_servers", [])
+    def enhance_search_result(result):
+        """Enhance search-type results by downloading content from URLs and summarizing with LLM"""
+        # Log the full raw result coming into the function
+        logger.info(f"[SEARCH_ENHANCEMENT] Raw search result coming into function: {result}")
 
-        logger.info(f"[PARALLEL_EXECUTION] Executing {len(tool_calls)} tool calls in parallel")
+        if result and isinstance(result, dict):
+            try:
+                # Import required components
+                from rag_component.main import RAGOrchestrator
+
+                # Shared RAG orchestrator; it downloads, summarizes and ranks the results in-process
+                rag_orchestrator = get_agent_runtime().component(RAGOrchestrator)
+
+                # Extract search results from the result dictionary
+                # The search results are nested in result['result']['result']['results']
+                search_results = result.get('result', {}).get('result', {}).get('results', [])
+
+                # Extract the user query from the state or result
+                # Try to get from the nested result structure
+                user_query = (result.get('user_query') or
+                              result.get('result', {}).get('result', {}).get('query', '') or
+                              result.get('query', ''))
+
+                # If not in result, try to get from the parent state context
+                if not user_query and 'user_request' in state:
+                    user_query = state['user_request']
+
+                # If we still don't have a query, use a default
+                if not user_query:
+                    user_query = "Provide a summary of this content"
+
+                # Process search results with download and summarization
+                processed_results = rag_orchestrator.process_search_results_with_download(
+                    search_results=search_results,
+                    user_query=user_query
+                )
 
-        if not tool_calls:
-            logger.info("[PARALLEL_EXECUTION] No tool calls to execute, returning original state")
-            return state
-
-        # Define enhancement functions for different MCP tool types
-        def enhance_sql_result(result):
-            """Enhance SQL-type results"""
-            if result and isinstance(result, dict):
-                enhanced = result.copy()
-                # Add any SQL-specific enhancements
-                enhanced['enhanced_at'] = time.time()
-                enhanced['type'] = 'sql_enhanced'
-                return enhanced
-            else:
-                # Log the error when enhancement is not possible
-                logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance SQL result: {result}")
-                # Return an error indication when enhancement is not possible
-                return {
-                    "error": "Cannot enhance: result is not a valid dictionary",
-                    "enhanced_at": time.time(),
-                    "type": "enhancement_error"
+                # Create enhanced result with the processed data
+                enhanced = {
+                    'enhanced_results': processed_results,
+                    'enhanced_at': time.time(),
+                    'type': 'search_enhanced_with_content',
+                    'enhancement_method': 'download_and_summarize_and_rerank'
                 }
 
-        def enhance_search_result(result):
-            """Enhance search-type results by downloading content from URLs and summarizing with LLM"""
-            # Log the full raw result coming into the function
-            logger.info(f"[SEARCH_ENHANCEMENT] Raw search result coming into function: {result}")
-
-            if result and isinstance(result, dict):
-                try:
-                    # Import required components
-                    from rag_component.main import RAGOrchestrator
-                    from registry.registry_client import ServiceRegistryClient
-                    from config.settings import MCP_REGISTRY_URL
-
-                    # Initialize the RAG orchestrator
-                    rag_orchestrator = RAGOrchestrator()
-
-                    # Extract search results from the result dictionary
-                    # The search results are nested in result['result']['result']['results']
-                    search_results = result.get('result', {}).get('result', {}).get('results', [])
-
-                    # Extract the user query from the state or result
-                    # Try to get from the nested result structure
-                    user_query = (result.get('user_query') or
-                                  result.get('result', {}).get('result', {}).get('query', '') or
-                                  result.get('query', ''))
-
-                    # If not in result, try to get from the parent state context
-                    if not user_query and 'user_request' in state:
-                        user_query = state['user_request']
-
-                    # If we still don't have a query, use a default
-                    if not user_query:
-                        user_query = "Provide a summary of this content"
-
-                    # Process search results with download and summarization
-                    processed_results = rag_orchestrator.process_search_results_with_download(
-                        search_results=search_results,
-                        user_query=user_query
-                    )
-
-                    # Apply reranking using the RAG MCP server
-                    try:
-                        # Import required components
-                        from models.dedicated_mcp_model import DedicatedMCPModel
-                        from registry.registry_client import ServiceRegistryClient
-                        from config.settings import MCP_REGISTRY_URL
-                        from rag_component.config import RERANK_TOP_K_RESULTS
-
-                        # Discover available RAG services
-                        registry_client = ServiceRegistryClient(MCP_REGISTRY_URL)
-                        rag_services = [s for s in registry_client.discover_services() if s.type == "rag"]
-
-                        if not rag_services:
-                            logger.warning("[SEARCH_ENHANCEMENT] No RAG MCP services available for reranking, skipping.")
-                        else:
-                            rag_service = rag_services[0]  # Use the first available RAG service
-
-                            # Prepare documents for reranking - extract the summaries/content to be reranked
-                            rerank_documents = []
-                            for item in processed_results:
-                                # Create a document-like structure for reranking
-                                doc = {
-                                    'content': item.get('summary', ''),  # Use the LLM-generated summary
-                                    'title': item.get('title', ''),
-                                    'url': item.get('url', ''),
-                                    'original_description': item.get('original_description', '')
-                                }
-                                rerank_documents.append(doc)
-
-                            # Prepare parameters for the MCP rerank call
-                            rerank_params = {
-                                "query": user_query,
-                                "documents": rerank_documents,
-                                "top_k": RERANK_TOP_K_RESULTS
-                            }
-
-                            # Call the RAG MCP server for reranking
-                            mcp_model = DedicatedMCPModel()
-                            rerank_result = mcp_model._call_mcp_service(
-                                {
-                                    "id": rag_service.id,
-                                    "host": rag_service.host,
-                                    "port": rag_service.port,
-                                    "type": rag_service.type,
-                                    "metadata": rag_service.metadata
-                                },
-                                "rerank_documents",  # Action to perform
-                                rerank_params
-                            )
-
-                            # Process the reranking results
-                            if rerank_result.get("status") == "success":
-                                reranked_results = rerank_result.get("result", {}).get("results", [])
-
-                                # Update the processed results with reranking information
-                                # Create a mapping of original results by URL for quick lookup
-                                original_results_map = {item.get('url'): item for item in processed_results if item.get('url')}
-
-                                reranked_processed_results = []
-                                for reranked_doc in reranked_results:
-                                    url = reranked_doc.get('url', '')
-                                    # Find the original processed result that matches this reranked document
-                                    original_result = original_results_map.get(url)
-
-                                    if original_result:
-                                        # Update with reranking score and position
-                                        original_result['relevance_score'] = reranked_doc.get('score', 0.0)
-                                        original_result['reranked'] = True
-                                        reranked_processed_results.append(original_result)
-                                    else:
-                                        # If no original match found, create a new result with the reranked data
-                                        reranked_processed_results.append({
-                                            'title': reranked_doc.get('title', ''),
-                                            'url': reranked_doc.get('url', ''),
-                                            'summary': reranked_doc.get('content', ''),
-                                            'original_description': reranked_doc.get('original_description', ''),
-                                            'relevance_score': reranked_doc.get('score', 0.0),
-                                            'reranked': True
-                                        })
-
-                                processed_results = reranked_processed_results
-                            else:
-                                logger.warning(f"[SEARCH_ENHANCEMENT] RAG MCP reranking failed: {rerank_result.get('error', 'Unknown error')}, skipping reranking.")
-
-                    except ImportError:
-                        logger.warning("[SEARCH_ENHANCEMENT] Required modules for MCP reranking not available, skipping reranking step.")
-                    except Exception as e:
-                        logger.error(f"[SEARCH_ENHANCEMENT] Error during MCP-based reranking: {str(e)}")
-                        # Continue with original processed results if reranking fails
-
-                    # Create enhanced result with the processed data
-                    enhanced = {
-                        'enhanced_results': processed_results,
-                        'enhanced_at': time.time(),
-                        'type': 'search_enhanced_with_content',
-                        'enhancement_method': 'download_and_summarize_and_rerank'
-                    }
-
-                    # Log the full enhanced result leaving the function
-                    logger.info(f"[SEARCH_ENHANCEMENT] Enhanced search result leaving function: {enhanced}")
-                    return enhanced
-                except ImportError as e:
-                    logger.warning(f"[SEARCH_ENHANCEMENT] Could not import required modules: {str(e)}. Falling back to basic enhancement.")
-                    # Fallback to basic enhancement if imports fail
-                    enhanced = {
-                        'enhanced_at': time.time(),
-                        'type': 'search_enhanced'
-                    }
-                    return enhanced
-                except Exception as e:
-                    logger.error(f"[SEARCH_ENHANCEMENT] Error enhancing search result: {str(e)}")
-                    # Return an error indication
-                    error_result = {
-                        "error": f"Error enhancing search result: {str(e)}",
-                        "enhanced_at": time.time(),
-                        "type": "enhancement_error"
-                    }
-                    logger.info(f"[SEARCH_ENHANCEMENT] Error result leaving function: {error_result}")
-                    return error_result
-            else:
-                # Log the error when enhancement is not possible
-                logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance search result: {result}")
-                # Log specifically when input is not a dictionary
-                if not isinstance(result, dict):
-                    logger.warning(f"[SEARCH_ENHANCEMENT] Input is not a dictionary: type={type(result)}, value={result}")
-                # Return an error indication when enhancement is not possible
+                # Log the full enhanced result leaving the function
+                logger.info(f"[SEARCH_ENHANCEMENT] Enhanced search result leaving function: {enhanced}")
+                return enhanced
+            except ImportError as e:
+                logger.warning(f"[SEARCH_ENHANCEMENT] Could not import required modules: {str(e)}. Falling back to basic enhancement.")
+                # Fallback to basic enhancement if imports fail
+                enhanced = {
+                    'enhanced_at': time.time(),
+                    'type': 'search_enhanced'
+                }
+                return enhanced
+            except Exception as e:
+                logger.error(f"[SEARCH_ENHANCEMENT] Error enhancing search result: {str(e)}")
+                # Return an error indication
                 error_result = {
-                    "error": "Cannot enhance: result is not a valid dictionary",
+                    "error": f"Error enhancing search result: {str(e)}",
                     "enhanced_at": time.time(),
                     "type": "enhancement_error"
                 }
                 logger.info(f"[SEARCH_ENHANCEMENT] Error result leaving function: {error_result}")
                 return error_result
+        else:
+            # Log the error when enhancement is not possible
+            logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance search result: {result}")
+            # Log specifically when input is not a dictionary
+            if not isinstance(result, dict):
+                logger.warning(f"[SEARCH_ENHANCEMENT] Input is not a dictionary: type={type(result)}, value={result}")
+            # Return an error indication when enhancement is not possible
+            error_result = {
+                "error": "Cannot enhance: result is not a valid dictionary",
+                "enhanced_at": time.time(),
+                "type": "enhancement_error"
+            }
+            logger.info(f"[SEARCH_ENHANCEMENT] Error result leaving function: {error_result}")
+            return error_result
+
+    def enhance_dns_result(result):
+        """Enhance DNS-type results"""
+        if result and isinstance(result, dict):
+            enhanced = result.copy()
+            # Add any DNS-specific enhancements
+            enhanced['enhanced_at'] = time.time()
+            enhanced['type'] = 'dns_enhanced'
+            return enhanced
+        else:
+            # Log the error when enhancement is not possible
+            logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance DNS result: {result}")
+            # Return an error indication when enhancement is not possible
+            return {
+                "error": "Cannot enhance: result is not a valid dictionary",
+                "enhanced_at": time.time(),
+                "type": "enhancement_error"
+            }
 
-        def enhance_dns_result(result):
-            """Enhance DNS-type results"""
-            if result and isinstance(result, dict):
-                enhanced = result.copy()
-                # Add any DNS-specific enhancements
-                enhanced['enhanced_at'] = time.time()
-                enhanced['type'] = 'dns_enhanced'
-                return enhanced
-            else:
-                # Log the error when enhancement is not possible
-                logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance DNS result: {result}")
-                # Return an error indication when enhancement is not possible
-                return {
-                    "error": "Cannot enhance: result is not a valid dictionary",
-                    "enhanced_at": time.time(),
-                    "type": "enhancement_error"
-                }
+    def enhance_download_result(result):
+        """Enhance download-type results"""
+        if result and isinstance(result, dict):
+            enhanced = result.copy()
+            # Add any download-specific enhancements
+            enhanced['enhanced_at'] = time.time()
+            enhanced['type'] = 'download_enhanced'
+            return enhanced
+        else:
+            # Log the error when enhancement is not possible
+            logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance download result: {result}")
+            # Return an error indication when enhancement is not possible
+            return {
+                "error": "Cannot enhance: result is not a valid dictionary",
+                "enhanced_at": time.time(),
+                "type": "enhancement_error"
+            }
 
-        def enhance_download_result(result):
-            """Enhance download-type results"""
-            if result and isinstance(result, dict):
-                enhanced = result.copy()
-                # Add any download-specific enhancements
-                enhanced['enhanced_at'] = time.time()
-                enhanced['type'] = 'download_enhanced'
-                return enhanced
-            else:
-                # Log the error when enhancement is not possible
-                logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance download result: {result}")
-                # Return an error indication when enhancement is not possible
-                return {
-                    "error": "Cannot enhance: result is not a valid dictionary",
-                    "enhanced_at": time.time(),
-                    "type": "enhancement_error"
-                }
+    def enhance_rag_result(result):
+        """Enhance RAG-type results by reranking with the RAG MCP server"""
 
-        def enhance_rag_result(result):
-            """Enhance RAG-type results by reranking with the RAG MCP server"""
+        if result and isinstance(result, dict):
+            try:
+                # Import required components
+                from models.dedicated_mcp_model import DedicatedMCPModel
+                from registry.registry_client import ServiceRegistryClient
+                from config.settings import MCP_REGISTRY_URL
+                from rag_component.config import RERANK_TOP_K_RESULTS
+
+                # Extract RAG results - check multiple possible structures based on actual data
+                rag_results = []
+
+                # Case 1: Direct results in 'result' field (most common for RAG)
+                if 'result' in result and isinstance(result['result'], list):
+                    rag_results = result['result']
+                # Case 2: Nested structure like RAG MCP results
+                elif 'result' in result and isinstance(result['result'], dict):
+                    nested_result = result['result']
+                    if 'results' in nested_result and isinstance(nested_result['results'], list):
+                        rag_results = nested_result['results']
+                # Case 3: Direct results in 'results' field
+                elif 'results' in result and isinstance(result['results'], list):
+                    rag_results = result['results']
+                # Case 4: The result itself might be a single RAG document (based on test_actual_structures.py)
+                elif 'content' in result and 'metadata' in result:
+                    # Single document, wrap in a list
+                    rag_results = [result]
+                # Case 5: Results directly in the top level 'result' field (duplicate check with case 1 but more explicit)
+                elif isinstance(result.get('result'), list):
+                    rag_results = result['result']
+                # Case 6: If result itself is a list of documents
+                elif isinstance(result, list):
+                    rag_results = result
+                # Case 7: If the result is a single document dict
+                elif isinstance(result, dict) and 'content' in result and 'metadata' in result:
+                    rag_results = [result]
+                # Case 8: Last resort - if none of the above matched
+                else:
+                    # If we still haven't found results, log the structure for debugging
+                    logger.warning(f"[RAG_ENHANCEMENT] No RAG results found, result structure: {type(result)} with keys: {result.keys() if isinstance(result, dict) else 'N/A'}")
 
-            if result and isinstance(result, dict):
-                try:
-                    # Import required components
-                    from models.dedicated_mcp_model import DedicatedMCPModel
-                    from registry.registry_client import ServiceRegistryClient
-                    from config.settings import MCP_REGISTRY_URL
-                    from rag_component.config import RERANK_TOP_K_RESULTS
+                logger.debug(f"[RAG_ENHANCEMENT] Detected {len(rag_results)} RAG results from structure")
 
-                    # Extract RAG results - check multiple possible structures based on actual data
-                    rag_results = []
+                # Get the user query from the state
+                user_query = state.get('user_request', '')
 
-                    # Case 1: Direct results in 'result' field (most common for RAG)
-                    if 'result' in result and isinstance(result['result'], list):
-                        rag_results = result['result']
-                    # Case 2: Nested structure like RAG MCP results
-                    elif 'result' in result and isinstance(result['result'], dict):
-                        nested_result = result['result']
-                        if 'results' in nested_result and isinstance(nested_result['results'], list):
-                            rag_results = nested_result['results']
-                    # Case 3: Direct results in 'results' field
-                    elif 'results' in result and isinstance(result['results'], list):
-                        rag_results = result['results']
-                    # Case 4: The result itself might be a single RAG document (based on test_actual_structures.py)
-                    elif 'content' in result and 'metadata' in result:
-                        # Single document, wrap in a list
-                        rag_results = [result]
-                    # Case 5: Results directly in the top level 'result' field (duplicate check with case 1 but more explicit)
-                    elif isinstance(result.get('result'), list):
-                        rag_results = result['result']
-                    # Case 6: If result itself is a list of documents
-                    elif isinstance(result, list):
-                        rag_results = result
-                    # Case 7: If the result is a single document dict
-                    elif isinstance(result, dict) and 'content' in result and 'metadata' in result:
-                        rag_results = [result]
-                    # Case 8: Last resort - if none of the above matched
-                    else:
-                        # If we still haven't found results, log the structure for debugging
-                        logger.warning(f"[RAG_ENHANCEMENT] No RAG results found, result structure: {type(result)} with keys: {result.keys() if isinstance(result, dict) else 'N/A'}")
+                # If no RAG results to enhance, return an error
+                if not rag_results:
+                    return {
+                        "error": "No RAG results to enhance",
+                        "enhanced_at": time.time(),
+                        "type": "enhancement_error"
+                    }
 
-                    logger.debug(f"[RAG_ENHANCEMENT] Detected {len(rag_results)} RAG results from structure")
+                # Discover available RAG services for reranking
+                registry_client = ServiceRegistryClient(MCP_REGISTRY_URL)
+                rag_services = [s for s in registry_client.discover_services() if s.type == "rag"]
 
-                    # Get the user query from the state
-                    user_query = state.get('user_request', '')
+                if not rag_services:
+                    return {
+                        "error": "No RAG MCP services available for reranking",
+                        "enhanced_at": time.time(),
+                        "type": "enhancement_error"
+                    }
 
-                    # If no RAG results to enhance, return an error
-                    if not rag_results:
-                        return {
-                            "error": "No RAG results to enhance",
-                            "enhanced_at": time.time(),
-                            "type": "enhancement_error"
+                # Any RAG instance can rerank: the call goes to the least loaded healthy one
+                rag_services = [registered_service_dict(s) for s in rag_services]
+
+                # Prepare documents for reranking - extract the content to be reranked
+                rerank_documents = []
+                for item in rag_results:
+                    # Create a document-like structure for reranking
+                    if isinstance(item, dict):
+                        doc = {
+                            'content': item.get('content', ''),
+                            'title': item.get('title', ''),
+                            'source': item.get('source', ''),
+                            'metadata': item.get('metadata', {}),
+                            'score': item.get('score', 0.0)
                         }
-
-                    # Discover available RAG services for reranking
-                    registry_client = ServiceRegistryClient(MCP_REGISTRY_URL)
-                    rag_services = [s for s in registry_client.discover_services() if s.type == "rag"]
-
-                    if not rag_services:
-                        return {
-                            "error": "No RAG MCP services available for reranking",
-                            "enhanced_at": time.time(),
-                            "type": "enhancement_error"
+                    else:
+                        # If it's not a dict, try to convert it
+                        doc = {
+                            'content': str(item),
+                            'title': '',
+                            'source': '',
+                            'metadata': {},
+                            'score': 0.0
                         }
+                    rerank_documents.append(doc)
 
-                    rag_service = rag_services[0]  # Use the first available RAG service
-
-                    # Prepare documents for reranking - extract the content to be reranked
-                    rerank_documents = []
-                    for item in rag_results:
-                        # Create a document-like structure for reranking
-                        if isinstance(item, dict):
-                            doc = {
-                                'content': item.get('content', ''),
-                                'title': item.get('title', ''),
-                                'source': item.get('source', ''),
-                                'metadata': item.get('metadata', {}),
-                                'score': item.get('score', 0.0)
-                            }
-                        else:
-                            # If it's not a dict, try to convert it
-                            doc = {
-                                'content': str(item),
-                                'title': '',
-                                'source': '',
-                                'metadata': {},
-                                'score': 0.0
-                            }
-                        rerank_documents.append(doc)
+                # Prepare parameters for the MCP rerank call
+                rerank_params = {
+                    "query": user_query,
+                    "documents": rerank_documents,
+                    "top_k": RERANK_TOP_K_RESULTS
+                }
 
-                    # Prepare parameters for the MCP rerank call
-                    rerank_params = {
-                        "query": user_query,
-                        "documents": rerank_documents,
-                        "top_k": RERANK_TOP_K_RESULTS
-                    }
+                # Call the RAG MCP server for reranking
+                mcp_model = get_agent_runtime().component(DedicatedMCPModel)
+                rerank_result = get_resilient_caller().call_any(
+                    rag_services, "rerank_documents", rerank_params, mcp_model._call_mcp_service
+                )
 
-                    # Call the RAG MCP server for reranking
-                    mcp_model = DedicatedMCPModel()
-                    rerank_result = mcp_model._call_mcp_service(
-                        {
-                            "id": rag_service.id,
-                            "host": rag_service.host,
-                            "port": rag_service.port,
-                            "type": rag_service.type,
-                            "metadata": rag_service.metadata
-                        },
-                        "rerank_documents",  # Action to perform
-                        rerank_params
-                    )
-
-                    # Process the reranking results
-                    if rerank_result.get("status") == "success":
-                        reranked_results = rerank_result.get("result", {}).get("results", [])
-
-
-                        # Update the original RAG results with reranking information
-                        # Create a mapping of content to reranked document for quick lookup
-                        # Use a more robust matching approach since content might be slightly different
-                        content_to_reranked = {}
-                        for doc in reranked_results:
-                            content = doc.get('content', '')
-                            if content:
-                                content_to_reranked[content] = doc
-
-                        # Use only the reranked results, not the original unmatched documents
-                        updated_results = []
-                        for reranked_doc in reranked_results:
-                            # Find the corresponding original document to preserve metadata
-                            reranked_content = reranked_doc.get('content', '')
-
-                            # Look for the original document with matching content
-                            original_match = None
-                            for original_item in rag_results:
-                                if isinstance(original_item, dict) and original_item.get('content', '') == reranked_content:
-                                    original_match = original_item
-                                    break
-
-                            if original_match:
-                                # Update the original document with the new reranking score
-                                updated_item = original_match.copy()
-                                updated_item['score'] = reranked_doc.get('score', original_match.get('score'))
-                                updated_item['reranked'] = True
-                                updated_results.append(updated_item)
-                            else:
-                                # If no match found, use the reranked document as is
-                                updated_item = {
-                                    'content': reranked_doc.get('content', ''),
-                                    'metadata': reranked_doc.get('metadata', {}),
-                                    'score': reranked_doc.get('score', 0.0),
-                                    'reranked': True
-                                }
-                                updated_results.append(updated_item)
-
-                        # Create enhanced result with reranked data
-                        # Preserve the original structure of the result
-                        enhanced = result.copy()
-                        # Update the results based on the original structure
-                        if 'result' in result and isinstance(result['result'], list):
-                            enhanced['result'] = updated_results
-                        elif 'result' in result and isinstance(result['result'], dict) and 'results' in result['result']:
-                            enhanced['result']['results'] = updated_results
-                            # Also update the count to reflect the actual number of results after reranking
-                            enhanced['result']['count'] = len(updated_results)
-                        elif 'results' in result:
-                            enhanced['results'] = updated_results
-                            # Update count if it exists in the structure
-                            if 'count' in enhanced:
-                                enhanced['count'] = len(updated_results)
+                # Process the reranking results
+                if rerank_result.get("status") == "success":
+                    reranked_results = rerank_result.get("result", {}).get("results", [])
+
+
+                    # Update the original RAG results with reranking information
+                    # Create a mapping of content to reranked document for quick lookup
+                    # Use a more robust matching approach since content might be slightly different
+                    content_to_reranked = {}
+                    for doc in reranked_results:
+                        content = doc.get('content', '')
+                        if content:
+                            content_to_reranked[content] = doc
+
+                    # Use only the reranked results, not the original unmatched documents
+                    updated_results = []
+                    for reranked_doc in reranked_results:
+                        # Find the corresponding original document to preserve metadata
+                        reranked_content = reranked_doc.get('content', '')
+
+                        # Look for the original document with matching content
+                        original_match = None
+                        for original_item in rag_results:
+                            if isinstance(original_item, dict) and original_item.get('content', '') == reranked_content:
+                                original_match = original_item
+                                break
+
+                        if original_match:
+                            # Update the original document with the new reranking score
+                            updated_item = original_match.copy()
+                            updated_item['score'] = reranked_doc.get('score', original_match.get('score'))
+                            updated_item['reranked'] = True
+                            updated_results.append(updated_item)
                         else:
-                            # If single document was wrapped, return the updated list
-                            enhanced = updated_results[0] if len(updated_results) == 1 else updated_results
-
-                        enhanced['enhanced_at'] = time.time()
-                        enhanced['type'] = 'rag_enhanced_with_rerank'
-                        enhanced['enhancement_method'] = 'rerank_documents_via_mcp'
+                            # If no match found, use the reranked document as is
+                            updated_item = {
+                                'content': reranked_doc.get('content', ''),
+                                'metadata': reranked_doc.get('metadata', {}),
+                                'score': reranked_doc.get('score', 0.0),
+                                'reranked': True
+                            }
+                            updated_results.append(updated_item)
 
+                    # Create enhanced result with reranked data
+                    # Preserve the original structure of the result
+                    enhanced = result.copy()
+                    # Update the results based on the original structure
+                    if 'result' in result and isinstance(result['result'], list):
+                        enhanced['result'] = updated_results
+                    elif 'result' in result and isinstance(result['result'], dict) and 'results' in result['result']:
+                        enhanced['result']['results'] = updated_results
+                        # Also update the count to reflect the actual number of results after reranking
+                        enhanced['result']['count'] = len(updated_results)
+                    elif 'results' in result:
+                        enhanced['results'] = updated_results
+                        # Update count if it exists in the structure
+                        if 'count' in enhanced:
+                            enhanced['count'] = len(updated_results)
                     else:
-                        # Return an error instead of original results
-                        return {
-                            "error": f"RAG MCP reranking failed: {rerank_result.get('error', 'Unknown error')}",
-                            "enhanced_at": time.time(),
-                            "type": "enhancement_error"
-                        }
+                        # If single document was wrapped, return the updated list
+                        enhanced = updated_results[0] if len(updated_results) == 1 else updated_results
 
-                    return enhanced
-                except Exception as e:
-                    # Return an error indication
+                    enhanced['enhanced_at'] = time.time()
+                    enhanced['type'] = 'rag_enhanced_with_rerank'
+                    enhanced['enhancement_method'] = 'rerank_documents_via_mcp'
+
+                else:
+                    # Return an error instead of original results
                     return {
-                        "error": f"Error enhancing RAG result: {str(e)}",
+                        "error": f"RAG MCP reranking failed: {rerank_result.get('error', 'Unknown error')}",
                         "enhanced_at": time.time(),
                         "type": "enhancement_error"
                     }
-            else:
-                # Return an error indication when enhancement is not possible
-                return {
-                    "error": "Cannot enhance: result is not a valid dictionary",
-                    "enhanced_at": time.time(),
-                    "type": "enhancement_error"
-                }
 
-        def enhance_generic_result(result):
-            """Generic enhancement for other result types"""
-            if result and isinstance(result, dict):
-                enhanced = result.copy()
-                enhanced['enhanced_at'] = time.time()
-                enhanced['type'] = 'generic_enhanced'
                 return enhanced
-            else:
-                # Log the error when enhancement is not possible
-                logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance generic result: {result}")
-                # Return an error indication when enhancement is not possible
+            except Exception as e:
+                # Return an error indication
                 return {
-                    "error": "Cannot enhance: result is not a valid dictionary",
+                    "error": f"Error enhancing RAG result: {str(e)}",
                     "enhanced_at": time.time(),
                     "type": "enhancement_error"
                 }
+        else:
+            # Return an error indication when enhancement is not possible
+            return {
+                "error": "Cannot enhance: result is not a valid dictionary",
+                "enhanced_at": time.time(),
+                "type": "enhancement_error"
+            }
+
+    def enhance_generic_result(result):
+        """Generic enhancement for other result types"""
+        if result and isinstance(result, dict):
+            enhanced = result.copy()
+            enhanced['enhanced_at'] = time.time()
+            enhanced['type'] = 'generic_enhanced'
+            return enhanced
+        else:
+            # Log the error when enhancement is not possible
+            logger.warning(f"[PARALLEL_EXECUTION] Cannot enhance generic result: {result}")
+            # Return an error indication when enhancement is not possible
+            return {
+                "error": "Cannot enhance: result is not a valid dictionary",
+                "enhanced_at": time.time(),
+                "type": "enhancement_error"
+            }
+
+
+    def enhance(tool_call, result):
+        # Select enhancement function based on service type
+        service_id = tool_call.get("service_id", "").lower()
+        if 'sql' in service_id or 'database' in service_id:
+            enhancer_func = enhance_sql_result
+        elif 'search' in service_id or 'web' in service_id:
+            enhancer_func = enhance_search_result
+        elif 'dns' in service_id:
+            enhancer_func = enhance_dns_result
+        elif 'download' in service_id:
+            enhancer_func = enhance_download_result
+        elif 'rag' in service_id:
+            enhancer_func = enhance_rag_result
+        else:
+            enhancer_func = enhance_generic_result
+        enhanced = enhancer_func(result)
+        # Keep the result cache annotation so synthesis can tell cached data from fresh data
+        if isinstance(result, dict) and "cache" in result and isinstance(enhanced, dict):
+            enhanced.setdefault("cache", result["cache"])
+        return enhanced
+
+    return enhance
+
+
+def emit_tool_call_start(index: int, tool_call: Dict[str, Any]) -> None:
+    """Report that an MCP tool call started (for streamed runs)."""
+    emit_agent_event(
+        "tool_call_start",
+        index=index,
+        service_id=tool_call.get("service_id") or tool_call.get("service"),
+        action=tool_call.get("action") or tool_call.get("method")
+    )
+
+
+def emit_tool_call_end(index: int, tool_call: Dict[str, Any], result: Any, started: float) -> None:
+    """Report that an MCP tool call finished, with its status and time.monotonic() duration since started."""
+    status = result.get("status", "success") if isinstance(result, dict) else "success"
+    event = {
+        "index": index,
+        "service_id": tool_call.get("service_id") or tool_call.get("service"),
+        "action": tool_call.get("action") or tool_call.get("method"),
+        "status": status,
+        "duration_ms": round((time.monotonic() - started) * 1000, 1)
+    }
+    if status == "error":
+        event["error"] = result.get("error")
+    emit_agent_event("tool_call_end", **event)
+
+
+def parallel_execution_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Node to execute all requested MCP tool calls simultaneously in parallel and enhance them immediately.
+    This is the fifth step in the workflow.
+    """
+    import time
+    import concurrent.futures
+    import contextvars
+    from models.dedicated_mcp_model import DedicatedMCPModel
+
+
+    start_time = time.time()
+    logger.info("[PARALLEL_EXECUTION] Starting parallel execution of MCP tool calls with immediate enhancement")
+
+    try:
+        # Get the filtered tool calls and MCP servers from the state
+        tool_calls = state.get("mcp_tool_calls", [])
+        mcp_servers = state.get("mcp_servers", [])
+
+        logger.info(f"[PARALLEL_EXECUTION] Executing {len(tool_calls)} tool calls in parallel")
+
+        if not tool_calls:
+            logger.info("[PARALLEL_EXECUTION] No tool calls to execute, leaving state unchanged")
+            return {}
+
+        enhance_result = make_result_enhancer(state)
 
         # Create a function to execute and enhance a single tool call
-        def execute_and_enhance_single_call(tool_call):
+        def execute_and_enhance_single_call(index, tool_call):
+            call_started = time.monotonic()
+            emit_tool_call_start(index, tool_call)
             try:
-                mcp_model = DedicatedMCPModel()
+                mcp_model = get_agent_runtime().component(DedicatedMCPModel)
                 # Execute the single tool call against the available services
                 result = mcp_model.execute_mcp_tool_calls([tool_call], mcp_servers)
 
-                # Get the service ID to determine which enhancement function to use
-                service_id = tool_call.get("service_id", "").lower()
-
-                # Select enhancement function based on service type
-                if 'sql' in service_id or 'database' in service_id:
-                    enhancer_func = enhance_sql_result
-                elif 'search' in service_id or 'web' in service_id:
-                    enhancer_func = enhance_search_result
-                elif 'dns' in service_id:
-                    enhancer_func = enhance_dns_result
-                elif 'download' in service_id:
-                    enhancer_func = enhance_download_result
-                elif 'rag' in service_id:
-                    enhancer_func = enhance_rag_result
-                else:
-                    enhancer_func = enhance_generic_result
-
-                # Apply enhancement to the result
+                # Apply enhancement to the result based on the service type
                 original_result = result[0] if result and isinstance(result, list) and len(result) > 0 else result
-                enhanced_result = enhancer_func(original_result)
+                emit_tool_call_end(index, tool_call, original_result, call_started)
+                enhanced_result = enhance_result(tool_call, original_result)
 
                 return {
                     "tool_call": tool_call,
@@ -879,6 +838,7 @@ def parallel_execution_node(state: AgentState) -> AgentState:
                 }
             except Exception as e:
                 logger.error(f"[PARALLEL_EXECUTION] Failed to execute or enhance tool call {tool_call.get('service_id', 'unknown')}: {str(e)}")
+                emit_tool_call_end(index, tool_call, {"status": "error", "error": str(e)}, call_started)
                 return {
                     "tool_call": tool_call,
                     "result": None,
@@ -889,8 +849,11 @@ def parallel_execution_node(state: AgentState) -> AgentState:
         # Execute all tool calls in parallel with immediate enhancement using ThreadPoolExecutor
         results = []
         with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(tool_calls), 10)) as executor:
-            # Submit all tasks
-            future_to_call = {executor.submit(execute_and_enhance_single_call, call): call for call in tool_calls}
+            # Submit all tasks; each runs in a copy of this context so it can report progress events
+            future_to_call = {
+                executor.submit(contextvars.copy_context().run, execute_and_enhance_single_call, index, call): call
+                for index, call in enumerate(tool_calls)
+            }
 
             # Collect results as they complete
             for future in concurrent.futures.as_completed(future_to_call):
@@ -914,7 +877,6 @@ def parallel_execution_node(state: AgentState) -> AgentState:
 
         # Merge results back into the state
         result_state = {
-            **state,
             "mcp_results": successful_results,
             "mcp_execution_errors": errors
         }
@@ -927,7 +889,6 @@ def parallel_execution_node(state: AgentState) -> AgentState:
 
         # Return state with error information
         result_state = {
-            **state,
             "error_message": error_msg,
             "mcp_results": [],
             "mcp_execution_errors": [{"error": str(e), "status": "failed"}]
@@ -936,7 +897,7 @@ def parallel_execution_node(state: AgentState) -> AgentState:
         return result_state
 
 
-def enhanced_results_collection_node(state: AgentState) -> AgentState:
+def enhanced_results_collection_node(state: AgentState) -> Dict[str, Any]:
     """
     Node to collect enhanced results and conditionally generate a response based on environment settings.
     This is the seventh step in the workflow.
@@ -996,7 +957,6 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
             logger.info(f"[ENHANCED_RESULTS_COLLECTION] Direct response completed in {elapsed_time:.2f}s")
 
             result_state = {
-                **state,
                 "final_answer": str(final_response),
                 "synthesized_result": str(final_response),
                 "can_answer": True,
@@ -1017,7 +977,6 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
 
                 # Return error response
                 result_state = {
-                    **state,
                     "error_message": error_msg,
                     "final_answer": f"Error: {error_msg}",
                     "can_answer": False
@@ -1027,7 +986,7 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
 
             # Format ALL enhanced results to send to the LLM (no truncation)
             results_text = "\n".join([
-                f"- {res.get('type', 'result')}: {str(res)}"
+                f"- {res.get('type', 'result')}{describe_cache_status(res)}: {str(res)}"
                 for res in enhanced_results  # Include ALL results, no truncation
             ])
 
@@ -1043,19 +1002,19 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
 
             # Call the response generation LLM
             try:
-                response_generator = ResponseGenerator()
+                response_generator = get_agent_runtime().component(ResponseGenerator)
                 llm_response = response_generator.generate_response(
                     user_request=user_query,
                     informational_content=results_text,
                     previous_signals=[],  # No previous signals at this stage
-                    previous_tool_calls=[]  # No previous tool calls at this stage
+                    previous_tool_calls=[],  # No previous tool calls at this stage
+                    on_token=token_emitter()  # Streams the answer when the run is streamed
                 )
 
                 elapsed_time = time.time() - start_time
                 logger.info(f"[ENHANCED_RESULTS_COLLECTION] LLM response generation completed in {elapsed_time:.2f}s")
 
                 result_state = {
-                    **state,
                     "final_answer": llm_response,
                     "synthesized_result": llm_response,
                     "can_answer": True,
@@ -1069,7 +1028,6 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
 
                 # Return error response but still include the enhanced results
                 result_state = {
-                    **state,
                     "error_message": error_msg,
                     "final_answer": f"Response generation failed, but here are the enhanced results: {str(enhanced_results[:3])}",  # Show first 3 results
                     "synthesized_result": str(enhanced_results),
@@ -1086,7 +1044,6 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
 
         # Return state with error information
         result_state = {
-            **state,
             "error_message": error_msg,
             "final_answer": f"Error: {error_msg}",
             "can_answer": False
@@ -1095,31 +1052,69 @@ def enhanced_results_collection_node(state: AgentState) -> AgentState:
         return result_state
 
 
-def create_enhanced_agent_graph():
+def with_request_deadline(name: str, node):
+    """
+    Wrap a node so it runs with the request deadline (configurable "deadline", set by
+    run_enhanced_agent and the other runners) as the current deadline (utils.deadline), and
+    raises DeadlineExceeded instead of starting once the deadline has passed (async nodes are
+    also cancelled when it passes). MCP and LLM calls made by the node then take their timeouts
+    from the time left.
+    """
+    def node_deadline(config: Optional[RunnableConfig]) -> Optional[float]:
+        return ((config or {}).get("configurable") or {}).get("deadline")
+
+    if asyncio.iscoroutinefunction(node):
+        async def run_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+            with deadline_scope(node_deadline(config)):
+                return await run_before_deadline(node(state), what=f"the {name} node")
+    else:
+        def run_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+            with deadline_scope(node_deadline(config)):
+                check_deadline(f"the {name} node")
+                return node(state)
+    run_node.__name__ = getattr(node, "__name__", name)
+    return run_node
+
+
+def create_enhanced_agent_graph(nodes: Optional[Dict[str, Any]] = None):
     """
     Creates the LangGraph workflow with the input reception, MCP registry call, MCP model query, planning/filtering, parallel execution, parallel enhancement, and enhanced results collection nodes.
+
+    Args:
+        nodes: Optional node implementations by node name, replacing the sync defaults (used by the async graph)
     """
+    nodes = {
+        "input_reception": input_reception_node,
+        "mcp_registry_call": mcp_registry_call_node,
+        "mcp_model_query": mcp_model_query_node,
+        "planning_and_filtering": planning_and_filtering_node,
+        "parallel_execution": parallel_execution_node,
+        "enhanced_results_collection": enhanced_results_collection_node,
+        **(nodes or {})
+    }
+    nodes = {name: with_request_deadline(name, node) for name, node in nodes.items()}
+
     # Create a simple graph as a starting point
     workflow = StateGraph(AgentState)
 
     # Add the input reception node to the workflow
-    workflow.add_node("input_reception", input_reception_node)
+    workflow.add_node("input_reception", nodes["input_reception"])
 
     # Add the MCP registry call node to the workflow
-    workflow.add_node("mcp_registry_call", mcp_registry_call_node)
+    workflow.add_node("mcp_registry_call", nodes["mcp_registry_call"])
 
     # Add the MCP model query node to the workflow
-    workflow.add_node("mcp_model_query", mcp_model_query_node)
+    workflow.add_node("mcp_model_query", nodes["mcp_model_query"])
 
     # Add the planning and filtering node to the workflow
-    workflow.add_node("planning_and_filtering", planning_and_filtering_node)
+    workflow.add_node("planning_and_filtering", nodes["planning_and_filtering"])
 
     # Add the parallel execution node to the workflow
-    workflow.add_node("parallel_execution", parallel_execution_node)
+    workflow.add_node("parallel_execution", nodes["parallel_execution"])
 
 
     # Add the enhanced results collection node to the workflow
-    workflow.add_node("enhanced_results_collection", enhanced_results_collection_node)
+    workflow.add_node("enhanced_results_collection", nodes["enhanced_results_collection"])
 
     # Set the entry point to the input reception node
     workflow.set_entry_point("input_reception")
@@ -1145,13 +1140,33 @@ def create_enhanced_agent_graph():
     return workflow.compile()
 
 
+def measure_state_size(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Measure the serialized size of each state field.
+
+    Args:
+        state: Agent state after a node
+
+    Returns:
+        Dictionary with total_bytes and fields (field name -> {"bytes", and "items" for lists})
+    """
+    fields = {}
+    for key, value in state.items():
+        size = {"bytes": len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))}
+        if isinstance(value, list):
+            size["items"] = len(value)
+        fields[key] = size
+    return {"total_bytes": sum(size["bytes"] for size in fields.values()), "fields": fields}
+
+
 class AgentMonitoringCallback:
     """
     Callback class to monitor and log the execution of the LangGraph agent
     """
-    def __init__(self):
+    def __init__(self, track_state_size: bool = AGENT_STATE_SIZE_LOGGING):
         self.execution_log = []
         self.start_time = None
+        self.track_state_size = track_state_size
 
     def on_graph_start(self, state: AgentState):
         self.start_time = time.time()
@@ -1169,6 +1184,24 @@ class AgentMonitoringCallback:
         self.execution_log.append(log_entry)
         logger.info(f"[GRAPH START] Processing request: {state['user_request']}")
 
+    def on_node_end(self, node: str, state: AgentState):
+        """Record and log the size of every state field after a node (when state size tracking is on)"""
+        if not self.track_state_size:
+            return
+        size = measure_state_size(state)
+        self.execution_log.append({
+            "timestamp": datetime.now(),
+            "event": "node_end",
+            "node": node,
+            "state_size": size
+        })
+        largest = sorted(size["fields"].items(), key=lambda item: item[1]["bytes"], reverse=True)
+        fields = ", ".join(
+            f"{key}={field['bytes']}B" + (f"/{field['items']} items" if "items" in field else "")
+            for key, field in largest if field["bytes"] > 2
+        )
+        logger.info(f"[STATE_SIZE] After {node}: {size['total_bytes']} bytes ({fields})")
+
     def on_graph_end(self, state: AgentState):
         total_time = time.time() - self.start_time if self.start_time else 0
         log_entry = {
@@ -1192,24 +1225,24 @@ class AgentMonitoringCallback:
         logger.info(f"[GRAPH END] Completed in {total_time:.2f}s, retries: {state.get('retry_count', 0)}")
 
 
-def run_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = None, disable_sql_blocking: bool = False, disable_databases: bool = False, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None) -> Dict[str, Any]:
-    """
-    Function to run the enhanced agent with a user request.
-    This serves as an entry point that will work with the reconstructed graph.
+def stream_agent_graph(graph, initial_state: AgentState, config: Dict[str, Any],
+                       callback_handler: AgentMonitoringCallback) -> Dict[str, Any]:
     """
-    # Import the registry URL from config if not provided
-    from config.settings import MCP_REGISTRY_URL
-    effective_registry_url = registry_url or MCP_REGISTRY_URL
+    Run the graph, reporting the state after every node to the callback.
 
-    # Log the user_request at the start
-    logger.info(f"[RUN_ENHANCED_AGENT] Initial user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
-    logger.info(f"[RUN_ENHANCED_AGENT] Type of user_request: {type(user_request)}")
-    logger.info(f"[RUN_ENHANCED_AGENT] Repr of user_request: {repr(user_request)}")
+    Returns:
+        The final state (same as graph.invoke)
+    """
+    events = AgentEventStream(initial_state, callback_handler)
+    for mode, chunk in graph.stream(initial_state, config=config, stream_mode=["updates", "values"]):
+        events.feed(mode, chunk)
+    return events.finish()
 
-    # Create the graph
-    graph = create_enhanced_agent_graph()
 
-    # Define initial state for the agent
+def build_initial_state(user_request: str, mcp_servers: List[Dict[str, Any]] = None, disable_sql_blocking: bool = False, disable_databases: bool = False, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None) -> AgentState:
+    """
+    Build the initial state for one agent run (shared by run_enhanced_agent and arun_enhanced_agent).
+    """
     initial_state: AgentState = {
         "user_request": user_request,
         "mcp_queries": [],
@@ -1241,7 +1274,7 @@ def run_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = No
         "query_type": "initial",
         "database_name": "",
         "previous_sql_queries": [],
-        "registry_url": effective_registry_url,
+        "registry_url": registry_url,
         "discovered_services": [],
         "mcp_service_results": [],
         "use_mcp_results": False,
@@ -1260,6 +1293,106 @@ def run_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = No
         "custom_system_prompt": custom_system_prompt,
         "skip_final_response_generation": skip_final_response_generation
     }
+
+    return initial_state
+
+
+def build_failed_state(user_request: str, error_msg: str, mcp_servers: List[Dict[str, Any]] = None, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None) -> Dict[str, Any]:
+    """
+    Build the final state returned when the graph itself fails.
+    """
+    return {
+        "user_request": user_request,
+        "mcp_queries": [],
+        "mcp_results": [],
+        "synthesized_result": "",
+        "can_answer": False,
+        "iteration_count": 0,
+        "max_iterations": 3,
+        "final_answer": f"Error: The system encountered an issue while processing your request: {error_msg}",
+        "error_message": error_msg,
+        "mcp_servers": mcp_servers or [],
+        "refined_queries": [],
+        "failure_reason": error_msg,
+        # Compatibility fields
+        "schema_dump": {},
+        "sql_query": "",
+        "db_results": [],
+        "all_db_results": {},
+        "table_to_db_mapping": {},
+        "table_to_real_db_mapping": {},
+        "response_prompt": "",
+        "messages": [],
+        "validation_error": error_msg,
+        "retry_count": 0,
+        "execution_error": error_msg,
+        "sql_generation_error": error_msg,
+        "disable_sql_blocking": False,
+        "disable_databases": False,
+        "query_type": "initial",
+        "database_name": "",
+        "previous_sql_queries": [],
+        "registry_url": registry_url,
+        "discovered_services": [],
+        "mcp_service_results": [],
+        "use_mcp_results": False,
+        "mcp_tool_calls": [],
+        "mcp_capable_response": "",
+        "return_mcp_results_to_llm": False,
+        "is_final_answer": False,
+        "rag_documents": [],
+        "rag_context": "",
+        "use_rag_flag": False,
+        "rag_relevance_score": 0.0,
+        "rag_query": "",
+        "rag_response": "",
+        "custom_system_prompt": custom_system_prompt,
+        "skip_final_response_generation": skip_final_response_generation
+    }
+
+
+def format_agent_result(user_request: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the response returned to callers from the final state.
+    """
+    return {
+        "original_request": user_request,
+        "final_answer": result.get("final_answer"),
+        "can_answer": result.get("can_answer"),
+        "iteration_count": result.get("iteration_count"),
+        "mcp_tool_calls": result.get("mcp_tool_calls"),
+        "is_final_answer": result.get("is_final_answer"),
+        "has_sufficient_info": result.get("has_sufficient_info"),
+        "confidence_level": result.get("confidence_level")
+    }
+
+
+def run_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = None, disable_sql_blocking: bool = False, disable_databases: bool = False, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Function to run the enhanced agent with a user request.
+    This serves as an entry point that will work with the reconstructed graph.
+
+    Args:
+        deadline: Absolute time (Unix seconds) by which the request must be answered, e.g. from the
+            X-Request-Deadline header (see utils.deadline); None for no deadline
+    """
+    # Import the registry URL from config if not provided
+    from config.settings import MCP_REGISTRY_URL
+    effective_registry_url = registry_url or MCP_REGISTRY_URL
+
+    # Log the user_request at the start
+    logger.info(f"[RUN_ENHANCED_AGENT] Initial user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
+    logger.info(f"[RUN_ENHANCED_AGENT] Type of user_request: {type(user_request)}")
+    logger.info(f"[RUN_ENHANCED_AGENT] Repr of user_request: {repr(user_request)}")
+
+    # Get the graph (compiled once per process)
+    graph = get_agent_runtime().graph(create_enhanced_agent_graph)
+
+    # Define initial state for the agent
+    initial_state = build_initial_state(
+        user_request, mcp_servers, disable_sql_blocking, disable_databases,
+        custom_system_prompt, skip_final_response_generation, effective_registry_url
+    )
     
     # DEBUG logging for initial state
     logger.debug(f"DEBUG: Initial state created with custom_system_prompt: {initial_state.get('custom_system_prompt')}")
@@ -1270,69 +1403,59 @@ def run_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = No
 
     # Run the graph with a recursion limit to prevent infinite loops
     try:
-        result = graph.invoke(initial_state, config={"configurable": {"thread_id": "default"}, "recursion_limit": 50})
+        result = stream_agent_graph(
+            graph, initial_state, {"configurable": {"thread_id": "default", "deadline": deadline}, "recursion_limit": 50},
+            callback_handler
+        )
     except Exception as e:
         # If we hit a recursion limit or other error, return a meaningful response
         error_msg = str(e)
         logger.error(f"Error in graph execution: {error_msg}")
-        result = {
-            "user_request": user_request,
-            "mcp_queries": [],
-            "mcp_results": [],
-            "synthesized_result": "",
-            "can_answer": False,
-            "iteration_count": 0,
-            "max_iterations": 3,
-            "final_answer": f"Error: The system encountered an issue while processing your request: {error_msg}",
-            "error_message": error_msg,
-            "mcp_servers": mcp_servers or [],
-            "refined_queries": [],
-            "failure_reason": error_msg,
-            # Compatibility fields
-            "schema_dump": {},
-            "sql_query": "",
-            "db_results": [],
-            "all_db_results": {},
-            "table_to_db_mapping": {},
-            "table_to_real_db_mapping": {},
-            "response_prompt": "",
-            "messages": [],
-            "validation_error": error_msg,
-            "retry_count": 0,
-            "execution_error": error_msg,
-            "sql_generation_error": error_msg,
-            "disable_sql_blocking": False,
-            "disable_databases": False,
-            "query_type": "initial",
-            "database_name": "",
-            "previous_sql_queries": [],
-            "registry_url": effective_registry_url,
-            "discovered_services": [],
-            "mcp_service_results": [],
-            "use_mcp_results": False,
-            "mcp_tool_calls": [],
-            "mcp_capable_response": "",
-            "return_mcp_results_to_llm": False,
-            "is_final_answer": False,
-            "rag_documents": [],
-            "rag_context": "",
-            "use_rag_flag": False,
-            "rag_relevance_score": 0.0,
-            "rag_query": "",
-            "rag_response": "",
-            "custom_system_prompt": custom_system_prompt,
-            "skip_final_response_generation": skip_final_response_generation
-        }
+        result = build_failed_state(
+            user_request, error_msg, mcp_servers, custom_system_prompt,
+            skip_final_response_generation, effective_registry_url
+        )
 
     callback_handler.on_graph_end(result)
 
-    return {
-        "original_request": user_request,
-        "final_answer": result.get("final_answer"),
-        "can_answer": result.get("can_answer"),
-        "iteration_count": result.get("iteration_count"),
-        "mcp_tool_calls": result.get("mcp_tool_calls"),
-        "is_final_answer": result.get("is_final_answer"),
-        "has_sufficient_info": result.get("has_sufficient_info"),
-        "confidence_level": result.get("confidence_level")
-    }
\ No newline at end of file
+    return format_agent_result(user_request, result)
+
+
+def stream_enhanced_agent(user_request: str, mcp_servers: List[Dict[str, Any]] = None, disable_sql_blocking: bool = False, disable_databases: bool = False, custom_system_prompt: Optional[str] = None, skip_final_response_generation: bool = False, registry_url: str = None, deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Run the enhanced agent like run_enhanced_agent, yielding progress events as it goes
+    (see langgraph_agent.agent_events). The last event is always "result", carrying the same
+    dictionary run_enhanced_agent returns.
+    """
+    from config.settings import MCP_REGISTRY_URL
+    effective_registry_url = registry_url or MCP_REGISTRY_URL
+
+    logger.info(f"[STREAM_ENHANCED_AGENT] Initial user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
+
+    graph = get_agent_runtime().graph(create_enhanced_agent_graph)
+    initial_state = build_initial_state(
+        user_request, mcp_servers, disable_sql_blocking, disable_databases,
+        custom_system_prompt, skip_final_response_generation, effective_registry_url
+    )
+
+    callback_handler = AgentMonitoringCallback()
+    callback_handler.on_graph_start(initial_state)
+    events = AgentEventStream(initial_state, callback_handler)
+    config = {"configurable": {"thread_id": "default", "stream_tokens": True, "deadline": deadline}, "recursion_limit": 50}
+
+    try:
+        for mode, chunk in graph.stream(initial_state, config=config, stream_mode=AGENT_EVENT_STREAM_MODES):
+            yield from events.feed(mode, chunk)
+        result = events.finish()
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Error in streamed graph execution: {error_msg}")
+        yield {"event": "error", "error": error_msg}
+        result = build_failed_state(
+            user_request, error_msg, mcp_servers, custom_system_prompt,
+            skip_final_response_generation, effective_registry_url
+        )
+
+    callback_handler.on_graph_end(result)
+
+    yield {"event": "result", "result": format_agent_result(user_request, result)}
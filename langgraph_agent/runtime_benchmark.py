@@ -0,0 +1,121 @@
+"""
+Agent runtime overhead benchmark.
+Measures the setup work run_enhanced_agent does per request before any LLM or MCP call:
+compiling the graph, one DedicatedMCPModel for planning plus one per tool call, and one
+ResponseGenerator. Compares building everything per request (AGENT_RUNTIME_REUSE=false, how
+the agent worked before the runtime) with the shared runtime. No network calls are made.
+
+Usage:
+    python -m langgraph_agent.runtime_benchmark --requests 20 --tool-calls 3
+    python -m langgraph_agent.runtime_benchmark --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from langgraph_agent.agent_runtime import AgentRuntime
+
+
+def _components() -> Tuple[List[Tuple[str, Callable]], Dict[str, str]]:
+    """Import the component classes, skipping (and reporting) any that cannot load or be created here."""
+    available, unavailable = [], {}
+    try:
+        from models.dedicated_mcp_model import DedicatedMCPModel
+        DedicatedMCPModel()  # e.g. no API key configured for its LLM provider
+        available.append(("DedicatedMCPModel", DedicatedMCPModel))
+    except Exception as e:
+        unavailable["DedicatedMCPModel"] = f"{type(e).__name__}: {e}"
+    try:
+        from models.response_generator import ResponseGenerator
+        ResponseGenerator()
+        available.append(("ResponseGenerator", ResponseGenerator))
+    except Exception as e:
+        unavailable["ResponseGenerator"] = f"{type(e).__name__}: {e}"
+    return available, unavailable
+
+
+def _request(runtime: AgentRuntime, builder: Callable, components: List[Tuple[str, Callable]], tool_calls: int) -> None:
+    """Do the setup work of one agent run."""
+    runtime.graph(builder)
+    for name, factory in components:
+        for _ in range(1 + tool_calls if name == "DedicatedMCPModel" else 1):
+            runtime.component(factory)
+
+
+def run_runtime_benchmark(num_requests: int = 20, tool_calls: int = 3) -> Dict[str, Any]:
+    """
+    Time the per-request setup with and without reuse.
+
+    Args:
+        num_requests: Agent runs to simulate in each mode
+        tool_calls: Tool calls per run (each one used its own DedicatedMCPModel)
+
+    Returns:
+        Dictionary with the configuration, one report per mode and the per-request saving
+    """
+    from langgraph_agent.langgraph_agent import create_enhanced_agent_graph
+
+    components, unavailable = _components()
+    reports = {}
+    for mode, reuse in (("per_request", False), ("shared_runtime", True)):
+        runtime = AgentRuntime(reuse=reuse)
+        timings = []
+        for _ in range(num_requests):
+            started = time.perf_counter()
+            _request(runtime, create_enhanced_agent_graph, components, tool_calls)
+            timings.append(time.perf_counter() - started)
+        stats = runtime.stats()
+        reports[mode] = {
+            "requests": num_requests,
+            "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+            "first_ms": round(timings[0] * 1000, 3),
+            "steady_ms": round(sum(timings[1:]) / max(len(timings) - 1, 1) * 1000, 3),
+            "builds": stats["builds"],
+            "build_ms": stats["build_ms"]
+        }
+    return {
+        "config": {"requests": num_requests, "tool_calls": tool_calls},
+        "components": [name for name, _ in components],
+        "unavailable": unavailable,
+        "modes": reports,
+        "saved_ms_per_request": round(reports["per_request"]["steady_ms"] - reports["shared_runtime"]["steady_ms"], 3)
+    }
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """Human-readable comparison table."""
+    lines = [f"{'mode':<16} {'first ms':>10} {'steady ms':>10} {'mean ms':>10}  builds"]
+    for name, report in summary["modes"].items():
+        builds = ", ".join(f"{component}={count}" for component, count in report["builds"].items())
+        lines.append(f"{name:<16} {report['first_ms']:>10} {report['steady_ms']:>10} {report['mean_ms']:>10}  {builds}")
+    lines.append(f"Setup time saved per request: {summary['saved_ms_per_request']} ms")
+    for name, error in summary["unavailable"].items():
+        lines.append(f"Skipped {name}: {error}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-request setup overhead of the agent with and without the shared runtime')
+    parser.add_argument('--requests', type=int, default=20, help="Agent runs to simulate per mode")
+    parser.add_argument('--tool-calls', type=int, default=3, help="Tool calls per run")
+    parser.add_argument('--json', action='store_true', help="Print the full summary as JSON")
+    args = parser.parse_args()
+
+    summary = run_runtime_benchmark(num_requests=args.requests, tool_calls=args.tool_calls)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,14 +37,16 @@ from config.settings import (
     DEFAULT_LLM_HOSTNAME,
     DEFAULT_LLM_PORT,
     DEFAULT_LLM_API_PATH,
-    FORCE_DEFAULT_MODEL_FOR_ALL,
-    MCP_SERVICE_CALL_TIMEOUT
+    FORCE_DEFAULT_MODEL_FOR_ALL
 )
 from utils.prompt_manager import PromptManager
 from utils.ssh_keep_alive import SSHKeepAliveContext
+from utils.mcp_result_cache import get_mcp_result_cache
+from utils.mcp_resilience import get_resilient_caller
+from utils.planner_cache import get_planner_cache
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
+from utils.deadline_llm import DeadlineChatOpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -153,14 +155,14 @@ class DedicatedMCPModel:
 
             # Create ChatOpenAI instance with appropriate configuration
             if provider and provider.lower() == 'openai':
-                self.llm = ChatOpenAI(
+                self.llm = DeadlineChatOpenAI(
                     model=model,
                     temperature=0.1,
                     openai_api_key=OPENAI_API_KEY,
                     base_url=base_url
                 )
             elif provider and provider.lower() == 'deepseek':
-                self.llm = ChatOpenAI(
+                self.llm = DeadlineChatOpenAI(
                     model=model,
                     temperature=0.1,
                     openai_api_key=DEEPSEEK_API_KEY,
@@ -168,7 +170,7 @@ class DedicatedMCPModel:
                 )
             else:
                 # Default to generic ChatOpenAI for other providers
-                self.llm = ChatOpenAI(
+                self.llm = DeadlineChatOpenAI(
                     model=model,
                     temperature=0.1,
                     base_url=base_url
@@ -884,8 +886,12 @@ class DedicatedMCPModel:
             # Execute the tool call - this is a simplified implementation
             # In a real implementation, you would need to make actual calls to the MCP services
             try:
-                # Simulate calling the MCP service
-                result = self._call_mcp_service(service, action, parameters)
+                # Idempotent actions are served from the result cache when the service allows it;
+                # calls go through the instance's circuit breaker and may fail over or be hedged
+                result = get_mcp_result_cache().call(
+                    service, action, parameters,
+                    lambda: get_resilient_caller().call(service, action, parameters, self._call_mcp_service, mcp_services)
+                )
                 results.append(result)
             except Exception as e:
                 logger.error(f"Error calling MCP service {service_id} with DedicatedMCPModel: {str(e)}")
@@ -921,204 +927,12 @@ class DedicatedMCPModel:
     def _call_mcp_service(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Actually call an MCP service.
-        Determines the protocol to use (HTTP, TCP socket, etc.) based on service metadata
-        and makes the appropriate network call.
+        The protocol (HTTP, HTTP/2, framed or one-shot TCP) comes from the service metadata; calls go
+        through the process-wide MCPTransport, which reuses connections and records per-call metrics.
         """
-        import socket
-        import json
-        import requests
-        from datetime import datetime
-
-
-        # Determine the protocol to use based on service metadata or default to HTTP
-        service_protocol = service.get('metadata', {}).get('protocol', 'http')
-        service_host = service['host']
-        service_port = service['port']
-
-        try:
-            if service_protocol.lower() == 'http':
-                # Use HTTP protocol to call the service
-                base_url = f"http://{service_host}:{service_port}"
-
-                # Determine the endpoint based on the action
-                # This is a convention - you might need to adjust based on your actual service implementation
-                if action:
-                    endpoint = f"{base_url}/{action.lstrip('/')}"  # Ensure action doesn't start with extra slash
-                else:
-                    # If no action is specified, use the base URL directly
-                    endpoint = base_url
-
-                # Prepare the request payload
-                payload = {
-                    "action": action,
-                    "parameters": parameters,
-                    "timestamp": datetime.utcnow().isoformat() + "Z"
-                }
-
-                # Make the HTTP request
-                response = requests.post(
-                    endpoint,
-                    json=payload,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=MCP_SERVICE_CALL_TIMEOUT  # Configurable timeout
-                )
-
-                if response.status_code == 200:
-                    # Parse the response
-                    result_data = response.json()
-                    return {
-                        "service_id": service['id'],
-                        "action": action,
-                        "parameters": parameters,
-                        "status": "success",
-                        "result": result_data,
-                        "timestamp": datetime.utcnow().isoformat() + "Z"
-                    }
-                else:
-                    return {
-                        "service_id": service['id'],
-                        "action": action,
-                        "parameters": parameters,
-                        "status": "error",
-                        "error": f"HTTP {response.status_code}: {response.text}",
-                        "timestamp": datetime.utcnow().isoformat() + "Z"
-                    }
-
-            elif service_protocol.lower() == 'tcp':
-                # Use TCP socket to call the service
-                # Create a socket and connect to the service
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                    sock.settimeout(MCP_SERVICE_CALL_TIMEOUT)  # Configurable timeout
-                    sock.connect((service_host, service_port))
-
-                    # Prepare the request payload
-                    request_payload = {
-                        "service_id": service['id'],
-                        "action": action,
-                        "parameters": parameters,
-                        "timestamp": datetime.utcnow().isoformat() + "Z"
-                    }
-
-                    # Send the request as JSON
-                    request_json = json.dumps(request_payload)
-                    sock.sendall(request_json.encode('utf-8'))
-
-                    # Receive the response
-                    response_data = sock.recv(4096)
-                    response_json = response_data.decode('utf-8')
-
-                    # Parse the response
-                    result_data = json.loads(response_json)
-
-                    return {
-                        "service_id": service['id'],
-                        "action": action,
-                        "parameters": parameters,
-                        "status": "success",
-                        "result": result_data,
-                        "timestamp": datetime.utcnow().isoformat() + "Z"
-                    }
-            else:
-                # Default to HTTP if protocol is not specified or recognized
-                logger.warning(f"Unknown protocol '{service_protocol}' for service {service['id']}, defaulting to HTTP")
-                base_url = f"http://{service_host}:{service_port}"
-
-                # Determine the endpoint based on the action
-                if action:
-                    endpoint = f"{base_url}/{action.lstrip('/')}"  # Ensure action doesn't start with extra slash
-                else:
-                    # If no action is specified, use the base URL directly
-                    endpoint = base_url
-
-                # Prepare the request payload
-                payload = {
-                    "action": action,
-                    "parameters": parameters,
-                    "timestamp": datetime.utcnow().isoformat() + "Z"
-                }
-
-                # Make the HTTP request
-                response = requests.post(
-                    endpoint,
-                    json=payload,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=MCP_SERVICE_CALL_TIMEOUT  # Configurable timeout
-                )
+        from utils.mcp_transport import get_mcp_transport
 
-                if response.status_code == 200:
-                    # Parse the response
-                    result_data = response.json()
-                    return {
-                        "service_id": service['id'],
-                        "action": action,
-                        "parameters": parameters,
-                        "status": "success",
-                        "result": result_data,
-                        "timestamp": datetime.utcnow().isoformat() + "Z"
-                    }
-                else:
-                    return {
-                        "service_id": service['id'],
-                        "action": action,
-                        "parameters": parameters,
-                        "status": "error",
-                        "error": f"HTTP {response.status_code}: {response.text}",
-                        "timestamp": datetime.utcnow().isoformat() + "Z"
-                    }
-        except requests.exceptions.Timeout:
-            return {
-                "service_id": service['id'],
-                "action": action,
-                "parameters": parameters,
-                "status": "error",
-                "error": "Request timed out",
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
-        except requests.exceptions.RequestException as e:
-            return {
-                "service_id": service['id'],
-                "action": action,
-                "parameters": parameters,
-                "status": "error",
-                "error": f"HTTP request failed: {str(e)}",
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
-        except socket.timeout:
-            return {
-                "service_id": service['id'],
-                "action": action,
-                "parameters": parameters,
-                "status": "error",
-                "error": "TCP request timed out",
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
-        except socket.error as e:
-            return {
-                "service_id": service['id'],
-                "action": action,
-                "parameters": parameters,
-                "status": "error",
-                "error": f"TCP connection failed: {str(e)}",
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
-        except json.JSONDecodeError as e:
-            return {
-                "service_id": service['id'],
-                "action": action,
-                "parameters": parameters,
-                "status": "error",
-                "error": f"Invalid JSON response: {str(e)}",
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
-        except Exception as e:
-            return {
-                "service_id": service['id'],
-                "action": action,
-                "parameters": parameters,
-                "status": "error",
-                "error": f"Unexpected error calling MCP service: {str(e)}",
-                "timestamp": datetime.utcnow().isoformat() + "Z"
-            }
+        return get_mcp_transport().call(service, action, parameters)
 
     def evaluate_if_can_answer(self, user_request: str, synthesized_result: str) -> bool:
         """
@@ -1253,6 +1067,7 @@ class DedicatedMCPModel:
     def analyze_request_for_mcp_services(self, user_request: str, mcp_servers: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Analyze the user request to determine what MCP services might be needed.
+        Plans of repeated requests are reused from the planner cache (see utils/planner_cache.py).
 
         Args:
             user_request: The user's natural language request
@@ -1261,6 +1076,14 @@ class DedicatedMCPModel:
         Returns:
             Dictionary containing suggested queries or actions to take
         """
+        return get_planner_cache().plan(
+            self.system_prompt_template, mcp_servers, user_request,
+            lambda: self._analyze_request_for_mcp_services(user_request, mcp_servers),
+            model=self._planner_model_name(), cacheable=self._is_plan
+        )
+
+    def _analyze_request_for_mcp_services(self, user_request: str, mcp_servers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Ask the LLM which MCP services the request needs (uncached)."""
         logger.info(f"[ANALYZE_REQUEST_FOR_MCP_SERVICES] Analyzing request with DedicatedMCPModel: '{user_request}' (length: {len(user_request) if user_request else 0})")
         logger.info(f"[ANALYZE_REQUEST_FOR_MCP_SERVICES] Method received user_request: '{user_request}' (length: {len(user_request) if user_request else 0})")
 
@@ -1281,7 +1104,8 @@ class DedicatedMCPModel:
             logger.info(f"[BEFORE_USER_REQUEST_REPLACE] Current temp_system_prompt has {temp_system_prompt.count('{user_request}')} occurrences of {{user_request}}")
             temp_system_prompt = temp_system_prompt.replace('{user_request}', user_request)  # Use the actual user request
             logger.info(f"[AFTER_USER_REQUEST_REPLACE] Replaced {{user_request}} with '{user_request}', now checking result")
-            logger.info(f"[AFTER_USER_REQUEST_REPLACE] Result contains empty user request section: {'[Initial User Request]\\n\\n[Technical Information]' in temp_system_prompt or '[Initial User Request]\\n\\n[' in temp_system_prompt}")
+            has_empty_request_section = '[Initial User Request]\n\n[' in temp_system_prompt
+            logger.info(f"[AFTER_USER_REQUEST_REPLACE] Result contains empty user request section: {has_empty_request_section}")
 
             temp_system_prompt = temp_system_prompt.replace('{previous_tool_calls}', '[{{}}]')  # Empty array with escaped braces
             temp_system_prompt = temp_system_prompt.replace('{previous_signals}', '[{{}}]')  # Empty array with escaped braces
@@ -1574,6 +1398,16 @@ class DedicatedMCPModel:
             # Return a default structure in case of error
             return {"suggested_queries": [], "analysis": f"Error analyzing request: {error_msg}"}
 
+    def _planner_model_name(self) -> str:
+        """Identity of the planner LLM, so cached plans are not shared between models."""
+        model = getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', None) or ''
+        return f"{type(self.llm).__name__}:{model}"
+
+    @staticmethod
+    def _is_plan(result: Any) -> bool:
+        """Whether a planner result is a parsed plan, as opposed to a raw-text or error fallback."""
+        return isinstance(result, dict) and any(key in result for key in ("tool_calls", "is_final_answer", "response"))
+
     def execute_single_query(self, query: str, mcp_servers: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Execute a single query against the MCP server pool.
@@ -1712,6 +1546,7 @@ class DedicatedMCPModel:
     def analyze_request_for_mcp_services_with_custom_prompt(self, user_request: str, mcp_servers: List[Dict[str, Any]], custom_prompt: str) -> Dict[str, Any]:
         """
         Analyze the user request using a custom system prompt.
+        Plans are cached like those of analyze_request_for_mcp_services, keyed by the custom prompt.
 
         Args:
             user_request: The user's natural language request
@@ -1721,6 +1556,14 @@ class DedicatedMCPModel:
         Returns:
             Dictionary containing suggested queries or actions to take
         """
+        return get_planner_cache().plan(
+            custom_prompt, mcp_servers, user_request,
+            lambda: self._analyze_request_for_mcp_services_with_custom_prompt(user_request, mcp_servers, custom_prompt),
+            model=self._planner_model_name(), cacheable=self._is_plan
+        )
+
+    def _analyze_request_for_mcp_services_with_custom_prompt(self, user_request: str, mcp_servers: List[Dict[str, Any]], custom_prompt: str) -> Dict[str, Any]:
+        """Ask the LLM which MCP services the request needs, using a custom system prompt (uncached)."""
         logger.info(f"[ANALYZE_WITH_CUSTOM_PROMPT] Analyzing request with custom prompt: '{user_request}' (length: {len(user_request) if user_request else 0})")
 
         # Format MCP servers as JSON for the prompt
@@ -2028,7 +1871,7 @@ class DedicatedMCPModel:
                     api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
                 # Create the LLM with the determined base URL
-                return ChatOpenAI(
+                return DeadlineChatOpenAI(
                     model=actual_model,
                     temperature=0.1,
                     api_key=api_key,
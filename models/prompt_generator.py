@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from utils.deadline_llm import DeadlineChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from config.settings import (
@@ -84,7 +84,7 @@ class PromptGenerator:
                 api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
             # Create the LLM with the determined base URL
-            self.llm = ChatOpenAI(
+            self.llm = DeadlineChatOpenAI(
                 model=model,
                 temperature=0.1,
                 api_key=api_key,
@@ -443,7 +443,7 @@ class PromptGenerator:
                     api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
                 # Create the LLM with the determined base URL
-                return ChatOpenAI(
+                return DeadlineChatOpenAI(
                     model=actual_model,
                     temperature=0.1,
                     api_key=api_key,
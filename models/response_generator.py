@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from utils.deadline_llm import DeadlineChatOpenAI, deadline_retry, stop_at_deadline
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel, Field
@@ -14,10 +14,14 @@ from config.settings import (
 from utils.prompt_manager import PromptManager
 from utils.ssh_keep_alive import SSHKeepAliveContext
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 
 logger = logging.getLogger(__name__)
 
+
+class PartialStreamError(Exception):
+    """The LLM failed after part of the answer was streamed; retrying would send those tokens again."""
+
 class ResponseOutput(BaseModel):
     """Structured output for response generation"""
     response_text: str = Field(description="The generated natural language response")
@@ -103,7 +107,7 @@ class ResponseGenerator:
                 api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
             # Create the LLM with the determined base URL
-            self.llm = ChatOpenAI(
+            self.llm = DeadlineChatOpenAI(
                 model=model,
                 temperature=0.7,  # Slightly higher temperature for more natural responses
                 api_key=api_key,
@@ -116,10 +120,15 @@ class ResponseGenerator:
         # Create the chain with the parser
         self.chain = self.prompt | self.llm | self.output_parser
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def generate_natural_language_response(self, generated_prompt, attached_files=None):
+    @retry(stop=stop_after_attempt(3) | stop_at_deadline,
+           retry=deadline_retry & retry_if_not_exception_type(PartialStreamError),
+           wait=wait_exponential(multiplier=1, min=4, max=10))
+    def generate_natural_language_response(self, generated_prompt, attached_files=None, on_token=None):
         """
-        Generate a natural language response based on the generated prompt
+        Generate a natural language response based on the generated prompt.
+        When on_token is given, the answer is streamed from the LLM and each piece is passed to it
+        as soon as it arrives; the full response is still returned. A failure after the first piece
+        was passed on raises PartialStreamError and is not retried.
         """
         try:
             # Log the full request to LLM, including all roles and prompts
@@ -148,9 +157,24 @@ class ResponseGenerator:
 
             # Use SSH keep-alive during the LLM call
             with SSHKeepAliveContext():
-                response = self.chain.invoke({
-                    "generated_prompt": generated_prompt
-                })
+                if on_token is None:
+                    response = self.chain.invoke({
+                        "generated_prompt": generated_prompt
+                    })
+                else:
+                    pieces = []
+                    try:
+                        for piece in self.chain.stream({"generated_prompt": generated_prompt}):
+                            if piece:
+                                pieces.append(piece)
+                                on_token(piece)
+                    except Exception as e:
+                        if pieces:
+                            raise PartialStreamError(
+                                f"LLM stream failed after {len(pieces)} streamed pieces: {e}"
+                            ) from e
+                        raise
+                    response = "".join(pieces)
 
             # Log the response
             if ENABLE_SCREEN_LOGGING:
@@ -189,12 +213,13 @@ class ResponseGenerator:
                 error=str(e)
             )
 
-            # Re-raise the exception to trigger the retry
+            # Re-raise the exception to trigger the retry (unless part of the answer was streamed)
             raise
 
-    def generate_response(self, user_request=None, informational_content=None, generated_prompt=None, attached_files=None, previous_signals=None, previous_tool_calls=None):
+    def generate_response(self, user_request=None, informational_content=None, generated_prompt=None, attached_files=None, previous_signals=None, previous_tool_calls=None, on_token=None):
         """
-        Enhanced method to generate response with detailed logging of all inputs
+        Enhanced method to generate response with detailed logging of all inputs.
+        on_token is passed to generate_natural_language_response to stream the answer.
         """
         # Log all the content being sent for enhancement
         logger.info(f"[ENHANCEMENT_DEBUG] generate_response called with:")
@@ -209,16 +234,16 @@ class ResponseGenerator:
 
         # If generated_prompt is provided, use it directly
         if generated_prompt is not None:
-            return self.generate_natural_language_response(generated_prompt, attached_files)
+            return self.generate_natural_language_response(generated_prompt, attached_files, on_token)
 
         # Otherwise, construct the prompt from user_request and informational_content
         if user_request is not None and informational_content is not None:
             # Construct a prompt combining user request and informational content
             combined_prompt = f"User Request: {user_request}\n\nInformational Content:\n{informational_content}"
-            return self.generate_natural_language_response(combined_prompt, attached_files)
+            return self.generate_natural_language_response(combined_prompt, attached_files, on_token)
 
         # Fallback to original behavior if only generated_prompt is provided
-        return self.generate_natural_language_response(user_request or generated_prompt, attached_files)
+        return self.generate_natural_language_response(user_request or generated_prompt, attached_files, on_token)
 
     def _get_llm_instance(self, provider=None, model=None):
         """
@@ -279,7 +304,7 @@ class ResponseGenerator:
                     api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
                 # Create the LLM with the determined base URL
-                return ChatOpenAI(
+                return DeadlineChatOpenAI(
                     model=actual_model,
                     temperature=0.7,
                     api_key=api_key,
@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from utils.deadline_llm import DeadlineChatOpenAI, deadline_retry, stop_at_deadline
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel, Field
@@ -88,7 +88,7 @@ class SQLGenerator:
             api_key = DEEPSEEK_API_KEY or ("sk-fake-key" if base_url else DEEPSEEK_API_KEY)
 
             # Create the LLM with the determined base URL but without structured output
-            llm_base = ChatOpenAI(
+            llm_base = DeadlineChatOpenAI(
                 model=model,
                 temperature=0,  # Lower temperature for more consistent SQL generation
                 api_key=api_key,
@@ -120,7 +120,7 @@ class SQLGenerator:
                 api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
             # Create the LLM with the determined base URL and structured output
-            llm_base = ChatOpenAI(
+            llm_base = DeadlineChatOpenAI(
                 model=model,
                 temperature=0,  # Lower temperature for more consistent SQL generation
                 api_key=api_key,
@@ -132,7 +132,8 @@ class SQLGenerator:
         # Create the chain
         self.chain = self.prompt | self.llm
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    @retry(stop=stop_after_attempt(3) | stop_at_deadline, retry=deadline_retry,
+           wait=wait_exponential(multiplier=1, min=4, max=10))
     def generate_sql(self, user_request, schema_dump, attached_files=None, previous_sql_queries=None, table_to_db_mapping=None, table_to_real_db_mapping=None):
         """
         Generate SQL query based on user request and database schema
@@ -638,7 +639,7 @@ class SQLGenerator:
                     api_key = OPENAI_API_KEY or ("sk-fake-key" if base_url else OPENAI_API_KEY)
 
                 # Create the LLM with the determined base URL
-                return ChatOpenAI(
+                return DeadlineChatOpenAI(
                     model=actual_model,
                     temperature=0.1,
                     api_key=api_key,
@@ -8,6 +8,7 @@ import os
 import sys
 import logging
 import argparse
+import sqlite3
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.exceptions import UnexpectedResponse
@@ -73,6 +74,22 @@ def get_qdrant_client():
         raise
 
 
+def clear_dedup_index(collection_name):
+    """Forget a collection's chunks in the RAG near-duplicate index, which would otherwise still point at them"""
+    index_path = os.getenv('RAG_DEDUP_INDEX_PATH', './data/dedup_index.sqlite3')
+    if not os.path.exists(index_path):
+        return
+    try:
+        connection = sqlite3.connect(index_path, timeout=30)
+        with connection:
+            for table in ('chunks', 'bands', 'duplicates'):
+                connection.execute(f"DELETE FROM {table} WHERE collection = ?", (collection_name,))
+        connection.close()
+        logging.info(f"Cleared near-duplicate index entries of collection: {collection_name}")
+    except sqlite3.Error as e:
+        logging.warning(f"Could not clear near-duplicate index {index_path} for {collection_name}: {str(e)}")
+
+
 def delete_all_collections(client):
     """Delete all collections in the Qdrant instance"""
     try:
@@ -84,6 +101,7 @@ def delete_all_collections(client):
             logging.info(f"Deleting collection: {collection.name}")
             client.delete_collection(collection.name)
             logging.info(f"Successfully deleted collection: {collection.name}")
+            clear_dedup_index(collection.name)
             deleted_count += 1
             
         logging.info(f"All {deleted_count} collections have been deleted successfully")
@@ -96,20 +114,21 @@ def delete_all_collections(client):
 def delete_all_points_from_collection(client, collection_name):
     """Delete all points from a specific collection using empty filter"""
     try:
-        logging.info(f"Deleting all points from collection: {collection.name}")
+        logging.info(f"Deleting all points from collection: {collection_name}")
         
         # Delete all points using an empty filter (matches all points)
         result = client.delete(
-            collection_name=collection.name,
+            collection_name=collection_name,
             points_selector=models.FilterSelector(
                 filter=models.Filter()  # Empty filter matches all points
             )
         )
         
-        logging.info(f"Successfully deleted all points from collection: {collection.name}")
+        logging.info(f"Successfully deleted all points from collection: {collection_name}")
+        clear_dedup_index(collection_name)
         return True
     except Exception as e:
-        logging.error(f"Error deleting points from collection {collection.name}: {str(e)}")
+        logging.error(f"Error deleting points from collection {collection_name}: {str(e)}")
         return False
 
 
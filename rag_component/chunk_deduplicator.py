@@ -0,0 +1,698 @@
+"""
+Near-duplicate chunk detection module for the RAG component.
+Computes MinHash signatures over word shingles and finds near-duplicate chunks through an
+LSH (banding) index persisted in SQLite, so repeated boilerplate and document revisions are
+detected across ingests instead of being embedded again and again.
+
+Depending on RAG_DEDUP_MODE, duplicates are either dropped ("skip") or linked to their canonical
+chunk ("link"): the duplicate's text and metadata are kept in the index, its sources are attached
+to the canonical chunk in search results, and it is promoted to canonical (and embedded) if the
+canonical chunk is ever deleted.
+
+The index can outlive the vector data (a wiped Chroma directory, a dropped or lost Qdrant
+collection), so a stored chunk is only used as canonical after the store confirms it still
+exists; index rows of chunks the store no longer has are dropped. Scripts that wipe the vector
+data call clear_dedup_index() as well.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document as LCDocument
+
+from .config import (
+    RAG_DEDUP_BANDS,
+    RAG_DEDUP_INDEX_PATH,
+    RAG_DEDUP_MODE,
+    RAG_DEDUP_NUM_PERM,
+    RAG_DEDUP_SHINGLE_SIZE,
+    RAG_DEDUP_THRESHOLD
+)
+
+logger = logging.getLogger(__name__)
+
+DEDUP_MODES = ("off", "skip", "link")
+# Index path that keeps the LSH index in memory (used with the in-memory Qdrant mode)
+IN_MEMORY_INDEX_PATH = ":memory:"
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_PERMUTATION_SEED = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_params (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    file_id TEXT,
+    source TEXT,
+    PRIMARY KEY (collection, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS chunks_by_hash ON chunks (collection, content_hash);
+CREATE INDEX IF NOT EXISTS chunks_by_file ON chunks (collection, file_id);
+CREATE INDEX IF NOT EXISTS chunks_by_source ON chunks (collection, source);
+CREATE TABLE IF NOT EXISTS bands (
+    collection TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    chunk_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_by_bucket ON bands (collection, band, bucket);
+CREATE INDEX IF NOT EXISTS bands_by_chunk ON bands (collection, chunk_id);
+CREATE TABLE IF NOT EXISTS duplicates (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    canonical_id TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    file_id TEXT,
+    source TEXT,
+    title TEXT,
+    upload_method TEXT,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (collection, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS duplicates_by_canonical ON duplicates (collection, canonical_id);
+CREATE INDEX IF NOT EXISTS duplicates_by_file ON duplicates (collection, file_id);
+CREATE INDEX IF NOT EXISTS duplicates_by_source ON duplicates (collection, source);
+"""
+
+_indexes: Dict[str, "DedupIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lowercase word tokens of a text (punctuation and whitespace differences are ignored)."""
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+class MinHasher:
+    """Class responsible for computing MinHash signatures over word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = _PERMUTATION_SEED):
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Number of words per shingle
+            seed: Seed of the random permutations (must stay fixed for a persisted index)
+        """
+        self.num_perm = num_perm
+        self.shingle_size = max(1, shingle_size)
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def shingles(self, tokens: List[str]) -> set:
+        """Word shingles of a token list (short texts form a single shingle)."""
+        if len(tokens) <= self.shingle_size:
+            return {" ".join(tokens)}
+        return {" ".join(tokens[i:i + self.shingle_size]) for i in range(len(tokens) - self.shingle_size + 1)}
+
+    def signature(self, tokens: List[str]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a token list.
+
+        Returns:
+            uint32 array of length num_perm
+        """
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+                for shingle in self.shingles(tokens)
+            ),
+            dtype=np.uint64
+        )
+        # Universal hashing (a*x + b) mod p; uint64 overflow wraps, which keeps the family well mixed
+        permuted = np.bitwise_and((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME, _MAX_HASH)
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimated_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two MinHash signatures."""
+    return float(np.mean(signature_a == signature_b))
+
+
+class DedupIndex:
+    """Class responsible for the persistent LSH index shared by every collection of one index file."""
+
+    def __init__(self, path: str, num_perm: int, bands: int, shingle_size: int):
+        """
+        Open (or create) the index.
+
+        Index parameters are fixed when the index is created; if the configured ones differ later,
+        the stored parameters win so existing signatures stay comparable.
+
+        Args:
+            path: SQLite file path, or ":memory:"
+            num_perm: Signature length for a new index
+            bands: Number of LSH bands for a new index
+            shingle_size: Words per shingle for a new index
+        """
+        if path != IN_MEMORY_INDEX_PATH:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            if path != IN_MEMORY_INDEX_PATH:
+                # Several service processes share the index file
+                self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(_SCHEMA)
+            stored = dict(self.connection.execute("SELECT name, value FROM index_params").fetchall())
+            configured = {"num_perm": num_perm, "bands": bands, "shingle_size": shingle_size, "seed": _PERMUTATION_SEED}
+            if not stored:
+                if num_perm % bands:
+                    raise ValueError(f"RAG_DEDUP_NUM_PERM ({num_perm}) must be divisible by RAG_DEDUP_BANDS ({bands})")
+                self.connection.executemany("INSERT INTO index_params (name, value) VALUES (?, ?)", configured.items())
+                stored = configured
+            elif stored != configured:
+                logger.warning(f"Dedup index {path} was built with {stored}; ignoring configured parameters {configured}")
+        self.num_perm = stored["num_perm"]
+        self.bands = stored["bands"]
+        self.rows_per_band = self.num_perm // self.bands
+        self.hasher = MinHasher(stored["num_perm"], stored["shingle_size"], seed=stored["seed"])
+
+    def band_buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        """LSH bucket of each band of a signature."""
+        buckets = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+        return buckets
+
+
+def get_dedup_index(
+    path: Optional[str] = None,
+    num_perm: Optional[int] = None,
+    bands: Optional[int] = None,
+    shingle_size: Optional[int] = None
+) -> DedupIndex:
+    """
+    Get the shared dedup index for a path (one connection per process and path).
+
+    Args:
+        path: SQLite file path or ":memory:" (defaults to RAG_DEDUP_INDEX_PATH)
+        num_perm: Signature length for a new index (defaults to RAG_DEDUP_NUM_PERM)
+        bands: LSH bands for a new index (defaults to RAG_DEDUP_BANDS)
+        shingle_size: Words per shingle for a new index (defaults to RAG_DEDUP_SHINGLE_SIZE)
+
+    Returns:
+        DedupIndex instance
+    """
+    path = path or RAG_DEDUP_INDEX_PATH
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = DedupIndex(
+                path,
+                num_perm or RAG_DEDUP_NUM_PERM,
+                bands or RAG_DEDUP_BANDS,
+                shingle_size or RAG_DEDUP_SHINGLE_SIZE
+            )
+            _indexes[path] = index
+        return index
+
+
+def clear_dedup_index(collection_name: Optional[str] = None, path: Optional[str] = None):
+    """
+    Forget the indexed chunks of a collection, or of every collection, after its vector data was wiped.
+
+    Args:
+        collection_name: Collection to clear (all collections if omitted)
+        path: SQLite index path (defaults to RAG_DEDUP_INDEX_PATH)
+    """
+    path = path or RAG_DEDUP_INDEX_PATH
+    if path != IN_MEMORY_INDEX_PATH and not os.path.exists(path):
+        return
+    index = get_dedup_index(path)
+    with index.lock, index.connection as connection:
+        for table in ("chunks", "bands", "duplicates"):
+            if collection_name is None:
+                connection.execute(f"DELETE FROM {table}")
+            else:
+                connection.execute(f"DELETE FROM {table} WHERE collection = ?", (collection_name,))
+
+
+class DeduplicationResult:
+    """Outcome of a deduplication pass; applied to the index by ChunkDeduplicator.commit."""
+
+    def __init__(self):
+        # Chunks that have to be embedded and stored, with their ids
+        self.documents: List[LCDocument] = []
+        self.ids: List[str] = []
+        # Dicts with id, canonical_id, similarity and document
+        self.duplicates: List[Dict[str, Any]] = []
+        self._canonical_entries: List[Tuple[str, str, np.ndarray, Optional[str], Optional[str]]] = []
+        self._promotions: Dict[str, str] = {}
+
+
+class ChunkDeduplicator:
+    """Class responsible for detecting near-duplicate chunks of one collection."""
+
+    def __init__(
+        self,
+        collection_name: str,
+        index_path: Optional[str] = None,
+        mode: Optional[str] = None,
+        threshold: Optional[float] = None,
+        existing_ids: Optional[Callable[[List[str]], Iterable[str]]] = None
+    ):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            collection_name: Logical collection the chunks belong to
+            index_path: SQLite index path or ":memory:" (defaults to RAG_DEDUP_INDEX_PATH)
+            mode: "skip" or "link" (defaults to RAG_DEDUP_MODE)
+            threshold: Minimum estimated similarity of a near-duplicate (defaults to RAG_DEDUP_THRESHOLD)
+            existing_ids: Returns which of the given chunk ids the vector store still holds; indexed
+                chunks it does not return are never used as canonical (no check if omitted)
+        """
+        self.mode = (mode or RAG_DEDUP_MODE).lower()
+        if self.mode not in DEDUP_MODES or self.mode == "off":
+            raise ValueError(f"Unsupported dedup mode: {self.mode}. Use 'skip' or 'link'")
+        self.collection_name = collection_name
+        self.threshold = RAG_DEDUP_THRESHOLD if threshold is None else threshold
+        self.index = get_dedup_index(index_path)
+        self.existing_ids = existing_ids
+        # Documents whose chunks must not be used as canonical (see excluding())
+        self.excluded_file_ids: Set[str] = set()
+
+    @contextmanager
+    def excluding(self, file_id: str):
+        """
+        Do not deduplicate against a document's chunks inside the with block.
+
+        Used while a document is replaced: the new version's unchanged chunks would otherwise be
+        duplicates of the old version's, which is deleted right after.
+
+        Args:
+            file_id: File ID of the document to ignore
+        """
+        self.excluded_file_ids.add(file_id)
+        try:
+            yield
+        finally:
+            self.excluded_file_ids.discard(file_id)
+
+    def deduplicate(self, documents: List[LCDocument], ids: Optional[List[str]] = None) -> DeduplicationResult:
+        """
+        Split documents into canonical chunks and near-duplicates.
+
+        Duplicates are detected against the persisted index and against earlier chunks of the
+        same batch. Nothing is written to the index until commit() is called, so a failed
+        upload leaves it untouched.
+
+        Args:
+            documents: Chunks about to be stored
+            ids: Optional chunk ids (generated if omitted)
+
+        Returns:
+            DeduplicationResult with the chunks to store and the detected duplicates
+        """
+        if ids is not None and len(ids) != len(documents):
+            raise ValueError("Number of ids must match number of documents")
+        ids = [str(chunk_id) for chunk_id in ids] if ids is not None else [str(uuid.uuid4()) for _ in documents]
+
+        result = DeduplicationResult()
+        pending_hashes: Dict[str, str] = {}
+        pending_buckets: Dict[Tuple[int, int], List[str]] = {}
+        pending_signatures: Dict[str, np.ndarray] = {}
+        # Indexed chunk ids already checked against the vector store in this pass
+        verified: Dict[str, bool] = {}
+
+        with self.index.lock:
+            for chunk_id, doc in zip(ids, documents):
+                tokens = normalize_tokens(doc.page_content)
+                if not tokens:
+                    # Nothing to compare (empty or punctuation-only chunk)
+                    result.documents.append(doc)
+                    result.ids.append(chunk_id)
+                    continue
+
+                content_hash = hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=16).hexdigest()
+                signature = self.index.hasher.signature(tokens)
+                buckets = self.index.band_buckets(signature)
+
+                canonical_id, similarity = self._find_canonical(
+                    chunk_id, content_hash, signature, buckets, pending_hashes, pending_buckets, pending_signatures,
+                    verified
+                )
+                if canonical_id is not None:
+                    result.duplicates.append({
+                        "id": chunk_id,
+                        "canonical_id": canonical_id,
+                        "similarity": similarity,
+                        "document": doc
+                    })
+                    continue
+
+                result.documents.append(doc)
+                result.ids.append(chunk_id)
+                result._canonical_entries.append(
+                    (chunk_id, content_hash, signature, doc.metadata.get("file_id"), doc.metadata.get("source"))
+                )
+                pending_hashes.setdefault(content_hash, chunk_id)
+                pending_signatures[chunk_id] = signature
+                for bucket in buckets:
+                    pending_buckets.setdefault(bucket, []).append(chunk_id)
+
+        if result.duplicates:
+            logger.info(
+                f"Detected {len(result.duplicates)} near-duplicate chunks out of {len(documents)} "
+                f"for '{self.collection_name}' ({self.mode})"
+            )
+        return result
+
+    def commit(self, result: DeduplicationResult):
+        """Record the canonical chunks (and, in link mode, the duplicates) of a stored batch."""
+        now = time.time()
+        with self.index.lock, self.index.connection as connection:
+            for chunk_id, content_hash, signature, file_id, source in result._canonical_entries:
+                # Re-ingesting a chunk under the same id replaces its previous entry
+                self._delete_canonical_rows(connection, [chunk_id])
+                connection.execute(
+                    "INSERT INTO chunks (collection, chunk_id, content_hash, signature, file_id, source) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.collection_name, chunk_id, content_hash, signature.tobytes(), file_id, source)
+                )
+                connection.executemany(
+                    "INSERT INTO bands (collection, band, bucket, chunk_id) VALUES (?, ?, ?, ?)",
+                    [(self.collection_name, band, bucket, chunk_id) for band, bucket in self.index.band_buckets(signature)]
+                )
+            for old_canonical_id, new_canonical_id in result._promotions.items():
+                connection.execute(
+                    "DELETE FROM duplicates WHERE collection = ? AND chunk_id = ?",
+                    (self.collection_name, new_canonical_id)
+                )
+                connection.execute(
+                    "UPDATE duplicates SET canonical_id = ? WHERE collection = ? AND canonical_id = ?",
+                    (new_canonical_id, self.collection_name, old_canonical_id)
+                )
+            if self.mode == "link":
+                connection.executemany(
+                    "INSERT OR REPLACE INTO duplicates (collection, chunk_id, canonical_id, similarity, file_id, "
+                    "source, title, upload_method, page_content, metadata, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            self.collection_name,
+                            duplicate["id"],
+                            duplicate["canonical_id"],
+                            duplicate["similarity"],
+                            duplicate["document"].metadata.get("file_id"),
+                            duplicate["document"].metadata.get("source"),
+                            duplicate["document"].metadata.get("title"),
+                            duplicate["document"].metadata.get("upload_method"),
+                            duplicate["document"].page_content,
+                            json.dumps(duplicate["document"].metadata, ensure_ascii=False, default=str),
+                            now
+                        )
+                        for duplicate in result.duplicates
+                    ]
+                )
+
+    def remove(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None
+    ) -> DeduplicationResult:
+        """
+        Forget the chunks of a deleted document.
+
+        Duplicates belonging to the document are dropped. Canonical chunks belonging to it are
+        removed from the index; for each of them the oldest remaining duplicate (link mode) is
+        returned for promotion: the caller stores it and then calls commit() with the result.
+
+        Args:
+            file_id: File ID of the deleted document
+            source: Source of the deleted document
+            ids: Explicit deleted chunk ids
+
+        Returns:
+            DeduplicationResult whose documents/ids have to be stored as new canonical chunks
+        """
+        where, params = self._selector(file_id, source, ids)
+
+        result = DeduplicationResult()
+        with self.index.lock, self.index.connection as connection:
+            connection.execute(f"DELETE FROM duplicates WHERE {where}", params)
+            removed = [row[0] for row in connection.execute(f"SELECT chunk_id FROM chunks WHERE {where}", params)]
+            self._delete_canonical_rows(connection, removed)
+
+            for canonical_id in removed:
+                row = connection.execute(
+                    "SELECT chunk_id, page_content, metadata FROM duplicates "
+                    "WHERE collection = ? AND canonical_id = ? ORDER BY created_at, rowid LIMIT 1",
+                    (self.collection_name, canonical_id)
+                ).fetchone()
+                if row is None:
+                    continue
+                chunk_id, page_content, metadata = row
+                doc = LCDocument(page_content=page_content, metadata=json.loads(metadata))
+                tokens = normalize_tokens(page_content)
+                signature = self.index.hasher.signature(tokens)
+                result.documents.append(doc)
+                result.ids.append(chunk_id)
+                result._canonical_entries.append((
+                    chunk_id,
+                    hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=16).hexdigest(),
+                    signature,
+                    doc.metadata.get("file_id"),
+                    doc.metadata.get("source")
+                ))
+                result._promotions[canonical_id] = chunk_id
+
+        if result.ids:
+            logger.info(f"Promoting {len(result.ids)} duplicate chunks of deleted canonical chunks in '{self.collection_name}'")
+        return result
+
+    def find_duplicates(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Find linked duplicates of a document; they are not stored in the vector store.
+
+        Args:
+            file_id: File ID of the document
+            source: Source of the document
+            ids: Explicit chunk ids
+
+        Returns:
+            List of tuples (chunk id, chunk metadata)
+        """
+        where, params = self._selector(file_id, source, ids)
+        with self.index.lock:
+            rows = self.index.connection.execute(
+                f"SELECT chunk_id, metadata FROM duplicates WHERE {where} ORDER BY created_at, rowid", params
+            ).fetchall()
+        return [(chunk_id, json.loads(metadata) if metadata else {}) for chunk_id, metadata in rows]
+
+    def _selector(
+        self,
+        file_id: Optional[str],
+        source: Optional[str],
+        ids: Optional[List[str]]
+    ) -> Tuple[str, List[Any]]:
+        """SQL condition and parameters selecting a document's rows of the collection."""
+        conditions = ["collection = ?"]
+        params: List[Any] = [self.collection_name]
+        if file_id:
+            conditions.append("file_id = ?")
+            params.append(file_id)
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if ids:
+            conditions.append(f"chunk_id IN ({','.join('?' * len(ids))})")
+            params.extend(str(chunk_id) for chunk_id in ids)
+        if len(conditions) == 1:
+            raise ValueError("At least one of file_id, source or ids must be provided")
+        return " AND ".join(conditions), params
+
+    def clear(self):
+        """Forget every chunk of the collection (used when the collection is dropped)."""
+        with self.index.lock, self.index.connection as connection:
+            for table in ("chunks", "bands", "duplicates"):
+                connection.execute(f"DELETE FROM {table} WHERE collection = ?", (self.collection_name,))
+
+    def provenance(self, chunk_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Sources of the duplicates linked to canonical chunks.
+
+        Args:
+            chunk_ids: Canonical chunk ids (e.g. of search results)
+
+        Returns:
+            Dictionary mapping canonical chunk id to a list of {source, title, file_id, upload_method, similarity}
+        """
+        chunk_ids = [str(chunk_id) for chunk_id in chunk_ids if chunk_id is not None]
+        if self.mode != "link" or not chunk_ids:
+            return {}
+        with self.index.lock:
+            rows = self.index.connection.execute(
+                "SELECT canonical_id, source, title, file_id, upload_method, MAX(similarity) FROM duplicates "
+                f"WHERE collection = ? AND canonical_id IN ({','.join('?' * len(chunk_ids))}) "
+                "GROUP BY canonical_id, source, file_id ORDER BY MIN(created_at)",
+                [self.collection_name, *chunk_ids]
+            ).fetchall()
+        provenance: Dict[str, List[Dict[str, Any]]] = {}
+        for canonical_id, source, title, file_id, upload_method, similarity in rows:
+            provenance.setdefault(canonical_id, []).append({
+                "source": source,
+                "title": title,
+                "file_id": file_id,
+                "upload_method": upload_method,
+                "similarity": round(similarity, 4)
+            })
+        return provenance
+
+    def stats(self) -> Dict[str, int]:
+        """Number of canonical and linked duplicate chunks of the collection."""
+        with self.index.lock:
+            canonical = self.index.connection.execute(
+                "SELECT COUNT(*) FROM chunks WHERE collection = ?", (self.collection_name,)
+            ).fetchone()[0]
+            duplicates = self.index.connection.execute(
+                "SELECT COUNT(*) FROM duplicates WHERE collection = ?", (self.collection_name,)
+            ).fetchone()[0]
+        return {"canonical_chunks": canonical, "linked_duplicates": duplicates}
+
+    def _find_canonical(
+        self,
+        chunk_id: str,
+        content_hash: str,
+        signature: np.ndarray,
+        buckets: List[Tuple[int, int]],
+        pending_hashes: Dict[str, str],
+        pending_buckets: Dict[Tuple[int, int], List[str]],
+        pending_signatures: Dict[str, np.ndarray],
+        verified: Dict[str, bool]
+    ) -> Tuple[Optional[str], float]:
+        """Best canonical chunk at or above the threshold, or (None, 0.0)."""
+        connection = self.index.connection
+
+        # Exact duplicates (after normalization) need no signature comparison
+        exact = pending_hashes.get(content_hash)
+        if exact is None:
+            excluded_sql, excluded_params = self._excluded_files_condition()
+            stored_exact = self._live_chunks([
+                row[0] for row in connection.execute(
+                    f"SELECT chunk_id FROM chunks WHERE collection = ? AND content_hash = ? AND chunk_id != ?{excluded_sql}",
+                    (self.collection_name, content_hash, chunk_id, *excluded_params)
+                )
+            ], verified)
+            exact = min(stored_exact) if stored_exact else None
+        if exact is not None and exact != chunk_id:
+            return exact, 1.0
+
+        candidates = set()
+        for bucket in buckets:
+            candidates.update(pending_buckets.get(bucket, ()))
+        stored_candidates = set()
+        for band, bucket in buckets:
+            stored_candidates.update(
+                row[0] for row in connection.execute(
+                    "SELECT chunk_id FROM bands WHERE collection = ? AND band = ? AND bucket = ?",
+                    (self.collection_name, band, bucket)
+                )
+            )
+        stored_candidates -= candidates
+        candidates.discard(chunk_id)
+        stored_candidates.discard(chunk_id)
+        stored_candidates = self._live_chunks(stored_candidates, verified)
+
+        best_id, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = estimated_similarity(signature, pending_signatures[candidate])
+            if similarity > best_similarity:
+                best_id, best_similarity = candidate, similarity
+        if stored_candidates:
+            candidate_list = list(stored_candidates)
+            excluded_sql, excluded_params = self._excluded_files_condition()
+            rows = connection.execute(
+                f"SELECT chunk_id, signature FROM chunks WHERE collection = ? "
+                f"AND chunk_id IN ({','.join('?' * len(candidate_list))}){excluded_sql}",
+                [self.collection_name, *candidate_list, *excluded_params]
+            ).fetchall()
+            for candidate, blob in rows:
+                similarity = estimated_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+                if similarity > best_similarity:
+                    best_id, best_similarity = candidate, similarity
+
+        if best_id is not None and best_similarity >= self.threshold:
+            return best_id, best_similarity
+        return None, 0.0
+
+    def _excluded_files_condition(self) -> Tuple[str, List[str]]:
+        """SQL condition (and parameters) leaving out the chunks of excluded documents."""
+        excluded = sorted(self.excluded_file_ids)
+        if not excluded:
+            return "", []
+        return f" AND (file_id IS NULL OR file_id NOT IN ({','.join('?' * len(excluded))}))", excluded
+
+    def _live_chunks(self, chunk_ids: Iterable[str], verified: Dict[str, bool]) -> Set[str]:
+        """
+        Indexed chunk ids that the vector store still holds.
+
+        Chunks the store no longer has (its data was wiped behind the index's back) are dropped
+        from the index together with their linked duplicates. If the store cannot be asked, no
+        indexed chunk is used as canonical for now and nothing is dropped.
+        """
+        chunk_ids = set(chunk_ids)
+        if self.existing_ids is None or not chunk_ids:
+            return chunk_ids
+        unknown = [chunk_id for chunk_id in chunk_ids if chunk_id not in verified]
+        if unknown:
+            try:
+                existing = {str(chunk_id) for chunk_id in self.existing_ids(unknown)}
+            except Exception as e:
+                logger.warning(f"Could not check indexed chunks against the vector store, not deduplicating against them: {e}")
+                return set()
+            stale = [chunk_id for chunk_id in unknown if chunk_id not in existing]
+            verified.update((chunk_id, chunk_id in existing) for chunk_id in unknown)
+            if stale:
+                with self.index.connection as connection:
+                    connection.execute(
+                        f"DELETE FROM duplicates WHERE collection = ? AND canonical_id IN ({','.join('?' * len(stale))})",
+                        [self.collection_name, *stale]
+                    )
+                    self._delete_canonical_rows(connection, stale)
+                logger.warning(
+                    f"Dropped {len(stale)} indexed chunks of '{self.collection_name}' that are no longer in the vector store"
+                )
+        return {chunk_id for chunk_id in chunk_ids if verified[chunk_id]}
+
+    def _delete_canonical_rows(self, connection, chunk_ids: List[str]):
+        """Remove canonical chunks and their LSH buckets (duplicate links are left to the caller)."""
+        for chunk_id in chunk_ids:
+            connection.execute(
+                "DELETE FROM chunks WHERE collection = ? AND chunk_id = ?", (self.collection_name, chunk_id)
+            )
+            connection.execute(
+                "DELETE FROM bands WHERE collection = ? AND chunk_id = ?", (self.collection_name, chunk_id)
+            )
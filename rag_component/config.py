@@ -30,6 +30,40 @@ RAG_CHROMA_PERSIST_DIR = os.getenv("RAG_CHROMA_PERSIST_DIR", "./data/chroma_db")
 RAG_COLLECTION_NAME = os.getenv("RAG_COLLECTION_NAME", "documents")
 RAG_QDRANT_URL = os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
 RAG_QDRANT_API_KEY = os.getenv("RAG_QDRANT_API_KEY", "")
+RAG_QDRANT_PREFER_GRPC = str_to_bool(os.getenv("RAG_QDRANT_PREFER_GRPC", "false"))
+RAG_QDRANT_GRPC_PORT = int(os.getenv("RAG_QDRANT_GRPC_PORT", "6334"))
+
+# Qdrant bulk ingestion configuration
+RAG_QDRANT_BULK_UPLOAD_ENABLED = str_to_bool(os.getenv("RAG_QDRANT_BULK_UPLOAD_ENABLED", "true"))
+RAG_QDRANT_BULK_PREFER_GRPC = str_to_bool(os.getenv("RAG_QDRANT_BULK_PREFER_GRPC", "true"))
+RAG_QDRANT_UPLOAD_BATCH_SIZE = int(os.getenv("RAG_QDRANT_UPLOAD_BATCH_SIZE", "256"))
+RAG_QDRANT_UPLOAD_MAX_BATCH_BYTES = int(os.getenv("RAG_QDRANT_UPLOAD_MAX_BATCH_BYTES", str(16 * 1024 * 1024)))
+RAG_QDRANT_UPLOAD_PARALLELISM = int(os.getenv("RAG_QDRANT_UPLOAD_PARALLELISM", "4"))
+# Metadata fields that get a keyword payload index in Qdrant so filtered search stays fast
+RAG_PAYLOAD_INDEX_FIELDS = [f.strip() for f in os.getenv("RAG_PAYLOAD_INDEX_FIELDS", "source,file_id,upload_method").split(',') if f.strip()]
+
+# Vector snapshot configuration (export/import without re-embedding)
+RAG_SNAPSHOT_DIR = os.getenv("RAG_SNAPSHOT_DIR", "./data/vector_snapshots")
+RAG_SNAPSHOT_CHUNK_SIZE = int(os.getenv("RAG_SNAPSHOT_CHUNK_SIZE", "10000"))
+
+# Embedding model migration configuration (shadow collection + alias swap instead of delete on model change)
+RAG_EMBEDDING_MIGRATION_ENABLED = str_to_bool(os.getenv("RAG_EMBEDDING_MIGRATION_ENABLED", "true"))
+RAG_MIGRATION_STATE_FILE = os.getenv("RAG_MIGRATION_STATE_FILE", "./data/embedding_migration.json")
+RAG_MIGRATION_BATCH_SIZE = int(os.getenv("RAG_MIGRATION_BATCH_SIZE", "64"))
+RAG_MIGRATION_MAX_POINTS_PER_SECOND = float(os.getenv("RAG_MIGRATION_MAX_POINTS_PER_SECOND", "20"))  # 0 disables throttling
+RAG_MIGRATION_KEEP_OLD_COLLECTION = str_to_bool(os.getenv("RAG_MIGRATION_KEEP_OLD_COLLECTION", "false"))
+RAG_MIGRATION_FREEZE_DRAIN_SECONDS = float(os.getenv("RAG_MIGRATION_FREEZE_DRAIN_SECONDS", "2"))  # Wait for in-flight writes after freezing them
+# Embedding model of a pre-existing collection that has no recorded model yet (used to keep serving it)
+RAG_MIGRATION_SOURCE_EMBEDDING_PROVIDER = os.getenv("RAG_MIGRATION_SOURCE_EMBEDDING_PROVIDER")
+RAG_MIGRATION_SOURCE_EMBEDDING_MODEL = os.getenv("RAG_MIGRATION_SOURCE_EMBEDDING_MODEL")
+
+# Near-duplicate chunk detection at ingestion time (MinHash signatures + persistent LSH index)
+RAG_DEDUP_MODE = os.getenv("RAG_DEDUP_MODE", "off").lower()  # Options: "off", "skip", "link"
+RAG_DEDUP_THRESHOLD = float(os.getenv("RAG_DEDUP_THRESHOLD", "0.9"))  # Estimated Jaccard similarity of word shingles
+RAG_DEDUP_INDEX_PATH = os.getenv("RAG_DEDUP_INDEX_PATH", "./data/dedup_index.sqlite3")
+RAG_DEDUP_NUM_PERM = int(os.getenv("RAG_DEDUP_NUM_PERM", "128"))
+RAG_DEDUP_BANDS = int(os.getenv("RAG_DEDUP_BANDS", "16"))
+RAG_DEDUP_SHINGLE_SIZE = int(os.getenv("RAG_DEDUP_SHINGLE_SIZE", "3"))
 
 # Document processing configuration
 RAG_SUPPORTED_FILE_TYPES = os.getenv("RAG_SUPPORTED_FILE_TYPES", ".txt,.pdf,.docx,.html,.md").split(',')
@@ -49,4 +83,8 @@ RERANKER_MODEL = os.getenv("RERANKER_MODEL", "text-embedding-bge-reranker-v2-m3"
 RERANKER_HOSTNAME = os.getenv("RERANKER_HOSTNAME", "localhost")
 RERANKER_PORT = os.getenv("RERANKER_PORT", "1234")
 RERANKER_API_PATH = os.getenv("RERANKER_API_PATH", "/v1")
-RERANK_TOP_K_RESULTS = int(os.getenv("RERANK_TOP_K_RESULTS", "5"))
\ No newline at end of file
+RERANK_TOP_K_RESULTS = int(os.getenv("RERANK_TOP_K_RESULTS", "5"))
+
+# Web search enhancement pipeline (download -> summarize -> rank)
+RAG_WEB_ENHANCEMENT_TIME_BUDGET_SECONDS = float(os.getenv("RAG_WEB_ENHANCEMENT_TIME_BUDGET_SECONDS", "30"))  # 0 waits for every result
+RAG_WEB_ENHANCEMENT_MIN_SCORE = float(os.getenv("RAG_WEB_ENHANCEMENT_MIN_SCORE", "0.5"))  # Score needed to count towards the early return
\ No newline at end of file
@@ -3,7 +3,9 @@ Document loader module for the RAG component.
 Handles loading and preprocessing of various document types.
 """
 import os
+import time
 import logging
+from contextlib import nullcontext
 from typing import List, Optional
 from pathlib import Path
 from langchain_community.document_loaders import (
@@ -14,6 +16,7 @@ from langchain_community.document_loaders import (
     UnstructuredMarkdownLoader
 )
 from langchain_core.documents import Document as LCDocument
+from utils.deadline import bounded_timeout
 from .config import RAG_SUPPORTED_FILE_TYPES, RAG_PDF_TO_MARKDOWN_CONVERSION_ENABLED, RAG_USE_FALLBACK_ON_CONVERSION_ERROR
 
 logger = logging.getLogger(__name__)
@@ -26,17 +29,19 @@ class DocumentLoader:
         self.supported_types = RAG_SUPPORTED_FILE_TYPES
         self.use_pdf_conversion = RAG_PDF_TO_MARKDOWN_CONVERSION_ENABLED
 
-    def load_document(self, file_path: str) -> List[LCDocument]:
+    def load_document(self, file_path: str, metrics=None) -> List[LCDocument]:
         """
         Load a document based on its file extension.
 
         Args:
             file_path: Path to the document file
+            metrics: Optional IngestionMetrics recording the conversion and parse time per loader
 
         Returns:
             List of LangChain Document objects
         """
         file_ext = Path(file_path).suffix.lower()
+        markdown_file_path = None
 
         if file_ext not in self.supported_types:
             raise ValueError(f"Unsupported file type: {file_ext}. Supported types: {self.supported_types}")
@@ -53,8 +58,12 @@ class DocumentLoader:
                     # Initialize the converter
                     converter = PDFToMarkdownConverter()
 
-                    # Convert PDF to Markdown file with a much longer timeout (e.g., 3600 seconds = 1 hour) to allow complex PDFs to process
-                    markdown_file_path = converter.convert_pdf_to_markdown_file(file_path, timeout_seconds=3600)
+                    # Convert PDF to Markdown file with a much longer timeout (e.g., 3600 seconds = 1 hour) to allow complex PDFs to process,
+                    # but not past the deadline of the request being served
+                    with metrics.stage("convert.marker", docs=1, bytes=_file_size(file_path)) if metrics else nullcontext():
+                        markdown_file_path = converter.convert_pdf_to_markdown_file(
+                            file_path, timeout_seconds=bounded_timeout(3600, "PDF conversion")
+                        )
 
                     if markdown_file_path:
                         # Use UnstructuredMarkdownLoader for the converted Markdown
@@ -89,14 +98,30 @@ class DocumentLoader:
             # Default to text loader for any other supported type
             loader = TextLoader(file_path, encoding='utf-8')
 
-        return loader.load()
+        parse_start = time.perf_counter()
+        docs = loader.load()
+        if metrics:
+            metrics.add(
+                f"parse.{type(loader).__name__}",
+                seconds=time.perf_counter() - parse_start,
+                docs=len(docs),
+                bytes=_file_size(file_path)
+            )
+
+        if markdown_file_path:
+            # Remember the converted Markdown so it can be cleaned up when the document is deleted
+            for doc in docs:
+                doc.metadata["markdown_file_path"] = markdown_file_path
+
+        return docs
     
-    def load_documents_from_directory(self, directory_path: str) -> List[LCDocument]:
+    def load_documents_from_directory(self, directory_path: str, metrics=None) -> List[LCDocument]:
         """
         Load all supported documents from a directory.
         
         Args:
             directory_path: Path to the directory containing documents
+            metrics: Optional IngestionMetrics passed on to load_document
             
         Returns:
             List of LangChain Document objects
@@ -110,9 +135,20 @@ class DocumentLoader:
                 
                 if file_ext in self.supported_types:
                     try:
-                        loaded_docs = self.load_document(file_path)
+                        loaded_docs = self.load_document(file_path, metrics=metrics)
                         documents.extend(loaded_docs)
+                        if metrics:
+                            metrics.count(files=1, bytes=_file_size(file_path))
                     except Exception as e:
                         print(f"Error loading document {file_path}: {str(e)}")
+                        if metrics:
+                            metrics.record_failure()
         
-        return documents
\ No newline at end of file
+        return documents
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
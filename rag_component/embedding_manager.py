@@ -261,13 +261,34 @@ class T5EncoderEmbeddings(Embeddings):
 class EmbeddingManager:
     """Class responsible for managing text embeddings."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        provider: str = None,
+        model_name: str = None,
+        hostname: str = None,
+        port: str = None,
+        api_path: str = None
+    ):
+        """
+        Initialize the embedding manager.
+
+        Args:
+            provider: Embedding provider to use instead of the configured one
+            model_name: Embedding model to use instead of the configured one
+            hostname: Embedding server hostname to use instead of the configured one
+            port: Embedding server port to use instead of the configured one
+            api_path: Embedding server API path to use instead of the configured one
+        """
         # Use RAG-specific settings if available, otherwise use global settings
         self.provider = RAG_EMBEDDING_PROVIDER if RAG_EMBEDDING_PROVIDER is not None else EMBEDDING_PROVIDER
         self.model_name = RAG_EMBEDDING_MODEL if RAG_EMBEDDING_MODEL is not None else EMBEDDING_MODEL
-        self.hostname = EMBEDDING_HOSTNAME
-        self.port = EMBEDDING_PORT
-        self.api_path = EMBEDDING_API_PATH
+        if provider is not None:
+            self.provider = provider
+        if model_name is not None:
+            self.model_name = model_name
+        self.hostname = hostname if hostname is not None else EMBEDDING_HOSTNAME
+        self.port = port if port is not None else EMBEDDING_PORT
+        self.api_path = api_path if api_path is not None else EMBEDDING_API_PATH
         self._embeddings = None
         self._initialize_embeddings()
 
@@ -0,0 +1,507 @@
+"""
+Embedding migration module for the RAG component.
+Rebuilds a Qdrant collection with a new embedding model in a shadow collection while the
+current collection keeps serving queries, then atomically repoints the collection alias.
+
+The migration state (which embedding model each physical collection was built with, and the
+progress of the running migration) is kept in a small JSON file so that every RAG process
+(Flask workers, the MCP server) sees the same view.
+
+Before the swap, writes are frozen through that file (see wait_for_migration_swap), a final
+catch-up runs against the quiescent source and the point counts are verified, so no chunk
+written during the migration is lost when the source collection is dropped.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .config import (
+    RAG_MIGRATION_STATE_FILE,
+    RAG_MIGRATION_BATCH_SIZE,
+    RAG_MIGRATION_MAX_POINTS_PER_SECOND,
+    RAG_MIGRATION_KEEP_OLD_COLLECTION,
+    RAG_MIGRATION_FREEZE_DRAIN_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# A running migration that has not reported progress for this long is considered dead
+MIGRATION_STALE_SECONDS = 120
+# Final catch-up rounds under frozen writes before giving up on matching point counts
+MIGRATION_VERIFY_ROUNDS = 3
+
+_state_lock = threading.Lock()
+_active_migrations: Dict[str, "EmbeddingMigration"] = {}
+
+
+def embedding_identity(provider: Optional[str], model: Optional[str]) -> Dict[str, str]:
+    """Build the identity used to tell embedding models apart."""
+    return {"provider": (provider or "").strip().lower(), "model": (model or "").strip()}
+
+
+def load_state() -> Dict[str, Any]:
+    """Load the migration state file (empty state if it does not exist)."""
+    try:
+        with open(RAG_MIGRATION_STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    state.setdefault("collections", {})
+    state.setdefault("serving_generation", 0)
+    state.setdefault("migration", None)
+    return state
+
+
+def update_state(mutate: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """
+    Apply a change to the migration state file atomically.
+
+    Args:
+        mutate: Callable that modifies the state dictionary in place
+
+    Returns:
+        The updated state
+    """
+    with _state_lock:
+        state = load_state()
+        mutate(state)
+        directory = os.path.dirname(os.path.abspath(RAG_MIGRATION_STATE_FILE))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{RAG_MIGRATION_STATE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, RAG_MIGRATION_STATE_FILE)
+        return state
+
+
+def state_mtime() -> int:
+    """Modification time of the state file, used to cheaply detect changes."""
+    try:
+        return os.stat(RAG_MIGRATION_STATE_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def get_collection_embedding(collection_name: str) -> Optional[Dict[str, str]]:
+    """Get the recorded embedding model of a physical collection."""
+    record = load_state()["collections"].get(collection_name)
+    if not record:
+        return None
+    return embedding_identity(record.get("provider"), record.get("model"))
+
+
+def record_collection_embedding(collection_name: str, identity: Dict[str, str], dimension: int):
+    """Record the embedding model a physical collection was built with."""
+    def mutate(state):
+        state["collections"][collection_name] = {**identity, "dimension": dimension, "recorded_at": time.time()}
+    update_state(mutate)
+
+
+def get_migration_status() -> Optional[Dict[str, Any]]:
+    """
+    Get the progress of the latest migration.
+
+    Returns:
+        Migration status dictionary, or None if no migration has ever run
+    """
+    migration = load_state()["migration"]
+    if not migration:
+        return None
+    status = dict(migration)
+    if status.get("status") == "running" and time.time() - status.get("updated_at", 0) > MIGRATION_STALE_SECONDS:
+        status["status"] = "stalled"
+    total = status.get("total") or 0
+    status["progress"] = round(min(status.get("processed", 0) / total, 1.0), 4) if total else None
+    return status
+
+
+def wait_for_migration_swap(alias: str, writing: bool = False, poll_interval: float = 0.1) -> int:
+    """
+    Block while a running migration of ``alias`` is swapping the alias or, for writers, has frozen writes.
+
+    Args:
+        alias: Collection name used by the application
+        writing: Whether the caller is about to write to the collection
+        poll_interval: Seconds between checks of the state file
+
+    Returns:
+        Modification time of the state file the decision was based on
+    """
+    while True:
+        mtime = state_mtime()
+        migration = load_state()["migration"] or {}
+        if migration.get("alias") != alias or migration.get("status") != "running" or \
+                time.time() - migration.get("updated_at", 0) > MIGRATION_STALE_SECONDS:
+            return mtime
+        if not (migration.get("swapping") or (writing and migration.get("writes_frozen"))):
+            return mtime
+        time.sleep(poll_interval)
+
+
+def resolve_collection(client, name: str) -> str:
+    """Resolve a collection alias to the physical collection name (names that are not aliases are returned as-is)."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return name
+
+
+def shadow_collection_name(alias: str, identity: Dict[str, str]) -> str:
+    """Build a unique physical collection name for a model."""
+    slug = re.sub(r"[^a-zA-Z0-9]+", "_", identity["model"]).strip("_").lower()[:48] or "model"
+    return f"{alias}__{slug}_{int(time.time())}"
+
+
+class EmbeddingMigration:
+    """Class responsible for re-embedding a collection into a shadow collection and swapping the alias."""
+
+    def __init__(
+        self,
+        client,
+        alias: str,
+        target_embeddings,
+        target_identity: Dict[str, str],
+        target_collection: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_points_per_second: Optional[float] = None,
+        content_payload_key: str = "page_content",
+        freeze_drain_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the migration.
+
+        Args:
+            client: Qdrant client
+            alias: Collection name used by the application (becomes an alias after the swap)
+            target_embeddings: LangChain embeddings of the new model
+            target_identity: Identity of the new model (see embedding_identity)
+            target_collection: Shadow collection to (re)use; a new name is generated if omitted
+            batch_size: Chunks re-embedded per batch
+            max_points_per_second: Throttle for the rebuild (0 disables throttling)
+            content_payload_key: Payload key holding the stored chunk text
+            freeze_drain_seconds: Time given to in-flight writes to finish after writes are frozen
+        """
+        self.client = client
+        self.alias = alias
+        self.target_embeddings = target_embeddings
+        self.target_identity = target_identity
+        self.target_collection = target_collection or shadow_collection_name(alias, target_identity)
+        self.batch_size = max(1, batch_size or RAG_MIGRATION_BATCH_SIZE)
+        self.max_points_per_second = RAG_MIGRATION_MAX_POINTS_PER_SECOND if max_points_per_second is None else max_points_per_second
+        self.content_payload_key = content_payload_key
+        self.freeze_drain_seconds = RAG_MIGRATION_FREEZE_DRAIN_SECONDS if freeze_drain_seconds is None else freeze_drain_seconds
+        self.source_collection = None
+        self.dimension = None
+        self.processed = 0
+        self.total = 0
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> threading.Thread:
+        """Run the migration in a background thread."""
+        self._thread = threading.Thread(target=self.run, name=f"embedding-migration-{self.alias}", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Ask the background migration to stop after the current batch."""
+        self._stop.set()
+
+    def run(self) -> bool:
+        """
+        Run the migration to completion.
+
+        Returns:
+            True if the alias now points at the rebuilt collection
+        """
+        from qdrant_client.http.models import Distance, VectorParams
+        from .vector_store_manager import ensure_qdrant_payload_indexes
+
+        try:
+            self.source_collection = resolve_collection(self.client, self.alias)
+            self._report(status="running", started_at=time.time(), error=None, writes_frozen=False, swapping=False)
+
+            self.dimension = len(self.target_embeddings.embed_query("dimension probe"))
+            if not self.client.collection_exists(self.target_collection):
+                self.client.create_collection(
+                    collection_name=self.target_collection,
+                    vectors_config=VectorParams(size=self.dimension, distance=Distance.COSINE)
+                )
+                ensure_qdrant_payload_indexes(self.client, self.target_collection)
+            logger.info(
+                f"Migrating '{self.alias}' ({self.source_collection}) to '{self.target_collection}' "
+                f"with model {self.target_identity['model']}"
+            )
+
+            # The first pass copies everything; the second picks up chunks ingested meanwhile
+            self._copy_missing("copy")
+            self._copy_missing("catch_up")
+            self._report(phase="cleanup")
+            self._delete_removed()
+            if self._stop.is_set():
+                self._report(status="stopped", writes_frozen=False)
+                return False
+
+            # Freeze writes and let in-flight ones finish, then copy the last changes and verify
+            self._report(phase="freeze", writes_frozen=True)
+            self._stop.wait(self.freeze_drain_seconds)
+            source_count = self._final_catch_up()
+            if self._stop.is_set():
+                self._report(status="stopped", writes_frozen=False)
+                return False
+
+            self._report(phase="swap", swapping=True)
+            self._swap_alias(source_count)
+            self._report(status="completed", finished_at=time.time(), writes_frozen=False, swapping=False)
+            logger.info(f"Embedding migration of '{self.alias}' completed; now serving '{self.target_collection}'")
+            return True
+        except Exception as e:
+            logger.error(f"Embedding migration of '{self.alias}' failed: {e}")
+            self._report(status="failed", error=str(e), finished_at=time.time(), writes_frozen=False, swapping=False)
+            return False
+        finally:
+            _active_migrations.pop(self.alias, None)
+
+    def _copy_missing(self, phase: str):
+        """Re-embed every source chunk that is not yet in the shadow collection."""
+        from qdrant_client.http.models import PointStruct
+
+        offset = None
+        self.processed = 0
+        self.skipped = 0
+        self.total = self.client.count(self.source_collection, exact=True).count
+        self._report(phase=phase, processed=0, total=self.total)
+        while not self._stop.is_set():
+            batch_start = time.time()
+            points, offset = self.client.scroll(
+                collection_name=self.source_collection,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            if points:
+                existing = {
+                    point.id for point in self.client.retrieve(
+                        collection_name=self.target_collection,
+                        ids=[point.id for point in points],
+                        with_payload=False,
+                        with_vectors=False
+                    )
+                }
+                has_content = [
+                    point for point in points
+                    if str((point.payload or {}).get(self.content_payload_key, "")).strip()
+                ]
+                self.skipped += len(points) - len(has_content)
+                missing = [point for point in has_content if point.id not in existing]
+                if missing:
+                    vectors = self.target_embeddings.embed_documents(
+                        [point.payload[self.content_payload_key] for point in missing]
+                    )
+                    self.client.upsert(
+                        collection_name=self.target_collection,
+                        points=[
+                            PointStruct(id=point.id, vector=vector, payload=point.payload)
+                            for point, vector in zip(missing, vectors)
+                        ],
+                        wait=True
+                    )
+                self.processed += len(points)
+                self._report(processed=self.processed, total=max(self.total, self.processed))
+                self._throttle(len(missing), time.time() - batch_start)
+            if offset is None:
+                break
+
+    def _delete_removed(self):
+        """Remove chunks from the shadow collection that were deleted from the source meanwhile."""
+        from qdrant_client.http.models import PointIdsList
+
+        offset = None
+        while not self._stop.is_set():
+            points, offset = self.client.scroll(
+                collection_name=self.target_collection,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            if points:
+                present = {
+                    point.id for point in self.client.retrieve(
+                        collection_name=self.source_collection,
+                        ids=[point.id for point in points],
+                        with_payload=False,
+                        with_vectors=False
+                    )
+                }
+                removed = [point.id for point in points if point.id not in present]
+                if removed:
+                    self.client.delete(
+                        collection_name=self.target_collection,
+                        points_selector=PointIdsList(points=removed),
+                        wait=True
+                    )
+            if offset is None:
+                break
+
+    def _final_catch_up(self) -> int:
+        """
+        Copy the changes made before writes were frozen and verify the shadow collection is complete.
+
+        Returns:
+            Number of points in the source collection
+
+        Raises:
+            RuntimeError: If the point counts still differ after MIGRATION_VERIFY_ROUNDS rounds
+        """
+        for _ in range(MIGRATION_VERIFY_ROUNDS):
+            if self._stop.is_set():
+                break
+            self._copy_missing("final_catch_up")
+            self._delete_removed()
+            source_count = self.client.count(self.source_collection, exact=True).count
+            target_count = self.client.count(self.target_collection, exact=True).count
+            if target_count == source_count - self.skipped:
+                return source_count
+            logger.warning(
+                f"Migration of '{self.alias}': {target_count} points in '{self.target_collection}', "
+                f"expected {source_count - self.skipped}; catching up again"
+            )
+        if self._stop.is_set():
+            return 0
+        raise RuntimeError(
+            f"Point counts of '{self.source_collection}' and '{self.target_collection}' do not match; "
+            f"keeping '{self.source_collection}'"
+        )
+
+    def _swap_alias(self, source_count: int):
+        """
+        Point the alias at the shadow collection.
+
+        Args:
+            source_count: Point count of the source verified against the shadow collection
+        """
+        from qdrant_client.http.models import (
+            CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+        )
+
+        # Record the model before the swap so that processes picking up the new collection embed queries correctly
+        record_collection_embedding(self.target_collection, self.target_identity, self.dimension)
+
+        create_alias = CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=self.target_collection, alias_name=self.alias)
+        )
+        source_dropped = False
+        if self.source_collection != self.alias:
+            # Deleting and creating the alias in one request makes the switch atomic for readers
+            self.client.update_collection_aliases(change_aliases_operations=[
+                DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.alias)),
+                create_alias
+            ])
+            if not RAG_MIGRATION_KEEP_OLD_COLLECTION:
+                # Only drop the source if nothing reached it since the counts were verified
+                if self.client.count(self.source_collection, exact=True).count == source_count:
+                    self.client.delete_collection(collection_name=self.source_collection)
+                    source_dropped = True
+                else:
+                    logger.warning(f"'{self.source_collection}' changed during the swap; keeping it")
+        else:
+            # The pre-existing collection occupies the alias name, and Qdrant cannot drop a collection
+            # inside an alias update. Readers and writers wait on the swapping flag for this short gap,
+            # which happens once per collection; later migrations are pure alias swaps.
+            self.client.delete_collection(collection_name=self.alias)
+            self.client.update_collection_aliases(change_aliases_operations=[create_alias])
+            source_dropped = True
+
+        def mutate(state):
+            state["serving_generation"] = state.get("serving_generation", 0) + 1
+            if self.source_collection != self.target_collection and source_dropped:
+                state["collections"].pop(self.source_collection, None)
+        update_state(mutate)
+
+    def _throttle(self, embedded: int, elapsed: float):
+        """Sleep so that re-embedding stays under max_points_per_second."""
+        if self.max_points_per_second and embedded:
+            delay = embedded / self.max_points_per_second - elapsed
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def _report(self, **fields):
+        """Write migration progress to the shared state file."""
+        def mutate(state):
+            migration = state.get("migration") or {}
+            if migration.get("target_collection") != self.target_collection:
+                migration = {}
+            migration.update({
+                "alias": self.alias,
+                "source_collection": self.source_collection,
+                "target_collection": self.target_collection,
+                "target_embedding": self.target_identity,
+                "pid": os.getpid(),
+                "updated_at": time.time()
+            })
+            migration.update(fields)
+            state["migration"] = migration
+        update_state(mutate)
+
+
+def start_background_migration(
+    client,
+    alias: str,
+    target_embeddings,
+    target_identity: Dict[str, str]
+) -> Optional[EmbeddingMigration]:
+    """
+    Start a background migration of ``alias`` to the target model unless one is already running.
+
+    A migration that died with its process (no progress for MIGRATION_STALE_SECONDS) is resumed
+    into the same shadow collection; chunks that were already re-embedded are skipped.
+
+    Args:
+        client: Qdrant client
+        alias: Collection name used by the application
+        target_embeddings: LangChain embeddings of the new model
+        target_identity: Identity of the new model
+
+    Returns:
+        The started migration, or None if a migration is already in progress
+    """
+    if alias in _active_migrations:
+        return None
+
+    lock_path = f"{RAG_MIGRATION_STATE_FILE}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    try:
+        lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Another process is deciding right now; it will start the migration if needed
+        if time.time() - os.path.getmtime(lock_path) > MIGRATION_STALE_SECONDS:
+            os.remove(lock_path)
+        return None
+
+    try:
+        migration_state = load_state()["migration"] or {}
+        target_collection = None
+        if migration_state.get("alias") == alias and migration_state.get("target_embedding") == target_identity:
+            if migration_state.get("status") == "running" and \
+                    time.time() - migration_state.get("updated_at", 0) <= MIGRATION_STALE_SECONDS:
+                return None
+            if migration_state.get("status") != "completed":
+                target_collection = migration_state.get("target_collection")
+
+        migration = EmbeddingMigration(
+            client, alias, target_embeddings, target_identity, target_collection=target_collection
+        )
+        _active_migrations[alias] = migration
+        migration._report(status="running", processed=0, total=0)
+        migration.start()
+        return migration
+    finally:
+        os.close(lock_fd)
+        os.remove(lock_path)
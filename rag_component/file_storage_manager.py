@@ -8,6 +8,7 @@ import uuid
 from pathlib import Path
 from typing import List, Optional
 from config.settings import RAG_FILE_STORAGE_DIR
+from .config import RAG_MARKDOWN_STORAGE_DIR
 
 
 class FileStorageManager:
@@ -23,19 +24,22 @@ class FileStorageManager:
         self.storage_dir = storage_dir or RAG_FILE_STORAGE_DIR or './data/rag_files'
         os.makedirs(self.storage_dir, exist_ok=True)
         
-    def store_file(self, file_path: str, original_filename: str) -> str:
+    def store_file(self, file_path: str, original_filename: str, file_id: Optional[str] = None) -> str:
         """
         Store a file with its original filename preserved.
         
         Args:
             file_path: Path to the temporary file to store
             original_filename: Original filename to preserve
+            file_id: Optional ID to store the file under (a new UUID is generated if omitted)
             
         Returns:
             Path to the stored file
         """
         # Create a unique subdirectory to avoid filename collisions
-        subdir = str(uuid.uuid4())
+        subdir = file_id or str(uuid.uuid4())
+        if not self._is_valid_file_id(subdir):
+            raise ValueError(f"Invalid file ID: {subdir}")
         file_storage_dir = os.path.join(self.storage_dir, subdir)
         os.makedirs(file_storage_dir, exist_ok=True)
         
@@ -48,23 +52,32 @@ class FileStorageManager:
         
         return stored_file_path
     
-    def store_files(self, file_paths: List[str], original_filenames: List[str]) -> List[str]:
+    def store_files(
+        self,
+        file_paths: List[str],
+        original_filenames: List[str],
+        file_ids: Optional[List[str]] = None
+    ) -> List[str]:
         """
         Store multiple files with their original filenames preserved.
         
         Args:
             file_paths: List of paths to temporary files to store
             original_filenames: List of original filenames to preserve
+            file_ids: Optional list of IDs to store the files under
             
         Returns:
             List of paths to the stored files
         """
         if len(file_paths) != len(original_filenames):
             raise ValueError("Number of file paths must match number of original filenames")
+        if file_ids is not None and len(file_ids) != len(file_paths):
+            raise ValueError("Number of file IDs must match number of file paths")
         
         stored_paths = []
-        for file_path, original_filename in zip(file_paths, original_filenames):
-            stored_path = self.store_file(file_path, original_filename)
+        for i, (file_path, original_filename) in enumerate(zip(file_paths, original_filenames)):
+            file_id = file_ids[i] if file_ids else None
+            stored_path = self.store_file(file_path, original_filename, file_id=file_id)
             stored_paths.append(stored_path)
         
         return stored_paths
@@ -90,6 +103,55 @@ class FileStorageManager:
         else:
             return None
     
+    def delete_file(self, file_id: str) -> bool:
+        """
+        Delete a stored original file together with its storage directory.
+
+        Args:
+            file_id: The unique ID assigned to the file during storage
+
+        Returns:
+            True if a stored file was removed
+        """
+        if not self._is_valid_file_id(file_id):
+            raise ValueError(f"Invalid file ID: {file_id}")
+
+        file_storage_dir = os.path.join(self.storage_dir, file_id)
+        if not os.path.isdir(file_storage_dir):
+            return False
+
+        shutil.rmtree(file_storage_dir)
+        return True
+
+    def delete_markdown_file(self, markdown_file_path: str) -> bool:
+        """
+        Delete a converted Markdown file produced by the PDF converter.
+
+        Only paths inside the Markdown storage directory are removed; the converter
+        stores every file in its own UUID subdirectory, which is removed as well.
+
+        Args:
+            markdown_file_path: Path recorded in the chunk metadata at ingestion time
+
+        Returns:
+            True if the Markdown file was removed
+        """
+        markdown_root = os.path.realpath(RAG_MARKDOWN_STORAGE_DIR)
+        resolved_path = os.path.realpath(markdown_file_path)
+        if not resolved_path.startswith(markdown_root + os.sep) or not os.path.exists(resolved_path):
+            return False
+
+        markdown_dir = os.path.dirname(resolved_path)
+        if os.path.dirname(markdown_dir) == markdown_root:
+            shutil.rmtree(markdown_dir)
+        else:
+            os.remove(resolved_path)
+        return True
+
+    def _is_valid_file_id(self, file_id: str) -> bool:
+        """Check that a file ID is a single safe path component."""
+        return bool(file_id) and os.path.basename(file_id) == file_id and file_id not in ('.', '..')
+
     def _sanitize_filename(self, filename: str) -> str:
         """
         Sanitize a filename to prevent path traversal and other security issues.
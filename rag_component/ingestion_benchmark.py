@@ -0,0 +1,170 @@
+"""
+Ingestion throughput benchmark for the RAG component.
+Writes a configurable synthetic corpus to disk, ingests it through RAGOrchestrator.ingest_documents
+against the local stand-in embedding server, and prints the per-stage breakdown collected by
+IngestionMetrics (parse, split, metadata, embed, upsert, ...).
+
+Usage:
+    python -m rag_component.ingestion_benchmark --docs 2000 --doc-size 40
+    python -m rag_component.ingestion_benchmark --embedding-latency-ms 20 --batch-size 128 --parallelism 4 --json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .ingestion_metrics import IngestionMetrics
+from .retrieval_benchmark import StandInEmbeddingServer, build_synthetic_corpus, _drop_benchmark_collection
+
+logger = logging.getLogger(__name__)
+
+
+def write_synthetic_corpus(output_dir: str, num_docs: int, doc_size: int = 12, seed: int = 42) -> List[str]:
+    """
+    Write the synthetic benchmark corpus as .txt files.
+
+    Args:
+        output_dir: Directory to write the files into
+        num_docs: Number of documents
+        doc_size: Filler sentences per document (roughly 80 bytes each)
+        seed: Random seed
+
+    Returns:
+        List of written file paths
+    """
+    documents, _ = build_synthetic_corpus(num_docs, 0, seed=seed, filler_sentences=doc_size)
+    os.makedirs(output_dir, exist_ok=True)
+    file_paths = []
+    for doc in documents:
+        file_path = os.path.join(output_dir, doc.metadata["source"])
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(doc.page_content)
+        file_paths.append(file_path)
+    return file_paths
+
+
+def run_ingestion_benchmark(
+    num_docs: int = 500,
+    doc_size: int = 12,
+    store_type: str = "qdrant",
+    qdrant_url: Optional[str] = ":memory:",
+    batch_size: Optional[int] = None,
+    parallelism: Optional[int] = None,
+    embedding_dim: int = 256,
+    embedding_latency_ms: float = 0.0,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """
+    Ingest a synthetic corpus and return the ingestion metrics.
+
+    Args:
+        num_docs: Number of synthetic documents
+        doc_size: Filler sentences per document
+        store_type: Vector store backend ("qdrant" or "chroma")
+        qdrant_url: Qdrant URL (":memory:" runs fully offline)
+        batch_size: Bulk upload batch size (Qdrant)
+        parallelism: Bulk upload parallelism (Qdrant)
+        embedding_dim: Stand-in embedding dimension
+        embedding_latency_ms: Artificial latency per embedding request
+        seed: Random seed for the synthetic corpus
+
+    Returns:
+        IngestionMetrics summary with an added "config" section
+    """
+    from .embedding_manager import EmbeddingManager
+    from .main import RAGOrchestrator
+    from .vector_store_manager import VectorStoreManager
+
+    corpus_dir = tempfile.mkdtemp(prefix="ingestion_benchmark_")
+    try:
+        file_paths = write_synthetic_corpus(corpus_dir, num_docs, doc_size=doc_size, seed=seed)
+
+        with StandInEmbeddingServer(dimension=embedding_dim, latency_ms=embedding_latency_ms) as server:
+            embedding_manager = EmbeddingManager(
+                provider="LM Studio",
+                model_name="stand-in-embedding",
+                hostname=server.host,
+                port=str(server.port),
+                api_path="/v1"
+            )
+            vector_store_manager = VectorStoreManager(
+                store_type=store_type,
+                embedding_manager=embedding_manager,
+                collection_name=f"ingestion_benchmark_{uuid.uuid4().hex[:8]}",
+                qdrant_url=qdrant_url
+            )
+            vector_store_manager.upload_batch_size = batch_size
+            vector_store_manager.upload_parallelism = parallelism
+            try:
+                orchestrator = RAGOrchestrator(vector_store_manager=vector_store_manager)
+                metrics = IngestionMetrics(run_id="ingestion_benchmark")
+                # The orchestrator prints its own breakdown; keep the benchmark output to a single report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    success = orchestrator.ingest_documents(file_paths, metrics=metrics)
+                if not success:
+                    raise RuntimeError("Benchmark ingestion failed")
+                summary = orchestrator.last_ingestion_metrics
+                summary["breakdown"] = metrics.format_breakdown()
+                summary["embedding_requests"] = server.request_count
+            finally:
+                _drop_benchmark_collection(vector_store_manager)
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    summary["config"] = {
+        "docs": num_docs,
+        "doc_size": doc_size,
+        "store_type": store_type,
+        "qdrant_url": qdrant_url if store_type == "qdrant" else None,
+        "batch_size": batch_size,
+        "parallelism": parallelism,
+        "embedding_dim": embedding_dim,
+        "embedding_latency_ms": embedding_latency_ms
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingestion throughput benchmark with per-stage breakdown')
+    parser.add_argument('--docs', type=int, default=500, help="Number of synthetic documents")
+    parser.add_argument('--doc-size', type=int, default=12, help="Filler sentences per document")
+    parser.add_argument('--store', choices=['qdrant', 'chroma'], default='qdrant', help="Vector store backend")
+    parser.add_argument('--qdrant-url', default=':memory:', help="Qdrant URL (':memory:' runs fully offline)")
+    parser.add_argument('--batch-size', type=int, default=None, help="Bulk upload batch size (Qdrant)")
+    parser.add_argument('--parallelism', type=int, default=None, help="Bulk upload parallelism (Qdrant)")
+    parser.add_argument('--embedding-dim', type=int, default=256)
+    parser.add_argument('--embedding-latency-ms', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="Print the full metrics summary as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    summary = run_ingestion_benchmark(
+        num_docs=args.docs,
+        doc_size=args.doc_size,
+        store_type=args.store,
+        qdrant_url=args.qdrant_url,
+        batch_size=args.batch_size,
+        parallelism=args.parallelism,
+        embedding_dim=args.embedding_dim,
+        embedding_latency_ms=args.embedding_latency_ms,
+        seed=args.seed
+    )
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(summary["breakdown"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
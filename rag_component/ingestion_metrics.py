@@ -0,0 +1,225 @@
+"""
+Ingestion metrics module for the RAG component.
+Collects per-stage timings and counters (documents, chunks, bytes, embedding batch sizes and
+queue depths) for one ingestion run, so slow uploads can be attributed to a stage.
+"""
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionMetrics:
+    """Class responsible for timing ingestion stages and counting what flows through them."""
+
+    def __init__(
+        self,
+        run_id: Optional[str] = None,
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+        update_interval: float = 2.0
+    ):
+        """
+        Initialize the metrics collector.
+
+        Args:
+            run_id: Identifier of the ingestion run (generated if omitted)
+            on_update: Optional callback receiving the summary while the run progresses (e.g. to update job status)
+            update_interval: Minimum number of seconds between two on_update calls
+        """
+        self.run_id = run_id or uuid.uuid4().hex
+        self.on_update = on_update
+        self.update_interval = update_interval
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.totals = {"files": 0, "docs": 0, "chunks": 0, "bytes": 0}
+        self.failed_files = 0
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._batch_sizes: List[int] = []
+        self._queues: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._last_update = 0.0
+
+    @contextmanager
+    def stage(self, name: str, docs: int = 0, chunks: int = 0, bytes: int = 0):
+        """
+        Time a block of work as one call of a stage.
+
+        Args:
+            name: Stage name (dotted names such as "parse.PyPDFLoader" give a per-loader breakdown)
+            docs: Documents processed by the block
+            chunks: Chunks processed by the block
+            bytes: Bytes processed by the block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, seconds=time.perf_counter() - start, docs=docs, chunks=chunks, bytes=bytes)
+
+    def add(self, name: str, seconds: float = 0.0, docs: int = 0, chunks: int = 0, bytes: int = 0):
+        """Record one call of a stage (also usable for counts known only after the block ran)."""
+        with self._lock:
+            stage = self._stages.setdefault(name, {"seconds": 0.0, "calls": 0, "docs": 0, "chunks": 0, "bytes": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += 1 if seconds else 0
+            stage["docs"] += docs
+            stage["chunks"] += chunks
+            stage["bytes"] += bytes
+        self._maybe_notify()
+
+    def count(self, files: int = 0, docs: int = 0, chunks: int = 0, bytes: int = 0):
+        """Add to the run totals."""
+        with self._lock:
+            self.totals["files"] += files
+            self.totals["docs"] += docs
+            self.totals["chunks"] += chunks
+            self.totals["bytes"] += bytes
+
+    def record_failure(self, files: int = 1):
+        """Count files that could not be ingested (the run goes on without them)."""
+        with self._lock:
+            self.failed_files += files
+
+    def record_batch(self, size: int):
+        """Record the size of one embedding batch."""
+        with self._lock:
+            self._batch_sizes.append(size)
+
+    def set_queue_depth(self, name: str, depth: int):
+        """Record the current depth of a queue (the maximum is kept as well)."""
+        with self._lock:
+            queue = self._queues.setdefault(name, {"current": 0, "max": 0})
+            queue["current"] = depth
+            queue["max"] = max(queue["max"], depth)
+
+    def finish(self, error: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Mark the run as finished and return the final summary.
+
+        Args:
+            error: Error that aborted the run, if any
+
+        Returns:
+            The final summary
+        """
+        self._end = time.perf_counter()
+        self.finished_at = time.time()
+        self.error = error
+        summary = self.summary()
+        if self.on_update:
+            self._notify(summary)
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Build the metrics summary.
+
+        Returns:
+            Dictionary with totals, overall throughput, per-stage breakdown, embedding batch
+            sizes and queue depths. Stage times of work done in worker threads are summed
+            across threads, so they can add up to more than the elapsed time.
+        """
+        with self._lock:
+            elapsed = ((self._end or time.perf_counter()) - self._start)
+            stages = {}
+            for name, stage in self._stages.items():
+                seconds = stage["seconds"]
+                stages[name] = {
+                    "seconds": round(seconds, 4),
+                    "calls": stage["calls"],
+                    "share": round(seconds / elapsed, 4) if elapsed > 0 else None,
+                    **{key: stage[key] for key in ("docs", "chunks", "bytes") if stage[key]},
+                    **{
+                        f"{key}_per_second": round(stage[key] / seconds, 2)
+                        for key in ("docs", "chunks", "bytes") if stage[key] and seconds > 0
+                    }
+                }
+            batches = list(self._batch_sizes)
+            return {
+                "run_id": self.run_id,
+                "status": self._status(),
+                "error": self.error,
+                "failed_files": self.failed_files,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "elapsed_seconds": round(elapsed, 4),
+                "totals": dict(self.totals),
+                "throughput": {
+                    f"{key}_per_second": round(self.totals[key] / elapsed, 2) if elapsed > 0 else None
+                    for key in ("docs", "chunks", "bytes")
+                },
+                "stages": stages,
+                "embedding_batches": {
+                    "count": len(batches),
+                    "mean_size": round(sum(batches) / len(batches), 2) if batches else None,
+                    "min_size": min(batches) if batches else None,
+                    "max_size": max(batches) if batches else None
+                },
+                "queue_depths": {name: dict(queue) for name, queue in self._queues.items()}
+            }
+
+    def _status(self) -> str:
+        """Run status derived from the failure counters (call with the lock held)."""
+        if not self.finished_at:
+            return "running"
+        if self.error or (self.failed_files and not self.totals["files"]):
+            return "failed"
+        if self.failed_files:
+            return "completed_with_errors"
+        return "completed"
+
+    def format_breakdown(self) -> str:
+        """Human-readable stage breakdown for logs and the benchmark command."""
+        summary = self.summary()
+        totals = summary["totals"]
+        throughput = summary["throughput"]
+        lines = [
+            f"Ingestion {summary['run_id']}: {totals['files']} files, {totals['docs']} docs, "
+            f"{totals['chunks']} chunks, {totals['bytes']} bytes in {summary['elapsed_seconds']:.2f}s "
+            f"({throughput['docs_per_second']} docs/s, {throughput['chunks_per_second']} chunks/s, "
+            f"{throughput['bytes_per_second']} bytes/s)"
+        ]
+        if summary["status"] in ("failed", "completed_with_errors"):
+            lines.append(
+                f"  status: {summary['status']} ({summary['failed_files']} files failed"
+                + (f"; {summary['error']}" if summary["error"] else "") + ")"
+            )
+        for name, stage in sorted(summary["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            rates = ", ".join(
+                f"{stage[key]} {key.replace('_per_second', '')}/s"
+                for key in ("docs_per_second", "chunks_per_second", "bytes_per_second") if key in stage
+            )
+            share = f"{stage['share'] * 100:5.1f}%" if stage["share"] is not None else "    -"
+            lines.append(f"  {name:<28} {stage['seconds']:9.3f}s {share}  calls={stage['calls']}" + (f"  {rates}" if rates else ""))
+        batches = summary["embedding_batches"]
+        if batches["count"]:
+            lines.append(
+                f"  embedding batches: {batches['count']} (size mean {batches['mean_size']}, "
+                f"min {batches['min_size']}, max {batches['max_size']})"
+            )
+        for name, queue in summary["queue_depths"].items():
+            lines.append(f"  queue {name}: max depth {queue['max']}")
+        return "\n".join(lines)
+
+    def _maybe_notify(self):
+        if not self.on_update:
+            return
+        now = time.monotonic()
+        if now - self._last_update < self.update_interval:
+            return
+        self._last_update = now
+        self._notify(self.summary())
+
+    def _notify(self, summary: Dict[str, Any]):
+        try:
+            self.on_update(summary)
+        except Exception as e:
+            # Reporting must never break the ingestion itself
+            logger.warning(f"Ingestion metrics update callback failed: {e}")
@@ -3,6 +3,9 @@ Main RAG orchestrator module.
 Coordinates all RAG components and provides a unified interface.
 """
 import os
+import threading
+import time
+from contextlib import nullcontext
 from typing import List, Dict, Any, Optional
 from langchain_core.documents import Document as LCDocument
 from .document_loader import DocumentLoader
@@ -11,23 +14,32 @@ from .vector_store_manager import VectorStoreManager
 from .retriever import Retriever
 from .rag_chain import RAGChain
 from .reranker import Reranker
+from .ingestion_metrics import IngestionMetrics
 from .config import RAG_CHUNK_SIZE, RAG_CHUNK_OVERLAP, RERANKER_ENABLED
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+# Characters of downloaded page text passed to the summarization prompt, to avoid exceeding token limits
+WEB_CONTENT_MAX_CHARS = 4000
+
 
 class RAGOrchestrator:
     """Main class that orchestrates all RAG components."""
 
-    def __init__(self, llm=None):
+    def __init__(self, llm=None, vector_store_manager: Optional[VectorStoreManager] = None):
         """
         Initialize the RAG orchestrator.
 
         Args:
             llm: Language model to use for generation (will be passed to RAGChain)
+            vector_store_manager: Optional preconfigured vector store manager (e.g. for benchmarks)
         """
         self.document_loader = DocumentLoader()
-        self.embedding_manager = EmbeddingManager()
-        self.vector_store_manager = VectorStoreManager()
+        if vector_store_manager is not None:
+            self.embedding_manager = vector_store_manager.embedding_manager
+            self.vector_store_manager = vector_store_manager
+        else:
+            self.embedding_manager = EmbeddingManager()
+            self.vector_store_manager = VectorStoreManager()
         self.retriever = Retriever(self.vector_store_manager)
         self.rag_chain = RAGChain(self.retriever, llm)
         self.reranker = Reranker() if RERANKER_ENABLED else None
@@ -40,29 +52,74 @@ class RAGOrchestrator:
             is_separator_regex=False,
         )
 
-    def ingest_documents(self, file_paths: List[str], preprocess: bool = True) -> bool:
+        # Summary of the most recent ingestion run (see IngestionMetrics.summary)
+        self.last_ingestion_metrics: Optional[Dict[str, Any]] = None
+
+        # LLM client shared by web search result summaries (see _get_summary_generator)
+        self._summary_generator = None
+        self._summary_generator_lock = threading.Lock()
+        # MCP client shared by web search result downloads (see _get_mcp_model)
+        self._mcp_model = None
+        self._mcp_model_lock = threading.Lock()
+
+    def _split(self, docs: List[LCDocument], metrics: IngestionMetrics) -> List[LCDocument]:
+        """Split documents into chunks, recording the split stage."""
+        split_start = time.perf_counter()
+        chunks = self.text_splitter.split_documents(docs)
+        metrics.add(
+            "split",
+            seconds=time.perf_counter() - split_start,
+            docs=len(docs),
+            chunks=len(chunks),
+            bytes=sum(len(doc.page_content.encode("utf-8")) for doc in docs)
+        )
+        return chunks
+
+    def _index(self, docs: List[LCDocument], metrics: IngestionMetrics):
+        """Embed and store the accumulated chunks, recording the wall time of the index stage."""
+        metrics.set_queue_depth("chunks_buffered", len(docs))
+        with metrics.stage("index", chunks=len(docs)):
+            self.vector_store_manager.add_documents(docs, metrics=metrics)
+        metrics.set_queue_depth("chunks_buffered", 0)
+
+    def _finish_metrics(self, metrics: IngestionMetrics):
+        """Store and log the summary of an ingestion run."""
+        self.last_ingestion_metrics = metrics.finish()
+        print(metrics.format_breakdown())
+
+    def ingest_documents(
+        self,
+        file_paths: List[str],
+        preprocess: bool = True,
+        metrics: Optional[IngestionMetrics] = None
+    ) -> bool:
         """
         Ingest documents into the vector store.
 
         Args:
             file_paths: List of file paths to ingest
             preprocess: Whether to split documents into chunks
+            metrics: Optional IngestionMetrics to record the run into (one is created if omitted)
 
         Returns:
             True if ingestion was successful
         """
+        metrics = metrics or IngestionMetrics()
         try:
             all_docs = []
+            ingested_at = time.time()
 
-            for file_path in file_paths:
-                docs = self.document_loader.load_document(file_path)
+            for i, file_path in enumerate(file_paths):
+                metrics.set_queue_depth("files_pending", len(file_paths) - i)
+                docs = self.document_loader.load_document(file_path, metrics=metrics)
+                metrics.count(files=1, docs=len(docs), bytes=os.path.getsize(file_path))
 
                 if preprocess:
                     # Split documents into chunks
-                    docs = self.text_splitter.split_documents(docs)
+                    docs = self._split(docs, metrics)
 
                 # Add source metadata to each document if not already present
-                import os
+                metadata_start = time.perf_counter()
                 for doc in docs:
                     if not doc.metadata.get("source"):
                         # Use the original filename as the source, preserving full name with non-Latin characters
@@ -73,20 +130,35 @@ class RAGOrchestrator:
                     # Label the source as coming from local ingestion
                     if not doc.metadata.get("upload_method"):
                         doc.metadata["upload_method"] = "Local"
+                    # Ingestion timestamp, used for date range filtering
+                    doc.metadata["ingested_at"] = ingested_at
+                metrics.add("metadata", seconds=time.perf_counter() - metadata_start, chunks=len(docs))
 
                 all_docs.extend(docs)
+                metrics.set_queue_depth("chunks_buffered", len(all_docs))
+            metrics.set_queue_depth("files_pending", 0)
+            metrics.count(chunks=len(all_docs))
 
             # Add documents to vector store
-            self.vector_store_manager.add_documents(all_docs)
+            self._index(all_docs, metrics)
+            self._finish_metrics(metrics)
 
             return True
         except Exception as e:
             print(f"Error ingesting documents: {str(e)}")
             import traceback
             traceback.print_exc()
+            self.last_ingestion_metrics = metrics.finish(error=str(e))
             return False
 
-    def ingest_documents_from_upload(self, file_paths: List[str], original_filenames: List[str], preprocess: bool = True) -> bool:
+    def ingest_documents_from_upload(
+        self,
+        file_paths: List[str],
+        original_filenames: List[str],
+        preprocess: bool = True,
+        file_ids: Optional[List[str]] = None,
+        metrics: Optional[IngestionMetrics] = None
+    ) -> bool:
         """
         Ingest documents from web uploads into the vector store, preserving original filenames.
 
@@ -94,10 +166,13 @@ class RAGOrchestrator:
             file_paths: List of temporary file paths to ingest
             original_filenames: List of original filenames from the upload
             preprocess: Whether to split documents into chunks
+            file_ids: Optional file IDs to store the documents under (generated if omitted)
+            metrics: Optional IngestionMetrics to record the run into (one is created if omitted)
 
         Returns:
             True if ingestion was successful
         """
+        metrics = metrics or IngestionMetrics()
         try:
             from .file_storage_manager import FileStorageManager
             import os
@@ -110,26 +185,31 @@ class RAGOrchestrator:
             file_storage_manager = FileStorageManager()
 
             # Store the original files with their original filenames preserved
-            stored_file_paths = file_storage_manager.store_files(file_paths, original_filenames)
+            with metrics.stage("store_files", docs=len(file_paths)):
+                stored_file_paths = file_storage_manager.store_files(file_paths, original_filenames, file_ids=file_ids)
             print(f"DEBUG: Stored file paths: {stored_file_paths}")
 
             all_docs = []
+            ingested_at = time.time()
 
             for i, (file_path, original_filename, stored_file_path) in enumerate(zip(file_paths, original_filenames, stored_file_paths)):
                 print(f"DEBUG: Processing file {i+1}/{len(file_paths)}: {original_filename}")
+                metrics.set_queue_depth("files_pending", len(file_paths) - i)
                 print(f"DEBUG: File path: {file_path}")
                 print(f"DEBUG: Stored file path: {stored_file_path}")
 
                 # Load the document, which will handle PDF processing with timeouts and fallbacks
-                docs = self.document_loader.load_document(file_path)
+                docs = self.document_loader.load_document(file_path, metrics=metrics)
+                metrics.count(files=1, docs=len(docs), bytes=os.path.getsize(stored_file_path))
                 print(f"DEBUG: Loaded {len(docs)} documents from {original_filename}")
 
                 if preprocess:
                     # Split documents into chunks
-                    docs = self.text_splitter.split_documents(docs)
+                    docs = self._split(docs, metrics)
                     print(f"DEBUG: After preprocessing, {len(docs)} documents for {original_filename}")
 
                 # Add source metadata to each document using original filename
+                metadata_start = time.perf_counter()
                 for doc in docs:
                     # Use the original filename as both source and title for web uploads
                     doc.metadata["source"] = original_filename
@@ -141,46 +221,63 @@ class RAGOrchestrator:
                     # Extract the unique ID from the stored file path (the directory name)
                     stored_dir = os.path.dirname(stored_file_path)
                     doc.metadata["file_id"] = os.path.basename(stored_dir)
+                    # Ingestion timestamp, used for date range filtering
+                    doc.metadata["ingested_at"] = ingested_at
+                metrics.add("metadata", seconds=time.perf_counter() - metadata_start, chunks=len(docs))
 
                 all_docs.extend(docs)
+                metrics.set_queue_depth("chunks_buffered", len(all_docs))
                 print(f"DEBUG: Total docs accumulated: {len(all_docs)}")
+            metrics.set_queue_depth("files_pending", 0)
+            metrics.count(chunks=len(all_docs))
 
             print(f"DEBUG: Adding {len(all_docs)} total documents to vector store")
 
             # Add documents to vector store
-            self.vector_store_manager.add_documents(all_docs)
+            self._index(all_docs, metrics)
 
             # Clean up temporary files after successful storage
             file_storage_manager.cleanup_temp_files(file_paths)
             print(f"DEBUG: Completed ingestion for all {len(file_paths)} files")
+            self._finish_metrics(metrics)
 
             return True
         except Exception as e:
             print(f"Error ingesting uploaded documents: {str(e)}")
             import traceback
             traceback.print_exc()
+            self.last_ingestion_metrics = metrics.finish(error=str(e))
             return False
 
-    def ingest_documents_from_directory(self, directory_path: str, preprocess: bool = True) -> bool:
+    def ingest_documents_from_directory(
+        self,
+        directory_path: str,
+        preprocess: bool = True,
+        metrics: Optional[IngestionMetrics] = None
+    ) -> bool:
         """
         Ingest all supported documents from a directory.
 
         Args:
             directory_path: Path to directory containing documents
             preprocess: Whether to split documents into chunks
+            metrics: Optional IngestionMetrics to record the run into (one is created if omitted)
 
         Returns:
             True if ingestion was successful
         """
+        metrics = metrics or IngestionMetrics()
         try:
-            docs = self.document_loader.load_documents_from_directory(directory_path)
+            docs = self.document_loader.load_documents_from_directory(directory_path, metrics=metrics)
+            metrics.count(docs=len(docs))
 
             if preprocess:
                 # Split documents into chunks
-                docs = self.text_splitter.split_documents(docs)
+                docs = self._split(docs, metrics)
 
             # Add source metadata to each document if not already present
-            import os
+            ingested_at = time.time()
+            metadata_start = time.perf_counter()
             for doc in docs:
                 # Update source to use just the filename for consistency
                 if doc.metadata.get("source"):
@@ -194,15 +291,127 @@ class RAGOrchestrator:
                 # Label the source as coming from local ingestion
                 if not doc.metadata.get("upload_method"):
                     doc.metadata["upload_method"] = "Local"
+                # Ingestion timestamp, used for date range filtering
+                doc.metadata["ingested_at"] = ingested_at
+            metrics.add("metadata", seconds=time.perf_counter() - metadata_start, chunks=len(docs))
+            metrics.count(chunks=len(docs))
 
             # Add documents to vector store
-            self.vector_store_manager.add_documents(docs)
+            self._index(docs, metrics)
+            self._finish_metrics(metrics)
 
             return True
         except Exception as e:
             print(f"Error ingesting documents from directory: {str(e)}")
+            self.last_ingestion_metrics = metrics.finish(error=str(e))
             return False
 
+    def delete_document(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None,
+        delete_files: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Delete a single document's chunks from the vector store.
+
+        Args:
+            file_id: File ID assigned to the document at upload time
+            source: Source (original filename) of the document
+            ids: Explicit chunk ids to delete
+            delete_files: Whether to also remove the stored original and converted Markdown files
+
+        Returns:
+            Dictionary with the number of deleted chunks, deleted linked duplicate chunks
+            and removed files
+        """
+        from .file_storage_manager import FileStorageManager
+
+        # Collect file references before the chunks (and their metadata) are gone; chunks that
+        # were linked to a near-duplicate instead of being stored belong to the document too
+        chunks = self.vector_store_manager.find_chunks(file_id=file_id, source=source, ids=ids)
+        linked_chunks = self.vector_store_manager.find_linked_chunks(file_id=file_id, source=source, ids=ids)
+        deleted_chunks = self.vector_store_manager.delete_documents(file_id=file_id, source=source, ids=ids)
+
+        removed_files = []
+        if delete_files and (chunks or linked_chunks):
+            file_storage_manager = FileStorageManager()
+            all_chunks = chunks + linked_chunks
+            stored_file_ids = {metadata.get("file_id") for _, metadata in all_chunks if metadata.get("file_id")}
+            markdown_paths = {metadata.get("markdown_file_path") for _, metadata in all_chunks if metadata.get("markdown_file_path")}
+
+            # Only remove files that no longer back any remaining chunk
+            for stored_file_id in stored_file_ids:
+                if ids and (self.vector_store_manager.find_chunks(file_id=stored_file_id)
+                            or self.vector_store_manager.find_linked_chunks(file_id=stored_file_id)):
+                    continue
+                try:
+                    if file_storage_manager.delete_file(stored_file_id):
+                        removed_files.append(stored_file_id)
+                except Exception as e:
+                    print(f"Error removing stored file {stored_file_id}: {str(e)}")
+            for markdown_path in markdown_paths:
+                try:
+                    if file_storage_manager.delete_markdown_file(markdown_path):
+                        removed_files.append(markdown_path)
+                except Exception as e:
+                    print(f"Error removing converted Markdown file {markdown_path}: {str(e)}")
+
+        return {
+            "deleted_chunks": deleted_chunks,
+            "deleted_linked_chunks": len(linked_chunks),
+            "removed_files": removed_files
+        }
+
+    def replace_document(self, file_id: str, file_path: str, original_filename: str, preprocess: bool = True) -> Dict[str, Any]:
+        """
+        Replace a previously uploaded document with a new version.
+
+        The new version is fully ingested under a fresh file ID before the old chunks are
+        deleted, so queries never see the document missing: if ingestion fails, the old
+        version stays untouched.
+
+        Args:
+            file_id: File ID of the document to replace
+            file_path: Path to the new version of the document
+            original_filename: Original filename of the new version
+            preprocess: Whether to split documents into chunks
+
+        Returns:
+            Dictionary with the new file ID and the number of replaced chunks
+        """
+        import uuid
+        from .file_storage_manager import FileStorageManager
+
+        old_chunks = (self.vector_store_manager.find_chunks(file_id=file_id)
+                      + self.vector_store_manager.find_linked_chunks(file_id=file_id))
+        old_chunk_ids = [chunk_id for chunk_id, _ in old_chunks]
+        if not old_chunk_ids:
+            raise ValueError(f"No document found with file_id: {file_id}")
+
+        new_file_id = str(uuid.uuid4())
+        # The new version's unchanged chunks must not be deduplicated against the old version,
+        # whose chunks are deleted below (in skip mode they would be lost with it)
+        deduplicator = self.vector_store_manager.deduplicator
+        with deduplicator.excluding(file_id) if deduplicator else nullcontext():
+            success = self.ingest_documents_from_upload(
+                [file_path], [original_filename], preprocess=preprocess, file_ids=[new_file_id]
+            )
+        if not success:
+            # Drop whatever was stored for the failed version; the old one is still in place
+            self.vector_store_manager.delete_documents(file_id=new_file_id)
+            FileStorageManager().delete_file(new_file_id)
+            raise RuntimeError(f"Failed to ingest the new version of document {file_id}")
+
+        result = self.delete_document(file_id=file_id)
+        return {
+            "file_id": new_file_id,
+            "replaced_file_id": file_id,
+            "replaced_chunks": len(old_chunk_ids),
+            "removed_files": result["removed_files"]
+        }
+
     def query(self, user_query: str) -> Dict[str, Any]:
         """
         Process a user query using the RAG pipeline.
@@ -215,19 +424,27 @@ class RAGOrchestrator:
         """
         return self.rag_chain.get_context_and_response(user_query)
 
-    def retrieve_documents(self, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    def retrieve_documents(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents for a query without generating a response.
 
         Args:
             query: Query to search for
             top_k: Number of top results to return
+            filter: Optional metadata filter expression, e.g. {"file_id": "..."},
+                {"upload_method": ["Web upload", "Local"]} or
+                {"ingested_at": {"gte": "2024-01-01"}}
 
         Returns:
             List of relevant documents with metadata and scores
         """
         # Use retrieve_documents_with_scores to respect the top_k parameter
-        docs_with_scores = self.retriever.retrieve_documents_with_scores(query, top_k=top_k)
+        docs_with_scores = self.retriever.retrieve_documents_with_scores(query, top_k=top_k, filter=filter)
 
         # Apply the same formatting as get_relevant_documents but with the specified top_k
         formatted_docs = []
@@ -285,29 +502,57 @@ class RAGOrchestrator:
         """
         self.rag_chain = RAGChain(self.retriever, llm)
 
-    def process_search_results_with_download(self, search_results: List[Dict[str, Any]], user_query: str) -> List[Dict[str, Any]]:
+    def _get_summary_generator(self):
+        """Get the ResponseGenerator shared by all web result summaries (created on first use)."""
+        with self._summary_generator_lock:
+            if self._summary_generator is None:
+                from models.response_generator import ResponseGenerator
+                self._summary_generator = ResponseGenerator()
+            return self._summary_generator
+
+    def _get_mcp_model(self):
+        """Get the DedicatedMCPModel shared by all web result downloads (created on first use)."""
+        with self._mcp_model_lock:
+            if self._mcp_model is None:
+                from models.dedicated_mcp_model import DedicatedMCPModel
+                self._mcp_model = DedicatedMCPModel()
+            return self._mcp_model
+
+    def process_search_results_with_download(
+        self,
+        search_results: List[Dict[str, Any]],
+        user_query: str,
+        time_budget: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """
         Process search results by downloading content from each result using MCP download tool,
         summarizing the content taking into account the original user query, and then reranking
         the summaries to return the top results.
 
+        Results stream through the pipeline: each page is summarized as soon as its download
+        completes and scored in-process as soon as its summary is ready. Once the time budget
+        has expired, the call returns as soon as the top K results all score at least
+        RAG_WEB_ENHANCEMENT_MIN_SCORE, without waiting for slower pages.
+
         Args:
             search_results: List of search results with title, url, and description
             user_query: Original user query for context
+            time_budget: Seconds before an early return is allowed (defaults to
+                RAG_WEB_ENHANCEMENT_TIME_BUDGET_SECONDS; 0 waits for every result)
 
         Returns:
             List of processed and ranked results with summaries
         """
         try:
             # Import required components
-            from models.dedicated_mcp_model import DedicatedMCPModel
-            from rag_component.config import RERANK_TOP_K_RESULTS
-            from config.settings import str_to_bool
-            import os
-            import concurrent.futures
-            from functools import partial
+            from rag_component.config import (
+                RERANK_TOP_K_RESULTS,
+                RAG_WEB_ENHANCEMENT_TIME_BUDGET_SECONDS,
+                RAG_WEB_ENHANCEMENT_MIN_SCORE
+            )
+            from .web_result_pipeline import run_pipeline
 
-            mcp_model = DedicatedMCPModel()
+            mcp_model = self._get_mcp_model()
 
             # Get available download services
             from registry.registry_client import ServiceRegistryClient
@@ -331,238 +576,131 @@ class RAGOrchestrator:
                 sorted_results = sorted(processed_results, key=lambda x: x['relevance_score'], reverse=True)
                 return sorted_results[:RERANK_TOP_K_RESULTS]
 
-            download_service = download_services[0]
+            # Downloads are spread over every registered download instance by the load balancer
+            from utils.mcp_resilience import get_resilient_caller
+            download_instances = [
+                {
+                    "id": download_service.id,
+                    "host": download_service.host,
+                    "port": download_service.port,
+                    "type": download_service.type,
+                    "metadata": download_service.metadata
+                }
+                for download_service in download_services
+            ]
 
             # Get parallelism setting from environment
             parallelism = int(os.getenv('PARRALELISM', 4))
 
-            # Function to download content for a single result
+            # Results without a URL cannot be downloaded
+            indexed_results = []
+            for idx, result in enumerate(search_results):
+                if not result.get("url", ""):
+                    print(f"[RAG WARNING] No URL found for result {idx}, skipping")
+                    continue
+                indexed_results.append((idx, result))
+
             def download_single_result(result_tuple):
                 idx, result = result_tuple
-                url = result.get("url", "")
-                title = result.get("title", "")
-                description = result.get("description", "")
-
-                if not url:
-                    print(f"[RAG WARNING] No URL found for result {idx}, skipping")
-                    return None
-
-                print(f"[RAG INFO] Processing result {idx+1}/{len(search_results)}: {title}")
-
-                # Download content using MCP download service
-                download_params = {"url": url}
-                download_result = mcp_model._call_mcp_service(
-                    {
-                        "id": download_service.id,
-                        "host": download_service.host,
-                        "port": download_service.port,
-                        "type": download_service.type,
-                        "metadata": download_service.metadata
-                    },
+                print(f"[RAG INFO] Processing result {idx+1}/{len(search_results)}: {result.get('title', '')}")
+                # Extract mode returns the cleaned page text, so no shared disk with the download server is needed
+                return get_resilient_caller().call_any(
+                    download_instances,
                     "download",
-                    download_params
+                    {"url": result.get("url", ""), "extract": True, "max_chars": WEB_CONTENT_MAX_CHARS},
+                    mcp_model._call_mcp_service
                 )
 
-                return {
-                    "idx": idx,
-                    "result": result,
-                    "url": url,
+            summary_generator = self._get_summary_generator()
+
+            def summarize_content(result_tuple, download_result):
+                _, result = result_tuple
+                url = result.get("url", "")
+                title = result.get("title", "")
+                description = result.get("description", "")
+                summary_result = {
                     "title": title,
-                    "description": description,
-                    "download_result": download_result
+                    "url": url,
+                    "summary": description,
+                    "original_description": description,
+                    "relevance_score": 0.0
                 }
 
-            # Function to summarize downloaded content
-            def summarize_content(download_data):
-                idx = download_data["idx"]
-                result = download_data["result"]
-                url = download_data["url"]
-                title = download_data["title"]
-                description = download_data["description"]
-                download_result = download_data["download_result"]
-
-                if download_result.get("status") == "success":
-                    # Get the downloaded content
-                    downloaded_content = ""
-                    file_path = download_result.get("result", {}).get("file_path", "")
-
-                    if file_path and os.path.exists(file_path):
-                        try:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                downloaded_content = f.read()
-                        except Exception as e:
-                            print(f"[RAG WARNING] Error reading downloaded file {file_path}: {str(e)}")
-                            # If we can't read the file, try to get content from the description
-                            downloaded_content = description
-
-                    # Summarize the content in relation to the original user query
-                    from models.response_generator import ResponseGenerator
-                    response_generator = ResponseGenerator()
-
-                    # Create a prompt to summarize the content in the context of the user's request
-                    summary_prompt = f"""
+                if download_result.get("status") != "success":
+                    print(f"[RAG WARNING] Failed to download content from {url}")
+                    # Keep the original description as fallback
+                    return summary_result
+
+                # Get the downloaded content; the server wraps its result in {"success", "result"}
+                download_payload = download_result.get("result", {})
+                if isinstance(download_payload.get("result"), dict):
+                    download_payload = download_payload["result"]
+                downloaded_content = download_payload.get("text") or ""
+                file_path = download_payload.get("file_path", "")
+                # Older download servers only return a path, which is readable when the disk is shared
+                if not downloaded_content and file_path and os.path.exists(file_path):
+                    try:
+                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                            downloaded_content = f.read()
+                    except Exception as e:
+                        print(f"[RAG WARNING] Error reading downloaded file {file_path}: {str(e)}")
+                        # If we can't read the file, try to get content from the description
+                        downloaded_content = description
+
+                # Create a prompt to summarize the content in the context of the user's request
+                summary_prompt = f"""
                     Original user request: {user_query}
 
                     Content from webpage titled "{title}":
-                    {downloaded_content[:4000]}  # Limit content to avoid exceeding token limits
+                    {downloaded_content[:WEB_CONTENT_MAX_CHARS]}
 
                     Please provide a concise summary of this webpage content that is relevant to the user's original request.
                     Focus on information that directly addresses the user's question or need.
                     """
 
-                    try:
-                        summary = response_generator.generate_natural_language_response(summary_prompt)
-
-                        # Return the summary with metadata
-                        return {
-                            "title": title,
-                            "url": url,
-                            "summary": summary,
-                            "original_description": description,
-                            "relevance_score": 0.0  # Will be calculated during reranking
-                        }
-
-                    except Exception as e:
-                        print(f"[RAG WARNING] Error generating summary for {title}: {str(e)}")
-                        # Return the result with the original description as fallback
-                        return {
-                            "title": title,
-                            "url": url,
-                            "summary": description,
-                            "original_description": description,
-                            "relevance_score": 0.0
-                        }
-                else:
-                    print(f"[RAG WARNING] Failed to download content from {url}")
-                    # Return the result with the original description as fallback
-                    return {
-                        "title": title,
-                        "url": url,
-                        "summary": description,
-                        "original_description": description,
-                        "relevance_score": 0.0
-                    }
-
-            # Prepare tuples of (index, result) for parallel processing
-            indexed_results = [(idx, result) for idx, result in enumerate(search_results)]
-
-            # Perform downloads in parallel
-            download_results = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=parallelism) as executor:
-                # Submit all download tasks
-                future_to_result = {executor.submit(download_single_result, item): item for item in indexed_results}
-
-                # Collect download results as they complete
-                for future in concurrent.futures.as_completed(future_to_result):
-                    download_data = future.result()
-                    if download_data is not None:
-                        download_results.append(download_data)
-
-            # Perform summarization in parallel for completed downloads
-            processed_summaries = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=parallelism) as executor:
-                # Submit all summarization tasks
-                future_to_download = {executor.submit(summarize_content, download_data): download_data for download_data in download_results}
-
-                # Collect summarization results as they complete
-                for future in concurrent.futures.as_completed(future_to_download):
-                    summary_result = future.result()
-                    if summary_result is not None:
-                        processed_summaries.append(summary_result)
-
-            # Use the RAG MCP server for reranking all summaries at once
-            try:
-                # Discover available RAG services
-                rag_services = [s for s in registry_client.discover_services() if s.type == "rag"]
-
-                if not rag_services:
-                    print("[RAG WARNING] No RAG MCP services available for reranking.")
-                    # Set default scores for all processed summaries
-                    for summary_obj in processed_summaries:
-                        summary_obj['relevance_score'] = 0.5  # Default score
-                else:
-                    rag_service = rag_services[0]  # Use the first available RAG service
-
-                    # Prepare documents for reranking - extract the summaries/content to be reranked
-                    rerank_documents = []
-                    for item in processed_summaries:
-                        # Create a document-like structure for reranking
-                        doc = {
-                            'content': item.get('summary', ''),  # Use the LLM-generated summary
-                            'title': item.get('title', ''),
-                            'url': item.get('url', ''),
-                            'original_description': item.get('original_description', '')
-                        }
-                        rerank_documents.append(doc)
-
-                    # Prepare parameters for the MCP rerank call
-                    from rag_component.config import RERANK_TOP_K_RESULTS
-                    rerank_params = {
-                        "query": user_query,
-                        "documents": rerank_documents,
-                        "top_k": RERANK_TOP_K_RESULTS
-                    }
-
-                    # Call the RAG MCP server for reranking
-                    rerank_result = mcp_model._call_mcp_service(
-                        {
-                            "id": rag_service.id,
-                            "host": rag_service.host,
-                            "port": rag_service.port,
-                            "type": rag_service.type,
-                            "metadata": rag_service.metadata
-                        },
-                        "rerank_documents",  # Action to perform
-                        rerank_params
-                    )
-
-                    # Process the reranking results
-                    if rerank_result.get("status") == "success":
-                        reranked_results = rerank_result.get("result", {}).get("results", [])
-
-                        # Update the processed summaries with reranking information
-                        # Create a mapping of original results by URL for quick lookup
-                        original_results_map = {item.get('url'): item for item in processed_summaries if item.get('url')}
-
-                        reranked_processed_summaries = []
-                        for reranked_doc in reranked_results:
-                            url = reranked_doc.get('url', '')
-                            # Find the original processed result that matches this reranked document
-                            original_result = original_results_map.get(url)
-
-                            if original_result:
-                                # Update with reranking score and position
-                                original_result['relevance_score'] = reranked_doc.get('score', 0.0)
-                                original_result['reranked'] = True
-                                reranked_processed_summaries.append(original_result)
-                            else:
-                                # If no original match found, create a new result with the reranked data
-                                reranked_processed_summaries.append({
-                                    'title': reranked_doc.get('title', ''),
-                                    'url': reranked_doc.get('url', ''),
-                                    'summary': reranked_doc.get('content', ''),
-                                    'original_description': reranked_doc.get('original_description', ''),
-                                    'relevance_score': reranked_doc.get('score', 0.0),
-                                    'reranked': True
-                                })
-
-                        processed_summaries = reranked_processed_summaries
-                    else:
-                        print(f"[RAG WARNING] RAG MCP reranking failed: {rerank_result.get('error', 'Unknown error')}")
-                        # Set default scores for all processed summaries
-                        for summary_obj in processed_summaries:
-                            summary_obj['relevance_score'] = 0.5  # Default score
-            except Exception as e:
-                print(f"[RAG WARNING] Error during MCP-based reranking: {str(e)}")
-                # Set default scores for all processed summaries
-                for summary_obj in processed_summaries:
-                    summary_obj['relevance_score'] = 0.5  # Default score
-
-            # Sort by relevance score in descending order and take top K
-            sorted_summaries = sorted(processed_summaries, key=lambda x: x['relevance_score'], reverse=True)
-            top_summaries = sorted_summaries[:RERANK_TOP_K_RESULTS]
-
-            print(f"[RAG SUCCESS] Processed and reranked {len(processed_summaries)} results to top {len(top_summaries)}")
+                try:
+                    summary_result["summary"] = summary_generator.generate_natural_language_response(summary_prompt)
+                except Exception as e:
+                    print(f"[RAG WARNING] Error generating summary for {title}: {str(e)}")
+                return summary_result
+
+            # Rerank in-process: embed the query once, then score each summary as soon as it is ready
+            query_embedding = None
+            if self.reranker is not None and self.reranker.enabled:
+                try:
+                    query_embedding = self.reranker.embed_text(user_query)
+                except Exception as e:
+                    print(f"[RAG WARNING] Error embedding query for reranking: {str(e)}")
+
+            def score_summary(summary_result):
+                if query_embedding is None:
+                    return 0.5  # Default score when reranking is unavailable
+                try:
+                    score = self.reranker.score_text(query_embedding, summary_result.get("summary", ""))
+                    summary_result["reranked"] = True
+                    return score
+                except Exception as e:
+                    print(f"[RAG WARNING] Error reranking {summary_result.get('url', '')}: {str(e)}")
+                    return 0.5
+
+            if time_budget is None:
+                time_budget = RAG_WEB_ENHANCEMENT_TIME_BUDGET_SECONDS
+            top_summaries, stats = run_pipeline(
+                indexed_results,
+                download_single_result,
+                summarize_content,
+                score_summary,
+                top_k=RERANK_TOP_K_RESULTS,
+                parallelism=parallelism,
+                time_budget=time_budget,
+                min_score=RAG_WEB_ENHANCEMENT_MIN_SCORE
+            )
+
+            print(
+                f"[RAG SUCCESS] Processed and reranked {stats['summarized']}/{stats['items']} results to top "
+                f"{len(top_summaries)} in {stats['seconds']}s"
+                + (" (early return)" if stats["early_return"] else "")
+            )
 
             return top_summaries
 
@@ -571,4 +709,4 @@ class RAGOrchestrator:
             import traceback
             traceback.print_exc()
             # Return an empty list on error
-            return []
\ No newline at end of file
+            return []
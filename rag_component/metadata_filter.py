@@ -0,0 +1,150 @@
+"""
+Metadata filter module for the RAG component.
+Translates a backend-neutral filter expression into native Qdrant and Chroma filters
+so that metadata restrictions are evaluated inside the vector store instead of in Python.
+
+A filter expression is a flat dictionary keyed by metadata field name:
+
+    {
+        "file_id": "0b7c...",                          # equality
+        "upload_method": ["Web upload", "Local"],      # match any of the values
+        "ingested_at": {"gte": "2024-01-01", "lt": 1735689600},  # range
+    }
+
+All conditions are combined with AND. Range bounds may be numbers or ISO-8601
+date/datetime strings (converted to UNIX timestamps, which is how ``ingested_at``
+is stored at ingestion time).
+"""
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+_FIELD_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _to_range_value(value: Any) -> float:
+    """Convert a range bound (number or ISO date string) to a float."""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid range bound: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"Invalid range bound: {value!r}. Use a number or an ISO-8601 date")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    raise ValueError(f"Invalid range bound: {value!r}")
+
+
+def normalize_filter(filter_expr: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate a filter expression and convert it into a list of conditions.
+
+    Args:
+        filter_expr: Filter expression as described in the module docstring
+
+    Returns:
+        List of conditions, each a dict with ``field``, ``op`` ("eq", "in" or "range")
+        and ``value``. An empty list means "no filtering".
+    """
+    if not filter_expr:
+        return []
+    if not isinstance(filter_expr, dict):
+        raise ValueError("Filter must be a JSON object mapping metadata fields to conditions")
+
+    conditions = []
+    for field, condition in filter_expr.items():
+        if not isinstance(field, str) or not _FIELD_NAME_PATTERN.match(field):
+            raise ValueError(f"Invalid metadata field name in filter: {field!r}")
+
+        if isinstance(condition, dict):
+            unknown_ops = set(condition) - set(RANGE_OPERATORS)
+            if unknown_ops or not condition:
+                raise ValueError(
+                    f"Invalid range for '{field}'. Supported operators: {', '.join(RANGE_OPERATORS)}"
+                )
+            bounds = {op: _to_range_value(value) for op, value in condition.items()}
+            conditions.append({"field": field, "op": "range", "value": bounds})
+        elif isinstance(condition, (list, tuple)):
+            if not condition:
+                raise ValueError(f"Empty value list in filter for '{field}'")
+            for value in condition:
+                if not isinstance(value, (str, int)) or isinstance(value, bool):
+                    raise ValueError(f"Only string or integer values can be matched for '{field}'")
+            conditions.append({"field": field, "op": "in", "value": list(condition)})
+        elif isinstance(condition, (str, int, bool)):
+            conditions.append({"field": field, "op": "eq", "value": condition})
+        else:
+            raise ValueError(f"Unsupported filter value for '{field}': {condition!r}")
+
+    return conditions
+
+
+def to_qdrant_filter(filter_expr: Optional[Dict[str, Any]], metadata_key: str = "metadata"):
+    """
+    Translate a filter expression into a Qdrant ``Filter``.
+
+    Args:
+        filter_expr: Filter expression as described in the module docstring
+        metadata_key: Payload key under which LangChain stores document metadata
+
+    Returns:
+        ``qdrant_client.http.models.Filter`` or None if the expression is empty
+    """
+    conditions = normalize_filter(filter_expr)
+    if not conditions:
+        return None
+
+    from qdrant_client.http import models as qdrant_models
+
+    must = []
+    for condition in conditions:
+        key = f"{metadata_key}.{condition['field']}" if metadata_key else condition["field"]
+        if condition["op"] == "eq":
+            must.append(qdrant_models.FieldCondition(
+                key=key, match=qdrant_models.MatchValue(value=condition["value"])
+            ))
+        elif condition["op"] == "in":
+            must.append(qdrant_models.FieldCondition(
+                key=key, match=qdrant_models.MatchAny(any=condition["value"])
+            ))
+        else:
+            must.append(qdrant_models.FieldCondition(
+                key=key, range=qdrant_models.Range(**condition["value"])
+            ))
+
+    return qdrant_models.Filter(must=must)
+
+
+def to_chroma_filter(filter_expr: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate a filter expression into a Chroma ``where`` clause.
+
+    Args:
+        filter_expr: Filter expression as described in the module docstring
+
+    Returns:
+        Chroma ``where`` dictionary or None if the expression is empty
+    """
+    clauses: List[Dict[str, Any]] = []
+    for condition in normalize_filter(filter_expr):
+        field = condition["field"]
+        if condition["op"] == "eq":
+            clauses.append({field: {"$eq": condition["value"]}})
+        elif condition["op"] == "in":
+            clauses.append({field: {"$in": condition["value"]}})
+        else:
+            # Chroma allows a single operator per field clause
+            for op, bound in condition["value"].items():
+                clauses.append({field: {f"${op}": bound}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
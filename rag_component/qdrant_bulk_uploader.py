@@ -0,0 +1,271 @@
+"""
+Qdrant bulk uploader module for the RAG component.
+Embeds and uploads documents in size-bounded batches over several parallel streams.
+Each batch is sent with wait=False so Qdrant only acknowledges the write-ahead log entry;
+a final wait=True write acts as a consistency barrier once every batch has been sent.
+"""
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document as LCDocument
+
+from .config import (
+    RAG_QDRANT_UPLOAD_BATCH_SIZE,
+    RAG_QDRANT_UPLOAD_MAX_BATCH_BYTES,
+    RAG_QDRANT_UPLOAD_PARALLELISM
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough per-point framing overhead (id, field names, protobuf/JSON structure)
+POINT_OVERHEAD_BYTES = 64
+
+
+class QdrantBulkUploader:
+    """Class responsible for high-throughput uploads into a Qdrant collection."""
+
+    def __init__(
+        self,
+        client,
+        collection_name: str,
+        embeddings=None,
+        batch_size: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        vector_name: str = "",
+        content_payload_key: str = "page_content",
+        metadata_payload_key: str = "metadata",
+        metrics=None
+    ):
+        """
+        Initialize the bulk uploader.
+
+        Args:
+            client: Qdrant client to upload with
+            collection_name: Target collection
+            embeddings: LangChain embeddings used for documents without precomputed vectors
+            batch_size: Maximum number of points per batch
+            max_batch_bytes: Maximum estimated size of one upsert request
+            parallelism: Number of batches embedded and uploaded concurrently
+            vector_name: Named vector to write to ("" for the default unnamed vector)
+            content_payload_key: Payload key for the document text (LangChain layout)
+            metadata_payload_key: Payload key for the document metadata (LangChain layout)
+            metrics: Optional IngestionMetrics receiving embed/upsert timings, batch sizes and in-flight depth
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size or RAG_QDRANT_UPLOAD_BATCH_SIZE)
+        self.max_batch_bytes = max(1, max_batch_bytes or RAG_QDRANT_UPLOAD_MAX_BATCH_BYTES)
+        self.parallelism = max(1, parallelism or RAG_QDRANT_UPLOAD_PARALLELISM)
+        self.vector_name = vector_name or ""
+        self.content_payload_key = content_payload_key
+        self.metadata_payload_key = metadata_payload_key
+        self.metrics = metrics
+        self.last_stats: Dict[str, Any] = {}
+
+    def upload_documents(self, documents: List[LCDocument], ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Embed and upload documents.
+
+        Args:
+            documents: Documents to upload
+            ids: Optional point ids (generated if omitted)
+
+        Returns:
+            List of ids of the uploaded points
+        """
+        if self.embeddings is None:
+            raise ValueError("An embeddings model is required to upload documents")
+        if ids is not None and len(ids) != len(documents):
+            raise ValueError("Number of ids must match number of documents")
+
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in documents]
+
+        # Embedding providers drop empty strings, which would misalign texts and vectors
+        items = [
+            (point_id, doc) for point_id, doc in zip(ids, documents)
+            if doc.page_content and doc.page_content.strip()
+        ]
+        skipped = len(documents) - len(items)
+        if skipped:
+            logger.warning(f"Skipping {skipped} empty documents during bulk upload")
+
+        def embed_batch(batch):
+            texts = [doc.page_content for _, doc in batch]
+            embed_start = time.perf_counter()
+            vectors = self.embeddings.embed_documents(texts)
+            if self.metrics:
+                self.metrics.record_batch(len(texts))
+                self.metrics.add(
+                    "embed",
+                    seconds=time.perf_counter() - embed_start,
+                    chunks=len(texts),
+                    bytes=sum(len(text.encode("utf-8")) for text in texts)
+                )
+            if len(vectors) != len(batch):
+                raise RuntimeError(f"Embedding model returned {len(vectors)} vectors for {len(batch)} texts")
+            return [
+                self._make_point(point_id, vector, doc.page_content, doc.metadata)
+                for (point_id, doc), vector in zip(batch, vectors)
+            ]
+
+        self._run(self._chunk(items, self.batch_size), embed_batch, total=len(items))
+        return [point_id for point_id, _ in items]
+
+    def upload_points(self, points: Iterable[Dict[str, Any]]) -> int:
+        """
+        Upload points whose vectors are already computed (no embedding calls).
+
+        Args:
+            points: Iterable of dicts with ``id``, ``vector`` and ``payload`` keys
+
+        Returns:
+            Number of uploaded points
+        """
+        from qdrant_client.http import models as qdrant_models
+
+        def to_point_structs(batch):
+            return [
+                qdrant_models.PointStruct(
+                    id=point["id"],
+                    vector=self._vector(point["vector"]),
+                    payload=point.get("payload") or {}
+                )
+                for point in batch
+            ]
+
+        return self._run(self._chunk(points, self.batch_size), to_point_structs)
+
+    def _make_point(self, point_id: str, vector: List[float], content: str, metadata: Dict[str, Any]):
+        """Build a point in the payload layout used by the LangChain Qdrant wrapper."""
+        from qdrant_client.http import models as qdrant_models
+
+        return qdrant_models.PointStruct(
+            id=point_id,
+            vector=self._vector(vector),
+            payload={
+                self.content_payload_key: content,
+                self.metadata_payload_key: metadata
+            }
+        )
+
+    def _vector(self, vector):
+        """Wrap a vector for named-vector collections."""
+        vector = [float(v) for v in vector]
+        return {self.vector_name: vector} if self.vector_name else vector
+
+    def _run(self, batches: Iterable[list], prepare_batch, total: Optional[int] = None) -> int:
+        """
+        Prepare and upsert batches over ``parallelism`` concurrent streams.
+
+        Args:
+            batches: Iterable of raw batches
+            prepare_batch: Callable converting a raw batch into a list of PointStruct
+            total: Expected number of points, for logging only
+
+        Returns:
+            Number of uploaded points
+        """
+        start_time = time.time()
+        uploaded = 0
+        requests_sent = 0
+        last_point = None
+
+        def process(batch):
+            points = prepare_batch(batch)
+            sent = 0
+            upsert_start = time.perf_counter()
+            for request_points in self._split_by_bytes(points):
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=request_points,
+                    wait=False
+                )
+                sent += 1
+            if self.metrics:
+                self.metrics.add("upsert", seconds=time.perf_counter() - upsert_start, chunks=len(points))
+            return len(points), sent, points[-1] if points else None
+
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+            pending = []
+            for batch in batches:
+                # Bound the number of in-flight batches to keep memory flat on huge inputs
+                if len(pending) >= self.parallelism * 2:
+                    count, sent, tail = pending.pop(0).result()
+                    uploaded += count
+                    requests_sent += sent
+                    last_point = tail or last_point
+                pending.append(executor.submit(process, batch))
+                if self.metrics:
+                    self.metrics.set_queue_depth("upload_in_flight", len(pending))
+            for future in pending:
+                count, sent, tail = future.result()
+                uploaded += count
+                requests_sent += sent
+                last_point = tail or last_point
+
+        if last_point is not None:
+            # Consistency barrier: operations are applied in order, so once this idempotent
+            # wait=True write returns, every earlier wait=False batch has been applied.
+            barrier_start = time.perf_counter()
+            self.client.upsert(collection_name=self.collection_name, points=[last_point], wait=True)
+            if self.metrics:
+                self.metrics.add("upsert.barrier", seconds=time.perf_counter() - barrier_start)
+
+        elapsed = time.time() - start_time
+        self.last_stats = {
+            "points": uploaded,
+            "requests": requests_sent,
+            "seconds": elapsed,
+            "points_per_second": uploaded / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info(
+            f"Bulk uploaded {uploaded}{f'/{total}' if total is not None else ''} points to "
+            f"'{self.collection_name}' in {requests_sent} requests ({elapsed:.2f}s)"
+        )
+        return uploaded
+
+    def _split_by_bytes(self, points: list) -> List[list]:
+        """Split a batch so each upsert request stays under max_batch_bytes."""
+        requests_points = []
+        current = []
+        current_bytes = 0
+        for point in points:
+            point_bytes = self._estimate_size(point)
+            if current and current_bytes + point_bytes > self.max_batch_bytes:
+                requests_points.append(current)
+                current = []
+                current_bytes = 0
+            current.append(point)
+            current_bytes += point_bytes
+        if current:
+            requests_points.append(current)
+        return requests_points
+
+    @staticmethod
+    def _estimate_size(point) -> int:
+        """Estimate the serialized size of a point."""
+        vector = point.vector
+        if isinstance(vector, dict):
+            vector_len = sum(len(v) for v in vector.values())
+        else:
+            vector_len = len(vector)
+        payload_bytes = len(json.dumps(point.payload or {}, ensure_ascii=False, default=str).encode("utf-8"))
+        return vector_len * 4 + payload_bytes + POINT_OVERHEAD_BYTES
+
+    @staticmethod
+    def _chunk(items: Iterable, size: int):
+        """Yield lists of at most ``size`` items."""
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,107 @@
+"""
+Qdrant connection module for the RAG component.
+Provides a process-wide, thread-safe cache of Qdrant clients so that the vector store,
+the MCP server and the bulk uploader share connections instead of creating new clients ad hoc.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from .config import RAG_QDRANT_PREFER_GRPC, RAG_QDRANT_GRPC_PORT
+
+logger = logging.getLogger(__name__)
+
+# Special URL that selects qdrant-client's embedded in-memory mode (tests and offline benchmarks)
+QDRANT_IN_MEMORY_URL = ":memory:"
+
+_clients: Dict[Tuple[str, str, bool], object] = {}
+_clients_lock = threading.Lock()
+
+
+def get_qdrant_client(
+    url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    prefer_grpc: Optional[bool] = None
+):
+    """
+    Get the shared Qdrant client for the given connection settings.
+
+    Args:
+        url: Qdrant URL (defaults to RAG_QDRANT_URL from the environment)
+        api_key: Qdrant API key (defaults to RAG_QDRANT_API_KEY from the environment)
+        prefer_grpc: Whether to use gRPC (defaults to RAG_QDRANT_PREFER_GRPC)
+
+    Returns:
+        QdrantClient instance shared by every caller in this process
+    """
+    from qdrant_client import QdrantClient
+
+    # Read connection settings from the environment at call time to pick up the latest values
+    url = url or os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
+    api_key = api_key if api_key is not None else os.getenv("RAG_QDRANT_API_KEY", "")
+    prefer_grpc = RAG_QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    if url == QDRANT_IN_MEMORY_URL:
+        # There is only one in-memory instance per process, whatever the transport settings
+        api_key, prefer_grpc = "", False
+
+    key = (url, api_key, prefer_grpc)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None and url == QDRANT_IN_MEMORY_URL:
+            client = QdrantClient(location=QDRANT_IN_MEMORY_URL)
+            _clients[key] = client
+        elif client is None:
+            client_kwargs = {"url": url, "prefer_grpc": prefer_grpc}
+            if prefer_grpc:
+                client_kwargs["grpc_port"] = RAG_QDRANT_GRPC_PORT
+            if api_key:
+                client_kwargs["api_key"] = api_key
+            client = QdrantClient(**client_kwargs)
+            _clients[key] = client
+        return client
+
+
+def get_bulk_qdrant_client(url: Optional[str] = None, api_key: Optional[str] = None):
+    """
+    Get a client suited for bulk uploads: gRPC when the server exposes it, HTTP otherwise.
+
+    Args:
+        url: Qdrant URL (defaults to RAG_QDRANT_URL from the environment)
+        api_key: Qdrant API key (defaults to RAG_QDRANT_API_KEY from the environment)
+
+    Returns:
+        Shared QdrantClient instance
+    """
+    from .config import RAG_QDRANT_BULK_PREFER_GRPC
+
+    if RAG_QDRANT_BULK_PREFER_GRPC and (url or os.getenv("RAG_QDRANT_URL")) != QDRANT_IN_MEMORY_URL:
+        client = get_qdrant_client(url, api_key, prefer_grpc=True)
+        try:
+            client.get_collections()
+            return client
+        except Exception as e:
+            logger.warning(f"Qdrant gRPC endpoint unavailable, falling back to HTTP for bulk upload: {e}")
+            reset_qdrant_client(url, api_key, prefer_grpc=True)
+    return get_qdrant_client(url, api_key, prefer_grpc=False)
+
+
+def reset_qdrant_client(
+    url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    prefer_grpc: Optional[bool] = None
+):
+    """Close and forget a cached client (e.g. after a connection failure)."""
+    url = url or os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
+    api_key = api_key if api_key is not None else os.getenv("RAG_QDRANT_API_KEY", "")
+    prefer_grpc = RAG_QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    if url == QDRANT_IN_MEMORY_URL:
+        api_key, prefer_grpc = "", False
+
+    with _clients_lock:
+        client = _clients.pop((url, api_key, prefer_grpc), None)
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
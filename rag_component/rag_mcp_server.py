@@ -42,6 +42,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from rag_component.main import RAGOrchestrator
+from utils.deadline import DeadlineExceeded, deadline_scope, request_deadline, run_before_deadline
 from registry.registry_client import ServiceRegistryClient as RegistryClient, MCPServiceWrapper, ServiceInfo
 
 # Configure logging
@@ -68,6 +69,10 @@ class RAGRequestHandler:
                 return await self.ingest_documents(parameters)
             elif action == "list_documents":
                 return await self.list_documents(parameters)
+            elif action == "delete_documents":
+                return await self.delete_documents(parameters)
+            elif action == "replace_document":
+                return await self.replace_document(parameters)
             elif action == "rerank_documents":
                 return await self.rerank_documents(parameters)
             elif action == "process_search_results_with_download":
@@ -92,6 +97,7 @@ class RAGRequestHandler:
             # Use RAG_TOP_K_RESULTS from config as default if not provided in parameters
             from rag_component.config import RAG_TOP_K_RESULTS
             top_k = parameters.get("top_k", RAG_TOP_K_RESULTS)
+            metadata_filter = parameters.get("filter")
 
             if not query_text:
                 return {
@@ -100,7 +106,7 @@ class RAGRequestHandler:
                 }
 
             # Perform document retrieval
-            retrieved_docs = self.rag_orchestrator.retrieve_documents(query_text, top_k=top_k)
+            retrieved_docs = self.rag_orchestrator.retrieve_documents(query_text, top_k=top_k, filter=metadata_filter)
 
             # Format results
             results = []
@@ -180,25 +186,9 @@ class RAGRequestHandler:
                 # For ChromaDB, access the collection count
                 collection_count = vector_store_manager.vector_store._collection.count()
             elif vector_store_manager.store_type.lower() == "qdrant":
-                # For Qdrant, use the client to get collection info
-                from qdrant_client import QdrantClient
-                import os
-
-                # Get Qdrant config directly from environment to ensure latest values
-                qdrant_url = os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
-                qdrant_api_key = os.getenv("RAG_QDRANT_API_KEY", "")
-
-                if qdrant_api_key:
-                    client = QdrantClient(
-                        url=qdrant_url,
-                        api_key=qdrant_api_key,
-                        prefer_grpc=False
-                    )
-                else:
-                    client = QdrantClient(
-                        url=qdrant_url,
-                        prefer_grpc=False
-                    )
+                # For Qdrant, use the shared client to get collection info
+                from rag_component.qdrant_connection import get_qdrant_client
+                client = get_qdrant_client()
 
                 # Get collection info and extract point count
                 collection_info = client.get_collection(vector_store_manager.collection_name)
@@ -226,6 +216,65 @@ class RAGRequestHandler:
                 "status": "error"
             }
 
+    async def delete_documents(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Delete a single document's chunks by file_id, source or chunk ids."""
+        try:
+            file_id = parameters.get("file_id")
+            source = parameters.get("source")
+            ids = parameters.get("ids")
+
+            if not file_id and not source and not ids:
+                return {
+                    "error": "One of file_id, source or ids is required",
+                    "status": "error"
+                }
+
+            result = self.rag_orchestrator.delete_document(
+                file_id=file_id,
+                source=source,
+                ids=ids,
+                delete_files=parameters.get("delete_files", True)
+            )
+
+            return {
+                **result,
+                "message": f"Deleted {result['deleted_chunks']} chunks and {result['deleted_linked_chunks']} linked duplicates",
+                "status": "success"
+            }
+        except Exception as e:
+            logger.error(f"Error deleting documents: {str(e)}", exc_info=True)
+            return {
+                "error": str(e),
+                "status": "error"
+            }
+
+    async def replace_document(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace a document with a new version, swapping its chunks atomically."""
+        try:
+            file_id = parameters.get("file_id", "")
+            file_path = parameters.get("file_path", "")
+            original_filename = parameters.get("original_filename") or os.path.basename(file_path)
+
+            if not file_id or not file_path:
+                return {
+                    "error": "file_id and file_path are required",
+                    "status": "error"
+                }
+
+            result = self.rag_orchestrator.replace_document(file_id, file_path, original_filename)
+
+            return {
+                **result,
+                "message": f"Document {file_id} replaced successfully",
+                "status": "success"
+            }
+        except Exception as e:
+            logger.error(f"Error replacing document: {str(e)}", exc_info=True)
+            return {
+                "error": str(e),
+                "status": "error"
+            }
+
     async def rerank_documents(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Rerank documents using the reranker model."""
         try:
@@ -386,13 +435,24 @@ class RAGMCPServer:
                     "name": "rag-service",
                     "description": "RAG (Retrieval-Augmented Generation) service for document retrieval and ingestion",
                     "protocol": "http",
+                    # Queries may go stale after an ingest, so they are cached briefly; other actions change or list the store
+                    "cache_policy": {
+                        "query": {"cacheable": True, "ttl_seconds": 120},
+                        "query_documents": {"cacheable": True, "ttl_seconds": 120},
+                        "rerank_documents": {"cacheable": True, "ttl_seconds": 600}
+                    },
                     "capabilities": [
                         {
                             "name": "query_documents",
                             "description": "Query documents using RAG",
                             "parameters": {
                                 "query": {"type": "string", "required": True},
-                                "top_k": {"type": "integer", "required": False}
+                                "top_k": {"type": "integer", "required": False},
+                                "filter": {
+                                    "type": "object",
+                                    "required": False,
+                                    "description": "Metadata filter, e.g. {\"file_id\": \"...\"}, {\"upload_method\": [\"Web upload\"]} or {\"ingested_at\": {\"gte\": \"2024-01-01\"}}"
+                                }
                             }
                         },
                         {
@@ -408,6 +468,25 @@ class RAGMCPServer:
                             "description": "List available documents in the RAG system",
                             "parameters": {}
                         },
+                        {
+                            "name": "delete_documents",
+                            "description": "Delete one document from the RAG system by file_id, source or chunk ids",
+                            "parameters": {
+                                "file_id": {"type": "string", "required": False},
+                                "source": {"type": "string", "required": False},
+                                "ids": {"type": "array", "items": {"type": "string"}, "required": False},
+                                "delete_files": {"type": "boolean", "required": False}
+                            }
+                        },
+                        {
+                            "name": "replace_document",
+                            "description": "Atomically replace a document with a new version of the file",
+                            "parameters": {
+                                "file_id": {"type": "string", "required": True},
+                                "file_path": {"type": "string", "required": True},
+                                "original_filename": {"type": "string", "required": False}
+                            }
+                        },
                         {
                             "name": "rerank_documents",
                             "description": "Rerank documents based on relevance to query",
@@ -463,8 +542,15 @@ class RAGMCPServer:
             if request.method == 'POST':
                 try:
                     data = await request.json()
-                    response = await self.request_handler.handle_request(data)
+                    # Give up on requests whose caller has stopped waiting (X-Request-Deadline)
+                    with deadline_scope(request_deadline(request.headers, data)):
+                        response = await run_before_deadline(
+                            self.request_handler.handle_request(data), what=f"{data.get('action')} request"
+                        )
                     return web.json_response(response)
+                except DeadlineExceeded as e:
+                    logger.warning(f"Dropping request: {str(e)}")
+                    return web.json_response({"error": str(e), "status": "error"}, status=408)
                 except Exception as e:
                     logger.error(f"Error handling request: {str(e)}", exc_info=True)
                     return web.json_response({
@@ -488,6 +574,8 @@ class RAGMCPServer:
         app.router.add_post('/ingest', handle_request)
         app.router.add_post('/list_documents', handle_request)
         app.router.add_post('/list', handle_request)
+        app.router.add_post('/delete_documents', handle_request)
+        app.router.add_post('/replace_document', handle_request)
         app.router.add_post('/rerank_documents', handle_request)
         app.router.add_post('/process_search_results_with_download', handle_request)
 
@@ -1,11 +1,13 @@
 """
 Reranker module for the RAG component.
 Handles re-ranking of retrieved documents based on query relevance.
+Embedding requests wait at most until the current request deadline (utils.deadline).
 """
 from typing import List, Dict, Any
 import requests
 import logging
 import numpy as np
+from utils.deadline import bounded_timeout
 from .config import (
     RERANKER_MODEL,
     RERANKER_HOSTNAME,
@@ -33,6 +35,48 @@ class Reranker:
         else:
             logger.info("Reranker is disabled")
 
+    def embed_text(self, text: str):
+        """
+        Get the reranker embedding of a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding as a numpy array, or None if the endpoint returned no embedding
+        """
+        response = requests.post(
+            f"{self.base_url}/embeddings",
+            json={"input": text, "model": self.model},
+            headers={"Content-Type": "application/json"},
+            timeout=bounded_timeout(30, "embedding for reranking")
+        )
+        if response.status_code != 200:
+            logger.warning(f"Failed to get reranker embedding: {response.text}")
+            return None
+        data = response.json()
+        if "data" not in data or len(data["data"]) == 0:
+            logger.warning(f"Reranker embedding response missing data: {data}")
+            return None
+        return np.array(data["data"][0]["embedding"])
+
+    def score_text(self, query_embedding, text: str) -> float:
+        """
+        Score one text against an already embedded query (for incremental reranking).
+
+        Args:
+            query_embedding: Query embedding returned by embed_text
+            text: Document text
+
+        Returns:
+            Cosine similarity, or 0.0 if the text could not be embedded
+        """
+        doc_embedding = self.embed_text(text)
+        if doc_embedding is None or query_embedding is None:
+            return 0.0
+        norm = np.linalg.norm(query_embedding) * np.linalg.norm(doc_embedding)
+        return float(np.dot(query_embedding, doc_embedding) / norm) if norm else 0.0
+
     def rerank_documents(self, query: str, documents: List[Dict[str, Any]], top_k: int = None) -> List[Dict[str, Any]]:
         """
         Re-rank documents based on their relevance to the query.
@@ -63,7 +107,8 @@ class Reranker:
                 "model": self.model
             }
 
-            query_response = requests.post(f"{self.base_url}/embeddings", json=query_payload, headers=headers, timeout=30)
+            query_response = requests.post(f"{self.base_url}/embeddings", json=query_payload, headers=headers,
+                                           timeout=bounded_timeout(30, "reranking"))
 
             if query_response.status_code != 200:
                 logger.error(f"Failed to get query embedding: {query_response.text}")
@@ -85,7 +130,8 @@ class Reranker:
                     "model": self.model
                 }
 
-                doc_response = requests.post(f"{self.base_url}/embeddings", json=doc_payload, headers=headers, timeout=30)
+                doc_response = requests.post(f"{self.base_url}/embeddings", json=doc_payload, headers=headers,
+                                             timeout=bounded_timeout(30, "reranking"))
 
                 if doc_response.status_code != 200:
                     logger.warning(f"Failed to get embedding for document {idx}: {doc_response.text}")
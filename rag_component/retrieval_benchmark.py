@@ -0,0 +1,513 @@
+"""
+Offline retrieval benchmark for the RAG component.
+Ingests a fixed corpus (sample_documents plus synthetic scaling sets) through a deterministic
+local stand-in embedding server, replays a labelled query set through Retriever and Reranker,
+and reports recall@k, MRR and per-stage latency percentiles as machine-readable JSON.
+
+Usage:
+    python -m rag_component.retrieval_benchmark --synthetic-docs 1000 --output benchmark.json
+    python -m rag_component.retrieval_benchmark --store chroma --chunk-size 500 --no-rerank
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document as LCDocument
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from .config import RAG_CHUNK_SIZE, RAG_CHUNK_OVERLAP, RERANK_TOP_K_RESULTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_documents")
+DEFAULT_KS = (1, 3, 5, 10)
+
+# Labelled queries for the files in sample_documents (relevance is judged by file name)
+SAMPLE_QUERIES = [
+    {"query": "When was AI Solutions Inc. founded?", "relevant_sources": ["sample.txt"]},
+    {"query": "What is the phone number and email address of the company?", "relevant_sources": ["sample.txt"]},
+    {"query": "Which AI consulting and training services are offered?", "relevant_sources": ["sample.txt"]},
+    {"query": "Is AI secure?", "relevant_sources": ["sample.txt"]},
+    {"query": "What is the price of Brent oil?", "relevant_sources": ["oil_prices.txt"]},
+    {"query": "URALS oil mark price", "relevant_sources": ["oil_prices.txt"]},
+]
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of",
+    "on", "or", "the", "this", "to", "was", "what", "when", "which", "who", "with"
+}
+
+_SYNTHETIC_ATTRIBUTES = [
+    "codename", "budget owner", "launch city", "primary supplier", "storage site", "review board",
+    "export partner", "safety officer", "test facility", "license holder"
+]
+
+
+def stand_in_embedding(text: str, model: str, dimension: int) -> List[float]:
+    """
+    Deterministic hashed bag-of-words embedding.
+
+    Texts sharing words get similar vectors, which is enough signal for recall to be
+    meaningful. Reranker models ("rerank" in the name) also hash word bigrams so that
+    reranking produces a different, slightly sharper ordering.
+
+    Args:
+        text: Text to embed
+        model: Requested model name
+        dimension: Embedding dimension
+
+    Returns:
+        L2-normalized embedding vector
+    """
+    words = [word for word in re.findall(r"\w+", text.lower()) if word not in _STOPWORDS]
+    features = list(words)
+    if "rerank" in model.lower():
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    vector = np.zeros(dimension, dtype=np.float64)
+    for feature in features:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        vector[digest % dimension] += 1.0 if (digest >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        norm = 1.0
+    return (vector / norm).tolist()
+
+
+class StandInEmbeddingServer:
+    """Local OpenAI-compatible /v1/embeddings server returning deterministic embeddings."""
+
+    def __init__(self, dimension: int = 256, latency_ms: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the stand-in server.
+
+        Args:
+            dimension: Embedding dimension
+            latency_ms: Artificial latency added to every request, to mimic a real model server
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "StandInEmbeddingServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-embeddings", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/embeddings"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self.send_error(400, "Invalid JSON")
+                    return
+
+                texts = payload.get("input", [])
+                if isinstance(texts, str):
+                    texts = [texts]
+                model = payload.get("model", "stand-in")
+                with server._lock:
+                    server.request_count += 1
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+
+                body = json.dumps({
+                    "object": "list",
+                    "model": model,
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": stand_in_embedding(text, model, server.dimension)}
+                        for i, text in enumerate(texts)
+                    ]
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep benchmark output clean
+                pass
+
+        return Handler
+
+
+def build_synthetic_corpus(num_docs: int, num_queries: int, seed: int = 42, filler_sentences: int = 12):
+    """
+    Generate a reproducible synthetic corpus with one labelled query per sampled document.
+
+    Every document states one unique fact ("The <attribute> of <entity> is <value>.") buried in
+    filler text drawn from a shared vocabulary, so retrieval has to find the right document among
+    many lexically similar ones.
+
+    Args:
+        num_docs: Number of synthetic documents
+        num_queries: Number of labelled queries to generate (at most num_docs)
+        seed: Random seed
+        filler_sentences: Filler sentences per document
+
+    Returns:
+        Tuple of (documents, queries)
+    """
+    rng = random.Random(seed)
+    syllables = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+
+    def pseudo_word(used):
+        while True:
+            word = "".join(rng.choice(syllables) for _ in range(rng.randint(3, 4)))
+            if word not in used:
+                used.add(word)
+                return word
+
+    used_words = set()
+    vocabulary = [pseudo_word(used_words) for _ in range(400)]
+
+    documents = []
+    facts = []
+    for i in range(num_docs):
+        entity = pseudo_word(used_words)
+        value = pseudo_word(used_words)
+        attribute = _SYNTHETIC_ATTRIBUTES[i % len(_SYNTHETIC_ATTRIBUTES)]
+        source = f"synthetic_{i:05d}.txt"
+
+        sentences = [
+            " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 14))).capitalize() + "."
+            for _ in range(filler_sentences)
+        ]
+        sentences.insert(rng.randint(0, len(sentences)), f"The {attribute} of {entity} is {value}.")
+        documents.append(LCDocument(page_content=" ".join(sentences), metadata={"source": source}))
+        facts.append({"query": f"What is the {attribute} of {entity}?", "relevant_sources": [source]})
+
+    queries = rng.sample(facts, min(num_queries, len(facts))) if facts else []
+    return documents, queries
+
+
+def latency_summary(values_ms: Sequence[float]) -> Dict[str, Any]:
+    """Summarize latencies (in milliseconds) with percentiles."""
+    if not values_ms:
+        return {"count": 0}
+    values = np.asarray(values_ms, dtype=np.float64)
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3)
+    }
+
+
+def ranking_metrics(ranked_sources: List[List[str]], relevant: List[List[str]], ks: Sequence[int]) -> Dict[str, float]:
+    """
+    Compute recall@k and MRR over a query set.
+
+    Args:
+        ranked_sources: For each query, the source of every returned chunk in rank order
+        relevant: For each query, the relevant source names
+        ks: Cut-offs for recall@k
+
+    Returns:
+        Dictionary with recall@k for every k and the mean reciprocal rank
+    """
+    metrics = {}
+    if not ranked_sources:
+        return metrics
+    for k in ks:
+        recalls = [
+            len(set(sources[:k]) & set(rel)) / len(rel)
+            for sources, rel in zip(ranked_sources, relevant) if rel
+        ]
+        metrics[f"recall@{k}"] = round(float(np.mean(recalls)), 4) if recalls else 0.0
+
+    reciprocal_ranks = []
+    for sources, rel in zip(ranked_sources, relevant):
+        rank = next((position for position, source in enumerate(sources, 1) if source in rel), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    metrics["mrr"] = round(float(np.mean(reciprocal_ranks)), 4)
+    return metrics
+
+
+def _source_name(metadata: Dict[str, Any]) -> str:
+    return os.path.basename(str((metadata or {}).get("source", "")))
+
+
+def run_benchmark(
+    store_type: str = "qdrant",
+    qdrant_url: str = ":memory:",
+    sample_dir: Optional[str] = DEFAULT_SAMPLE_DIR,
+    synthetic_docs: int = 200,
+    synthetic_queries: int = 100,
+    extra_queries: Optional[List[Dict[str, Any]]] = None,
+    chunk_size: int = RAG_CHUNK_SIZE,
+    chunk_overlap: int = RAG_CHUNK_OVERLAP,
+    top_k: int = 10,
+    ks: Sequence[int] = DEFAULT_KS,
+    rerank: bool = True,
+    rerank_top_k: int = RERANK_TOP_K_RESULTS,
+    embedding_dim: int = 256,
+    embedding_latency_ms: float = 0.0,
+    warmup: int = 2,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """
+    Run the retrieval benchmark.
+
+    Args:
+        store_type: Vector store backend ("qdrant" or "chroma")
+        qdrant_url: Qdrant URL (":memory:" runs fully offline)
+        sample_dir: Directory with the fixed corpus (None to skip it)
+        synthetic_docs: Number of synthetic scaling documents
+        synthetic_queries: Number of labelled queries over the synthetic documents
+        extra_queries: Additional labelled queries ({"query", "relevant_sources"})
+        chunk_size: Text splitter chunk size
+        chunk_overlap: Text splitter chunk overlap
+        top_k: Number of chunks retrieved per query (at least max(ks))
+        ks: Cut-offs for recall@k
+        rerank: Whether to run the Reranker stage
+        rerank_top_k: Number of chunks kept by the Reranker
+        embedding_dim: Stand-in embedding dimension
+        embedding_latency_ms: Artificial latency per embedding request
+        warmup: Number of unmeasured warm-up queries
+        seed: Random seed for the synthetic corpus
+
+    Returns:
+        Benchmark report dictionary
+    """
+    from .document_loader import DocumentLoader
+    from .embedding_manager import EmbeddingManager
+    from .reranker import Reranker
+    from .retriever import Retriever
+    from .vector_store_manager import VectorStoreManager
+
+    documents = []
+    queries = []
+    if sample_dir:
+        documents.extend(DocumentLoader().load_documents_from_directory(sample_dir))
+        present = {_source_name(doc.metadata) for doc in documents}
+        queries.extend(q for q in SAMPLE_QUERIES if set(q["relevant_sources"]) <= present)
+    synthetic_documents, synthetic_labelled = build_synthetic_corpus(synthetic_docs, synthetic_queries, seed=seed)
+    documents.extend(synthetic_documents)
+    queries.extend(synthetic_labelled)
+    queries.extend(extra_queries or [])
+    if not documents or not queries:
+        raise ValueError("The benchmark needs at least one document and one labelled query")
+
+    retrieve_k = max(top_k, max(ks))
+    collection_name = f"retrieval_benchmark_{uuid.uuid4().hex[:8]}"
+
+    with StandInEmbeddingServer(dimension=embedding_dim, latency_ms=embedding_latency_ms) as server:
+        embedding_manager = EmbeddingManager(
+            provider="LM Studio",
+            model_name="stand-in-embedding",
+            hostname=server.host,
+            port=str(server.port),
+            api_path="/v1"
+        )
+        vector_store_manager = VectorStoreManager(
+            store_type=store_type,
+            embedding_manager=embedding_manager,
+            collection_name=collection_name,
+            qdrant_url=qdrant_url
+        )
+        try:
+            # Ingestion
+            splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            ingest_start = time.perf_counter()
+            chunks = splitter.split_documents(documents)
+            split_seconds = time.perf_counter() - ingest_start
+            embed_start = time.perf_counter()
+            vector_store_manager.add_documents(chunks)
+            index_seconds = time.perf_counter() - embed_start
+            corpus_bytes = sum(len(doc.page_content.encode("utf-8")) for doc in documents)
+
+            retriever = Retriever(vector_store_manager)
+            reranker = None
+            if rerank:
+                reranker = Reranker()
+                # Point the real reranker client at the stand-in server
+                reranker.enabled = True
+                reranker.base_url = server.base_url
+
+            for query in queries[:warmup]:
+                retriever.retrieve_documents_with_scores(query["query"], top_k=retrieve_k)
+
+            # Query replay
+            latencies = {"retrieve": [], "rerank": [], "total": []}
+            retrieved_sources, reranked_sources, relevant = [], [], []
+            for query in queries:
+                start = time.perf_counter()
+                results = retriever.retrieve_documents_with_scores(query["query"], top_k=retrieve_k)
+                retrieved = time.perf_counter()
+                latencies["retrieve"].append((retrieved - start) * 1000)
+                retrieved_sources.append([_source_name(doc.metadata) for doc, _ in results])
+                relevant.append(list(query["relevant_sources"]))
+
+                if reranker is not None:
+                    candidates = [
+                        {"content": doc.page_content, "metadata": doc.metadata, "score": score}
+                        for doc, score in results
+                    ]
+                    reranked = reranker.rerank_documents(query["query"], candidates, top_k=rerank_top_k)
+                    latencies["rerank"].append((time.perf_counter() - retrieved) * 1000)
+                    reranked_sources.append([_source_name(doc.get("metadata")) for doc in reranked])
+                latencies["total"].append((time.perf_counter() - start) * 1000)
+        finally:
+            _drop_benchmark_collection(vector_store_manager)
+
+        embedding_requests = server.request_count
+
+    quality = {"retrieve": ranking_metrics(retrieved_sources, relevant, ks)}
+    if reranker is not None:
+        quality["rerank"] = ranking_metrics(reranked_sources, relevant, [k for k in ks if k <= rerank_top_k])
+
+    return {
+        "benchmark": "retrieval",
+        "created_at": time.time(),
+        "config": {
+            "store_type": store_type,
+            "qdrant_url": qdrant_url if store_type == "qdrant" else None,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "top_k": retrieve_k,
+            "rerank": rerank,
+            "rerank_top_k": rerank_top_k if rerank else None,
+            "embedding_dim": embedding_dim,
+            "embedding_latency_ms": embedding_latency_ms,
+            "synthetic_docs": synthetic_docs,
+            "seed": seed
+        },
+        "corpus": {
+            "documents": len(documents),
+            "chunks": len(chunks),
+            "bytes": corpus_bytes,
+            "queries": len(queries)
+        },
+        "ingestion": {
+            "split_seconds": round(split_seconds, 4),
+            "index_seconds": round(index_seconds, 4),
+            "chunks_per_second": round(len(chunks) / index_seconds, 2) if index_seconds > 0 else None
+        },
+        "latency": {stage: latency_summary(values) for stage, values in latencies.items() if values},
+        "quality": quality,
+        "embedding_requests": embedding_requests
+    }
+
+
+def _drop_benchmark_collection(vector_store_manager):
+    """Remove the temporary benchmark collection from the backend."""
+    try:
+        if vector_store_manager.store_type.lower() == "qdrant":
+            vector_store_manager.client.delete_collection(collection_name=vector_store_manager.collection_name)
+        elif vector_store_manager.store_type.lower() == "chroma":
+            vector_store_manager.vector_store.delete_collection()
+    except Exception as e:
+        logger.warning(f"Could not drop benchmark collection {vector_store_manager.collection_name}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline retrieval benchmark (recall@k, MRR, latency percentiles)')
+    parser.add_argument('--store', choices=['qdrant', 'chroma'], default='qdrant', help="Vector store backend")
+    parser.add_argument('--qdrant-url', default=':memory:', help="Qdrant URL (':memory:' runs fully offline)")
+    parser.add_argument('--sample-dir', default=DEFAULT_SAMPLE_DIR, help="Fixed corpus directory ('' to skip)")
+    parser.add_argument('--synthetic-docs', type=int, default=200, help="Number of synthetic scaling documents")
+    parser.add_argument('--synthetic-queries', type=int, default=100, help="Number of synthetic labelled queries")
+    parser.add_argument('--queries', help="JSON file with extra labelled queries [{query, relevant_sources}]")
+    parser.add_argument('--chunk-size', type=int, default=RAG_CHUNK_SIZE)
+    parser.add_argument('--chunk-overlap', type=int, default=RAG_CHUNK_OVERLAP)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--ks', default=",".join(str(k) for k in DEFAULT_KS), help="Comma-separated recall@k cut-offs")
+    parser.add_argument('--no-rerank', action='store_true', help="Skip the Reranker stage")
+    parser.add_argument('--rerank-top-k', type=int, default=RERANK_TOP_K_RESULTS)
+    parser.add_argument('--embedding-dim', type=int, default=256)
+    parser.add_argument('--embedding-latency-ms', type=float, default=0.0)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    extra_queries = None
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            extra_queries = json.load(f)
+
+    report = run_benchmark(
+        store_type=args.store,
+        qdrant_url=args.qdrant_url,
+        sample_dir=args.sample_dir or None,
+        synthetic_docs=args.synthetic_docs,
+        synthetic_queries=args.synthetic_queries,
+        extra_queries=extra_queries,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        top_k=args.top_k,
+        ks=[int(k) for k in args.ks.split(",") if k.strip()],
+        rerank=not args.no_rerank,
+        rerank_top_k=args.rerank_top_k,
+        embedding_dim=args.embedding_dim,
+        embedding_latency_ms=args.embedding_latency_ms,
+        warmup=args.warmup,
+        seed=args.seed
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
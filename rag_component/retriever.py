@@ -21,7 +21,8 @@ class Retriever:
         self, 
         query: str, 
         top_k: Optional[int] = None,
-        use_mmr: bool = False
+        use_mmr: bool = False,
+        filter: Optional[Dict[str, Any]] = None
     ) -> List[LCDocument]:
         """
         Retrieve relevant documents for a given query.
@@ -30,6 +31,7 @@ class Retriever:
             query: User query to find relevant documents for
             top_k: Number of top results to return (uses default if not provided)
             use_mmr: Whether to use Maximal Marginal Relevance search
+            filter: Optional metadata filter expression (e.g. {"file_id": "..."})
             
         Returns:
             List of relevant documents
@@ -40,18 +42,21 @@ class Retriever:
         if use_mmr:
             return self.vector_store_manager.max_marginal_relevance_search(
                 query=query,
-                top_k=top_k
+                top_k=top_k,
+                filter=filter
             )
         else:
             return self.vector_store_manager.similarity_search(
                 query=query,
-                top_k=top_k
+                top_k=top_k,
+                filter=filter
             )
     
     def retrieve_documents_with_scores(
         self, 
         query: str, 
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None
     ) -> List[tuple[LCDocument, float]]:
         """
         Retrieve relevant documents with their similarity scores.
@@ -59,6 +64,7 @@ class Retriever:
         Args:
             query: User query to find relevant documents for
             top_k: Number of top results to return (uses default if not provided)
+            filter: Optional metadata filter expression (e.g. {"file_id": "..."})
             
         Returns:
             List of tuples (document, score)
@@ -68,20 +74,22 @@ class Retriever:
         
         return self.vector_store_manager.similarity_search_with_score(
             query=query,
-            top_k=top_k
+            top_k=top_k,
+            filter=filter
         )
     
-    def get_relevant_documents(self, query: str) -> List[Dict[str, Any]]:
+    def get_relevant_documents(self, query: str, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Get relevant documents formatted for use in the RAG pipeline.
 
         Args:
             query: User query to find relevant documents for
+            filter: Optional metadata filter expression pushed down to the vector store
 
         Returns:
             List of dictionaries containing document content and metadata
         """
-        docs_with_scores = self.retrieve_documents_with_scores(query)
+        docs_with_scores = self.retrieve_documents_with_scores(query, filter=filter)
 
         # Format documents for RAG pipeline
         formatted_docs = []
@@ -120,7 +128,9 @@ class Retriever:
                     "source": source_label,
                     "metadata": doc.metadata,
                     "score": score,
-                    "download_info": download_info
+                    "download_info": download_info,
+                    # Other documents containing a near-duplicate of this chunk
+                    "duplicate_sources": doc.metadata.get("duplicate_sources", [])
                 })
 
         return formatted_docs
\ No newline at end of file
@@ -0,0 +1,468 @@
+"""
+Vector snapshot module for the RAG component.
+Exports a collection's ids, vectors and payloads into a compact, backend-neutral snapshot and
+restores it into Qdrant or Chroma without re-embedding any text.
+
+Snapshot layout (one directory):
+    manifest.json            - format version, dimension, distance, chunk list and sha256 checksums
+    vectors-00000.npy        - float32 matrix (rows x dimension), memory-mappable with numpy
+    payloads-00000.jsonl     - one {"id", "page_content", "metadata"} record per vector row
+    ...
+
+The manifest is written last, so an interrupted export never looks like a valid snapshot.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import RAG_SNAPSHOT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+
+# Distance names follow Qdrant; Chroma's hnsw:space values are mapped onto them
+CHROMA_TO_SNAPSHOT_DISTANCE = {"l2": "Euclid", "cosine": "Cosine", "ip": "Dot"}
+SNAPSHOT_TO_CHROMA_DISTANCE = {value: key for key, value in CHROMA_TO_SNAPSHOT_DISTANCE.items()}
+
+
+class _SnapshotWriter:
+    """Writes snapshot chunks to disk and builds the manifest."""
+
+    def __init__(self, output_dir: str):
+        if os.path.exists(os.path.join(output_dir, MANIFEST_FILENAME)):
+            raise ValueError(f"A snapshot already exists in {output_dir}")
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.chunks: List[Dict[str, Any]] = []
+        self.dimension: Optional[int] = None
+        self.count = 0
+
+    def write_chunk(self, ids: List[Any], vectors: List[List[float]], contents: List[str], metadatas: List[Dict]):
+        """Write one chunk of rows (vectors as .npy, payloads as JSONL)."""
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError(f"Expected {len(ids)} vectors of equal dimension, got shape {matrix.shape}")
+        if self.dimension is None:
+            self.dimension = int(matrix.shape[1])
+        elif matrix.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension changed from {self.dimension} to {matrix.shape[1]} during export")
+
+        index = len(self.chunks)
+        vectors_file = f"vectors-{index:05d}.npy"
+        payloads_file = f"payloads-{index:05d}.jsonl"
+
+        np.save(os.path.join(self.output_dir, vectors_file), matrix, allow_pickle=False)
+        with open(os.path.join(self.output_dir, payloads_file), "w", encoding="utf-8") as f:
+            for point_id, content, metadata in zip(ids, contents, metadatas):
+                record = {"id": point_id, "page_content": content or "", "metadata": metadata or {}}
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+        self.chunks.append({
+            "index": index,
+            "count": len(ids),
+            "vectors": vectors_file,
+            "payloads": payloads_file,
+            "sha256": {
+                vectors_file: _sha256_file(os.path.join(self.output_dir, vectors_file)),
+                payloads_file: _sha256_file(os.path.join(self.output_dir, payloads_file))
+            }
+        })
+        self.count += len(ids)
+        logger.info(f"Snapshot chunk {index} written ({len(ids)} points, {self.count} total)")
+
+    def finish(self, source: Dict[str, Any], distance: str) -> Dict[str, Any]:
+        """Write the manifest and return it."""
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": time.time(),
+            "source": source,
+            "count": self.count,
+            "dimension": self.dimension,
+            "distance": distance,
+            "dtype": "float32",
+            "chunks": self.chunks
+        }
+        manifest_path = os.path.join(self.output_dir, MANIFEST_FILENAME)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        return manifest
+
+
+def export_qdrant_collection(
+    client,
+    collection_name: str,
+    output_dir: str,
+    chunk_size: Optional[int] = None,
+    vector_name: Optional[str] = None,
+    content_payload_key: str = "page_content",
+    metadata_payload_key: str = "metadata"
+) -> Dict[str, Any]:
+    """
+    Export a Qdrant collection into a snapshot directory.
+
+    Args:
+        client: Qdrant client
+        collection_name: Collection to export
+        output_dir: Directory to write the snapshot to (must not already hold a snapshot)
+        chunk_size: Number of points per snapshot chunk
+        vector_name: Named vector to export (defaults to the unnamed or only vector)
+        content_payload_key: Payload key holding the document text
+        metadata_payload_key: Payload key holding the document metadata
+
+    Returns:
+        The snapshot manifest
+    """
+    chunk_size = chunk_size or RAG_SNAPSHOT_CHUNK_SIZE
+    collection_info = client.get_collection(collection_name)
+    vectors_config = collection_info.config.params.vectors
+    if isinstance(vectors_config, dict):
+        if vector_name is None:
+            if len(vectors_config) != 1:
+                raise ValueError(f"Collection has several named vectors {list(vectors_config)}; pass vector_name")
+            vector_name = next(iter(vectors_config))
+        distance = vectors_config[vector_name].distance
+    else:
+        distance = vectors_config.distance
+
+    writer = _SnapshotWriter(output_dir)
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=chunk_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=[vector_name] if vector_name else True
+        )
+        ids, vectors, contents, metadatas = [], [], [], []
+        for point in points:
+            vector = point.vector
+            if isinstance(vector, dict):
+                vector = vector.get(vector_name or "")
+            if vector is None:
+                logger.warning(f"Skipping point {point.id} without a vector")
+                continue
+            payload = point.payload or {}
+            ids.append(point.id)
+            vectors.append(vector)
+            contents.append(payload.get(content_payload_key, ""))
+            metadatas.append(payload.get(metadata_payload_key) or {})
+        writer.write_chunk(ids, vectors, contents, metadatas)
+        if offset is None:
+            break
+
+    return writer.finish(
+        source={"store": "qdrant", "collection": collection_name, "vector_name": vector_name or ""},
+        distance=getattr(distance, "value", str(distance))
+    )
+
+
+def export_chroma_collection(collection, output_dir: str, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Export a Chroma collection into a snapshot directory.
+
+    Args:
+        collection: chromadb Collection (e.g. ``Chroma(...)._collection``)
+        output_dir: Directory to write the snapshot to (must not already hold a snapshot)
+        chunk_size: Number of records per snapshot chunk
+
+    Returns:
+        The snapshot manifest
+    """
+    chunk_size = chunk_size or RAG_SNAPSHOT_CHUNK_SIZE
+    writer = _SnapshotWriter(output_dir)
+    offset = 0
+    while True:
+        result = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=chunk_size,
+            offset=offset
+        )
+        ids = result.get("ids") or []
+        if not ids:
+            break
+        writer.write_chunk(
+            ids,
+            result["embeddings"],
+            result.get("documents") or [""] * len(ids),
+            result.get("metadatas") or [{}] * len(ids)
+        )
+        offset += len(ids)
+        if len(ids) < chunk_size:
+            break
+
+    return writer.finish(
+        source={"store": "chroma", "collection": collection.name},
+        distance=CHROMA_TO_SNAPSHOT_DISTANCE.get(_chroma_space(collection), "Euclid")
+    )
+
+
+def chroma_collection_metadata(manifest: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Metadata to create a Chroma collection for a snapshot with, so it uses the snapshot's distance.
+
+    Args:
+        manifest: Snapshot manifest
+
+    Returns:
+        Collection metadata with the matching ``hnsw:space``
+    """
+    space = SNAPSHOT_TO_CHROMA_DISTANCE.get(manifest["distance"])
+    if space is None:
+        raise ValueError(f"Chroma has no equivalent of the snapshot distance {manifest['distance']}")
+    return {"hnsw:space": space}
+
+
+def load_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    """
+    Load and sanity-check a snapshot manifest.
+
+    Args:
+        snapshot_dir: Snapshot directory
+
+    Returns:
+        The manifest dictionary
+    """
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No snapshot manifest found in {snapshot_dir}")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {manifest.get('format_version')}")
+    return manifest
+
+
+def verify_snapshot(snapshot_dir: str) -> Dict[str, Any]:
+    """
+    Verify every chunk file of a snapshot against the manifest checksums.
+
+    Args:
+        snapshot_dir: Snapshot directory
+
+    Returns:
+        The verified manifest
+
+    Raises:
+        ValueError: If a file is missing, corrupted or the row counts do not add up
+    """
+    manifest = load_manifest(snapshot_dir)
+    total = 0
+    for chunk in manifest["chunks"]:
+        for filename, expected in chunk["sha256"].items():
+            path = os.path.join(snapshot_dir, filename)
+            if not os.path.exists(path):
+                raise ValueError(f"Snapshot file missing: {filename}")
+            actual = _sha256_file(path)
+            if actual != expected:
+                raise ValueError(f"Checksum mismatch for {filename}: expected {expected}, got {actual}")
+        total += chunk["count"]
+    if total != manifest["count"]:
+        raise ValueError(f"Snapshot chunks hold {total} points but the manifest lists {manifest['count']}")
+    return manifest
+
+
+def iter_snapshot_chunks(snapshot_dir: str, manifest: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[List[Any], np.ndarray, List[Dict[str, Any]]]]:
+    """
+    Stream snapshot chunks without loading the whole snapshot into memory.
+
+    Args:
+        snapshot_dir: Snapshot directory
+        manifest: Already loaded manifest (loaded from disk if omitted)
+
+    Yields:
+        Tuples of (ids, memory-mapped vector matrix, payload records)
+    """
+    manifest = manifest or load_manifest(snapshot_dir)
+    for chunk in manifest["chunks"]:
+        vectors = np.load(os.path.join(snapshot_dir, chunk["vectors"]), mmap_mode="r", allow_pickle=False)
+        records = []
+        with open(os.path.join(snapshot_dir, chunk["payloads"]), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+        if len(records) != vectors.shape[0]:
+            raise ValueError(f"Chunk {chunk['index']} has {vectors.shape[0]} vectors but {len(records)} payloads")
+        yield [record["id"] for record in records], vectors, records
+
+
+def import_into_qdrant(
+    snapshot_dir: str,
+    client,
+    collection_name: str,
+    recreate: bool = False,
+    vector_name: str = "",
+    batch_size: Optional[int] = None,
+    parallelism: Optional[int] = None,
+    content_payload_key: str = "page_content",
+    metadata_payload_key: str = "metadata"
+) -> int:
+    """
+    Restore a snapshot into a Qdrant collection using the parallel bulk uploader.
+
+    Args:
+        snapshot_dir: Snapshot directory
+        client: Qdrant client
+        collection_name: Target collection (created if missing)
+        recreate: Drop and recreate the collection before restoring
+        vector_name: Named vector to write to ("" for the default unnamed vector)
+        batch_size: Points per upload batch
+        parallelism: Number of concurrent upload batches
+        content_payload_key: Payload key for the document text
+        metadata_payload_key: Payload key for the document metadata
+
+    Returns:
+        Number of restored points
+    """
+    from qdrant_client.http.models import Distance, VectorParams
+    from .qdrant_bulk_uploader import QdrantBulkUploader
+    from .vector_store_manager import ensure_qdrant_payload_indexes
+
+    manifest = verify_snapshot(snapshot_dir)
+    if recreate and client.collection_exists(collection_name):
+        client.delete_collection(collection_name=collection_name)
+
+    if client.collection_exists(collection_name):
+        collection_info = client.get_collection(collection_name)
+        vectors_config = collection_info.config.params.vectors
+        if isinstance(vectors_config, dict):
+            vectors_config = vectors_config.get(vector_name)
+        if (vectors_config is None or vectors_config.size != manifest["dimension"]
+                or vectors_config.distance != Distance(manifest["distance"])):
+            raise ValueError(
+                f"Collection '{collection_name}' does not match the snapshot dimension {manifest['dimension']} "
+                f"and distance {manifest['distance']}; use recreate=True or restore into a new collection"
+            )
+        ensure_qdrant_payload_indexes(client, collection_name, collection_info)
+    else:
+        params = VectorParams(size=manifest["dimension"], distance=Distance(manifest["distance"]))
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config={vector_name: params} if vector_name else params
+        )
+        ensure_qdrant_payload_indexes(client, collection_name)
+
+    def points():
+        for ids, vectors, records in iter_snapshot_chunks(snapshot_dir, manifest):
+            for row, (point_id, record) in enumerate(zip(ids, records)):
+                yield {
+                    "id": _qdrant_point_id(point_id),
+                    "vector": vectors[row].tolist(),
+                    "payload": {
+                        content_payload_key: record["page_content"],
+                        metadata_payload_key: record["metadata"]
+                    }
+                }
+
+    uploader = QdrantBulkUploader(
+        client=client,
+        collection_name=collection_name,
+        batch_size=batch_size,
+        parallelism=parallelism,
+        vector_name=vector_name
+    )
+    restored = uploader.upload_points(points())
+    logger.info(f"Restored {restored} points into Qdrant collection '{collection_name}'")
+    return restored
+
+
+def import_into_chroma(snapshot_dir: str, collection, batch_size: Optional[int] = None) -> int:
+    """
+    Restore a snapshot into a Chroma collection.
+
+    Create the collection with ``chroma_collection_metadata(manifest)`` so it uses the snapshot's
+    distance; a collection with another distance or dimension is rejected.
+
+    Args:
+        snapshot_dir: Snapshot directory
+        collection: chromadb Collection to add the records to
+        batch_size: Records per add() call (capped by the client's max batch size)
+
+    Returns:
+        Number of restored records
+    """
+    manifest = verify_snapshot(snapshot_dir)
+    space = _chroma_space(collection)
+    if space != chroma_collection_metadata(manifest)["hnsw:space"]:
+        raise ValueError(
+            f"Chroma collection '{collection.name}' uses the {space} space but the snapshot distance is "
+            f"{manifest['distance']}; restore into a new collection"
+        )
+    if collection.count():
+        existing = collection.peek(1)["embeddings"]
+        if len(existing) and len(existing[0]) != manifest["dimension"]:
+            raise ValueError(
+                f"Chroma collection '{collection.name}' holds {len(existing[0])}-dimensional vectors but the "
+                f"snapshot dimension is {manifest['dimension']}; restore into a new collection"
+            )
+    batch_size = batch_size or RAG_SNAPSHOT_CHUNK_SIZE
+    max_batch_size = getattr(getattr(collection, "_client", None), "max_batch_size", None)
+    if max_batch_size:
+        batch_size = min(batch_size, max_batch_size)
+
+    restored = 0
+    for ids, vectors, records in iter_snapshot_chunks(snapshot_dir, manifest):
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            collection.upsert(
+                ids=[str(point_id) for point_id in ids[start:end]],
+                embeddings=np.asarray(vectors[start:end]),
+                documents=[record["page_content"] for record in records[start:end]],
+                metadatas=[_chroma_metadata(record["metadata"]) for record in records[start:end]]
+            )
+            restored += len(ids[start:end])
+    logger.info(f"Restored {restored} records into Chroma collection '{collection.name}'")
+    return restored
+
+
+def _qdrant_point_id(point_id):
+    """Qdrant only accepts unsigned integers and UUIDs; map any other id deterministically to a UUID."""
+    if isinstance(point_id, int) and point_id >= 0:
+        return point_id
+    try:
+        return str(uuid.UUID(str(point_id)))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, str(point_id)))
+
+
+def _chroma_space(collection) -> str:
+    """Distance space of a Chroma collection, from its metadata or (newer clients) its configuration."""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    return space or "l2"
+
+
+def _chroma_metadata(metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Chroma metadata values must be scalars; drop None and serialize nested values as JSON."""
+    cleaned = {}
+    for key, value in (metadata or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            cleaned[key] = value
+        else:
+            cleaned[key] = json.dumps(value, ensure_ascii=False, default=str)
+    return cleaned or None
+
+
+def _sha256_file(path: str) -> str:
+    """Compute the sha256 checksum of a file in streamed blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -3,7 +3,8 @@ Vector store manager module for the RAG component.
 Handles storage and retrieval of document embeddings.
 """
 import os
-from typing import List, Optional
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
 from langchain_chroma import Chroma
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document as LCDocument
@@ -14,36 +15,142 @@ from .config import (
     RAG_TOP_K_RESULTS,
     RAG_SIMILARITY_THRESHOLD,
     RAG_QDRANT_URL,
-    RAG_QDRANT_API_KEY
+    RAG_QDRANT_API_KEY,
+    RAG_PAYLOAD_INDEX_FIELDS,
+    RAG_QDRANT_BULK_UPLOAD_ENABLED,
+    RAG_EMBEDDING_MIGRATION_ENABLED,
+    RAG_MIGRATION_SOURCE_EMBEDDING_PROVIDER,
+    RAG_MIGRATION_SOURCE_EMBEDDING_MODEL,
+    RAG_DEDUP_MODE
 )
+from .chunk_deduplicator import ChunkDeduplicator, IN_MEMORY_INDEX_PATH
 from .embedding_manager import EmbeddingManager
+from .metadata_filter import to_chroma_filter, to_qdrant_filter
+from .qdrant_connection import get_qdrant_client, get_bulk_qdrant_client, QDRANT_IN_MEMORY_URL
+from . import embedding_migration
+
+# Numeric metadata fields indexed in Qdrant to support range filters (e.g. upload date)
+QDRANT_RANGE_INDEX_FIELDS = ["ingested_at"]
+
+
+def ensure_qdrant_payload_indexes(client, collection_name: str, collection_info=None):
+    """
+    Create Qdrant payload indexes on the metadata fields used for filtering.
+
+    Args:
+        client: Qdrant client connected to the server
+        collection_name: Collection to index
+        collection_info: Existing collection info, used to skip fields that are already indexed
+    """
+    from qdrant_client.http.models import PayloadSchemaType
+
+    existing = set()
+    if collection_info is not None and getattr(collection_info, "payload_schema", None):
+        existing = set(collection_info.payload_schema.keys())
+
+    index_fields = [(field, PayloadSchemaType.KEYWORD) for field in RAG_PAYLOAD_INDEX_FIELDS]
+    index_fields += [(field, PayloadSchemaType.FLOAT) for field in QDRANT_RANGE_INDEX_FIELDS]
+
+    for field, schema_type in index_fields:
+        field_name = f"metadata.{field}"
+        if field_name in existing:
+            continue
+        try:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=schema_type
+            )
+        except Exception as e:
+            # A missing index only makes filtered search slower, so don't fail initialization
+            print(f"Warning: could not create payload index on '{field_name}': {e}")
+
+
+def _collection_vector_size(collection_info) -> Optional[int]:
+    """Get the dimension of a collection's (single) vector."""
+    vectors_config = collection_info.config.params.vectors
+    if isinstance(vectors_config, dict):
+        if len(vectors_config) != 1:
+            return None
+        vectors_config = next(iter(vectors_config.values()))
+    return vectors_config.size
 
 
 class VectorStoreManager:
     """Class responsible for managing the vector store."""
+
+    # Near-duplicate detector of the collection (None when RAG_DEDUP_MODE is "off")
+    deduplicator: Optional[ChunkDeduplicator] = None
     
-    def __init__(self):
-        self.store_type = RAG_VECTOR_STORE_TYPE
+    def __init__(
+        self,
+        store_type: Optional[str] = None,
+        embedding_manager: Optional[EmbeddingManager] = None,
+        collection_name: Optional[str] = None,
+        qdrant_url: Optional[str] = None,
+        dedup_mode: Optional[str] = None
+    ):
+        """
+        Initialize the vector store manager.
+
+        Args:
+            store_type: Vector store type to use instead of RAG_VECTOR_STORE_TYPE
+            embedding_manager: Embedding manager to use instead of the configured one
+            collection_name: Collection to use instead of RAG_COLLECTION_NAME
+            qdrant_url: Qdrant URL to use instead of RAG_QDRANT_URL (":memory:" for the embedded mode)
+            dedup_mode: Near-duplicate handling to use instead of RAG_DEDUP_MODE ("off", "skip" or "link")
+        """
+        self.store_type = store_type or RAG_VECTOR_STORE_TYPE
         self.top_k = RAG_TOP_K_RESULTS
         self.similarity_threshold = RAG_SIMILARITY_THRESHOLD
-        self.embedding_manager = EmbeddingManager()
+        self.embedding_manager = embedding_manager or EmbeddingManager()
+        # Bulk upload tuning; None falls back to RAG_QDRANT_UPLOAD_BATCH_SIZE / RAG_QDRANT_UPLOAD_PARALLELISM
+        self.upload_batch_size: Optional[int] = None
+        self.upload_parallelism: Optional[int] = None
 
         # Initialize the appropriate vector store
         if self.store_type.lower() == "chroma":
             self.persist_dir = RAG_CHROMA_PERSIST_DIR
-            self.collection_name = RAG_COLLECTION_NAME
+            self.collection_name = collection_name or RAG_COLLECTION_NAME
             self.vector_store = self._initialize_chroma()
         elif self.store_type.lower() == "faiss":
             self.vector_store = self._initialize_faiss()
         elif self.store_type.lower() == "qdrant":
             # Get Qdrant config directly from environment to ensure latest values
             import os
-            self.qdrant_url = os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
+            self.qdrant_url = qdrant_url or os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
             self.qdrant_api_key = os.getenv("RAG_QDRANT_API_KEY", "")
-            self.collection_name = os.getenv("RAG_COLLECTION_NAME", "documents")
+            self.collection_name = collection_name or os.getenv("RAG_COLLECTION_NAME", "documents")
             self.vector_store = self._initialize_qdrant()
         else:
             raise ValueError(f"Unsupported vector store type: {self.store_type}")
+
+        self.deduplicator = self._initialize_deduplicator(dedup_mode or RAG_DEDUP_MODE)
+
+    def _initialize_deduplicator(self, mode: str) -> Optional[ChunkDeduplicator]:
+        """Initialize near-duplicate detection for the collection (None when disabled)."""
+        if mode.lower() == "off" or self.store_type.lower() not in ("chroma", "qdrant"):
+            return None
+        # The embedded in-memory Qdrant does not outlive the process, so neither may its index
+        index_path = IN_MEMORY_INDEX_PATH if getattr(self, "qdrant_url", None) == QDRANT_IN_MEMORY_URL else None
+        return ChunkDeduplicator(
+            self.collection_name, index_path=index_path, mode=mode, existing_ids=self._existing_chunk_ids
+        )
+
+    def _existing_chunk_ids(self, ids: List[str]) -> List[str]:
+        """Which of the given chunk ids are still stored (the dedup index may outlive wiped vector data)."""
+        if self.store_type.lower() == "chroma":
+            return self.vector_store._collection.get(ids=ids, include=[]).get("ids", [])
+        elif self.store_type.lower() == "qdrant":
+            return [
+                str(point.id) for point in self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=ids,
+                    with_payload=False,
+                    with_vectors=False
+                )
+            ]
+        return []
     
     def _initialize_chroma(self):
         """Initialize Chroma vector store."""
@@ -68,7 +175,6 @@ class VectorStoreManager:
     def _initialize_qdrant(self):
         """Initialize Qdrant vector store."""
         try:
-            from qdrant_client import QdrantClient
             try:
                 # Try to use the newer QdrantVectorStore class
                 from langchain_qdrant import QdrantVectorStore
@@ -78,24 +184,20 @@ class VectorStoreManager:
                 from langchain_qdrant import Qdrant
                 QdrantClass = Qdrant
 
-            # Initialize Qdrant client
-            if self.qdrant_api_key:
-                client = QdrantClient(
-                    url=self.qdrant_url,
-                    api_key=self.qdrant_api_key,
-                    prefer_grpc=False  # Use HTTP instead of gRPC to avoid auth issues
-                )
-            else:
-                client = QdrantClient(
-                    url=self.qdrant_url,
-                    prefer_grpc=False  # Use HTTP instead of gRPC to avoid auth issues
-                )
+            # Reuse the process-wide Qdrant client for these connection settings
+            client = get_qdrant_client(self.qdrant_url, self.qdrant_api_key)
 
             # Create or connect to the collection
             # Check if collection exists, if not create it
+            self.client = client
+            if self._tracks_embedding_migrations():
+                # Remember the migration state this store was built against (see _refresh_after_migration)
+                self._migration_state_mtime = embedding_migration.state_mtime()
+                self._serving_generation = embedding_migration.load_state()["serving_generation"]
             try:
                 collection_info = client.get_collection(self.collection_name)
-                # If collection exists, we don't need to recreate it
+                # If collection exists, we don't need to recreate it, only make sure it is indexed
+                self._ensure_payload_indexes(client, collection_info)
             except Exception as e:
                 # Check if the error is specifically about collection not existing
                 # Different Qdrant clients may throw different exceptions
@@ -112,34 +214,40 @@ class VectorStoreManager:
                         collection_name=self.collection_name,
                         vectors_config=VectorParams(size=embedding_size, distance=Distance.COSINE),
                     )
+                    self._ensure_payload_indexes(client)
+                    if self._tracks_embedding_migrations():
+                        embedding_migration.record_collection_embedding(
+                            self.collection_name, self._configured_embedding_identity(), embedding_size
+                        )
+                    collection_info = None
                 else:
                     # Re-raise the exception if it's not about collection not existing
                     raise e
 
+            if collection_info is not None and self._tracks_embedding_migrations():
+                self._select_serving_embeddings(client, collection_info)
+
             # Initialize the LangChain Qdrant wrapper
             # The Qdrant wrapper performs validation that may trigger test embeddings
             # To avoid unwanted test embeddings during initialization, we'll let it proceed normally
             # but note that this is expected behavior of the LangChain Qdrant integration
             try:
-                if QdrantClass.__name__ == 'QdrantVectorStore':
-                    # QdrantVectorStore uses 'embedding' instead of 'embeddings'
-                    vector_store = QdrantClass(
-                        client=client,
-                        collection_name=self.collection_name,
-                        embedding=self.embedding_manager.embeddings
-                    )
-                else:
-                    # Older Qdrant class uses 'embeddings'
-                    vector_store = QdrantClass(
-                        client=client,
-                        collection_name=self.collection_name,
-                        embeddings=self.embedding_manager.embeddings
-                    )
+                vector_store = self._create_qdrant_wrapper(QdrantClass, client)
             except Exception as e:
                 # Check if the error is due to dimension mismatch
                 error_str = str(e).lower()
                 if "dimension" in error_str and "mismatch" in error_str or "configured for" in error_str and "dimensions" in error_str:
                     print(f"Dimension mismatch detected: {e}")
+                    if self._tracks_embedding_migrations():
+                        # The model the collection was built with is unknown, so queries cannot be served
+                        # until the background migration swaps in the rebuilt collection. The data is kept.
+                        print(
+                            f"Collection '{self.collection_name}' is being rebuilt with the configured embedding model; "
+                            "set RAG_MIGRATION_SOURCE_EMBEDDING_PROVIDER/RAG_MIGRATION_SOURCE_EMBEDDING_MODEL "
+                            "to keep serving it in the meantime"
+                        )
+                        return self._create_qdrant_wrapper(QdrantClass, client, validate=False)
+
                     print(f"Recreating collection '{self.collection_name}' to match new embedding dimensions...")
 
                     # Delete the existing collection
@@ -155,20 +263,10 @@ class VectorStoreManager:
                         collection_name=self.collection_name,
                         vectors_config=VectorParams(size=embedding_size, distance=Distance.COSINE),
                     )
+                    self._ensure_payload_indexes(client)
 
                     # Now try to initialize the vector store again
-                    if QdrantClass.__name__ == 'QdrantVectorStore':
-                        vector_store = QdrantClass(
-                            client=client,
-                            collection_name=self.collection_name,
-                            embedding=self.embedding_manager.embeddings
-                        )
-                    else:
-                        vector_store = QdrantClass(
-                            client=client,
-                            collection_name=self.collection_name,
-                            embeddings=self.embedding_manager.embeddings
-                        )
+                    vector_store = self._create_qdrant_wrapper(QdrantClass, client)
                 else:
                     # Re-raise the exception if it's not a dimension mismatch
                     raise e
@@ -179,55 +277,272 @@ class VectorStoreManager:
                 "Please install Qdrant dependencies with: "
                 "pip install qdrant-client langchain-qdrant"
             )
-    
-    def add_documents(self, documents: List[LCDocument], ids: Optional[List[str]] = None):
-        """Add documents to the vector store."""
+
+    def _create_qdrant_wrapper(self, QdrantClass, client, validate: bool = True):
+        """Create the LangChain Qdrant wrapper around the collection."""
+        if QdrantClass.__name__ == 'QdrantVectorStore':
+            # QdrantVectorStore uses 'embedding' instead of 'embeddings'
+            kwargs = {} if validate else {"validate_collection_config": False}
+            return QdrantClass(
+                client=client,
+                collection_name=self.collection_name,
+                embedding=self.embedding_manager.embeddings,
+                **kwargs
+            )
+        # Older Qdrant class uses 'embeddings'
+        return QdrantClass(
+            client=client,
+            collection_name=self.collection_name,
+            embeddings=self.embedding_manager.embeddings
+        )
+
+    def _configured_embedding_identity(self) -> Dict[str, str]:
+        """Identity of the embedding model this manager was initialized with."""
+        return embedding_migration.embedding_identity(self.embedding_manager.provider, self.embedding_manager.model_name)
+
+    def _select_serving_embeddings(self, client, collection_info):
+        """
+        Choose the embedding model used to serve an existing collection.
+
+        If the collection was built with a different model than the configured one, queries keep
+        being embedded with the collection's model while a background migration rebuilds the
+        collection with the configured model and swaps it in.
+
+        Args:
+            client: Qdrant client
+            collection_info: Info of the existing collection
+        """
+        physical_collection = embedding_migration.resolve_collection(client, self.collection_name)
+        configured = self._configured_embedding_identity()
+        recorded = embedding_migration.get_collection_embedding(physical_collection)
+        vector_size = _collection_vector_size(collection_info)
+
+        if recorded is None and RAG_MIGRATION_SOURCE_EMBEDDING_MODEL:
+            recorded = embedding_migration.embedding_identity(
+                RAG_MIGRATION_SOURCE_EMBEDDING_PROVIDER or self.embedding_manager.provider,
+                RAG_MIGRATION_SOURCE_EMBEDDING_MODEL
+            )
+            embedding_migration.record_collection_embedding(physical_collection, recorded, vector_size)
+
+        if recorded is None:
+            if vector_size == len(self.embedding_manager.embeddings.embed_query("test")):
+                # A collection without a recorded model that matches the configured dimension is adopted as-is
+                embedding_migration.record_collection_embedding(physical_collection, configured, vector_size)
+                return
+            embedding_migration.start_background_migration(
+                client, self.collection_name, self.embedding_manager.embeddings, configured
+            )
+            return
+
+        if recorded == configured:
+            return
+
+        print(
+            f"Collection '{self.collection_name}' was built with {recorded['model']}; serving it with that model "
+            f"while it is rebuilt with {configured['model']}"
+        )
+        target_embedding_manager = self.embedding_manager
+        self.embedding_manager = EmbeddingManager(provider=recorded["provider"], model_name=recorded["model"])
+        embedding_migration.start_background_migration(
+            client, self.collection_name, target_embedding_manager.embeddings, configured
+        )
+
+    def _tracks_embedding_migrations(self) -> bool:
+        """Whether embedding models are recorded and migrated for this store (not for in-memory Qdrant)."""
+        return RAG_EMBEDDING_MIGRATION_ENABLED and getattr(self, "qdrant_url", None) != QDRANT_IN_MEMORY_URL
+
+    def _refresh_after_migration(self, writing: bool = False):
+        """
+        Re-initialize the Qdrant store if an embedding migration swapped the collection since initialization.
+
+        Waits while a migration swaps the alias and, for writes, while it has frozen writes.
+
+        Args:
+            writing: Whether the caller is about to write to the collection
+        """
+        if self.store_type.lower() != "qdrant" or not self._tracks_embedding_migrations():
+            return
+        last_mtime = getattr(self, "_migration_state_mtime", None)
+        if last_mtime is None:
+            return
+        if embedding_migration.state_mtime() == last_mtime:
+            return
+        self._migration_state_mtime = embedding_migration.wait_for_migration_swap(self.collection_name, writing=writing)
+        if embedding_migration.load_state()["serving_generation"] != self._serving_generation:
+            print(f"Collection '{self.collection_name}' was migrated to a new embedding model; reloading")
+            self.embedding_manager = EmbeddingManager()
+            self.vector_store = self._initialize_qdrant()
+
+    def _ensure_payload_indexes(self, client, collection_info=None):
+        """
+        Create Qdrant payload indexes on the metadata fields used for filtering.
+
+        Args:
+            client: Qdrant client connected to the server
+            collection_info: Existing collection info, used to skip fields that are already indexed
+        """
+        ensure_qdrant_payload_indexes(client, self.collection_name, collection_info)
+
+    def _native_filter(self, filter: Optional[Dict[str, Any]]):
+        """
+        Translate a metadata filter expression into the filter type of the active store.
+
+        Args:
+            filter: Metadata filter expression (see rag_component.metadata_filter)
+
+        Returns:
+            Native filter object for the configured vector store, or None
+
+        Raises:
+            ValueError: If a filter is given and the store has no native filter support
+        """
+        if not filter:
+            return None
         if self.store_type.lower() == "chroma":
-            if ids:
-                self.vector_store.add_documents(documents=documents, ids=ids)
-            else:
-                self.vector_store.add_documents(documents=documents)
-        elif self.store_type.lower() == "faiss":
-            # Implementation for FAISS would go here
-            pass
+            return to_chroma_filter(filter)
         elif self.store_type.lower() == "qdrant":
-            if ids:
-                self.vector_store.add_documents(documents=documents, ids=ids)
-            else:
-                self.vector_store.add_documents(documents=documents)
+            metadata_key = getattr(self.vector_store, "metadata_payload_key", "metadata")
+            return to_qdrant_filter(filter, metadata_key=metadata_key)
+        # Never return unfiltered results for a filtered query
+        raise ValueError(f"Metadata filters are not supported by the '{self.store_type}' vector store")
+
+    def add_documents(self, documents: List[LCDocument], ids: Optional[List[str]] = None, metrics=None):
+        """
+        Add documents to the vector store.
+
+        Near-duplicates of chunks already in the collection (or earlier in the batch) are
+        skipped or linked to their canonical chunk, depending on the dedup mode.
+
+        Args:
+            documents: Documents to add
+            ids: Optional document ids
+            metrics: Optional IngestionMetrics; the bulk path records embed/upsert separately,
+                the other paths are recorded as a single "embed+upsert" stage
+        """
+        self._refresh_after_migration(writing=True)
+        dedup_result = None
+        if self.deduplicator and documents:
+            with metrics.stage("dedup", chunks=len(documents)) if metrics else nullcontext():
+                dedup_result = self.deduplicator.deduplicate(documents, ids)
+            documents, ids = dedup_result.documents, dedup_result.ids
+            if metrics:
+                metrics.add("dedup.duplicates", chunks=len(dedup_result.duplicates))
+
+        self._store_documents(documents, ids, metrics)
+        if dedup_result is not None:
+            self.deduplicator.commit(dedup_result)
+
+    def _store_documents(self, documents: List[LCDocument], ids: Optional[List[str]], metrics=None):
+        """Embed and write documents to the backend."""
+        if not documents:
+            return
+        if self.store_type.lower() == "qdrant" and RAG_QDRANT_BULK_UPLOAD_ENABLED:
+            self.bulk_add_documents(documents, ids=ids, metrics=metrics)
+            return
+
+        with metrics.stage("embed+upsert", chunks=len(documents)) if metrics else nullcontext():
+            if self.store_type.lower() in ("chroma", "qdrant"):
+                if ids:
+                    self.vector_store.add_documents(documents=documents, ids=ids)
+                else:
+                    self.vector_store.add_documents(documents=documents)
+            elif self.store_type.lower() == "faiss":
+                # Implementation for FAISS would go here
+                pass
+
+    def bulk_add_documents(
+        self,
+        documents: List[LCDocument],
+        ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        metrics=None
+    ) -> List[str]:
+        """
+        Add documents to Qdrant through the high-throughput bulk path.
+
+        Documents are embedded and uploaded in size-bounded batches over several parallel
+        streams (gRPC where available), followed by a consistency barrier.
+
+        Args:
+            documents: Documents to add
+            ids: Optional point ids
+            batch_size: Points per batch (defaults to upload_batch_size, then RAG_QDRANT_UPLOAD_BATCH_SIZE)
+            parallelism: Concurrent streams (defaults to upload_parallelism, then RAG_QDRANT_UPLOAD_PARALLELISM)
+            metrics: Optional IngestionMetrics passed on to the uploader
+
+        Returns:
+            List of ids of the added documents
+        """
+        if self.store_type.lower() != "qdrant":
+            raise ValueError("Bulk upload is only supported for the Qdrant vector store")
+
+        from .qdrant_bulk_uploader import QdrantBulkUploader
+
+        batch_size = batch_size or self.upload_batch_size
+        parallelism = parallelism or self.upload_parallelism
+        if self.qdrant_url == QDRANT_IN_MEMORY_URL:
+            # The embedded in-memory mode is not thread-safe
+            parallelism = 1
+
+        uploader = QdrantBulkUploader(
+            client=get_bulk_qdrant_client(self.qdrant_url, self.qdrant_api_key),
+            collection_name=self.collection_name,
+            embeddings=self.embedding_manager.embeddings,
+            batch_size=batch_size,
+            parallelism=parallelism,
+            vector_name=getattr(self.vector_store, "vector_name", "") or "",
+            content_payload_key=getattr(self.vector_store, "content_payload_key", "page_content"),
+            metadata_payload_key=getattr(self.vector_store, "metadata_payload_key", "metadata"),
+            metrics=metrics
+        )
+        uploaded_ids = uploader.upload_documents(documents, ids=ids)
+        self.last_upload_stats = uploader.last_stats
+        return uploaded_ids
     
-    def similarity_search(self, query: str, top_k: Optional[int] = None) -> List[LCDocument]:
+    def similarity_search(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[LCDocument]:
         """
         Perform similarity search in the vector store.
 
         Args:
             query: Query string to search for
             top_k: Number of top results to return (uses default if not provided)
+            filter: Optional metadata filter expression evaluated by the vector store
 
         Returns:
             List of relevant documents
         """
         if top_k is None:
             top_k = self.top_k
+        native_filter = self._native_filter(filter)
+        self._refresh_after_migration()
 
         if self.store_type.lower() == "chroma":
-            return self.vector_store.similarity_search(
+            return self._attach_duplicate_sources(self.vector_store.similarity_search(
                 query=query,
-                k=top_k
-            )
+                k=top_k,
+                filter=native_filter
+            ))
         elif self.store_type.lower() == "faiss":
             # Implementation for FAISS would go here
             return []
         elif self.store_type.lower() == "qdrant":
-            return self.vector_store.similarity_search(
+            return self._attach_duplicate_sources(self.vector_store.similarity_search(
                 query=query,
-                k=top_k
-            )
+                k=top_k,
+                filter=native_filter
+            ))
     
     def similarity_search_with_score(
         self,
         query: str,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None
     ) -> List[tuple[LCDocument, float]]:
         """
         Perform similarity search with scores in the vector store.
@@ -235,32 +550,40 @@ class VectorStoreManager:
         Args:
             query: Query string to search for
             top_k: Number of top results to return (uses default if not provided)
+            filter: Optional metadata filter expression evaluated by the vector store
 
         Returns:
             List of tuples (document, score)
         """
         if top_k is None:
             top_k = self.top_k
+        native_filter = self._native_filter(filter)
+        self._refresh_after_migration()
 
         if self.store_type.lower() == "chroma":
-            return self.vector_store.similarity_search_with_score(
+            results = self.vector_store.similarity_search_with_score(
                 query=query,
-                k=top_k
+                k=top_k,
+                filter=native_filter
             )
         elif self.store_type.lower() == "faiss":
             # Implementation for FAISS would go here
             return []
         elif self.store_type.lower() == "qdrant":
-            return self.vector_store.similarity_search_with_score(
+            results = self.vector_store.similarity_search_with_score(
                 query=query,
-                k=top_k
+                k=top_k,
+                filter=native_filter
             )
+        self._attach_duplicate_sources([doc for doc, _ in results])
+        return results
     
     def max_marginal_relevance_search(
         self,
         query: str,
         top_k: Optional[int] = None,
-        fetch_k: Optional[int] = None
+        fetch_k: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None
     ) -> List[LCDocument]:
         """
         Perform MMR (Maximal Marginal Relevance) search in the vector store.
@@ -269,6 +592,7 @@ class VectorStoreManager:
             query: Query string to search for
             top_k: Number of top results to return (uses default if not provided)
             fetch_k: Number of documents to initially fetch for MMR algorithm
+            filter: Optional metadata filter expression evaluated by the vector store
 
         Returns:
             List of relevant documents
@@ -277,23 +601,39 @@ class VectorStoreManager:
             top_k = self.top_k
         if fetch_k is None:
             fetch_k = min(top_k * 2, 20)
+        native_filter = self._native_filter(filter)
+        self._refresh_after_migration()
 
         if self.store_type.lower() == "chroma":
-            return self.vector_store.max_marginal_relevance_search(
+            return self._attach_duplicate_sources(self.vector_store.max_marginal_relevance_search(
                 query=query,
                 k=top_k,
-                fetch_k=fetch_k
-            )
+                fetch_k=fetch_k,
+                filter=native_filter
+            ))
         elif self.store_type.lower() == "faiss":
             # Implementation for FAISS would go here
             return []
         elif self.store_type.lower() == "qdrant":
             # Qdrant doesn't have a direct MMR implementation, so we'll use similarity search
             # and potentially implement MMR separately if needed
-            return self.vector_store.similarity_search(
+            return self._attach_duplicate_sources(self.vector_store.similarity_search(
                 query=query,
-                k=top_k
-            )
+                k=top_k,
+                filter=native_filter
+            ))
+
+    def _attach_duplicate_sources(self, documents: List[LCDocument]) -> List[LCDocument]:
+        """Add the sources of linked near-duplicates to search results as metadata["duplicate_sources"]."""
+        if not self.deduplicator or not documents:
+            return documents
+        chunk_ids = {id(doc): doc.id or doc.metadata.get("_id") for doc in documents}
+        provenance = self.deduplicator.provenance([chunk_id for chunk_id in chunk_ids.values() if chunk_id])
+        for doc in documents:
+            duplicate_sources = provenance.get(str(chunk_ids[id(doc)]))
+            if duplicate_sources:
+                doc.metadata["duplicate_sources"] = duplicate_sources
+        return documents
     
     def delete_collection(self):
         """Delete the entire collection from the vector store."""
@@ -302,32 +642,194 @@ class VectorStoreManager:
             # We'll recreate the vector store to clear it
             self.vector_store = self._initialize_chroma()
         elif self.store_type.lower() == "qdrant":
-            # Delete the collection in Qdrant
-            from qdrant_client import QdrantClient
-            import os
+            # Delete the collection in Qdrant using the shared client
+            # (config is read from the environment to ensure latest values)
+            client = get_qdrant_client()
 
-            # Get Qdrant config directly from environment to ensure latest values
-            qdrant_url = os.getenv("RAG_QDRANT_URL", "http://localhost:6333")
-            qdrant_api_key = os.getenv("RAG_QDRANT_API_KEY", "")
-
-            if qdrant_api_key:
-                client = QdrantClient(
-                    url=qdrant_url,
-                    api_key=qdrant_api_key,
-                    prefer_grpc=False  # Use HTTP instead of gRPC to avoid auth issues
-                )
-            else:
-                client = QdrantClient(
-                    url=qdrant_url,
-                    prefer_grpc=False  # Use HTTP instead of gRPC to avoid auth issues
-                )
-
-            # Drop the collection
-            client.delete_collection(collection_name=self.collection_name)
+            # Drop the collection (the physical one if the name is an alias left by an embedding migration;
+            # dropping a collection also removes its aliases)
+            client.delete_collection(
+                collection_name=embedding_migration.resolve_collection(client, self.collection_name)
+            )
 
             # Recreate the vector store
             self.vector_store = self._initialize_qdrant()
+
+        if self.deduplicator:
+            self.deduplicator.clear()
     
+    def _document_selector(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the metadata filter expression that selects a document's chunks."""
+        selector = {}
+        if file_id:
+            selector["file_id"] = file_id
+        if source:
+            selector["source"] = source
+        return selector
+
+    def find_chunks(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[tuple[str, Dict[str, Any]]]:
+        """
+        Find stored chunks by document file_id, source and/or chunk ids.
+
+        Args:
+            file_id: File ID assigned to the document at upload time
+            source: Source (original filename) of the document
+            ids: Explicit chunk ids
+
+        Returns:
+            List of tuples (chunk id, chunk metadata)
+        """
+        selector = self._document_selector(file_id, source)
+        if not selector and not ids:
+            raise ValueError("At least one of file_id, source or ids must be provided")
+
+        if self.store_type.lower() == "chroma":
+            result = self.vector_store._collection.get(
+                ids=ids or None,
+                where=to_chroma_filter(selector),
+                include=["metadatas"]
+            )
+            return list(zip(result.get("ids", []), result.get("metadatas") or []))
+        elif self.store_type.lower() == "qdrant":
+            from qdrant_client.http import models as qdrant_models
+
+            metadata_key = getattr(self.vector_store, "metadata_payload_key", "metadata")
+            scroll_filter = to_qdrant_filter(selector, metadata_key=metadata_key)
+            if ids:
+                id_condition = qdrant_models.HasIdCondition(has_id=ids)
+                if scroll_filter is None:
+                    scroll_filter = qdrant_models.Filter(must=[id_condition])
+                else:
+                    scroll_filter.must.append(id_condition)
+
+            chunks = []
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=256,
+                    offset=offset,
+                    with_payload=[metadata_key],
+                    with_vectors=False
+                )
+                for point in points:
+                    chunks.append((str(point.id), (point.payload or {}).get(metadata_key, {})))
+                if offset is None:
+                    break
+            return chunks
+        return []
+
+    def find_linked_chunks(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[tuple[str, Dict[str, Any]]]:
+        """
+        Find chunks of a document that were linked to a near-duplicate instead of being stored.
+
+        Args:
+            file_id: File ID assigned to the document at upload time
+            source: Source (original filename) of the document
+            ids: Explicit chunk ids
+
+        Returns:
+            List of tuples (chunk id, chunk metadata); empty when deduplication is off
+        """
+        if not self.deduplicator:
+            return []
+        return self.deduplicator.find_duplicates(file_id=file_id, source=source, ids=ids)
+
+    def delete_documents(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        Delete all chunks of a document without touching the rest of the collection.
+
+        Uses a single filter-based bulk delete when selecting by file_id/source, and an
+        id-based delete when chunk ids are given.
+
+        Args:
+            file_id: File ID assigned to the document at upload time
+            source: Source (original filename) of the document
+            ids: Explicit chunk ids
+
+        Returns:
+            Number of chunks deleted
+        """
+        self._refresh_after_migration(writing=True)
+        deleted_count = self._delete_from_store(file_id, source, ids)
+
+        if self.deduplicator:
+            # Near-duplicates linked to deleted canonical chunks take their place
+            promoted = self.deduplicator.remove(file_id=file_id, source=source, ids=ids)
+            if promoted.ids:
+                self._store_documents(promoted.documents, promoted.ids)
+                self.deduplicator.commit(promoted)
+        return deleted_count
+
+    def _delete_from_store(
+        self,
+        file_id: Optional[str] = None,
+        source: Optional[str] = None,
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """Delete the selected chunks from the backend and return how many were deleted."""
+        selector = self._document_selector(file_id, source)
+        if not selector and not ids:
+            raise ValueError("At least one of file_id, source or ids must be provided")
+
+        if self.store_type.lower() == "chroma":
+            collection = self.vector_store._collection
+            where = to_chroma_filter(selector)
+            matched = collection.get(ids=ids or None, where=where, include=[])
+            matched_ids = matched.get("ids", [])
+            if matched_ids:
+                collection.delete(ids=matched_ids)
+            return len(matched_ids)
+        elif self.store_type.lower() == "qdrant":
+            from qdrant_client.http import models as qdrant_models
+
+            if ids:
+                # Restrict explicit ids to the selector (if any) before deleting
+                matched_ids = [chunk_id for chunk_id, _ in self.find_chunks(file_id, source, ids)]
+                if matched_ids:
+                    self.client.delete(
+                        collection_name=self.collection_name,
+                        points_selector=qdrant_models.PointIdsList(points=matched_ids),
+                        wait=True
+                    )
+                return len(matched_ids)
+
+            metadata_key = getattr(self.vector_store, "metadata_payload_key", "metadata")
+            delete_filter = to_qdrant_filter(selector, metadata_key=metadata_key)
+            deleted_count = self.client.count(
+                collection_name=self.collection_name,
+                count_filter=delete_filter,
+                exact=True
+            ).count
+            if deleted_count:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=qdrant_models.FilterSelector(filter=delete_filter),
+                    wait=True
+                )
+            return deleted_count
+        return 0
+
     def persist(self):
         """Persist the vector store to disk (Chroma handles this automatically)."""
         if self.store_type.lower() == "chroma":
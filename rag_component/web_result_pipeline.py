@@ -0,0 +1,140 @@
+"""
+Streaming download -> summarize -> rank pipeline for web search enhancement.
+Each search result is summarized as soon as its download completes and scored as soon as its
+summary is ready; an incremental top-K keeps the best results so the call can return early
+once enough high-scoring results are in and the time budget has expired.
+"""
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalTopK:
+    """Class responsible for keeping the K best-scored items seen so far."""
+
+    def __init__(self, k: int):
+        self.k = max(1, k)
+        self._heap: List[Tuple[float, int, int, Any]] = []
+        self._counter = itertools.count()
+
+    def push(self, score: float, item: Any, order: int = 0):
+        """
+        Offer an item.
+
+        Args:
+            score: Relevance score (higher is better)
+            item: The item
+            order: Original position, used to break ties in favour of earlier items
+        """
+        # Min-heap on (score, -order): the root is the item that would be dropped first
+        entry = (score, -order, next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def count_at_least(self, min_score: float) -> int:
+        """Number of kept items scoring at least min_score."""
+        return sum(1 for entry in self._heap if entry[0] >= min_score)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> List[Any]:
+        """Kept items, best first."""
+        return [entry[3] for entry in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+def run_pipeline(
+    items: List[Any],
+    download: Callable[[Any], Any],
+    summarize: Callable[[Any, Any], Optional[Dict[str, Any]]],
+    score: Callable[[Dict[str, Any]], float],
+    top_k: int,
+    parallelism: int = 4,
+    time_budget: Optional[float] = None,
+    min_score: float = 0.5
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run download -> summarize -> score over items with per-item streaming.
+
+    Downloads and summaries run on separate pools, so slow LLM calls never hold back
+    downloads and each summary starts as soon as its own download is done. Both run in a copy
+    of the caller's context, so they see the request deadline (utils.deadline).
+
+    Args:
+        items: Input items (e.g. search results), in their original ranking order
+        download: Callable(item) -> download result
+        summarize: Callable(item, download result) -> result dict (None to drop the item)
+        score: Callable(result dict) -> relevance score; runs on the summary pool
+        top_k: Number of results to return
+        parallelism: Workers per pool
+        time_budget: Seconds after which the call returns as soon as top_k results score at
+            least min_score (None or 0 waits for every item)
+        min_score: Score a result needs to count towards the early return
+
+    Returns:
+        Tuple of (top results with "relevance_score", best first; stats dictionary)
+    """
+    start = time.monotonic()
+    deadline = start + time_budget if time_budget else None
+    ranking = IncrementalTopK(top_k)
+    stats = {"items": len(items), "downloaded": 0, "summarized": 0, "early_return": False, "seconds": 0.0}
+
+    def summarize_and_score(item, downloaded):
+        result = summarize(item, downloaded)
+        if result is not None:
+            result["relevance_score"] = score(result)
+        return result
+
+    download_executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="web-download")
+    summary_executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="web-summary")
+    try:
+        pending = {
+            download_executor.submit(contextvars.copy_context().run, download, item): ("download", order, item)
+            for order, item in enumerate(items)
+        }
+        while pending:
+            budget_left = None
+            if deadline is not None:
+                budget_left = max(0.0, deadline - time.monotonic())
+            # Wake up at the deadline even if nothing completes, to check for an early return
+            done, _ = wait(list(pending), timeout=budget_left or None, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage, order, item = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.warning(f"Web result {order} failed during {stage}: {e}")
+                    continue
+                if stage == "download":
+                    stats["downloaded"] += 1
+                    pending[summary_executor.submit(contextvars.copy_context().run, summarize_and_score, item, value)] = ("summary", order, item)
+                elif value is not None:
+                    stats["summarized"] += 1
+                    ranking.push(value["relevance_score"], value, order)
+
+            if (
+                deadline is not None and pending and time.monotonic() >= deadline
+                and ranking.count_at_least(min_score) >= ranking.k
+            ):
+                stats["early_return"] = True
+                logger.info(
+                    f"Returning {ranking.k} results after {time.monotonic() - start:.1f}s; "
+                    f"abandoning {len(pending)} unfinished results"
+                )
+                break
+    finally:
+        # Do not block on abandoned work: queued tasks are cancelled, running ones finish in the background
+        download_executor.shutdown(wait=False, cancel_futures=True)
+        summary_executor.shutdown(wait=False, cancel_futures=True)
+
+    stats["seconds"] = round(time.monotonic() - start, 3)
+    return ranking.items(), stats
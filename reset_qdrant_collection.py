@@ -43,6 +43,11 @@ def reset_qdrant_collection():
             print(f"✓ Deleted existing collection: {collection_name}")
         except Exception as e:
             print(f"Note: Collection {collection_name} didn't exist or couldn't be deleted: {str(e)}")
+
+        # The near-duplicate index would otherwise still point at the deleted chunks
+        from rag_component.chunk_deduplicator import clear_dedup_index
+        clear_dedup_index(collection_name)
+        print(f"✓ Cleared near-duplicate index for collection: {collection_name}")
         
         # Create a new collection with the correct embedding size
         from rag_component.embedding_manager import EmbeddingManager
@@ -0,0 +1,237 @@
+"""
+DNS resolution benchmark for the MCP DNS server.
+Runs a local stub DNS server (UDP and TCP, configurable latency and TTL) and resolves a workload of
+lookups with repeated names three ways: one lookup at a time without a cache (how the server
+worked before the resolver engine), as request-sized concurrent batches without a cache, and as
+the same batches through the TTL cache. Reports throughput, upstream queries and cache hit rate.
+
+Usage:
+    python -m search_server.dns_benchmark --lookups 10000 --names 1000 --latency-ms 1
+    python -m search_server.dns_benchmark --concurrency 128 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import socketserver
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from search_server.dns_resolver import DNSResolver
+
+
+class StubDNSServer:
+    """
+    Local authoritative stand-in answering every name under any zone.
+
+    Names starting with "nx-" get NXDOMAIN (with an SOA for negative caching), names starting
+    with "big-" get a truncated UDP reply so the client has to retry over TCP, and everything
+    else gets one A or AAAA record derived from the name.
+    """
+
+    def __init__(self, ttl: int = 300, negative_ttl: int = 60, latency_ms: float = 0.0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.latency = latency_ms / 1000.0
+        self.queries = 0
+        self.tcp_queries = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class UDPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                reply = stub.answer(data, tcp=False)
+                if reply:
+                    sock.sendto(reply, self.client_address)
+
+        class TCPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                header = self.request.recv(2)
+                if len(header) < 2:
+                    return
+                data = self.request.recv(struct.unpack("!H", header)[0])
+                reply = stub.answer(data, tcp=True)
+                if reply:
+                    self.request.sendall(struct.pack("!H", len(reply)) + reply)
+
+        self.udp = socketserver.ThreadingUDPServer(("127.0.0.1", 0), UDPHandler)
+        self.udp.daemon_threads = True
+        self.port = self.udp.server_address[1]
+        self.tcp = socketserver.ThreadingTCPServer(("127.0.0.1", self.port), TCPHandler)
+        self.tcp.daemon_threads = True
+
+    @property
+    def nameserver(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        for server in (self.udp, self.tcp):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for server in (self.udp, self.tcp):
+            server.shutdown()
+            server.server_close()
+
+    def answer(self, data: bytes, tcp: bool) -> Optional[bytes]:
+        """Build the reply to one query message."""
+        with self._lock:
+            self.queries += 1
+            self.tcp_queries += tcp
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            query_id = struct.unpack("!H", data[:2])[0]
+            end = data.index(b"\x00", 12) + 1
+            qtype = struct.unpack("!H", data[end:end + 2])[0]
+        except (struct.error, ValueError):
+            return None
+        question = data[12:end + 4]
+        labels, offset = [], 12
+        while data[offset]:
+            labels.append(data[offset + 1:offset + 1 + data[offset]].decode("ascii"))
+            offset += 1 + data[offset]
+        name = ".".join(labels)
+
+        if name.startswith("nx-"):
+            soa = (b"\xc0\x0c" + struct.pack("!HHIH", 6, 1, self.negative_ttl, 22) + b"\x00\x00"
+                   + struct.pack("!IIIII", 1, 3600, 600, 86400, self.negative_ttl))
+            return struct.pack("!HHHHHH", query_id, 0x8183, 1, 0, 1, 0) + question + soa
+        if name.startswith("big-") and not tcp:
+            return struct.pack("!HHHHHH", query_id, 0x8380, 1, 0, 0, 0) + question
+
+        digest = zlib.crc32(name.encode())
+        if qtype == 1:
+            rdata = struct.pack("!I", 0x0A000000 | (digest & 0xFFFFFF))
+        elif qtype == 28:
+            rdata = b"\xfd\x00" + b"\x00" * 10 + struct.pack("!I", digest)
+        else:
+            return struct.pack("!HHHHHH", query_id, 0x8180, 1, 0, 0, 0) + question
+        record = b"\xc0\x0c" + struct.pack("!HHIH", qtype, 1, self.ttl, len(rdata)) + rdata
+        return struct.pack("!HHHHHH", query_id, 0x8180, 1, 1, 0, 0) + question + record
+
+
+def _workload(num_lookups: int, unique_names: int, nxdomain_fraction: float, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    names = [f"{'nx-' if rng.random() < nxdomain_fraction else ''}host-{i}.bench.test" for i in range(unique_names)]
+    return [rng.choice(names) for _ in range(num_lookups)]
+
+
+def _run(mode: str, names: List[str], stub: StubDNSServer, concurrency: int, batch_size: int) -> Dict[str, Any]:
+    cached = mode == "batch_cached"
+    resolver = DNSResolver(nameservers=[stub.nameserver], timeout=2.0, max_entries=100000 if cached else 0,
+                           max_concurrency=concurrency)
+    queries_before = stub.queries
+    started = time.monotonic()
+    if mode == "sequential_uncached":
+        results = [resolver.resolve(name) for name in names]
+    else:
+        results = []
+        for start in range(0, len(names), batch_size):
+            results.extend(resolver.resolve_batch(names[start:start + batch_size]))
+    seconds = time.monotonic() - started
+    resolver.close()
+    info = resolver.cache_info()
+    return {
+        "mode": mode,
+        "lookups": len(results),
+        "resolved": sum(1 for result in results if result["success"]),
+        "nxdomain": sum(1 for result in results if result["error"] and "NXDOMAIN" in result["error"]),
+        "seconds": round(seconds, 3),
+        "lookups_per_second": round(len(results) / seconds, 1) if seconds else 0.0,
+        "upstream_queries": stub.queries - queries_before,
+        "hit_rate": info["hit_rate"]
+    }
+
+
+def run_dns_benchmark(
+    num_lookups: int = 10000,
+    unique_names: int = 1000,
+    latency_ms: float = 1.0,
+    concurrency: int = 64,
+    batch_size: int = 100,
+    nxdomain_fraction: float = 0.05,
+    include_sequential: bool = True
+) -> Dict[str, Any]:
+    """
+    Resolve the same workload in each mode against a fresh stub DNS server.
+
+    Args:
+        num_lookups: Total lookups
+        unique_names: Distinct names the lookups are drawn from
+        latency_ms: Stub server delay per query
+        concurrency: Resolver threads for batch modes
+        batch_size: Names per batch request
+        nxdomain_fraction: Share of names that do not exist
+        include_sequential: Also run the one-at-a-time uncached baseline
+
+    Returns:
+        Dictionary with the configuration and one report per mode
+    """
+    names = _workload(num_lookups, unique_names, nxdomain_fraction)
+    modes = (["sequential_uncached"] if include_sequential else []) + ["batch_uncached", "batch_cached"]
+    reports = {}
+    for mode in modes:
+        with StubDNSServer(latency_ms=latency_ms) as stub:
+            reports[mode] = _run(mode, names, stub, concurrency, batch_size)
+    return {
+        "config": {
+            "lookups": num_lookups, "names": unique_names, "latency_ms": latency_ms,
+            "concurrency": concurrency, "batch_size": batch_size, "nxdomain_fraction": nxdomain_fraction
+        },
+        "modes": reports
+    }
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """Human-readable comparison table."""
+    lines = [f"{'mode':<20} {'lookups/s':>10} {'queries':>8} {'hit rate':>9} {'resolved':>9} {'seconds':>8}"]
+    for name, report in summary["modes"].items():
+        lines.append(
+            f"{name:<20} {report['lookups_per_second']:>10} {report['upstream_queries']:>8} "
+            f"{report['hit_rate']:>9} {report['resolved']:>9} {report['seconds']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DNS resolver throughput benchmark against a local stub DNS server')
+    parser.add_argument('--lookups', type=int, default=10000, help="Total lookups")
+    parser.add_argument('--names', type=int, default=1000, help="Distinct names in the workload")
+    parser.add_argument('--latency-ms', type=float, default=1.0, help="Stub server delay per query")
+    parser.add_argument('--concurrency', type=int, default=64, help="Resolver threads for batch modes")
+    parser.add_argument('--batch-size', type=int, default=100, help="Names per batch request")
+    parser.add_argument('--nxdomain', type=float, default=0.05, help="Share of names that do not exist")
+    parser.add_argument('--skip-sequential', action='store_true', help="Skip the one-at-a-time baseline")
+    parser.add_argument('--json', action='store_true', help="Print the full summary as JSON")
+    args = parser.parse_args()
+
+    summary = run_dns_benchmark(
+        num_lookups=args.lookups,
+        unique_names=args.names,
+        latency_ms=args.latency_ms,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        nxdomain_fraction=args.nxdomain,
+        include_sequential=not args.skip_sequential
+    )
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,475 @@
+"""
+Caching DNS resolver engine for the MCP DNS server.
+Queries the configured nameservers directly over UDP (TCP when a reply is truncated) so answer
+TTLs are known: positive answers are cached for their TTL and NXDOMAIN/NODATA answers for the SOA
+negative TTL (RFC 2308). Identical lookups in flight share one query, and batches of names are
+resolved concurrently on a thread pool. Without nameservers, A/AAAA lookups fall back to the
+system resolver (getaddrinfo) with a fixed cache TTL. Inside a request with a deadline
+(utils.deadline) nameservers are only waited for until the deadline.
+
+When the nameservers come from /etc/resolv.conf, the resolver stands in for the system one:
+A/AAAA lookups are answered from /etc/hosts first, and names the nameservers do not resolve are
+retried with getaddrinfo, which applies the resolv.conf search domains and ndots rules. A name is
+only cached as missing when both agree.
+"""
+
+import contextvars
+import ipaddress
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.deadline import DeadlineExceeded, bounded_timeout
+
+logger = logging.getLogger(__name__)
+
+RECORD_TYPES = {"A": 1, "NS": 2, "CNAME": 5, "SOA": 6, "PTR": 12, "MX": 15, "TXT": 16, "AAAA": 28}
+RCODE_NAMES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+_HEADER = struct.Struct("!HHHHHH")
+_FLAG_RD = 0x0100
+_FLAG_TC = 0x0200
+_RCODE_NXDOMAIN = 3
+
+
+class DNSError(Exception):
+    """Raised when no usable answer could be obtained from any nameserver."""
+
+
+def read_nameservers(resolv_conf: str = "/etc/resolv.conf") -> List[str]:
+    """Nameserver addresses listed in resolv.conf (empty if the file cannot be read)."""
+    try:
+        with open(resolv_conf) as f:
+            return [line.split()[1] for line in f if line.startswith("nameserver") and len(line.split()) > 1]
+    except OSError:
+        return []
+
+
+def read_hosts(hosts_file: str = "/etc/hosts") -> Dict[str, Dict[str, List[str]]]:
+    """
+    Addresses listed in a hosts file.
+
+    Returns:
+        Dictionary mapping lower-case host name to {"A": [...], "AAAA": [...]} (empty if the
+        file cannot be read)
+    """
+    hosts: Dict[str, Dict[str, List[str]]] = {}
+    try:
+        with open(hosts_file) as f:
+            lines = f.readlines()
+    except OSError:
+        return hosts
+    for line in lines:
+        fields = line.split("#", 1)[0].split()
+        if len(fields) < 2:
+            continue
+        try:
+            address = ipaddress.ip_address(fields[0].split("%", 1)[0])
+        except ValueError:
+            continue
+        record_type = "A" if address.version == 4 else "AAAA"
+        for name in fields[1:]:
+            addresses = hosts.setdefault(name.rstrip(".").lower(), {"A": [], "AAAA": []})[record_type]
+            if fields[0] not in addresses:
+                addresses.append(fields[0])
+    return hosts
+
+
+def parse_nameserver(nameserver: str) -> Tuple[str, int]:
+    """Split "host", "host:port" or "[v6]:port" into (host, port)."""
+    if nameserver.startswith("["):
+        host, _, port = nameserver[1:].partition("]")
+        return host, int(port.lstrip(":") or 53)
+    if nameserver.count(":") == 1:
+        host, port = nameserver.split(":")
+        return host, int(port)
+    return nameserver, 53
+
+
+def encode_name(name: str) -> bytes:
+    """Wire-format domain name (IDNA-encoded labels)."""
+    encoded = b""
+    for label in name.rstrip(".").split("."):
+        label_bytes = label.encode("idna")
+        if not label_bytes or len(label_bytes) > 63:
+            raise ValueError(f"Invalid domain name: {name}")
+        encoded += bytes([len(label_bytes)]) + label_bytes
+    return encoded + b"\x00"
+
+
+def build_query(name: str, rtype: int, query_id: int) -> bytes:
+    """DNS query message asking for recursion."""
+    return _HEADER.pack(query_id, _FLAG_RD, 1, 0, 0, 0) + encode_name(name) + struct.pack("!HH", rtype, 1)
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a possibly compressed name; returns (name, offset after the name)."""
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+        elif length == 0:
+            return ".".join(labels), end if end is not None else offset + 1
+        else:
+            labels.append(data[offset + 1:offset + 1 + length].decode("ascii", errors="replace"))
+            offset += 1 + length
+    raise ValueError("Too many compression pointers in DNS name")
+
+
+def _rdata_value(data: bytes, rtype: int, offset: int, length: int) -> Any:
+    rdata = data[offset:offset + length]
+    if rtype == 1:
+        return socket.inet_ntop(socket.AF_INET, rdata)
+    if rtype == 28:
+        return socket.inet_ntop(socket.AF_INET6, rdata)
+    if rtype in (2, 5, 12):
+        return _read_name(data, offset)[0]
+    if rtype == 15:
+        return f"{struct.unpack('!H', rdata[:2])[0]} {_read_name(data, offset + 2)[0]}"
+    if rtype == 16:
+        strings, position = [], 0
+        while position < len(rdata):
+            size = rdata[position]
+            strings.append(rdata[position + 1:position + 1 + size].decode("utf-8", errors="replace"))
+            position += 1 + size
+        return "".join(strings)
+    if rtype == 6:
+        mname, position = _read_name(data, offset)
+        rname, position = _read_name(data, position)
+        return (mname, rname) + struct.unpack("!IIIII", data[position:position + 20])
+    return rdata.hex()
+
+
+def parse_response(data: bytes, query_id: int) -> Dict[str, Any]:
+    """
+    Parse a DNS response message.
+
+    Args:
+        data: Response bytes
+        query_id: ID of the query the response must belong to
+
+    Returns:
+        Dictionary with rcode, truncated, answers (list of (type, ttl, value)) and negative_ttl
+        (from the SOA in the authority section, None if there is none)
+    """
+    response_id, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(data)
+    if response_id != query_id or not flags & 0x8000:
+        raise ValueError("DNS response does not match the query")
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = _read_name(data, offset)[1] + 4
+
+    answers = []
+    negative_ttl = None
+    for index in range(ancount + nscount):
+        offset = _read_name(data, offset)[1]
+        rtype, _, ttl, length = struct.unpack_from("!HHIH", data, offset)
+        offset += 10
+        value = _rdata_value(data, rtype, offset, length)
+        offset += length
+        if index < ancount:
+            answers.append((rtype, ttl, " ".join(map(str, value)) if rtype == 6 else value))
+        elif rtype == 6:
+            # RFC 2308: negative answers are cached for min(SOA TTL, SOA MINIMUM)
+            negative_ttl = min(ttl, value[-1])
+    return {"rcode": flags & 0x000F, "truncated": bool(flags & _FLAG_TC), "answers": answers,
+            "negative_ttl": negative_ttl}
+
+
+class DNSResolver:
+    """Class responsible for resolving names with a TTL-respecting cache."""
+
+    def __init__(self, nameservers: Optional[List[str]] = None, timeout: float = 2.0, attempts: int = 2,
+                 max_entries: int = 10000, min_ttl: int = 0, max_ttl: int = 3600, negative_ttl: int = 300,
+                 fallback_ttl: int = 60, max_concurrency: int = 64, system_fallback: Optional[bool] = None,
+                 hosts_file: str = "/etc/hosts"):
+        """
+        Initialize the resolver.
+
+        Args:
+            nameservers: "host" or "host:port" entries (None = read /etc/resolv.conf; empty = use getaddrinfo)
+            timeout: Seconds to wait for each nameserver reply
+            attempts: Rounds over the nameserver list before giving up
+            max_entries: Maximum cached answers; the least recently used are dropped first
+            min_ttl: Lower bound on how long answers are cached
+            max_ttl: Upper bound on how long answers are cached
+            negative_ttl: Upper bound (and default without SOA) for caching NXDOMAIN/NODATA answers
+            fallback_ttl: Cache TTL for getaddrinfo answers, which carry no TTL
+            max_concurrency: Threads resolving batch lookups
+            system_fallback: Answer A/AAAA from hosts_file and retry unresolved names with getaddrinfo
+                (defaults to True when the nameservers are read from /etc/resolv.conf)
+            hosts_file: Hosts file consulted when system_fallback is on
+        """
+        self.nameservers = [parse_nameserver(ns) for ns in (read_nameservers() if nameservers is None else nameservers)]
+        self.system_fallback = nameservers is None if system_fallback is None else system_fallback
+        self.hosts = read_hosts(hosts_file) if self.system_fallback else {}
+        self.timeout = timeout
+        self.attempts = max(1, attempts)
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.fallback_ttl = fallback_ttl
+        self.max_concurrency = max_concurrency
+
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "shared": 0, "queries": 0, "errors": 0}
+
+    def resolve(self, fqdn: str, record_type: str = "A") -> Dict[str, Any]:
+        """
+        Resolve one name, answering from the cache while the answer's TTL lasts.
+
+        Args:
+            fqdn: Domain name (an IP literal is returned as is for A/AAAA)
+            record_type: One of RECORD_TYPES
+
+        Returns:
+            Dictionary with fqdn, record_type, success, addresses, ttl (seconds the answer stays
+            cached), error and cache ("hit", "miss" or "shared")
+        """
+        name, record_type = self._key(fqdn, record_type)
+        if record_type not in RECORD_TYPES:
+            return self._result(fqdn, record_type, False, [], 0, f"Unsupported record type: {record_type}", "miss")
+
+        key = (name, record_type)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                remaining = cached[0] - time.monotonic()
+                if remaining > 0:
+                    self._cache.move_to_end(key)
+                    self.stats["hits" if cached[1]["success"] else "negative_hits"] += 1
+                    return dict(cached[1], fqdn=fqdn, ttl=int(remaining), cache="hit")
+                del self._cache[key]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats["misses"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            return dict(future.result(), fqdn=fqdn, cache="shared")
+
+        try:
+            result, cache_ttl = self._lookup(name, record_type)
+        except Exception as e:
+            result, cache_ttl = self._result(name, record_type, False, [], 0, f"Unexpected error resolving {name}: {str(e)}", "miss"), 0
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if cache_ttl > 0:
+                self._cache[key] = (time.monotonic() + cache_ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            if not result["success"]:
+                self.stats["errors"] += 1
+        future.set_result(result)
+        return dict(result, fqdn=fqdn)
+
+    def resolve_batch(self, fqdns: Iterable[str], record_types: Iterable[str] = ("A",)) -> List[Dict[str, Any]]:
+        """
+        Resolve many names concurrently.
+
+        Args:
+            fqdns: Domain names
+            record_types: Record types to resolve for every name
+
+        Returns:
+            One result per (name, record type), in input order
+        """
+        lookups = [(fqdn, record_type) for fqdn in fqdns for record_type in record_types]
+        # Each distinct name is resolved once; repeats in the batch reuse its result
+        keys = [self._key(fqdn, record_type) for fqdn, record_type in lookups]
+        unique = list(dict.fromkeys(keys))
+        if len(unique) <= 1:
+            resolved = [self.resolve(*key) for key in unique]
+        else:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="dns-resolver")
+            # Each lookup runs in a copy of the request's context, so it sees the request deadline
+            contexts = [contextvars.copy_context() for _ in unique]
+            resolved = self._pool.map(lambda context, key: context.run(self.resolve, *key), contexts, unique)
+        by_key = dict(zip(unique, resolved))
+
+        results = []
+        seen = set()
+        for (fqdn, _), key in zip(lookups, keys):
+            result = dict(by_key[key], fqdn=fqdn)
+            if key in seen:
+                result["cache"] = "shared"
+                with self._lock:
+                    self.stats["shared"] += 1
+            seen.add(key)
+            results.append(result)
+        return results
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters."""
+        with self._lock:
+            info = dict(self.stats, entries=len(self._cache))
+        lookups = info["hits"] + info["negative_hits"] + info["misses"] + info["shared"]
+        info["hit_rate"] = round((info["hits"] + info["negative_hits"]) / lookups, 4) if lookups else 0.0
+        return info
+
+    def clear_cache(self):
+        """Drop all cached answers."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """Stop the batch resolution threads."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    @staticmethod
+    def _key(fqdn: str, record_type: str) -> Tuple[str, str]:
+        return fqdn.strip().rstrip(".").lower(), record_type.upper()
+
+    def _clamp(self, ttl: int) -> int:
+        return max(self.min_ttl, min(self.max_ttl, ttl))
+
+    def _lookup(self, name: str, record_type: str) -> Tuple[Dict[str, Any], int]:
+        """Resolve without the cache; returns (result, seconds to cache it)."""
+        literal = self._ip_literal(name, record_type)
+        if literal is not None:
+            return literal, 0
+        if not self.nameservers:
+            return self._lookup_system(name, record_type)
+        hosts_addresses = self.hosts.get(name, {}).get(record_type)
+        if hosts_addresses:
+            ttl = self._clamp(self.fallback_ttl)
+            return self._result(name, record_type, True, list(hosts_addresses), ttl, None, "miss"), ttl
+
+        result, ttl = self._lookup_nameservers(name, record_type)
+        if result["success"] or not self.system_fallback or record_type not in ("A", "AAAA"):
+            return result, ttl
+        # Names only the local resolver knows (search domains, nsswitch sources) are not cached as missing
+        system_result, system_ttl = self._lookup_system(name, record_type)
+        if system_result["success"]:
+            logger.info(f"Resolved {name} ({record_type}) with the system resolver to {system_result['addresses']}")
+            return system_result, system_ttl
+        return result, ttl
+
+    def _lookup_nameservers(self, name: str, record_type: str) -> Tuple[Dict[str, Any], int]:
+        """Ask the nameservers; returns (result, seconds to cache it)."""
+        rtype = RECORD_TYPES[record_type]
+        try:
+            response = self._query(name, rtype)
+        except (DNSError, ValueError) as e:
+            return self._result(name, record_type, False, [], 0, f"DNS resolution failed for {name}: {str(e)}", "miss"), 0
+
+        if response["rcode"] in (0, _RCODE_NXDOMAIN):
+            records = [(ttl, value) for answer_type, ttl, value in response["answers"] if answer_type == rtype]
+            if records:
+                ttl = self._clamp(min(ttl for ttl, _ in records))
+                addresses = list(dict.fromkeys(value for _, value in records))
+                logger.info(f"Resolved {name} ({record_type}) to {addresses}, TTL {ttl}s")
+                return self._result(name, record_type, True, addresses, ttl, None, "miss"), ttl
+            ttl = min(self.negative_ttl, response["negative_ttl"] if response["negative_ttl"] is not None else self.negative_ttl)
+            if response["rcode"] == _RCODE_NXDOMAIN:
+                error_msg = f"DNS resolution failed for {name}: NXDOMAIN"
+            else:
+                error_msg = f"No {record_type} records found for {name}"
+            return self._result(name, record_type, False, [], ttl, error_msg, "miss"), ttl
+
+        # SERVFAIL, REFUSED and the like are not cached
+        rcode = RCODE_NAMES.get(response["rcode"], str(response["rcode"]))
+        return self._result(name, record_type, False, [], 0, f"DNS resolution failed for {name}: {rcode}", "miss"), 0
+
+    def _query(self, name: str, rtype: int) -> Dict[str, Any]:
+        """Send the query to each nameserver in turn until one answers."""
+        errors = []
+        for _ in range(self.attempts):
+            for host, port in self.nameservers:
+                query_id = int.from_bytes(os.urandom(2), "big")
+                query = build_query(name, rtype, query_id)
+                with self._lock:
+                    self.stats["queries"] += 1
+                try:
+                    timeout = bounded_timeout(self.timeout, f"resolving {name}")
+                except DeadlineExceeded as e:
+                    raise DNSError(str(e))
+                try:
+                    response = parse_response(self._send_udp(host, port, query, timeout), query_id)
+                    if response["truncated"]:
+                        response = parse_response(self._send_tcp(host, port, query, timeout), query_id)
+                    return response
+                except socket.timeout:
+                    errors.append(f"{host}:{port} timed out after {timeout:g}s")
+                except (OSError, ValueError, struct.error, IndexError) as e:
+                    errors.append(f"{host}:{port}: {str(e)}")
+        raise DNSError("; ".join(errors[-len(self.nameservers):]))
+
+    def _send_udp(self, host: str, port: int, query: bytes, timeout: float) -> bytes:
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect((host, port))
+            sock.send(query)
+            return sock.recv(65535)
+
+    def _send_tcp(self, host: str, port: int, query: bytes, timeout: float) -> bytes:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.sendall(struct.pack("!H", len(query)) + query)
+            length = struct.unpack("!H", self._recv_exact(sock, 2))[0]
+            return self._recv_exact(sock, length)
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise DNSError("Connection closed by nameserver")
+            data += chunk
+        return data
+
+    def _lookup_system(self, name: str, record_type: str) -> Tuple[Dict[str, Any], int]:
+        """getaddrinfo lookup for A/AAAA when no nameservers are configured or they do not know the name."""
+        if record_type not in ("A", "AAAA"):
+            return self._result(name, record_type, False, [], 0,
+                                f"{record_type} lookups need DNS_NAMESERVERS to be configured", "miss"), 0
+        family = socket.AF_INET if record_type == "A" else socket.AF_INET6
+        with self._lock:
+            self.stats["queries"] += 1
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(name, None, family=family)))
+        except socket.gaierror as e:
+            return self._result(name, record_type, False, [], 0, f"DNS resolution failed for {name}: {str(e)}", "miss"), 0
+        ttl = self._clamp(self.fallback_ttl)
+        return self._result(name, record_type, True, addresses, ttl, None, "miss"), ttl
+
+    def _ip_literal(self, name: str, record_type: str) -> Optional[Dict[str, Any]]:
+        try:
+            address = ipaddress.ip_address(name)
+        except ValueError:
+            return None
+        if (address.version == 4) == (record_type == "A") and record_type in ("A", "AAAA"):
+            return self._result(name, record_type, True, [str(address)], 0, None, "miss")
+        return self._result(name, record_type, False, [], 0, f"{name} is not a {record_type} address", "miss")
+
+    @staticmethod
+    def _result(fqdn: str, record_type: str, success: bool, addresses: List[Any], ttl: int,
+                error: Optional[str], cache: str) -> Dict[str, Any]:
+        return {"fqdn": fqdn, "record_type": record_type, "success": success, "addresses": addresses,
+                "ttl": ttl, "error": error, "cache": cache}
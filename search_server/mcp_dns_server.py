@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-MCP DNS Server - An MCP server that resolves FQDNs to IPv4 addresses and registers itself with the service registry
+MCP DNS Server - An MCP server that resolves FQDNs (A, AAAA and other record types, singly or in batches)
+through a caching resolver and registers itself with the service registry
 """
 
 import json
@@ -10,7 +11,7 @@ import os
 import threading
 import logging
 import argparse
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 # Add the project root directory and registry directory to the Python path to allow imports
@@ -19,24 +20,64 @@ sys.path.insert(0, project_root)
 sys.path.insert(0, os.path.join(project_root, 'registry'))
 
 from registry_client import ServiceInfo, MCPServiceWrapper, HeartbeatFilter
+from socketserver import ThreadingMixIn
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import urllib.parse
 
 # Import settings to check if screen logging is enabled
 sys.path.insert(0, os.path.join(project_root, 'config'))
-from settings import ENABLE_SCREEN_LOGGING
+from settings import (
+    ENABLE_SCREEN_LOGGING,
+    DNS_NAMESERVERS,
+    DNS_TIMEOUT_SECONDS,
+    DNS_ATTEMPTS,
+    DNS_CACHE_MAX_ENTRIES,
+    DNS_CACHE_MIN_TTL_SECONDS,
+    DNS_CACHE_MAX_TTL_SECONDS,
+    DNS_NEGATIVE_TTL_SECONDS,
+    DNS_MAX_CONCURRENCY,
+    DNS_BATCH_MAX_NAMES
+)
+from search_server.dns_resolver import DNSResolver
+from utils.deadline import deadline_passed, request_deadline, set_deadline
+
+# Answers are cached by the resolver for their record TTL, so MCP clients must not cache them
+# again with a fixed TTL; lookups are still idempotent and may be hedged.
+CACHE_POLICY = {"*": {"cacheable": False, "idempotent": True}}
+
+
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    """Handle requests in a separate thread."""
+    daemon_threads = True
 
 
 class DNSRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for DNS resolution requests"""
 
-    # Class variable to hold the resolve function
+    # Class variables to hold the resolve, batch resolve and metrics functions
     resolve_func = None
+    batch_func = None
+    metrics_func = None
 
     @classmethod
     def set_resolve_func(cls, func):
         cls.resolve_func = func
 
+    @classmethod
+    def set_batch_func(cls, func):
+        cls.batch_func = func
+
+    @classmethod
+    def set_metrics_func(cls, func):
+        cls.metrics_func = func
+
+    def do_GET(self):
+        """Handle GET /metrics with resolver cache statistics"""
+        if urllib.parse.urlparse(self.path).path != '/metrics' or DNSRequestHandler.metrics_func is None:
+            self._send_json_response(404, {"success": False, "error": "Not found"})
+            return
+        self._send_json_response(200, {"success": True, "result": DNSRequestHandler.metrics_func()})
+
     def do_POST(self):
         """Handle POST requests for DNS resolution"""
         try:
@@ -52,20 +93,23 @@ class DNSRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(400, "Invalid JSON", "unknown")
                 return
 
+            # Give up on requests whose caller has stopped waiting (X-Request-Deadline); otherwise
+            # lookups below stop waiting for nameservers at the deadline
+            deadline = request_deadline(self.headers, request_data)
+            if deadline_passed(deadline):
+                self.logger_error("Deadline exceeded before the request was processed")
+                self._send_error_response(408, "Deadline exceeded before the request was processed", "unknown")
+                return
+            set_deadline(deadline)
+
             # Extract FQDN from request - the parameters might be at the top level
             # or nested inside a 'parameters' field depending on how the client sends it
-            if 'fqdn' in request_data:
-                fqdn = request_data['fqdn']
-            elif 'domain' in request_data:
-                fqdn = request_data['domain']
+            if any(key in request_data for key in ('fqdn', 'domain', 'fqdns')):
+                params = request_data
             elif 'parameters' in request_data:
                 # If parameters are nested, check inside that object
                 params = request_data['parameters']
-                if 'fqdn' in params:
-                    fqdn = params['fqdn']
-                elif 'domain' in params:
-                    fqdn = params['domain']
-                else:
+                if not any(key in params for key in ('fqdn', 'domain', 'fqdns')):
                     self.logger_error("Missing 'fqdn' or 'domain' in request parameters")
                     self._send_error_response(400, "Missing 'fqdn' or 'domain' in request parameters", "unknown")
                     return
@@ -74,7 +118,13 @@ class DNSRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(400, "Missing 'fqdn', 'domain', or 'parameters' in request", "unknown")
                 return
 
-            self.logger_info(f"Resolving FQDN: {fqdn}")
+            record_type = params.get('record_type', 'A')
+            if 'fqdns' in params:
+                self._handle_batch(params['fqdns'], params.get('record_types') or [record_type])
+                return
+
+            fqdn = params['fqdn'] if 'fqdn' in params else params['domain']
+            self.logger_info(f"Resolving FQDN: {fqdn} ({record_type})")
 
             # Perform DNS resolution using the bound function
             if DNSRequestHandler.resolve_func is None:
@@ -82,17 +132,12 @@ class DNSRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(500, "Server configuration error", "unknown")
                 return
 
-            success, ipv4_addresses, error_msg = DNSRequestHandler.resolve_func(fqdn)
+            result = DNSRequestHandler.resolve_func(fqdn, record_type)
 
             # Create response
             response = {
                 "success": True,
-                "result": {
-                    "success": success,
-                    "fqdn": fqdn,
-                    "ipv4_addresses": ipv4_addresses,
-                    "error": error_msg
-                }
+                "result": self._format_result(result)
             }
 
             # Send successful response
@@ -102,6 +147,50 @@ class DNSRequestHandler(BaseHTTPRequestHandler):
             self.logger_error(f"Error handling request: {str(e)}")
             self._send_error_response(500, f"Internal server error: {str(e)}", "unknown")
 
+    def _handle_batch(self, fqdns, record_types):
+        """Resolve a list of FQDNs concurrently and return one result per name and record type"""
+        if not isinstance(fqdns, list) or not fqdns or not all(isinstance(fqdn, str) for fqdn in fqdns):
+            self._send_error_response(400, "'fqdns' must be a non-empty list of names", "unknown")
+            return
+        if len(fqdns) > DNS_BATCH_MAX_NAMES:
+            self._send_error_response(400, f"Too many names in batch: {len(fqdns)} (maximum {DNS_BATCH_MAX_NAMES})", "unknown")
+            return
+        if not isinstance(record_types, list) or not all(isinstance(record_type, str) for record_type in record_types):
+            self._send_error_response(400, "'record_types' must be a list of record types", "unknown")
+            return
+        if DNSRequestHandler.batch_func is None:
+            self.logger_error("Batch resolve function not set")
+            self._send_error_response(500, "Server configuration error", "unknown")
+            return
+
+        self.logger_info(f"Resolving {len(fqdns)} FQDNs ({', '.join(record_types)})")
+        results = [self._format_result(result) for result in DNSRequestHandler.batch_func(fqdns, record_types)]
+        succeeded = sum(1 for result in results if result["success"])
+        response = {
+            "success": True,
+            "result": {
+                "success": succeeded > 0,
+                "results": results,
+                "summary": {"lookups": len(results), "succeeded": succeeded, "failed": len(results) - succeeded},
+                "error": None if succeeded else "All lookups failed"
+            }
+        }
+        self._send_json_response(200, response)
+
+    @staticmethod
+    def _format_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolver result in the response format (ipv4_addresses is kept for A lookups)"""
+        return {
+            "success": result["success"],
+            "fqdn": result["fqdn"],
+            "record_type": result["record_type"],
+            "addresses": result["addresses"],
+            "ipv4_addresses": result["addresses"] if result["record_type"] == "A" else [],
+            "ttl": result["ttl"],
+            "cache": result["cache"],
+            "error": result["error"]
+        }
+
     def _send_json_response(self, status_code: int, data: dict):
         """Send a JSON response with appropriate headers"""
         self.send_response(status_code)
@@ -156,6 +245,18 @@ class MCPServer:
         self.httpd: Optional[HTTPServer] = None
         self.running = False
 
+        # Caching resolver shared by all requests
+        self.resolver = DNSResolver(
+            nameservers=DNS_NAMESERVERS,
+            timeout=DNS_TIMEOUT_SECONDS,
+            attempts=DNS_ATTEMPTS,
+            max_entries=DNS_CACHE_MAX_ENTRIES,
+            min_ttl=DNS_CACHE_MIN_TTL_SECONDS,
+            max_ttl=DNS_CACHE_MAX_TTL_SECONDS,
+            negative_ttl=DNS_NEGATIVE_TTL_SECONDS,
+            max_concurrency=DNS_MAX_CONCURRENCY
+        )
+
         # Set up logging
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(getattr(logging, log_level.upper()))
@@ -167,39 +268,47 @@ class MCPServer:
             handler.addFilter(HeartbeatFilter())
             self.logger.addHandler(handler)
 
+    def resolve(self, fqdn: str, record_type: str = 'A') -> Dict[str, Any]:
+        """
+        Resolve an FQDN through the caching resolver
+
+        Args:
+            fqdn: Domain name
+            record_type: A, AAAA, CNAME, MX, TXT, NS, SOA or PTR
+
+        Returns:
+            Dictionary with fqdn, record_type, success, addresses, ttl, cache and error
+        """
+        result = self.resolver.resolve(fqdn, record_type)
+        if result["success"]:
+            self.logger.info(f"Resolved {fqdn} ({result['record_type']}) to {result['addresses']} [{result['cache']}]")
+        else:
+            self.logger.warning(result["error"])
+        return result
+
+    def resolve_batch(self, fqdns: List[str], record_types: List[str]) -> List[Dict[str, Any]]:
+        """
+        Resolve many FQDNs concurrently
+
+        Args:
+            fqdns: Domain names
+            record_types: Record types to resolve for every name
+
+        Returns:
+            One result per (name, record type), in input order
+        """
+        results = self.resolver.resolve_batch(fqdns, record_types)
+        failed = sum(1 for result in results if not result["success"])
+        self.logger.info(f"Resolved batch of {len(results)} lookups ({failed} failed)")
+        return results
+
     def resolve_ipv4(self, fqdn: str) -> Tuple[bool, List[str], Optional[str]]:
         """
         Resolve FQDN to IPv4 addresses only
         Returns: (success, ipv4_addresses, error_message)
         """
-        try:
-            # Use getaddrinfo to get all addresses for the FQDN
-            # AF_INET ensures we only get IPv4 addresses
-            addr_info = socket.getaddrinfo(fqdn, None, family=socket.AF_INET)
-            
-            # Extract IPv4 addresses
-            ipv4_addresses = []
-            for res in addr_info:
-                addr = res[4][0]  # Extract IP address from sockaddr tuple
-                if addr not in ipv4_addresses:  # Avoid duplicates
-                    ipv4_addresses.append(addr)
-            
-            if ipv4_addresses:
-                self.logger.info(f"Resolved {fqdn} to IPv4 addresses: {ipv4_addresses}")
-                return True, ipv4_addresses, None
-            else:
-                error_msg = f"No IPv4 addresses found for {fqdn}"
-                self.logger.warning(error_msg)
-                return False, [], error_msg
-        except socket.gaierror as e:
-            error_msg = f"DNS resolution failed for {fqdn}: {str(e)}"
-            self.logger.error(error_msg)
-            return False, [], error_msg
-        except Exception as e:
-            error_msg = f"Unexpected error resolving {fqdn}: {str(e)}"
-            self.logger.error(error_msg)
-            return False, [], error_msg
-
+        result = self.resolve(fqdn, 'A')
+        return result["success"], result["addresses"], result["error"]
 
     def start(self):
         """Start the DNS server"""
@@ -215,7 +324,8 @@ class MCPServer:
                 type="mcp_dns",
                 metadata={
                     "service_type": "dns_resolver",
-                    "capabilities": ["ipv4_resolution"],
+                    "cache_policy": CACHE_POLICY,
+                    "capabilities": ["ipv4_resolution", "ipv6_resolution", "batch_resolution", "dns_cache"],
                     "started_at": datetime.now().isoformat()
                 }
             )
@@ -232,11 +342,13 @@ class MCPServer:
             else:
                 self.logger.error(f"Failed to register DNS server with service registry")
 
-            # Set the resolve function for the DNSRequestHandler class
-            DNSRequestHandler.set_resolve_func(self.resolve_ipv4)
+            # Set the resolve functions for the DNSRequestHandler class
+            DNSRequestHandler.set_resolve_func(self.resolve)
+            DNSRequestHandler.set_batch_func(self.resolve_batch)
+            DNSRequestHandler.set_metrics_func(self.resolver.cache_info)
 
-            # Create HTTP server with our custom request handler
-            self.httpd = HTTPServer((self.host, self.port), DNSRequestHandler)
+            # Create threaded HTTP server with our custom request handler
+            self.httpd = ThreadedHTTPServer((self.host, self.port), DNSRequestHandler)
 
             self.running = True
             self.logger.info(f"MCP DNS Server listening on {self.host}:{self.port}")
@@ -255,6 +367,7 @@ class MCPServer:
                 self.service_wrapper.stop()
             if self.httpd:
                 self.httpd.server_close()
+            self.resolver.close()
             self.logger.info("MCP DNS Server stopped")
 
     def stop(self):
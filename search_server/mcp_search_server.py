@@ -9,9 +9,11 @@ import os
 import threading
 import logging
 import argparse
+import contextvars
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the project root directory and registry directory to the Python path to allow imports
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -31,19 +33,70 @@ class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
 
 # Import settings to check if screen logging is enabled
 sys.path.insert(0, os.path.join(project_root, 'config'))
-from settings import ENABLE_SCREEN_LOGGING
+from settings import (
+    ENABLE_SCREEN_LOGGING,
+    SEARCH_TIMEOUT_SECONDS,
+    SEARCH_CACHE_TTL_SECONDS,
+    SEARCH_CACHE_MAX_ENTRIES,
+    BRAVE_RATE_LIMIT_PER_SECOND,
+    BRAVE_RATE_LIMIT_BURST,
+    SEARCH_MAX_QUEUE_WAIT_SECONDS,
+    SEARCH_BATCH_MAX_QUERIES,
+    SEARCH_BATCH_MAX_CONCURRENCY
+)
+from search_server.rate_limiter import TokenBucket
+from search_server.search_cache import SearchMetrics, SearchResultCache, normalize_query
+from utils.deadline import bounded_timeout, deadline_passed, request_deadline, set_deadline
+
+# Results are cached by the server for SEARCH_CACHE_TTL_SECONDS, so MCP clients must not cache
+# them again; searches are still idempotent and may be hedged.
+CACHE_POLICY = {"*": {"cacheable": False, "idempotent": True}}
+
+BRAVE_SEARCH_API_URL = 'https://api.search.brave.com/res/v1/web/search'
+
+# Optional request parameters passed through to the Brave Search API (part of the cache key)
+SEARCH_PARAMETERS = ('count', 'offset', 'country', 'search_lang', 'safesearch', 'freshness')
+
+
+def normalize_url(url: str) -> str:
+    """Key under which two result URLs count as the same page (scheme, www. prefix, fragment and trailing slash ignored)"""
+    parsed = urllib.parse.urlsplit(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host:
+        return url.strip()
+    path = parsed.path.rstrip('/')
+    return f"{host}{path}?{parsed.query}" if parsed.query else f"{host}{path}"
 
 
 class SearchRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for search requests"""
 
-    # Class variable to hold the search function
+    # Class variables to hold the search, batch search and metrics functions
     search_func = None
+    batch_func = None
+    metrics_func = None
 
     @classmethod
     def set_search_func(cls, func):
         cls.search_func = func
 
+    @classmethod
+    def set_batch_func(cls, func):
+        cls.batch_func = func
+
+    @classmethod
+    def set_metrics_func(cls, func):
+        cls.metrics_func = func
+
+    def do_GET(self):
+        """Handle GET /metrics with cache, rate limiter and upstream latency metrics"""
+        if urllib.parse.urlparse(self.path).path != '/metrics' or SearchRequestHandler.metrics_func is None:
+            self._send_json_response(404, {"success": False, "error": "Not found"})
+            return
+        self._send_json_response(200, {"success": True, "result": SearchRequestHandler.metrics_func()})
+
     def do_POST(self):
         """Handle POST requests for search queries"""
         try:
@@ -59,15 +112,25 @@ class SearchRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(400, "Invalid JSON", "unknown")
                 return
 
+            # Give up on requests whose caller has stopped waiting (X-Request-Deadline); otherwise
+            # the search below stops waiting at the deadline
+            deadline = request_deadline(self.headers, request_data)
+            if deadline_passed(deadline):
+                self.logger_error("Deadline exceeded before the request was processed")
+                self._send_error_response(408, "Deadline exceeded before the request was processed", "unknown")
+                return
+            set_deadline(deadline)
+
             # Extract query from request - the parameters might be at the top level
             # or nested inside a 'parameters' field depending on how the client sends it
-            if 'query' in request_data:
-                search_query = request_data['query']
+            if 'query' in request_data or 'queries' in request_data:
+                params = request_data
+                search_query = request_data.get('query')
             elif 'parameters' in request_data:
                 # If parameters are nested, check inside that object
                 params = request_data['parameters']
-                if 'query' in params:
-                    search_query = params['query']
+                if 'query' in params or 'queries' in params:
+                    search_query = params.get('query')
                 else:
                     self.logger_error("Missing 'query' in request parameters")
                     self._send_error_response(400, "Missing 'query' in request parameters", "unknown")
@@ -77,6 +140,11 @@ class SearchRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(400, "Missing 'query' or 'parameters' in request", "unknown")
                 return
 
+            search_params = {key: params[key] for key in SEARCH_PARAMETERS if params.get(key) is not None}
+            if 'queries' in params:
+                self._handle_batch(params['queries'], search_params)
+                return
+
             self.logger_info(f"Performing search query: {search_query}")
 
             # Perform search using the bound function
@@ -85,7 +153,7 @@ class SearchRequestHandler(BaseHTTPRequestHandler):
                 self._send_error_response(500, "Server configuration error", "unknown")
                 return
 
-            success, search_results, error_msg = SearchRequestHandler.search_func(search_query)
+            success, search_results, error_msg = SearchRequestHandler.search_func(search_query, search_params)
 
             # Create response
             response = {
@@ -105,6 +173,22 @@ class SearchRequestHandler(BaseHTTPRequestHandler):
             self.logger_error(f"Error handling request: {str(e)}")
             self._send_error_response(500, f"Internal server error: {str(e)}", "unknown")
 
+    def _handle_batch(self, queries, search_params: Dict[str, Any]):
+        """Run several queries concurrently and respond with the merged results"""
+        if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+            self._send_error_response(400, "'queries' must be a non-empty list of query strings", "unknown")
+            return
+        if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+            self._send_error_response(400, f"Too many queries in batch: {len(queries)} (maximum {SEARCH_BATCH_MAX_QUERIES})", "unknown")
+            return
+        if SearchRequestHandler.batch_func is None:
+            self.logger_error("Batch search function not set")
+            self._send_error_response(500, "Server configuration error", "unknown")
+            return
+
+        self.logger_info(f"Performing batch search with {len(queries)} queries: {queries}")
+        self._send_json_response(200, {"success": True, "result": SearchRequestHandler.batch_func(queries, search_params)})
+
     def _send_json_response(self, status_code: int, data: dict):
         """Send a JSON response with appropriate headers"""
         self.send_response(status_code)
@@ -151,7 +235,10 @@ class MCPSearchServer:
 
     def __init__(self, host: str = '127.0.0.1', port: int = 8090, registry_url: str = 'http://127.0.0.1:8080',
                  service_id: Optional[str] = None, service_ttl: int = 60, log_level: str = 'INFO',
-                 max_retries: int = 3, base_delay: float = 1.0):
+                 max_retries: int = 3, base_delay: float = 1.0, timeout: float = SEARCH_TIMEOUT_SECONDS,
+                 cache_ttl: int = SEARCH_CACHE_TTL_SECONDS, rate_limit: float = BRAVE_RATE_LIMIT_PER_SECOND,
+                 rate_burst: int = BRAVE_RATE_LIMIT_BURST, max_queue_wait: float = SEARCH_MAX_QUEUE_WAIT_SECONDS,
+                 api_url: str = BRAVE_SEARCH_API_URL):
         self.host = host
         self.port = port
         self.registry_url = registry_url
@@ -164,6 +251,23 @@ class MCPSearchServer:
         self.max_retries = int(os.getenv('SEARCH_MAX_RETRIES', str(max_retries)))
         self.base_delay = float(os.getenv('SEARCH_BASE_DELAY', str(base_delay)))
 
+        # Pooled keep-alive connections to the Brave Search API
+        self.api_url = api_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip'})
+
+        # Identical queries are answered from the cache or share one in-flight request, and the
+        # token bucket keeps upstream requests within the plan's rate so callers queue instead of
+        # getting 429s
+        self.cache = SearchResultCache(ttl_seconds=cache_ttl, max_entries=SEARCH_CACHE_MAX_ENTRIES)
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst)
+        self.max_queue_wait = max_queue_wait
+        self.metrics = SearchMetrics()
+
+        # Shared by all batch searches; the token bucket still paces the upstream requests
+        self.batch_pool = ThreadPoolExecutor(max_workers=SEARCH_BATCH_MAX_CONCURRENCY, thread_name_prefix="batch-search")
+
         # Set up logging
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(getattr(logging, log_level.upper()))
@@ -180,9 +284,14 @@ class MCPSearchServer:
         if not self.brave_api_key:
             self.logger.warning("BRAVE_SEARCH_API_KEY environment variable not set. Search functionality will not work properly.")
 
-    def perform_search(self, query: str) -> Tuple[bool, List[Dict], Optional[str]]:
+    def perform_search(self, query: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, List[Dict], Optional[str]]:
         """
-        Perform search using Brave Search API
+        Perform search using Brave Search API, answering repeated queries from the cache
+
+        Args:
+            query: Search query
+            params: Optional Brave Search parameters (see SEARCH_PARAMETERS)
+
         Returns: (success, search_results, error_message)
         """
         try:
@@ -191,84 +300,177 @@ class MCPSearchServer:
                 self.logger.error(error_msg)
                 return False, [], error_msg
 
-            # Prepare the request to Brave Search API
-            headers = {
-                'X-Subscription-Token': self.brave_api_key,
-                'Content-Type': 'application/json'
-            }
-
-            # Prepare the search parameters
-            params = {
-                'q': query,
-                'text_decorations': 0,  # Don't include text decorations
-                'spellcheck': 1         # Enable spellcheck
-            }
-
-            # Use configured retry settings
-            max_retries = self.max_retries
-            base_delay = self.base_delay
-
-            for attempt in range(max_retries):
-                try:
-                    # Make the request to Brave Search API
-                    response = requests.get(
-                        'https://api.search.brave.com/res/v1/web/search',
-                        headers=headers,
-                        params=params
-                    )
-
-                    if response.status_code == 200:
-                        # Parse the response
-                        data = response.json()
-
-                        # Extract search results
-                        results = []
-                        if 'web' in data and 'results' in data['web']:
-                            for result in data['web']['results']:
-                                results.append({
-                                    'title': result.get('title', ''),
-                                    'url': result.get('url', ''),
-                                    'description': result.get('description', ''),
-                                    'date': result.get('date', ''),
-                                    'language': result.get('language', ''),
-                                    'thumbnail': result.get('thumbnail', {}).get('src', '') if result.get('thumbnail') else ''
-                                })
-
-                        self.logger.info(f"Successfully performed search for '{query}', got {len(results)} results")
-                        return True, results, None
-                    elif response.status_code == 429:  # Rate limited
-                        if attempt < max_retries - 1:  # If not the last attempt
-                            # Calculate delay with exponential backoff and jitter
-                            delay = base_delay * (2 ** attempt) + (time.time() % 1)  # Add jitter
-                            self.logger.warning(f"Rate limited by Brave Search API. Retrying in {delay:.2f} seconds... (attempt {attempt + 1}/{max_retries})")
-                            time.sleep(delay)
-                            continue  # Retry
-                        else:
-                            error_msg = f"Brave Search API returned status code {response.status_code} after {max_retries} attempts: {response.text}"
-                            self.logger.error(error_msg)
-                            return False, [], error_msg
-                    else:
-                        error_msg = f"Brave Search API returned status code {response.status_code}: {response.text}"
-                        self.logger.error(error_msg)
-                        return False, [], error_msg
-
-                except requests.exceptions.RequestException as e:
-                    if attempt < max_retries - 1:  # If not the last attempt
-                        # Calculate delay with exponential backoff and jitter
-                        delay = base_delay * (2 ** attempt) + (time.time() % 1)  # Add jitter
-                        self.logger.warning(f"Network error during search attempt {attempt + 1}/{max_retries}. Retrying in {delay:.2f} seconds... Error: {str(e)}")
-                        time.sleep(delay)
-                        continue  # Retry
-                    else:
-                        error_msg = f"Network error performing search for '{query}' after {max_retries} attempts: {str(e)}"
-                        self.logger.error(error_msg)
-                        return False, [], error_msg
+            params = params or {}
+            key = self.cache.key(query, params)
+            (success, results, error_msg), status = self.cache.get_or_fetch(
+                key, lambda: self._search_brave(query, params)
+            )
+            self.metrics.record_lookup(status)
+            if status != "miss":
+                self.logger.info(f"Search for '{query}' answered from the cache ({status})")
+            # Callers may modify the results, so never hand out the cached objects themselves
+            return success, [dict(result) for result in results], error_msg
 
         except Exception as e:
             error_msg = f"Unexpected error performing search for '{query}': {str(e)}"
             self.logger.error(error_msg)
             return False, [], error_msg
 
+    def _search_brave(self, query: str, params: Dict[str, Any]) -> Tuple[bool, List[Dict], Optional[str]]:
+        """Query the Brave Search API, waiting for a rate limit slot before each request"""
+        headers = {
+            'X-Subscription-Token': self.brave_api_key
+        }
+
+        # Prepare the search parameters
+        request_params = {
+            'q': query,
+            'text_decorations': 0,  # Don't include text decorations
+            'spellcheck': 1         # Enable spellcheck
+        }
+        request_params.update(params)
+
+        # Use configured retry settings
+        max_retries = self.max_retries
+        base_delay = self.base_delay
+
+        for attempt in range(max_retries):
+            if deadline_passed():
+                error_msg = f"Deadline exceeded before searching for '{query}'"
+                self.logger.warning(error_msg)
+                return False, [], error_msg
+            waited = self.rate_limiter.acquire(bounded_timeout(self.max_queue_wait, "the search"))
+            if waited is None:
+                self.metrics.record_rejected()
+                error_msg = (f"Search rate limit queue is full (more than {self.max_queue_wait}s of waiting); "
+                             f"try again later")
+                self.logger.warning(error_msg)
+                return False, [], error_msg
+            self.metrics.record_queue_wait(waited)
+
+            started = time.monotonic()
+            try:
+                # Make the request to Brave Search API
+                response = self.session.get(self.api_url, headers=headers, params=request_params,
+                                            timeout=bounded_timeout(self.timeout, "the search"))
+            except requests.exceptions.RequestException as e:
+                self.metrics.record_upstream(time.monotonic() - started, None)
+                if attempt < max_retries - 1:  # If not the last attempt
+                    # Calculate delay with exponential backoff and jitter
+                    delay = base_delay * (2 ** attempt) + (time.time() % 1)  # Add jitter
+                    self.logger.warning(f"Network error during search attempt {attempt + 1}/{max_retries}. Retrying in {delay:.2f} seconds... Error: {str(e)}")
+                    time.sleep(delay)
+                    continue  # Retry
+                error_msg = f"Network error performing search for '{query}' after {max_retries} attempts: {str(e)}"
+                self.logger.error(error_msg)
+                return False, [], error_msg
+            self.metrics.record_upstream(time.monotonic() - started, response.status_code)
+
+            if response.status_code == 200:
+                # Parse the response
+                data = response.json()
+
+                # Extract search results
+                results = []
+                if 'web' in data and 'results' in data['web']:
+                    for result in data['web']['results']:
+                        results.append({
+                            'title': result.get('title', ''),
+                            'url': result.get('url', ''),
+                            'description': result.get('description', ''),
+                            'date': result.get('date', ''),
+                            'language': result.get('language', ''),
+                            'thumbnail': result.get('thumbnail', {}).get('src', '') if result.get('thumbnail') else ''
+                        })
+
+                self.logger.info(f"Successfully performed search for '{query}', got {len(results)} results")
+                return True, results, None
+            elif response.status_code == 429:  # Rate limited despite the token bucket
+                if attempt < max_retries - 1:  # If not the last attempt
+                    # Hold back every caller, not just this one, for as long as the API asks; the
+                    # retry then queues for its slot like any other search
+                    delay = self._retry_after(response, base_delay * (2 ** attempt))
+                    self.rate_limiter.pause(delay)
+                    self.logger.warning(f"Rate limited by Brave Search API. Pausing searches for {delay:.2f} seconds... (attempt {attempt + 1}/{max_retries})")
+                    continue  # Retry
+                error_msg = f"Brave Search API returned status code {response.status_code} after {max_retries} attempts: {response.text}"
+                self.logger.error(error_msg)
+                return False, [], error_msg
+            else:
+                error_msg = f"Brave Search API returned status code {response.status_code}: {response.text}"
+                self.logger.error(error_msg)
+                return False, [], error_msg
+
+    def batch_search(self, queries: List[str], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run several related queries concurrently and merge their results
+
+        Results are interleaved by rank (every query's first result, then every query's second, ...),
+        pages found by several queries are listed once and moved ahead of pages found by one, and each
+        result lists the queries and ranks that found it.
+
+        Args:
+            queries: Search queries (repeats that normalize to the same query are searched once)
+            params: Optional Brave Search parameters applied to every query
+
+        Returns:
+            Dictionary with success, queries (per-query success, result_count and error), results and error
+        """
+        first_seen: Dict[str, str] = {}
+        for query in queries:
+            first_seen.setdefault(normalize_query(query), query)
+        unique_queries = list(first_seen.values())
+        # Each query runs in a copy of the request's context, so it sees the request deadline
+        contexts = [contextvars.copy_context() for _ in unique_queries]
+        outcomes = list(self.batch_pool.map(
+            lambda context, query: context.run(self.perform_search, query, params), contexts, unique_queries
+        ))
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for rank in range(max((len(results) for _, results, _ in outcomes), default=0)):
+            for query, (_, results, _) in zip(unique_queries, outcomes):
+                if rank >= len(results):
+                    continue
+                result = results[rank]
+                key = normalize_url(result.get('url', '')) or f"{query}#{rank}"
+                found_by = {"query": query, "rank": rank + 1}
+                if key in merged:
+                    merged[key]["queries"].append(found_by)
+                else:
+                    merged[key] = dict(result, queries=[found_by])
+        # Stable sort keeps the rank interleaving among results found by the same number of queries
+        results = sorted(merged.values(), key=lambda result: -len(result["queries"]))
+
+        query_reports = [
+            {"query": query, "success": success, "result_count": len(query_results), "error": error}
+            for query, (success, query_results, error) in zip(unique_queries, outcomes)
+        ]
+        succeeded = any(report["success"] for report in query_reports)
+        total = sum(report["result_count"] for report in query_reports)
+        self.logger.info(f"Batch search of {len(unique_queries)} queries returned {len(results)} unique results ({total} before deduplication)")
+        return {
+            "success": succeeded,
+            "queries": query_reports,
+            "results": results,
+            "error": None if succeeded else "; ".join(report["error"] or "" for report in query_reports)
+        }
+
+    @staticmethod
+    def _retry_after(response: requests.Response, default: float) -> float:
+        """Seconds to wait after a 429, from the Retry-After header when present"""
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', default)))
+        except (TypeError, ValueError):
+            return default
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Cache hit rate, rate limiter queue wait and upstream latency"""
+        metrics = self.metrics.snapshot()
+        metrics["cache"]["entries"] = len(self.cache)
+        metrics["rate_limiter"]["rate_per_second"] = self.rate_limiter.rate
+        metrics["rate_limiter"]["burst"] = self.rate_limiter.capacity
+        return metrics
+
     def start(self):
         """Start the search server"""
         try:
@@ -283,7 +485,28 @@ class MCPSearchServer:
                 type="mcp_search",
                 metadata={
                     "service_type": "search_engine",
-                    "capabilities": ["web_search", "brave_search"],
+                    "provider": "brave_search",
+                    "cache_policy": CACHE_POLICY,
+                    "capabilities": [
+                        {
+                            "name": "web_search",
+                            "description": "Search the web for one query",
+                            "parameters": {
+                                "query": {"type": "string", "required": True},
+                                "count": {"type": "integer", "required": False}
+                            }
+                        },
+                        {
+                            "name": "batch_search",
+                            "description": "Search the web for several related queries in one call; results are merged, "
+                                           "deduplicated by URL and list the queries that found them",
+                            "parameters": {
+                                "queries": {"type": "array", "items": {"type": "string"}, "required": True,
+                                            "description": f"Up to {SEARCH_BATCH_MAX_QUERIES} queries"},
+                                "count": {"type": "integer", "required": False}
+                            }
+                        }
+                    ],
                     "started_at": datetime.now().isoformat()
                 }
             )
@@ -302,8 +525,10 @@ class MCPSearchServer:
                 # Stop the server if registration fails
                 raise Exception("Service registration failed")
 
-            # Set the search function for the SearchRequestHandler class
+            # Set the search and metrics functions for the SearchRequestHandler class
             SearchRequestHandler.set_search_func(self.perform_search)
+            SearchRequestHandler.set_batch_func(self.batch_search)
+            SearchRequestHandler.set_metrics_func(self.get_metrics)
 
             # Create threaded HTTP server with our custom request handler
             self.httpd = ThreadedHTTPServer((self.host, self.port), SearchRequestHandler)
@@ -335,6 +560,8 @@ class MCPSearchServer:
         self.running = False
         if self.httpd:
             self.httpd.shutdown()
+        self.session.close()
+        self.batch_pool.shutdown(wait=False)
         self.logger.info("Stopping MCP Search Server...")
 
 
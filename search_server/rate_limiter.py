@@ -0,0 +1,77 @@
+"""
+Client-side rate limiting for upstream search APIs.
+A token bucket matched to the API plan makes callers queue for a token instead of sending
+requests that would be answered with HTTP 429.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket; waiting callers are served in arrival order."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Initialize the bucket (full).
+
+        Args:
+            rate: Tokens added per second (0 or less disables limiting)
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take a token, possibly from the future.
+
+        The token count may go negative: each reservation pushes the next caller's wait further
+        out, so callers are served in the order they arrived.
+
+        Args:
+            max_wait: Give up instead of reserving if the wait would exceed this many seconds
+
+        Returns:
+            Seconds the caller has to wait before using the token, or None if it would exceed max_wait
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Block until a token is available.
+
+        Args:
+            max_wait: Give up immediately if the wait would exceed this many seconds
+
+        Returns:
+            Seconds waited, or None if the wait would have exceeded max_wait
+        """
+        wait = self.reserve(max_wait)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the next `seconds` (e.g. after a 429 with Retry-After)."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
@@ -0,0 +1,168 @@
+"""
+Search result caching for the MCP search server.
+Results are cached per normalized query and search parameters for a TTL, identical queries in
+flight at the same time share one upstream request, and SearchMetrics keeps the numbers needed
+to tune both (hit rate, rate limiter queue wait, upstream latency).
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SearchOutcome = Tuple[bool, Any, Optional[str]]
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query."""
+    return " ".join(query.lower().split())
+
+
+class SearchResultCache:
+    """Class responsible for the TTL cache and single-flight collapsing of search queries."""
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a successful result is served from the cache (0 disables caching,
+                but identical in-flight queries are still collapsed)
+            max_entries: Maximum cached queries; the least recently used are dropped first
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, SearchOutcome]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for a query and its search parameters."""
+        return json.dumps([normalize_query(query), params or {}], sort_keys=True, default=str)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], SearchOutcome]) -> Tuple[SearchOutcome, str]:
+        """
+        Return a cached result or fetch it, sharing the fetch with concurrent identical queries.
+
+        Args:
+            key: Cache key from key()
+            fetch: Callable returning (success, results, error); only successes are cached
+
+        Returns:
+            Tuple of ((success, results, error), status) where status is "hit", "miss" or "shared"
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                if time.monotonic() < cached[0]:
+                    self._entries.move_to_end(key)
+                    return cached[1], "hit"
+                del self._entries[key]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            return future.result(), "shared"
+
+        try:
+            outcome = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if outcome[0] and self.ttl_seconds > 0:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, outcome)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(outcome)
+        return outcome, "miss"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SearchMetrics:
+    """Thread-safe counters for cache efficiency, rate limiting and upstream latency."""
+
+    def __init__(self, latency_samples: int = 1000):
+        self._lock = threading.Lock()
+        self.lookups = {"hit": 0, "miss": 0, "shared": 0}
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.rate_limited = 0  # 429 answers from upstream
+        self.rejected = 0  # searches refused because the rate limiter queue was too long
+        self.queue_waits = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+        self._latencies = deque(maxlen=latency_samples)
+
+    def record_lookup(self, status: str):
+        with self._lock:
+            self.lookups[status] += 1
+
+    def record_queue_wait(self, seconds: float):
+        with self._lock:
+            self.queue_waits += 1
+            self.queue_wait_seconds += seconds
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, seconds)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_upstream(self, seconds: float, status_code: Optional[int]):
+        """Record one upstream request (status_code None for network errors)."""
+        with self._lock:
+            self.upstream_calls += 1
+            self._latencies.append(seconds)
+            if status_code == 429:
+                self.rate_limited += 1
+            if status_code != 200:
+                self.upstream_errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current metrics as a JSON-serializable dictionary."""
+        with self._lock:
+            total = sum(self.lookups.values())
+            latencies = sorted(self._latencies)
+
+            def percentile(fraction: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+
+            return {
+                "searches": total,
+                "cache": dict(self.lookups, hit_rate=round(self.lookups["hit"] / total, 4) if total else 0.0),
+                "rate_limiter": {
+                    "queued": self.queue_waits,
+                    "rejected": self.rejected,
+                    "mean_wait_ms": round(self.queue_wait_seconds / self.queue_waits * 1000, 1) if self.queue_waits else 0.0,
+                    "max_wait_ms": round(self.max_queue_wait_seconds * 1000, 1)
+                },
+                "upstream": {
+                    "calls": self.upstream_calls,
+                    "errors": self.upstream_errors,
+                    "rate_limited": self.rate_limited,
+                    "latency_p50_ms": percentile(0.5),
+                    "latency_p95_ms": percentile(0.95),
+                    "latency_mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0
+                }
+            }
@@ -21,6 +21,7 @@ from models.sql_executor import SQLExecutor
 from database.utils.multi_database_manager import multi_db_manager
 from registry.registry_client import ServiceRegistryClient as RegistryClient
 from config.settings import DISABLE_DATABASES
+from utils.deadline import DeadlineExceeded, deadline_scope, request_deadline, run_before_deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -243,8 +244,15 @@ class SQLMCPServer:
             if request.method == 'POST':
                 try:
                     data = await request.json()
-                    response = await self.request_handler.handle_request(data)
+                    # Give up on requests whose caller has stopped waiting (X-Request-Deadline)
+                    with deadline_scope(request_deadline(request.headers, data)):
+                        response = await run_before_deadline(
+                            self.request_handler.handle_request(data), what=f"{data.get('action')} request"
+                        )
                     return web.json_response(response)
+                except DeadlineExceeded as e:
+                    logger.warning(f"Dropping request: {str(e)}")
+                    return web.json_response({"error": str(e), "status": "error"}, status=408)
                 except Exception as e:
                     logger.error(f"Error handling request: {str(e)}", exc_info=True)
                     return web.json_response({
@@ -282,6 +290,13 @@ class SQLMCPServer:
                 metadata={
                     "name": "sql-service",
                     "description": "SQL generation and execution service for database queries",
+                    # Results of execute_sql and LLM-generated SQL are never reused
+                    "cache_policy": {
+                        "get_schema": {"cacheable": True, "ttl_seconds": 600},
+                        "validate_sql": {"cacheable": True, "ttl_seconds": 600},
+                        "execute_sql": {"cacheable": False},
+                        "generate_sql": {"cacheable": False}
+                    },
                     "capabilities": [
                         {
                             "name": "generate_sql",
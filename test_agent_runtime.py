@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that the agent runtime compiles the graph once and shares components across runs
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langgraph_agent.agent_runtime import AgentRuntime, config_fingerprint, get_agent_runtime
+from langgraph_agent.runtime_benchmark import run_runtime_benchmark
+
+
+class SlowComponent:
+    """Stands in for a model whose constructor reads prompts and creates an LLM client"""
+
+    instances = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        time.sleep(0.05)
+        with SlowComponent.lock:
+            SlowComponent.instances += 1
+
+
+def test_graph_and_components_are_reused():
+    """Test that repeated lookups return the same graph and component instances"""
+    print("Testing graph and component reuse...")
+
+    runtime = AgentRuntime()
+    builds = []
+    builder = lambda: builds.append(1) or object()
+    graph = runtime.graph(builder)
+    assert runtime.graph(builder) is graph and len(builds) == 1
+
+    SlowComponent.instances = 0
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        instances = list(pool.map(lambda _: runtime.component(SlowComponent), range(16)))
+    assert all(instance is instances[0] for instance in instances)
+    assert SlowComponent.instances == 1
+
+    stats = runtime.stats()
+    assert stats["builds"] == {"graph": 1, "SlowComponent": 1}
+    assert stats["reuses"]["SlowComponent"] == 15 and stats["estimated_ms_saved"] >= 15 * 50
+    assert get_agent_runtime() is get_agent_runtime()
+    print("✓ 16 concurrent lookups built the component once")
+
+
+def test_prompt_change_rebuilds_components():
+    """Test that editing a prompt file changes the fingerprint and rebuilds components"""
+    print("Testing fingerprint invalidation...")
+
+    with tempfile.TemporaryDirectory() as prompts_dir:
+        prompt_file = os.path.join(prompts_dir, "response_generator.txt")
+        with open(prompt_file, "w", encoding="utf-8") as f:
+            f.write("first version")
+        runtime = AgentRuntime(prompts_dir=prompts_dir, check_interval=0)
+        first = runtime.component(SlowComponent)
+        fingerprint = config_fingerprint(prompts_dir)
+        assert runtime.component(SlowComponent) is first
+
+        with open(prompt_file, "w", encoding="utf-8") as f:
+            f.write("second, longer version")
+        assert config_fingerprint(prompts_dir) != fingerprint
+        second = runtime.component(SlowComponent)
+        assert second is not first and runtime.stats()["invalidations"] == 1
+
+        throttled = AgentRuntime(prompts_dir=prompts_dir, check_interval=60)
+        cached = throttled.component(SlowComponent)
+        with open(prompt_file, "w", encoding="utf-8") as f:
+            f.write("third version, not noticed until the next check")
+        assert throttled.component(SlowComponent) is cached
+    print("✓ Components are rebuilt after a prompt file changes")
+
+
+def test_invalidate_and_disabled_reuse():
+    """Test explicit invalidation and AGENT_RUNTIME_REUSE=false behaviour"""
+    print("Testing invalidation and disabled reuse...")
+
+    runtime = AgentRuntime()
+    builder = lambda: object()
+    graph = runtime.graph(builder)
+    component = runtime.component(SlowComponent)
+    runtime.invalidate("prompts edited")
+    assert runtime.graph(builder) is not graph
+    assert runtime.component(SlowComponent) is not component
+
+    per_request = AgentRuntime(reuse=False)
+    assert per_request.graph(builder) is not per_request.graph(builder)
+    assert per_request.component(SlowComponent) is not per_request.component(SlowComponent)
+    assert per_request.stats()["builds"]["SlowComponent"] == 2
+    print("✓ invalidate() drops everything and reuse can be switched off")
+
+
+def test_slow_build_does_not_block_other_components():
+    """Test that components are built outside the runtime lock, one build per component"""
+    print("Testing builds outside the runtime lock...")
+
+    release = threading.Event()
+    started = threading.Event()
+
+    class BlockedComponent:
+        builds = 0
+
+        def __init__(self):
+            BlockedComponent.builds += 1
+            started.set()
+            assert release.wait(5)
+
+    runtime = AgentRuntime()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        blocked = [pool.submit(runtime.component, BlockedComponent) for _ in range(3)]
+        assert started.wait(5)
+        # Other components and stats stay available while BlockedComponent is being built
+        other = pool.submit(runtime.component, SlowComponent).result(timeout=2)
+        assert runtime.stats()["builds"]["SlowComponent"] == 1
+        release.set()
+        instances = [future.result(timeout=5) for future in blocked]
+
+    assert BlockedComponent.builds == 1 and all(instance is instances[0] for instance in instances)
+    assert isinstance(other, SlowComponent) and runtime.component(BlockedComponent) is instances[0]
+
+    # A build started before invalidate() is handed out but not cached
+    release.clear()
+    started.clear()
+    runtime.invalidate("start over")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stale = pool.submit(runtime.component, BlockedComponent)
+        assert started.wait(5)
+        runtime.invalidate("settings reloaded during a build")
+        release.set()
+        stale_instance = stale.result(timeout=5)
+    assert runtime.component(BlockedComponent) is not stale_instance and BlockedComponent.builds == 3
+    print("✓ Slow builds only block callers of the same component")
+
+
+def test_runtime_benchmark():
+    """Test the per-request overhead benchmark"""
+    print("Testing runtime benchmark...")
+
+    summary = run_runtime_benchmark(num_requests=4, tool_calls=2)
+    per_request, shared = summary["modes"]["per_request"], summary["modes"]["shared_runtime"]
+
+    assert per_request["builds"]["graph"] == 4
+    assert shared["builds"]["graph"] == 1
+    assert all(count == 1 for count in shared["builds"].values())
+    assert summary["saved_ms_per_request"] > 0 and shared["steady_ms"] < per_request["steady_ms"]
+    print(f"✓ Shared runtime saves {summary['saved_ms_per_request']} ms of setup per request")
+
+
+if __name__ == "__main__":
+    test_graph_and_components_are_reused()
+    test_prompt_change_rebuilds_components()
+    test_invalidate_and_disabled_reuse()
+    test_slow_build_does_not_block_other_components()
+    test_runtime_benchmark()
+    print("\nAll agent runtime tests passed!")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that LangGraph agent nodes return only the keys they change
+and that the agent state grows linearly with the number of tool results
+"""
+
+import sys
+import os
+import types
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langgraph_agent.langgraph_agent import (
+    AgentMonitoringCallback,
+    create_enhanced_agent_graph,
+    input_reception_node,
+    mcp_registry_call_node,
+    measure_state_size,
+    planning_and_filtering_node,
+    stream_agent_graph,
+)
+
+NODES = ["input_reception", "mcp_registry_call", "mcp_model_query", "planning_and_filtering",
+         "parallel_execution", "enhanced_results_collection"]
+
+
+class FakeMCPModel:
+    """Stands in for DedicatedMCPModel: plans `tool_call_count` calls and answers each with a fixed-size result"""
+
+    tool_call_count = 0
+
+    def analyze_request_for_mcp_services(self, user_request, mcp_services):
+        return {"tool_calls": [
+            {"service_id": f"echo-{i:03d}", "method": "echo", "params": {"index": i}}
+            for i in range(self.tool_call_count)
+        ]}
+
+    def execute_mcp_tool_calls(self, tool_calls, mcp_servers):
+        return [{"service_id": call["service_id"], "status": "success", "payload": "x" * 500} for call in tool_calls]
+
+
+class FakeRegistryClient:
+    def __init__(self, registry_url):
+        self.registry_url = registry_url
+
+    def discover_services(self):
+        return [SimpleNamespace(id="echo-server", host="127.0.0.1", port=9000, type="echo", metadata={})]
+
+
+def run_graph(tool_call_count, callback):
+    """Run the compiled graph with the model and registry replaced by the fakes above"""
+    FakeMCPModel.tool_call_count = tool_call_count
+    fake_module = types.ModuleType("models.dedicated_mcp_model")
+    fake_module.DedicatedMCPModel = FakeMCPModel
+    initial_state = {
+        "user_request": "echo everything",
+        "mcp_results": [],
+        "mcp_servers": [],
+        "registry_url": "http://registry.test",
+        "discovered_services": [],
+        "mcp_tool_calls": [],
+        "mcp_execution_errors": [],
+        "skip_final_response_generation": True,
+    }
+    with patch.dict(sys.modules, {"models.dedicated_mcp_model": fake_module}), \
+            patch("registry.registry_client.ServiceRegistryClient", FakeRegistryClient), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "true"}):
+        graph = create_enhanced_agent_graph()
+        return stream_agent_graph(graph, initial_state, {"recursion_limit": 50}, callback)
+
+
+def test_nodes_return_only_changed_keys():
+    """Test that nodes return deltas instead of the whole state"""
+    print("Testing delta-only node outputs...")
+
+    state = {"user_request": "hello", "mcp_results": [{"a": 1}], "mcp_tool_calls": [{"service_id": "dns-server"}]}
+    assert input_reception_node(state) == {}
+    assert set(mcp_registry_call_node(state)) == {"mcp_servers", "discovered_services"}
+    assert set(planning_and_filtering_node(state)) == {"mcp_tool_calls", "filtered_mcp_tool_calls"}
+    print("✓ Nodes return only the fields they change")
+
+
+def test_measure_state_size():
+    """Test the per-field size accounting"""
+    print("Testing state size measurement...")
+
+    size = measure_state_size({"user_request": "héllo", "mcp_results": [{"a": 1}, {"b": 2}], "can_answer": True})
+    assert size["fields"]["user_request"] == {"bytes": 8}  # quotes plus 6 UTF-8 bytes
+    assert size["fields"]["mcp_results"] == {"bytes": 20, "items": 2}
+    assert size["total_bytes"] == 8 + 20 + 4
+    print("✓ Bytes and list lengths are reported per field")
+
+
+def test_state_size_hook_logs_every_node():
+    """Test that the monitoring callback records the state size after each node"""
+    print("Testing state size hook...")
+
+    callback = AgentMonitoringCallback(track_state_size=True)
+    final_state = run_graph(3, callback)
+
+    entries = [entry for entry in callback.execution_log if entry["event"] == "node_end"]
+    assert [entry["node"] for entry in entries] == NODES
+    assert entries[-1]["state_size"] == measure_state_size(final_state)
+    assert entries[-1]["state_size"]["fields"]["mcp_results"]["items"] == 3
+
+    quiet = AgentMonitoringCallback(track_state_size=False)
+    run_graph(3, quiet)
+    assert not quiet.execution_log
+    print("✓ One state size entry per node")
+
+
+def test_state_grows_linearly_with_tool_results():
+    """Test that state size is linear in the number of tool results and no list is duplicated"""
+    print("Testing state growth...")
+
+    totals = {}
+    for count in (2, 4, 8):
+        final_state = run_graph(count, AgentMonitoringCallback(track_state_size=False))
+        assert len(final_state["mcp_results"]) == count
+        assert len(final_state["discovered_services"]) == 1
+        assert len(final_state["mcp_tool_calls"]) == count
+        totals[count] = measure_state_size(final_state)["total_bytes"]
+
+    per_result_small = (totals[4] - totals[2]) / 2
+    per_result_large = (totals[8] - totals[4]) / 4
+    assert per_result_small > 0
+    assert abs(per_result_large - per_result_small) / per_result_small < 0.05
+    print(f"✓ About {per_result_large:.0f} bytes per tool result at every size")
+
+
+if __name__ == "__main__":
+    test_nodes_return_only_changed_keys()
+    test_measure_state_size()
+    test_state_size_hook_logs_every_node()
+    test_state_grows_linearly_with_tool_results()
+    print("\nAll agent state growth tests passed!")
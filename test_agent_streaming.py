@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test script to verify streamed agent runs: progress events, answer tokens and the SSE endpoint
+"""
+
+import sys
+import os
+import asyncio
+import json
+import time
+import types
+import requests
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langgraph_agent.agent_events import format_sse, iter_sse_events
+from langgraph_agent.langgraph_agent import run_enhanced_agent, stream_enhanced_agent
+from langgraph_agent.async_agent import astream_enhanced_agent
+from test_async_agent import FakePlanner, StubMCPService
+
+NODES = [
+    "input_reception", "mcp_registry_call", "mcp_model_query",
+    "planning_and_filtering", "parallel_execution", "enhanced_results_collection"
+]
+
+
+class SyncPlanner(FakePlanner):
+    """FakePlanner that also executes tool calls, as the sync parallel_execution_node needs"""
+
+    def execute_mcp_tool_calls(self, tool_calls, mcp_services):
+        services = {service["id"]: service for service in mcp_services}
+        results = []
+        for call in tool_calls:
+            service = services[call["service_id"]]
+            response = requests.post(f"http://{service['host']}:{service['port']}/{call['method']}",
+                                     json={"action": call["method"], "parameters": call["params"]}, timeout=5)
+            results.append({"service_id": service["id"], "action": call["method"], "status": "success", "result": response.json()})
+        return results
+
+
+class FakeResponseGenerator:
+    """Stands in for the response LLM: answers in three pieces"""
+
+    def generate_response(self, user_request=None, informational_content=None, previous_signals=None,
+                          previous_tool_calls=None, on_token=None):
+        pieces = ["Echoed ", user_request, "."]
+        if on_token is not None:
+            for piece in pieces:
+                on_token(piece)
+        return "".join(pieces)
+
+
+def responder_module():
+    module = types.ModuleType("models.response_generator")
+    module.ResponseGenerator = FakeResponseGenerator
+    return module
+
+
+def agent_modules():
+    planner = types.ModuleType("models.dedicated_mcp_model")
+    planner.DedicatedMCPModel = SyncPlanner
+    return {"models.dedicated_mcp_model": planner, "models.response_generator": responder_module()}
+
+
+def check_events(events, services):
+    """Check the event sequence of one streamed run and return its result"""
+    kinds = [event["event"] for event in events]
+    assert [event["node"] for event in events if event["event"] == "node_start"] == NODES
+    ends = [event for event in events if event["event"] == "node_end"]
+    assert [event["node"] for event in ends] == NODES and all(event["duration_ms"] >= 0 for event in ends)
+
+    starts = [event for event in events if event["event"] == "tool_call_start"]
+    finished = [event for event in events if event["event"] == "tool_call_end"]
+    assert sorted(event["index"] for event in starts) == list(range(services))
+    assert sorted(event["service_id"] for event in finished) == [f"echo-{i}" for i in range(services)]
+    assert all(event["status"] == "success" and event["duration_ms"] >= 0 for event in finished)
+    # Tool calls happen inside parallel_execution
+    assert kinds.index("tool_call_start") > kinds.index("node_start", NODES.index("parallel_execution"))
+
+    assert "".join(event["text"] for event in events if event["event"] == "token") == "Echoed ping."
+    assert kinds[-1] == "result" and "error" not in kinds
+    return events[-1]["result"]
+
+
+def test_sse_round_trip():
+    """Test that events survive format_sse and iter_sse_events, including comments and bytes"""
+    print("Testing SSE encoding...")
+
+    events = [
+        {"event": "token", "text": "line one\nline two"},
+        {"event": "result", "result": {"final_answer": "ok", "can_answer": True}},
+    ]
+    stream = b": keep-alive\n\n" + b"".join(format_sse(event) for event in events)
+    assert format_sse(events[0]).startswith(b"event: token\ndata: ")
+
+    parsed = list(iter_sse_events(stream.split(b"\n")))
+    assert parsed == events
+    # str lines, \r\n line endings and a final event without the trailing blank line
+    text_lines = format_sse(events[1]).decode().replace("\n", "\r\n").split("\n")[:-2]
+    assert list(iter_sse_events(text_lines)) == [events[1]]
+    print("✓ Events round-trip through server-sent event framing")
+
+
+def test_stream_enhanced_agent():
+    """Test the sync streamed run: node transitions, tool call timing, tokens and the same final result"""
+    print("Testing stream_enhanced_agent...")
+
+    with StubMCPService(services=3) as stub, \
+            patch.dict(sys.modules, agent_modules()), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "false"}):
+        events = list(stream_enhanced_agent("ping", registry_url=stub.url))
+        plain = run_enhanced_agent("ping", registry_url=stub.url)
+
+    result = check_events(events, 3)
+    assert result == plain and result["final_answer"] == "Echoed ping."
+    print(f"✓ {len(events)} events, ending with the run_enhanced_agent result")
+
+
+def test_astream_enhanced_agent():
+    """Test the async streamed run, with tokens produced on the blocking pool"""
+    print("Testing astream_enhanced_agent...")
+
+    with StubMCPService(services=2) as stub, \
+            patch.dict(sys.modules, agent_modules()), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "false"}):
+        async def run():
+            return [event async for event in astream_enhanced_agent("ping", registry_url=stub.url)]
+
+        events = asyncio.run(run())
+
+    result = check_events(events, 2)
+    assert result["can_answer"] and len(result["mcp_tool_calls"]) == 2
+    print("✓ Async runs report the same events, including tokens from the response thread")
+
+
+def asgi_request(app, token, path, body, disconnect_after=None):
+    """Drive the ASGI app; the client disconnects after disconnect_after seconds (or stays connected)"""
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers, "client": ("127.0.0.1", 1)}
+    sent = []
+
+    async def run():
+        chunks = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+        disconnected = asyncio.Event()
+
+        async def receive():
+            if chunks:
+                return chunks.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        if disconnect_after is not None:
+            asyncio.get_running_loop().call_later(disconnect_after, disconnected.set)
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return sent[0]["status"], dict(sent[0]["headers"]), body
+
+
+def test_asgi_stream_endpoint():
+    """Test /query/stream on the ASGI service: SSE output, authentication and client disconnects"""
+    print("Testing ASGI /query/stream...")
+
+    from backend.security import security_manager, Permission, UserRole
+    from backend.services.agent.asgi_app import app
+
+    token = security_manager.generate_token({
+        "user_id": "tester", "role": UserRole.USER, "permissions": [Permission.READ_AGENT, Permission.WRITE_AGENT]
+    })
+
+    with StubMCPService(services=2) as stub, \
+            patch.dict(sys.modules, agent_modules()), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "false"}):
+        status, headers, body = asgi_request(app, token, "/query/stream", {"user_request": "ping", "registry_url": stub.url})
+        unauthorized = asgi_request(app, None, "/query/stream", {"user_request": "ping"})
+        invalid = asgi_request(app, token, "/query/stream", {"user_request": ""})
+
+    assert status == 200 and headers[b"content-type"].startswith(b"text/event-stream")
+    events = list(iter_sse_events(body.split(b"\n")))
+    result = check_events(events, 2)
+    assert "execution_time" in result
+    assert unauthorized[0] == 401 and json.loads(unauthorized[2]) == {"message": "Token is missing!"}
+    assert invalid[0] == 400
+
+    with StubMCPService(latency=2.0, services=1) as slow, \
+            patch.dict(sys.modules, agent_modules()):
+        started = time.monotonic()
+        status, _, body = asgi_request(app, token, "/query/stream", {"user_request": "ping", "registry_url": slow.url},
+                                       disconnect_after=0.5)
+        elapsed = time.monotonic() - started
+
+    kinds = [event["event"] for event in iter_sse_events(body.split(b"\n"))]
+    assert status == 200 and "tool_call_start" in kinds and "result" not in kinds
+    assert elapsed < 1.5
+    print("✓ Events are sent as SSE and the run stops when the client disconnects")
+
+def test_failed_stream_is_not_retried_after_tokens():
+    """Test that the response generator only retries a stream that has not emitted anything yet"""
+    print("Testing retries of a failing answer stream...")
+    from models.response_generator import ResponseGenerator, PartialStreamError
+
+    class FailingChain:
+        """Streams fail_after pieces, then raises"""
+
+        def __init__(self, fail_after):
+            self.fail_after = fail_after
+            self.calls = 0
+
+        def stream(self, inputs):
+            self.calls += 1
+            for piece in ["Hello", " world"][:self.fail_after]:
+                yield piece
+            raise ConnectionError("stream dropped")
+
+    generator = ResponseGenerator.__new__(ResponseGenerator)
+    retrying = ResponseGenerator.generate_natural_language_response.retry
+    with patch.object(retrying, "sleep", lambda seconds: None):
+        generator.chain = FailingChain(fail_after=2)
+        tokens = []
+        try:
+            generator.generate_natural_language_response("prompt", on_token=tokens.append)
+            assert False, "PartialStreamError expected"
+        except PartialStreamError as e:
+            assert isinstance(e.__cause__, ConnectionError)
+        assert tokens == ["Hello", " world"] and generator.chain.calls == 1
+
+        generator.chain = FailingChain(fail_after=0)
+        try:
+            generator.generate_natural_language_response("prompt", on_token=tokens.append)
+            assert False, "RetryError expected"
+        except Exception as e:
+            assert not isinstance(e, PartialStreamError)
+        assert generator.chain.calls == 3
+    print("✓ Streams are retried only before the first token")
+
+
+if __name__ == "__main__":
+    test_sse_round_trip()
+    test_stream_enhanced_agent()
+    test_astream_enhanced_agent()
+    test_asgi_stream_endpoint()
+    test_failed_stream_is_not_retried_after_tokens()
+    print("\nAll agent streaming tests passed!")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the asyncio agent path: the aiohttp MCP client, arun_enhanced_agent and the ASGI agent service
+"""
+
+import sys
+import os
+import asyncio
+import json
+import socketserver
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import AGENT_ASYNC_LIMIT_PER_HOST
+from langgraph_agent.async_mcp_client import AsyncMCPClient, normalize_tool_call
+from langgraph_agent.async_agent import arun_enhanced_agent
+
+
+class StubMCPService(ThreadingHTTPServer):
+    """Registry and MCP service stand-in: GET /discover lists `services` echo services, POST /<action> echoes after `latency`"""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, services=3):
+        super().__init__(("127.0.0.1", 0), StubMCPHandler)
+        self.latency = latency
+        self.services = services
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def service(self, service_id, **metadata):
+        return {"id": service_id, "host": "127.0.0.1", "port": self.server_address[1], "type": "echo", "metadata": metadata}
+
+
+class StubMCPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        services = [self.server.service(f"echo-{i}") for i in range(self.server.services)]
+        self._reply(200, {"success": True, "services": services})
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.calls += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.latency)
+        with server.lock:
+            server.in_flight -= 1
+        if self.path == "/fail":
+            self._reply(500, {"error": "boom"})
+        else:
+            self._reply(200, {"success": True, "result": {"echo": payload["parameters"]}})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubTCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        request = json.loads(self.request.recv(4096))
+        self.request.sendall(json.dumps({"echo": request["parameters"]}).encode())
+
+
+class FakePlanner:
+    """Stands in for DedicatedMCPModel's planning call: one echo call per service"""
+
+    def analyze_request_for_mcp_services(self, user_request, mcp_services):
+        return {"tool_calls": [
+            {"service_id": service["id"], "method": "echo", "params": {"q": user_request}} for service in mcp_services
+        ]}
+
+
+def planner_module():
+    module = types.ModuleType("models.dedicated_mcp_model")
+    module.DedicatedMCPModel = FakePlanner
+    return module
+
+
+def test_client_runs_calls_concurrently_within_limit():
+    """Test that tool calls overlap, stay within the concurrency limit and keep their order"""
+    print("Testing async MCP client concurrency...")
+
+    assert normalize_tool_call({"service": "s", "method": "m", "params": {"a": 1}, "b": 2}) == ("s", "m", {"a": 1, "b": 2})
+
+    with StubMCPService(latency=0.1) as stub:
+        async def run():
+            client = AsyncMCPClient(max_concurrency=4)
+            services = [stub.service("echo")]
+            calls = [{"service_id": "echo", "action": "echo", "parameters": {"i": i}} for i in range(12)]
+            started = time.monotonic()
+            results = await client.execute_tool_calls(calls, services)
+            elapsed = time.monotonic() - started
+            missing = await client.execute_tool_calls([{"service_id": "nope", "action": "x"}], services)
+            failed = await client.call_service(services[0], "fail", {})
+            await client.close()
+            return results, elapsed, missing, failed
+
+        results, elapsed, missing, failed = asyncio.run(run())
+
+    assert [result["result"]["result"]["echo"]["i"] for result in results] == list(range(12))
+    assert stub.max_in_flight == 4
+    assert 0.28 < elapsed < 0.8  # three waves of four
+    assert missing[0]["status"] == "error" and "not found" in missing[0]["error"]
+    assert failed["status"] == "error" and failed["error"].startswith("HTTP 500")
+    print("✓ 12 calls ran in 3 waves of 4")
+
+
+def test_client_tcp_and_timeout():
+    """Test TCP services and timeouts"""
+    print("Testing TCP calls and timeouts...")
+
+    tcp = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubTCPHandler)
+    tcp.daemon_threads = True
+    threading.Thread(target=tcp.serve_forever, daemon=True).start()
+    try:
+        with StubMCPService(latency=0.5) as slow:
+            async def run():
+                client = AsyncMCPClient(timeout=0.2)
+                tcp_service = {"id": "tcp", "host": "127.0.0.1", "port": tcp.server_address[1], "metadata": {"protocol": "tcp"}}
+                tcp_result = await client.call_service(tcp_service, "echo", {"x": 1})
+                timed_out = await client.call_service(slow.service("slow"), "echo", {})
+                await client.close()
+                return tcp_result, timed_out
+
+            tcp_result, timed_out = asyncio.run(run())
+    finally:
+        tcp.shutdown()
+        tcp.server_close()
+
+    assert tcp_result["status"] == "success" and tcp_result["result"] == {"echo": {"x": 1}}
+    assert timed_out["status"] == "error" and timed_out["error"] == "Request timed out"
+    print("✓ TCP services and timeouts are handled")
+
+
+def test_arun_enhanced_agent():
+    """Test a full async agent run against the stub registry and services"""
+    print("Testing arun_enhanced_agent...")
+
+    with StubMCPService(services=3) as stub, \
+            patch.dict(sys.modules, {"models.dedicated_mcp_model": planner_module()}), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "true"}):
+        result = asyncio.run(arun_enhanced_agent("ping", registry_url=stub.url))
+
+    assert result["original_request"] == "ping" and result["can_answer"]
+    assert [call["service_id"] for call in result["mcp_tool_calls"]] == ["echo-0", "echo-1", "echo-2"]
+    assert stub.calls == 3 and result["final_answer"].count("'echo': {'q': 'ping'}") == 3
+    print("✓ The async graph discovers services, runs the tool calls and returns the same result format")
+
+
+def test_registry_failure_is_reported_like_the_sync_node():
+    """Test that an unreachable registry is reported in the state instead of failing the run"""
+    print("Testing async registry node errors...")
+
+    from langgraph_agent.async_agent import amcp_registry_call_node
+
+    with patch("langgraph_agent.async_agent.get_async_mcp_client") as get_client:
+        get_client.return_value.discover_services.side_effect = ConnectionError("registry down")
+        result = asyncio.run(amcp_registry_call_node({"registry_url": "http://127.0.0.1:1"}))
+
+    assert result["mcp_servers"] == [] and result["discovered_services"] == []
+    assert result["error_message"] == "MCP registry call failed: registry down"
+    print("✓ Registry failures leave the run without services and record the error")
+
+
+def test_many_concurrent_runs_on_one_loop():
+    """Test that concurrent agent runs overlap on a single event loop"""
+    print("Testing concurrent async agent runs...")
+
+    with StubMCPService(latency=0.2, services=2) as stub, \
+            patch.dict(sys.modules, {"models.dedicated_mcp_model": planner_module()}), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "true"}):
+        async def run():
+            started = time.monotonic()
+            results = await asyncio.gather(*(arun_enhanced_agent(f"run {i}", registry_url=stub.url) for i in range(30)))
+            return results, time.monotonic() - started
+
+        results, elapsed = asyncio.run(run())
+
+    assert all(len(result["mcp_tool_calls"]) == 2 and result["can_answer"] for result in results)
+    # All stub services share one host:port, so the per-host connection limit caps the overlap
+    assert stub.calls == 60 and stub.max_in_flight == AGENT_ASYNC_LIMIT_PER_HOST
+    assert elapsed < 2.5  # 30 sequential runs would take at least 6s
+    print(f"✓ 30 runs with 200ms tool calls finished in {elapsed:.2f}s")
+
+
+def test_asgi_agent_service():
+    """Test the ASGI agent service endpoints, authentication and validation"""
+    print("Testing ASGI agent service...")
+
+    from backend.security import security_manager, Permission, UserRole
+    from backend.services.agent.asgi_app import app
+
+    token = security_manager.generate_token({
+        "user_id": "tester", "role": UserRole.USER, "permissions": [Permission.READ_AGENT, Permission.WRITE_AGENT]
+    })
+
+    async def request(method, path, body=None, authorized=True):
+        headers = [(b"authorization", f"Bearer {token}".encode())] if authorized else []
+        scope = {"type": "http", "method": method, "path": path, "headers": headers, "client": ("127.0.0.1", 1)}
+        chunks = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b"", "more_body": False}]
+        sent = []
+
+        async def receive():
+            return chunks.pop(0) if chunks else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        return sent[0]["status"], json.loads(sent[1]["body"] or b"null")
+
+    with StubMCPService(services=1) as stub, \
+            patch.dict(sys.modules, {"models.dedicated_mcp_model": planner_module()}), \
+            patch.dict(os.environ, {"DISABLE_RESPONSE_GENERATION": "true"}):
+        async def run():
+            return [
+                await request("GET", "/health", authorized=False),
+                await request("POST", "/query", {"user_request": "ping"}, authorized=False),
+                await request("POST", "/query", {"user_request": ""}),
+                await request("POST", "/query", {"user_request": "ping", "registry_url": stub.url}),
+                await request("GET", "/status"),
+                await request("GET", "/query"),
+                await request("GET", "/missing"),
+            ]
+
+        health, unauthorized, invalid, query, status, wrong_method, missing = asyncio.run(run())
+
+    assert health[0] == 200 and health[1]["service"] == "agent"
+    assert unauthorized == (401, {"message": "Token is missing!"})
+    assert invalid[0] == 400 and "Validation error" in invalid[1]["error"]
+    assert query[0] == 200 and query[1]["can_answer"] and "execution_time" in query[1]
+    assert status[0] == 200 and wrong_method[0] == 405 and missing[0] == 404
+    print("✓ The ASGI service matches the Flask endpoints")
+
+
+if __name__ == "__main__":
+    test_client_runs_calls_concurrently_within_limit()
+    test_client_tcp_and_timeout()
+    test_arun_enhanced_agent()
+    test_registry_failure_is_reported_like_the_sync_node()
+    test_many_concurrent_runs_on_one_loop()
+    test_asgi_agent_service()
+    print("\nAll async agent tests passed!")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the async download engine and batch downloads
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from download_server.async_download_engine import AsyncDownloadEngine
+from download_server.download_benchmark import run_download_benchmark
+from download_server.download_mcp_server import DownloadRequestHandler, MCPDownloadServer, ThreadedHTTPServer
+
+
+class StandInOrigin(ThreadingHTTPServer):
+    """Keep-alive origin that tracks connections, concurrency and request start times"""
+
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when many pooled connections open at once
+    request_queue_size = 256
+
+    def __init__(self, body_size=1024, delays=None):
+        super().__init__(("127.0.0.1", 0), StandInOriginHandler)
+        self.body = b"x" * body_size
+        self.delays = delays or {}
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.starts = []
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def process_request_thread(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request_thread(request, client_address)
+
+
+class StandInOriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.starts.append(time.monotonic())
+        try:
+            time.sleep(server.delays.get(self.path, 0.02))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(server.body)))
+            self.end_headers()
+            self.wfile.write(server.body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_per_host_limit_and_connection_reuse():
+    """Test that concurrency per host is capped and connections are kept alive"""
+    print("Testing per-host limits and keep-alive pooling...")
+
+    with StandInOrigin() as origin, tempfile.TemporaryDirectory() as temp_dir:
+        engine = AsyncDownloadEngine(temp_dir, per_host_limit=3)
+        urls = [origin.url(f"/file{i}.txt") for i in range(24)]
+        results = list(engine.download_batch(urls))
+        engine.close()
+
+        assert all(result["success"] for result in results)
+        assert sorted(result["index"] for result in results) == list(range(24))
+        assert len({result["file_path"] for result in results}) == 24
+        assert origin.max_active <= 3
+        assert origin.connections <= 3
+    print("✓ At most 3 concurrent requests over at most 3 connections")
+
+
+def test_politeness_delay():
+    """Test that request starts to one host are spaced out"""
+    print("Testing politeness delay...")
+
+    with StandInOrigin() as origin, tempfile.TemporaryDirectory() as temp_dir:
+        engine = AsyncDownloadEngine(temp_dir, per_host_limit=4, politeness_delay=0.1)
+        list(engine.download_batch([origin.url(f"/p{i}.txt") for i in range(4)]))
+        engine.close()
+
+        gaps = [later - earlier for earlier, later in zip(origin.starts, origin.starts[1:])]
+        assert len(gaps) == 3 and min(gaps) >= 0.09
+    print("✓ Requests to the same host start at least the politeness delay apart")
+
+
+def test_size_ceiling_aborts_early():
+    """Test that a body larger than the ceiling is cut and the transfer abandoned"""
+    print("Testing size ceiling...")
+
+    with StandInOrigin(body_size=8 * 1024 * 1024) as origin, tempfile.TemporaryDirectory() as temp_dir:
+        engine = AsyncDownloadEngine(temp_dir, chunk_size=16 * 1024, max_bytes=1024 * 1024)
+        capped = engine.download(origin.url("/big.bin"), max_bytes=100 * 1024)
+        ceiling = engine.download(origin.url("/big2.bin"))
+        invalid = engine.download("ftp://example.com/file")
+        engine.close()
+
+        assert capped["truncated"] and capped["bytes"] == os.path.getsize(capped["file_path"]) == 100 * 1024
+        assert ceiling["truncated"] and ceiling["bytes"] == 1024 * 1024
+        assert not invalid["success"] and "Invalid URL" in invalid["error"]
+    print("✓ Bodies stop at the requested cap or the engine ceiling")
+
+
+def test_total_timeout_and_request_deadline():
+    """Test that a download is bounded as a whole and by the caller's request deadline"""
+    print("Testing total timeout and request deadline...")
+    from utils.deadline import deadline_after, deadline_scope
+
+    with StandInOrigin(delays={"/slow.txt": 1.5}) as origin, tempfile.TemporaryDirectory() as temp_dir:
+        engine = AsyncDownloadEngine(temp_dir, timeout=5, total_timeout=0.3)
+        started = time.monotonic()
+        bounded = engine.download(origin.url("/slow.txt"))
+        bounded_seconds = time.monotonic() - started
+        engine.close()
+
+        engine = AsyncDownloadEngine(temp_dir, timeout=5)
+        started = time.monotonic()
+        with deadline_scope(deadline_after(0.3)):
+            deadline_bound = engine.download(origin.url("/slow.txt"))
+        deadline_seconds = time.monotonic() - started
+        with deadline_scope(deadline_after(-1)):
+            expired = engine.download(origin.url("/fast.txt"))
+        engine.close()
+
+    assert not bounded["success"] and "Timeout" in bounded["error"] and bounded_seconds < 1.0
+    assert not deadline_bound["success"] and deadline_seconds < 1.0
+    assert not expired["success"] and "Deadline exceeded" in expired["error"]
+    print("✓ Downloads stop at the total timeout or the request deadline, whichever is first")
+
+
+def test_batch_request_streams_completions():
+    """Test the batch endpoint: streamed results arrive as each URL completes"""
+    print("Testing batch downloads over HTTP...")
+
+    delays = {"/slow.txt": 0.5, "/fast.txt": 0.01}
+    with StandInOrigin(delays=delays) as origin, tempfile.TemporaryDirectory() as temp_dir:
+        server = MCPDownloadServer(download_dir=temp_dir, log_level="WARNING", cache_enabled=False, engine="async")
+        pool = ThreadPoolExecutor(max_workers=4)
+        DownloadRequestHandler.set_download_func(server.download_file)
+        DownloadRequestHandler.set_extract_func(server.download_and_extract)
+        DownloadRequestHandler.set_batch_func(server.download_batch)
+        DownloadRequestHandler.set_thread_pool(pool)
+        mcp = ThreadedHTTPServer(("127.0.0.1", 0), DownloadRequestHandler)
+        threading.Thread(target=mcp.serve_forever, daemon=True).start()
+        mcp_url = f"http://127.0.0.1:{mcp.server_address[1]}/download"
+        urls = [origin.url("/slow.txt"), origin.url("/fast.txt"), "not a url"]
+        try:
+            arrivals = []
+            started = time.monotonic()
+            with requests.post(mcp_url, json={"parameters": {"urls": urls, "stream": True}}, stream=True, timeout=10) as response:
+                assert response.headers["Content-Type"] == "application/x-ndjson"
+                for line in response.iter_lines(chunk_size=1):
+                    arrivals.append((json.loads(line), time.monotonic() - started))
+
+            lines = [line for line, _ in arrivals]
+            assert [line.get("index") for line in lines[:3]][2] == 0  # the slow URL finishes last
+            assert lines[-1] == {"done": True, "summary": lines[-1]["summary"]}
+            assert lines[-1]["summary"]["succeeded"] == 2 and lines[-1]["summary"]["failed"] == 1
+            fast_arrival = next(t for line, t in arrivals if line.get("index") == 1)
+            assert fast_arrival < 0.4
+
+            # Without streaming, results come back together in request order
+            result = requests.post(mcp_url, json={"urls": urls[:2], "extract": True}, timeout=10).json()["result"]
+            assert [r["index"] for r in result["results"]] == [0, 1]
+            assert result["success"] and result["results"][1]["text"] == "x" * 1024
+
+            response = requests.post(mcp_url, json={"urls": []}, timeout=10)
+            assert response.status_code == 400
+        finally:
+            mcp.shutdown()
+            mcp.server_close()
+            pool.shutdown()
+            server.engine.close()
+    print("✓ Each URL is reported as soon as it completes")
+
+
+def test_download_benchmark():
+    """Test the engine comparison benchmark on a small workload"""
+    print("Testing download benchmark...")
+
+    summary = run_download_benchmark(num_urls=40, size_kb=8, latency_ms=20, parallelism=4, per_host=16)
+
+    assert summary["threads"]["succeeded"] == summary["async"]["succeeded"] == 40
+    assert summary["async"]["connections"] <= 16
+    assert summary["async"]["urls_per_second"] > summary["threads"]["urls_per_second"]
+    print("✓ Benchmark compares both engines")
+
+
+if __name__ == "__main__":
+    test_per_host_limit_and_connection_reuse()
+    test_politeness_delay()
+    test_size_ceiling_aborts_early()
+    test_total_timeout_and_request_deadline()
+    test_batch_request_streams_completions()
+    test_download_benchmark()
+    print("\nAll async download engine tests passed!")
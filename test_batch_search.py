@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the batch_search action of the search server
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from search_server.mcp_search_server import SearchRequestHandler, ThreadedHTTPServer, normalize_url
+from test_search_cache import StandInBrave, make_server
+
+PAGES = {
+    "python asyncio": ["https://docs.python.org/3/library/asyncio.html", "https://realpython.com/async-io-python/",
+                       "https://example.com/a"],
+    "asyncio tutorial": ["https://realpython.com/async-io-python", "https://example.com/b"],
+    "event loop python": ["http://www.docs.python.org/3/library/asyncio.html#top", "https://example.com/c"],
+}
+
+
+def test_normalize_url():
+    """Test which URLs count as the same page"""
+    print("Testing URL normalization...")
+
+    assert normalize_url("https://www.Example.com/path/") == normalize_url("http://example.com/path#section")
+    assert normalize_url("https://example.com/page?id=1") != normalize_url("https://example.com/page?id=2")
+    assert normalize_url("not a url") == "not a url"
+    print("✓ Scheme, www., fragments and trailing slashes are ignored")
+
+
+def test_batch_merges_and_deduplicates():
+    """Test merged results with per-query provenance"""
+    print("Testing batch search merging...")
+
+    with StandInBrave(pages=PAGES) as brave:
+        server = make_server(brave, rate_limit=0)
+        batch = server.batch_search(["python asyncio", "asyncio tutorial", "event loop python", "Python  asyncio"])
+
+        assert batch["success"] and batch["error"] is None
+        assert [report["query"] for report in batch["queries"]] == ["python asyncio", "asyncio tutorial", "event loop python"]
+        assert [report["result_count"] for report in batch["queries"]] == [3, 2, 2]
+        assert len(brave.queries) == 3  # the repeated query is searched once
+
+        urls = [result["url"] for result in batch["results"]]
+        assert len(urls) == 5  # 7 results, 2 pages found twice
+        docs, realpython = batch["results"][0], batch["results"][1]
+        assert docs["url"] == "https://docs.python.org/3/library/asyncio.html"
+        assert docs["queries"] == [{"query": "python asyncio", "rank": 1}, {"query": "event loop python", "rank": 1}]
+        assert [q["query"] for q in realpython["queries"]] == ["asyncio tutorial", "python asyncio"]
+        assert urls[2:] == ["https://example.com/b", "https://example.com/c", "https://example.com/a"]
+        server.session.close()
+    print("✓ 7 results merged into 5 unique pages with their queries and ranks")
+
+
+def test_batch_runs_concurrently_within_rate_limit():
+    """Test that queries overlap when the rate limit allows and are paced when it does not"""
+    print("Testing batch concurrency...")
+
+    with StandInBrave(latency=0.3) as brave:
+        server = make_server(brave, rate_limit=0)
+        started = time.monotonic()
+        batch = server.batch_search([f"query {i}" for i in range(5)])
+        assert batch["success"] and time.monotonic() - started < 0.6
+        server.session.close()
+
+    with StandInBrave(min_interval=0.1, latency=0.01) as brave:
+        server = make_server(brave, rate_limit=10, rate_burst=1)
+        batch = server.batch_search([f"query {i}" for i in range(4)])
+        assert all(report["success"] for report in batch["queries"]) and brave.rejected == 0
+        server.session.close()
+    print("✓ Five 300ms searches finish together; paced searches get no 429s")
+
+
+def test_batch_over_http():
+    """Test the batch request format, partial failures and validation"""
+    print("Testing batch search over HTTP...")
+
+    with StandInBrave(pages=PAGES) as brave:
+        server = make_server(brave, rate_limit=0)
+        SearchRequestHandler.set_search_func(server.perform_search)
+        SearchRequestHandler.set_batch_func(server.batch_search)
+        httpd = ThreadedHTTPServer(("127.0.0.1", 0), SearchRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/batch_search"
+        try:
+            payload = {"action": "batch_search", "parameters": {"queries": ["python asyncio", "asyncio tutorial"], "count": 5}}
+            result = requests.post(url, json=payload, timeout=5).json()["result"]
+            assert result["success"] and len(result["results"]) == 4
+            assert brave.queries[0]["count"] == ["5"]
+
+            server.brave_api_key = None
+            server.cache.clear()
+            failed = requests.post(url, json={"queries": ["python asyncio"]}, timeout=5).json()["result"]
+            assert not failed["success"] and "BRAVE_SEARCH_API_KEY" in failed["error"]
+
+            assert requests.post(url, json={"queries": []}, timeout=5).status_code == 400
+            assert requests.post(url, json={"queries": ["q"] * 11}, timeout=5).status_code == 400
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            server.session.close()
+    print("✓ batch_search accepts the planner's request format")
+
+
+if __name__ == "__main__":
+    test_normalize_url()
+    test_batch_merges_and_deduplicates()
+    test_batch_runs_concurrently_within_rate_limit()
+    test_batch_over_http()
+    print("\nAll batch search tests passed!")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Test script to verify near-duplicate chunk detection at ingestion time
+"""
+
+import sys
+import os
+import tempfile
+import uuid
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document as LCDocument
+
+from rag_component import chunk_deduplicator
+from rag_component.chunk_deduplicator import ChunkDeduplicator, MinHasher, estimated_similarity, normalize_tokens
+from rag_component.embedding_manager import EmbeddingManager
+from rag_component.main import RAGOrchestrator
+from rag_component.retrieval_benchmark import StandInEmbeddingServer
+from rag_component.vector_store_manager import VectorStoreManager
+
+BOILERPLATE = (
+    "This document is provided for information purposes only. Reproduction or distribution of any part "
+    "of this standard without the written permission of the publisher is prohibited by law."
+)
+BOILERPLATE_REVISED = BOILERPLATE.replace("prohibited by law.", "prohibited by law!").upper()
+
+BASE_TEXT = (
+    "Pressure vessels shall be inspected at intervals not exceeding twelve months by a qualified inspector "
+    "who records wall thickness readings, weld condition and the state of every relief valve fitted to the vessel. "
+    "Any defect found during the inspection must be reported to the plant manager before the vessel returns to service."
+)
+
+
+def _chunk(text, source, file_id=None):
+    return LCDocument(page_content=text, metadata={"source": source, "title": source, "file_id": file_id or source})
+
+
+def test_minhash_similarity():
+    """Test that signatures estimate shingle similarity"""
+    print("Testing MinHash signatures...")
+
+    hasher = MinHasher(num_perm=128, shingle_size=3)
+    revised = BASE_TEXT.replace("twelve months", "twelve calendar months")
+    base = hasher.signature(normalize_tokens(BASE_TEXT))
+
+    assert estimated_similarity(base, hasher.signature(normalize_tokens(BASE_TEXT.upper()))) == 1.0
+    assert estimated_similarity(base, hasher.signature(normalize_tokens(revised))) > 0.8
+    assert estimated_similarity(base, hasher.signature(normalize_tokens(BOILERPLATE))) < 0.2
+    print("✓ Signatures separate revisions from unrelated text")
+
+
+def test_detects_duplicates_within_and_across_batches():
+    """Test batch-local and persisted detection, and that nothing is recorded before commit"""
+    print("Testing duplicate detection...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, "dedup.sqlite3")
+        dedup = ChunkDeduplicator("documents", index_path=index_path, mode="link", threshold=0.9)
+
+        first = dedup.deduplicate([
+            _chunk(BOILERPLATE, "a.pdf"),
+            _chunk(BASE_TEXT, "a.pdf"),
+            _chunk(BOILERPLATE_REVISED, "a.pdf")
+        ])
+        assert len(first.documents) == 2
+        assert first.duplicates[0]["canonical_id"] == first.ids[0]
+
+        # Not committed yet: a new pass does not see the first batch
+        assert not dedup.deduplicate([_chunk(BASE_TEXT, "b.pdf")]).duplicates
+        dedup.commit(first)
+
+        # The index persists across processes (simulated by reopening the file)
+        chunk_deduplicator._indexes.pop(index_path).connection.close()
+        reopened = ChunkDeduplicator("documents", index_path=index_path, mode="link", threshold=0.9)
+        second = reopened.deduplicate([_chunk(BASE_TEXT + " ", "b.pdf"), _chunk(BOILERPLATE, "b.pdf")])
+        assert not second.documents
+        assert {d["canonical_id"] for d in second.duplicates} == set(first.ids)
+
+        # Collections are isolated
+        other = ChunkDeduplicator("other", index_path=index_path, mode="link")
+        assert len(other.deduplicate([_chunk(BASE_TEXT, "b.pdf")]).documents) == 1
+        chunk_deduplicator._indexes.pop(index_path).connection.close()
+    print("✓ Duplicates are found in the batch and across ingests")
+
+
+def test_link_mode_provenance_and_promotion():
+    """Test that linked sources show in results and survive deletion of the canonical chunk"""
+    print("Testing link mode through the vector store manager...")
+
+    with StandInEmbeddingServer(dimension=64) as server:
+        embedding_manager = EmbeddingManager(
+            provider="LM Studio", model_name="stand-in", hostname=server.host, port=str(server.port), api_path="/v1"
+        )
+        manager = VectorStoreManager(
+            store_type="qdrant",
+            embedding_manager=embedding_manager,
+            collection_name=f"dedup_{uuid.uuid4().hex[:8]}",
+            qdrant_url=":memory:",
+            dedup_mode="link"
+        )
+        manager.add_documents([_chunk(BOILERPLATE, "a.pdf", "file-a"), _chunk(BASE_TEXT, "a.pdf", "file-a")])
+        manager.add_documents([_chunk(BOILERPLATE_REVISED, "b.pdf", "file-b")])
+        assert manager.client.count(manager.collection_name).count == 2
+        assert manager.deduplicator.stats() == {"canonical_chunks": 2, "linked_duplicates": 1}
+
+        results = manager.similarity_search("reproduction without written permission", top_k=1)
+        assert results[0].metadata["source"] == "a.pdf"
+        assert [s["source"] for s in results[0].metadata["duplicate_sources"]] == ["b.pdf"]
+
+        # Deleting the canonical document promotes the duplicate so b.pdf keeps its chunk
+        assert manager.delete_documents(file_id="file-a") == 2
+        results = manager.similarity_search("reproduction without written permission", top_k=1)
+        assert results[0].metadata["source"] == "b.pdf"
+        assert "duplicate_sources" not in results[0].metadata
+        assert manager.deduplicator.stats() == {"canonical_chunks": 1, "linked_duplicates": 0}
+        manager.client.delete_collection(manager.collection_name)
+    print("✓ Duplicate sources are shown and promoted on delete")
+
+
+def test_reingest_after_vector_data_was_wiped():
+    """Test that index entries of chunks the store no longer has are not used as canonical"""
+    print("Testing re-ingest after the vector data was wiped...")
+
+    with StandInEmbeddingServer(dimension=64) as server:
+        embedding_manager = EmbeddingManager(
+            provider="LM Studio", model_name="stand-in", hostname=server.host, port=str(server.port), api_path="/v1"
+        )
+        collection_name = f"wiped_{uuid.uuid4().hex[:8]}"
+        chunks = [_chunk(BOILERPLATE, "a.pdf"), _chunk(BASE_TEXT, "a.pdf"), _chunk(BASE_TEXT.upper() + " Annex", "a.pdf")]
+
+        def manager():
+            return VectorStoreManager(
+                store_type="qdrant", embedding_manager=embedding_manager, collection_name=collection_name,
+                qdrant_url=":memory:", dedup_mode="link"
+            )
+
+        first = manager()
+        first.add_documents([_chunk(BOILERPLATE, "a.pdf"), _chunk(BASE_TEXT, "a.pdf")])
+        assert first.client.count(collection_name).count == 2
+
+        # The collection is dropped behind the index's back (cleanup script, lost volume, ...)
+        first.client.delete_collection(collection_name)
+        second = manager()
+        second.add_documents([_chunk(BOILERPLATE, "a.pdf"), _chunk(BASE_TEXT, "a.pdf")])
+        assert second.client.count(collection_name).count == 2
+        assert second.deduplicator.stats() == {"canonical_chunks": 2, "linked_duplicates": 0}
+
+        # Live canonical chunks are still used
+        second.add_documents([_chunk(BOILERPLATE, "b.pdf")])
+        assert second.client.count(collection_name).count == 2
+        second.client.delete_collection(collection_name)
+
+    # clear_dedup_index forgets a collection for scripts that wipe the data themselves
+    dedup = ChunkDeduplicator("cleared", index_path=":memory:", mode="link")
+    dedup.commit(dedup.deduplicate(chunks))
+    chunk_deduplicator.clear_dedup_index("cleared", path=":memory:")
+    assert dedup.stats() == {"canonical_chunks": 0, "linked_duplicates": 0}
+    print("✓ Re-ingesting after a wipe stores the chunks again")
+
+
+def test_replace_document_in_skip_mode_keeps_unchanged_chunks():
+    """Test that replacing a document does not drop chunks the new version shares with the old one"""
+    print("Testing replace in skip mode...")
+
+    with StandInEmbeddingServer(dimension=64) as server, tempfile.TemporaryDirectory() as storage_dir:
+        embedding_manager = EmbeddingManager(
+            provider="LM Studio", model_name="stand-in", hostname=server.host, port=str(server.port), api_path="/v1"
+        )
+        manager = VectorStoreManager(
+            store_type="qdrant",
+            embedding_manager=embedding_manager,
+            collection_name=f"replace_{uuid.uuid4().hex[:8]}",
+            qdrant_url=":memory:",
+            dedup_mode="skip"
+        )
+        manager.add_documents([_chunk(BOILERPLATE, "a.pdf", "file-a"), _chunk(BASE_TEXT, "a.pdf", "file-a")])
+
+        def ingest_new_version(file_paths, filenames, preprocess=True, file_ids=None):
+            manager.add_documents([
+                _chunk(BOILERPLATE, "a.pdf", file_ids[0]),
+                _chunk(BASE_TEXT, "a.pdf", file_ids[0]),
+                _chunk("Revision two adds a section on the testing of relief valves every six months.", "a.pdf", file_ids[0])
+            ])
+            return True
+
+        orchestrator = RAGOrchestrator.__new__(RAGOrchestrator)
+        orchestrator.vector_store_manager = manager
+        with patch("rag_component.file_storage_manager.RAG_FILE_STORAGE_DIR", storage_dir), \
+                patch.object(RAGOrchestrator, "ingest_documents_from_upload", side_effect=ingest_new_version):
+            result = orchestrator.replace_document("file-a", "/tmp/a-v2.pdf", "a.pdf")
+
+        assert len(manager.find_chunks(file_id=result["file_id"])) == 3
+        assert not manager.find_chunks(file_id="file-a")
+        assert not manager.deduplicator.excluded_file_ids
+        manager.client.delete_collection(manager.collection_name)
+    print("✓ The new version keeps all its chunks after the old one is deleted")
+
+
+def test_delete_and_replace_fully_linked_document():
+    """Test that a document stored only as linked duplicates can be deleted and replaced"""
+    print("Testing delete and replace of a fully linked document...")
+
+    with StandInEmbeddingServer(dimension=64) as server, tempfile.TemporaryDirectory() as storage_dir:
+        embedding_manager = EmbeddingManager(
+            provider="LM Studio", model_name="stand-in", hostname=server.host, port=str(server.port), api_path="/v1"
+        )
+        manager = VectorStoreManager(
+            store_type="qdrant",
+            embedding_manager=embedding_manager,
+            collection_name=f"linked_{uuid.uuid4().hex[:8]}",
+            qdrant_url=":memory:",
+            dedup_mode="link"
+        )
+        manager.add_documents([_chunk(BOILERPLATE, "a.pdf", "file-a"), _chunk(BASE_TEXT, "a.pdf", "file-a")])
+        manager.add_documents([_chunk(BOILERPLATE, "copy.pdf", "file-copy"), _chunk(BASE_TEXT, "copy.pdf", "file-copy")])
+        os.makedirs(os.path.join(storage_dir, "file-copy"))
+        open(os.path.join(storage_dir, "file-copy", "copy.pdf"), "w").close()
+        assert not manager.find_chunks(file_id="file-copy")
+        assert len(manager.find_linked_chunks(file_id="file-copy")) == 2
+
+        def ingest_new_version(file_paths, filenames, preprocess=True, file_ids=None):
+            manager.add_documents([_chunk(BOILERPLATE, "copy.pdf", file_ids[0])])
+            return True
+
+        orchestrator = RAGOrchestrator.__new__(RAGOrchestrator)
+        orchestrator.vector_store_manager = manager
+        with patch("rag_component.file_storage_manager.RAG_FILE_STORAGE_DIR", storage_dir), \
+                patch.object(RAGOrchestrator, "ingest_documents_from_upload", side_effect=ingest_new_version):
+            replaced = orchestrator.replace_document("file-copy", "/tmp/copy-v2.pdf", "copy.pdf")
+            assert replaced["replaced_chunks"] == 2 and replaced["removed_files"] == ["file-copy"]
+            assert not manager.find_linked_chunks(file_id="file-copy")
+
+            deleted = orchestrator.delete_document(file_id=replaced["file_id"])
+        assert deleted["deleted_chunks"] == 0 and deleted["deleted_linked_chunks"] == 1
+        assert len(manager.find_chunks(file_id="file-a")) == 2
+        manager.client.delete_collection(manager.collection_name)
+    print("✓ Linked chunks are counted, reported and their files removed")
+
+
+def test_skip_mode_drops_duplicates():
+    """Test that skip mode neither stores nor links duplicates"""
+    print("Testing skip mode...")
+
+    dedup = ChunkDeduplicator(f"skip_{uuid.uuid4().hex[:8]}", index_path=":memory:", mode="skip")
+    result = dedup.deduplicate([_chunk(BASE_TEXT, "a.pdf"), _chunk(BASE_TEXT, "b.pdf")])
+    dedup.commit(result)
+
+    assert len(result.documents) == 1 and len(result.duplicates) == 1
+    assert dedup.provenance(result.ids) == {}
+    assert dedup.stats() == {"canonical_chunks": 1, "linked_duplicates": 0}
+    print("✓ Skip mode drops duplicates without provenance")
+
+
+if __name__ == "__main__":
+    test_minhash_similarity()
+    test_detects_duplicates_within_and_across_batches()
+    test_link_mode_provenance_and_promotion()
+    test_reingest_after_vector_data_was_wiped()
+    test_replace_document_in_skip_mode_keeps_unchanged_chunks()
+    test_delete_and_replace_fully_linked_document()
+    test_skip_mode_drops_duplicates()
+    print("\nAll chunk deduplication tests passed!")
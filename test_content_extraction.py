@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script to verify server-side content extraction in the download MCP server
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from download_server.content_extractor import detect_charset, extract_html_text
+from download_server.download_mcp_server import DownloadRequestHandler, MCPDownloadServer, ThreadedHTTPServer
+
+ARTICLE = (
+    "Brent crude rose to eighty dollars a barrel on Tuesday after producers agreed to extend "
+    "their output cuts until the end of the year."
+)
+PAGE = f"""<!DOCTYPE html>
+<html><head><title>Oil market update</title>
+<script>var tracking = "do not index";</script><style>body {{ color: red; }}</style></head>
+<body>
+<header><a href="/">Home</a> <a href="/markets">Markets</a></header>
+<nav><ul><li><a href="/a">Energy</a></li><li><a href="/b">Metals</a></li></ul></nav>
+<div class="cookie-banner">We use cookies to improve your experience on this website.</div>
+<article><header><h1>Oil climbs</h1></header><p>{ARTICLE}</p>
+<p>Analysts expect prices to stay above seventy five dollars &amp; volatility to ease.</p></article>
+<aside>Most read: ten tips for saving money on your heating bill this winter season.</aside>
+<footer>Copyright 2024 Example News. All rights reserved. Terms of use and privacy policy.</footer>
+</body></html>"""
+LATIN1_PAGE = (
+    '<html><head><meta charset="iso-8859-1"></head><body>'
+    '<p>Le caf\xe9 de la gare ouvre \xe0 six heures du matin pour les voyageurs press\xe9s du quartier.</p>'
+    '</body></html>'
+).encode("latin-1")
+
+
+class StandInWebHandler(BaseHTTPRequestHandler):
+    """Serves a few fixed pages"""
+
+    routes = {
+        "/article.html": ("text/html; charset=utf-8", PAGE.encode("utf-8")),
+        "/latin1": ("text/html", LATIN1_PAGE),
+        "/notes.txt": ("text/plain", ("Résumé " * 2000).encode("utf-8")),
+        "/image.png": ("image/png", b"\x89PNG\r\n\x1a\n" + bytes(256))
+    }
+
+    def do_GET(self):
+        content_type, body = self.routes[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_html_boilerplate_removal():
+    """Test that navigation, scripts and page chrome are dropped"""
+    print("Testing HTML boilerplate removal...")
+
+    text, title = extract_html_text(PAGE)
+
+    assert title == "Oil market update"
+    assert text.splitlines()[0] == "Oil climbs"
+    assert ARTICLE in text
+    assert "volatility to ease" in text and "&amp;" not in text
+    for boilerplate in ["Markets", "Energy", "cookies", "Most read", "Copyright", "tracking", "color: red"]:
+        assert boilerplate not in text, boilerplate
+
+    # Without <main>/<article>, short link-heavy blocks are dropped and long text kept
+    text, _ = extract_html_text(
+        "<body><div><a href='/'>Home</a> | <a href='/x'>About</a></div>"
+        "<h2>Opening hours</h2><div>The library opens at nine and closes at six on every weekday.</div></body>"
+    )
+    assert text == "Opening hours\nThe library opens at nine and closes at six on every weekday."
+    print("✓ Only the main text survives")
+
+
+def test_content_roots_are_never_skipped():
+    """Test that class/id hints on page and content roots do not drop the whole page"""
+    print("Testing content roots with boilerplate-like classes...")
+
+    text, _ = extract_html_text(
+        '<html class="no-js menu-open"><body class="page has-sidebar">'
+        '<div class="sidebar"><a href="/a">Archive</a></div>'
+        f'<main id="main-header-offset"><p>{ARTICLE}</p></main>'
+        f'<div role="main" class="content nav-offset"><p>Refineries ran at full capacity for the third week.</p></div>'
+        '</body></html>'
+    )
+    assert ARTICLE in text and "Refineries ran at full capacity" in text
+    assert "Archive" not in text
+    print("✓ Page and content roots are kept, non-root chrome is dropped")
+
+
+def test_charset_detection():
+    """Test header, meta tag and fallback charset detection"""
+    print("Testing charset detection...")
+
+    assert detect_charset(b"plain", declared="ISO-8859-1") == "iso8859-1"
+    assert detect_charset(LATIN1_PAGE, html=True) == "iso8859-1"
+    assert detect_charset("Résumé".encode("utf-8")) == "utf-8"
+    # A byte cap that splits the last multi-byte character does not hide UTF-8
+    assert detect_charset("Résumé".encode("utf-8")[:2]) == "utf-8"
+    assert detect_charset(b"\xef\xbb\xbfhello") == "utf-8-sig"
+    print("✓ Charsets are detected")
+
+
+def test_download_and_extract_caps():
+    """Test text extraction and the max_chars / max_bytes caps"""
+    print("Testing download_and_extract...")
+
+    web = HTTPServer(("127.0.0.1", 0), StandInWebHandler)
+    base_url = _serve(web)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            server = MCPDownloadServer(download_dir=temp_dir, log_level="WARNING")
+
+            result = server.download_and_extract(f"{base_url}/latin1")
+            assert result["success"] and result["error"] is None
+            assert "Le café de la gare ouvre à six heures" in result["text"]
+            assert result["charset"] == "iso8859-1" and result["kind"] == "html"
+            assert os.path.exists(result["file_path"])
+
+            result = server.download_and_extract(f"{base_url}/notes.txt", max_chars=100, max_bytes=1001)
+            assert result["bytes"] == 1001 and result["truncated"]
+            assert result["chars"] == 100 and result["text"].startswith("Résumé Résumé")
+            assert "�" not in result["text"]
+
+            result = server.download_and_extract(f"{base_url}/image.png")
+            assert result["success"] and result["text"] == "" and "No text extractor" in result["error"]
+
+            # Plain downloads are unchanged
+            success, file_path, error = server.download_file(f"{base_url}/notes.txt")
+            assert success and error is None and os.path.getsize(file_path) == len("Résumé ".encode("utf-8")) * 2000
+    finally:
+        web.shutdown()
+        web.server_close()
+    print("✓ Text is extracted and capped")
+
+
+def test_extract_mode_over_http():
+    """Test that the MCP endpoint returns the text in extract mode and only a path otherwise"""
+    print("Testing extract mode through the MCP endpoint...")
+
+    web = HTTPServer(("127.0.0.1", 0), StandInWebHandler)
+    web_url = _serve(web)
+    pool = ThreadPoolExecutor(max_workers=2)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        server = MCPDownloadServer(download_dir=temp_dir, log_level="WARNING")
+        DownloadRequestHandler.set_download_func(server.download_file)
+        DownloadRequestHandler.set_extract_func(server.download_and_extract)
+        DownloadRequestHandler.set_thread_pool(pool)
+        mcp = ThreadedHTTPServer(("127.0.0.1", 0), DownloadRequestHandler)
+        mcp_url = _serve(mcp)
+        try:
+            response = requests.post(f"{mcp_url}/download", json={
+                "action": "download",
+                "parameters": {"url": f"{web_url}/article.html", "extract": True, "max_chars": 5000}
+            }, timeout=10)
+            result = response.json()["result"]
+            assert ARTICLE in result["text"] and "Copyright" not in result["text"]
+            assert result["title"] == "Oil market update"
+            assert result["chars"] == len(result["text"]) < len(PAGE)
+
+            result = requests.post(f"{mcp_url}/download", json={"url": f"{web_url}/article.html"}, timeout=10).json()["result"]
+            assert result["success"] and "text" not in result and os.path.exists(result["file_path"])
+
+            response = requests.post(f"{mcp_url}/download", json={"url": f"{web_url}/latin1", "max_chars": "many"}, timeout=10)
+            assert response.status_code == 400
+        finally:
+            mcp.shutdown()
+            mcp.server_close()
+            web.shutdown()
+            web.server_close()
+            pool.shutdown()
+    print("✓ Extract mode returns cleaned text in the response")
+
+
+if __name__ == "__main__":
+    test_html_boilerplate_removal()
+    test_content_roots_are_never_skipped()
+    test_charset_detection()
+    test_download_and_extract_caps()
+    test_extract_mode_over_http()
+    print("\nAll content extraction tests passed!")
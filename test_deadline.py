@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test script to verify end-to-end request deadlines: budget helpers, MCP calls, graph nodes, LLM calls and MCP servers
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.graph import StateGraph
+from typing import TypedDict
+
+from utils.deadline import (
+    DEADLINE_HEADER, TIMEOUT_HEADER, DeadlineExceeded, bounded_timeout, check_deadline, current_deadline,
+    deadline_after, deadline_headers, deadline_scope, remaining_seconds, request_deadline, run_before_deadline
+)
+from utils.deadline_llm import DeadlineChatOpenAI
+from utils.mcp_resilience import CircuitBreakerRegistry, ResilientCaller
+from utils.mcp_transport import MCPTransport, make_framed_tcp_server
+from langgraph_agent.async_mcp_client import AsyncMCPClient
+from langgraph_agent.langgraph_agent import with_request_deadline
+from test_async_agent import StubMCPService, StubMCPHandler
+
+
+class RecordingHandler(StubMCPHandler):
+    """Stub handler that also records the deadline header of every call"""
+
+    def do_POST(self):
+        self.server.deadline_headers.append(self.headers.get(DEADLINE_HEADER))
+        super().do_POST()
+
+
+def recording_stub(latency=0.0):
+    stub = StubMCPService(latency=latency)
+    stub.RequestHandlerClass = RecordingHandler
+    stub.deadline_headers = []
+    return stub
+
+
+def test_deadline_helpers():
+    """Test reading deadlines from requests, capping them and deriving timeouts from the time left"""
+    print("Testing deadline helpers...")
+
+    assert current_deadline() is None and remaining_seconds() is None
+    assert bounded_timeout(30) == 30  # no deadline: the static timeout
+    check_deadline("nothing")
+
+    # Gateway: the client may ask for less than the maximum, never more
+    assert 9 < remaining_seconds(request_deadline({TIMEOUT_HEADER: "10"}, default_timeout=600, max_timeout=600)) <= 10
+    assert remaining_seconds(request_deadline({TIMEOUT_HEADER: "9999"}, default_timeout=600, max_timeout=600)) <= 600
+    assert request_deadline({TIMEOUT_HEADER: "junk"}) is None
+    # Services: the deadline comes from the header or the MCP payload
+    deadline = deadline_after(5)
+    assert request_deadline(deadline_headers(deadline)) == pytest.approx(deadline, abs=0.001)
+    assert request_deadline({}, {"deadline": deadline}) == deadline
+
+    with deadline_scope(deadline_after(2)):
+        assert 1 < bounded_timeout(30) <= 2
+        with deadline_scope(None):  # None keeps the outer deadline
+            assert current_deadline() is not None
+        with deadline_scope(deadline_after(-1)):
+            with pytest.raises(DeadlineExceeded):
+                bounded_timeout(30, "the test call")
+    assert current_deadline() is None
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run_before_deadline(slow(), deadline_after(0.1)))
+    assert time.monotonic() - started < 0.5
+    print("✓ Deadlines are parsed, capped and turned into timeouts")
+
+
+def test_mcp_calls_follow_the_deadline():
+    """Test that MCP calls send the deadline, stop waiting at it and are not held against the service"""
+    print("Testing MCP calls under a deadline...")
+
+    with recording_stub(latency=0.5) as stub:
+        transport = MCPTransport(timeout=30)
+        caller = ResilientCaller(CircuitBreakerRegistry(min_calls=1), balance=False)
+        service = stub.service("slow")
+
+        deadline = deadline_after(0.2)
+        with deadline_scope(deadline):
+            started = time.monotonic()
+            result = caller.call(service, "echo", {}, transport.call)
+            elapsed = time.monotonic() - started
+        assert result["status"] == "error" and result["error"].startswith("Deadline exceeded"), result
+        assert elapsed < 0.4, elapsed
+        assert float(stub.deadline_headers[0]) == pytest.approx(deadline, abs=0.001)
+
+        # Past the deadline the service is not called at all
+        with deadline_scope(deadline_after(-1)):
+            result = caller.call(service, "echo", {}, transport.call)
+        assert result["error"].startswith("Deadline exceeded") and stub.calls == 1
+
+        # Without a deadline the usual timeout applies and no header is sent
+        assert transport.call(service, "echo", {})["status"] == "success" and stub.deadline_headers[-1] is None
+        time.sleep(0.4)  # let the abandoned request finish
+        transport.close()
+
+    # Running out of time says nothing about the instance
+    assert caller.breakers.snapshot()["slow"]["recent_calls"] == 0
+    print(f"✓ The call gave up after {elapsed * 1000:.0f}ms instead of waiting 500ms")
+
+
+def test_async_mcp_client_follows_the_deadline():
+    """Test the async client: the deadline is forwarded and cuts the call short"""
+    print("Testing async MCP calls under a deadline...")
+
+    with recording_stub(latency=0.5) as stub:
+        async def run():
+            client = AsyncMCPClient(timeout=30)
+            with deadline_scope(deadline_after(0.2)):
+                started = time.monotonic()
+                result = await client.call_service(stub.service("slow"), "echo", {})
+                elapsed = time.monotonic() - started
+            await client.close()
+            return result, elapsed
+
+        result, elapsed = asyncio.run(run())
+        time.sleep(0.4)
+
+    assert result["status"] == "error" and result["error"].startswith("Deadline exceeded"), result
+    assert elapsed < 0.4 and stub.deadline_headers[0] is not None
+    print(f"✓ The async call gave up after {elapsed * 1000:.0f}ms")
+
+
+def test_graph_nodes_run_under_the_request_deadline():
+    """Test that nodes see the configurable deadline and do not start once it has passed"""
+    print("Testing graph nodes under a deadline...")
+
+    class State(TypedDict):
+        seen: float
+
+    def node(state):
+        return {"seen": current_deadline() or 0.0}
+
+    async def slow_node(state):
+        await asyncio.sleep(1)
+        return {"seen": 1.0}
+
+    def graph(implementation):
+        workflow = StateGraph(State)
+        workflow.add_node("node", with_request_deadline("node", implementation))
+        workflow.set_entry_point("node")
+        return workflow.compile()
+
+    deadline = deadline_after(5)
+    assert graph(node).invoke({"seen": 0.0}, {"configurable": {"deadline": deadline}})["seen"] == deadline
+    assert graph(node).invoke({"seen": 0.0})["seen"] == 0.0
+    with pytest.raises(DeadlineExceeded):
+        graph(node).invoke({"seen": 0.0}, {"configurable": {"deadline": deadline_after(-1)}})
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(graph(slow_node).ainvoke({"seen": 0.0}, {"configurable": {"deadline": deadline_after(0.1)}}))
+    assert time.monotonic() - started < 0.5
+    print("✓ Nodes run with the request deadline and are stopped by it")
+
+
+def test_llm_and_server_side_deadlines():
+    """Test the LLM call timeout and a server refusing work whose deadline has passed"""
+    print("Testing LLM calls and MCP servers under a deadline...")
+
+    llm = DeadlineChatOpenAI(model="test-model", api_key="sk-fake-key", base_url="http://127.0.0.1:1/v1")
+    messages = [HumanMessage(content="hi")]
+    assert "timeout" not in llm._get_request_payload(messages)
+    with deadline_scope(deadline_after(3)):
+        assert 2 < llm._get_request_payload(messages)["timeout"] <= 3
+    with deadline_scope(deadline_after(-1)):
+        with pytest.raises(DeadlineExceeded):
+            llm.invoke(messages)
+
+    # A tcp-framed server sees the caller's deadline and refuses requests that arrive too late
+    server = make_framed_tcp_server(("127.0.0.1", 0), lambda action, parameters: {"deadline": current_deadline()})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service = {"id": "framed", "host": "127.0.0.1", "port": server.server_address[1], "metadata": {"protocol": "tcp-framed"}}
+    transport = MCPTransport()
+    deadline = deadline_after(5)
+    with deadline_scope(deadline):
+        result = transport.call(service, "echo", {})
+    assert result["result"]["deadline"] == deadline
+    assert transport.call(service, "echo", {})["result"]["deadline"] is None
+    transport.close()
+    server.shutdown()
+    server.server_close()
+    print("✓ LLM calls get the time left as timeout and servers work within the caller's deadline")
+
+
+if __name__ == "__main__":
+    test_deadline_helpers()
+    test_mcp_calls_follow_the_deadline()
+    test_async_mcp_client_follows_the_deadline()
+    test_graph_nodes_run_under_the_request_deadline()
+    test_llm_and_server_side_deadlines()
+    print("\nAll deadline tests passed!")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the caching, batching DNS resolver of the DNS server
+"""
+
+import sys
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from search_server.dns_resolver import DNSResolver
+from search_server.dns_benchmark import StubDNSServer, run_dns_benchmark
+from search_server.mcp_dns_server import CACHE_POLICY, DNSRequestHandler, MCPServer, ThreadedHTTPServer
+from utils.mcp_result_cache import cache_ttl
+from utils.mcp_resilience import is_idempotent
+
+
+def test_positive_cache_respects_ttl():
+    """Test that answers are cached for their record TTL"""
+    print("Testing positive caching...")
+
+    with StubDNSServer(ttl=1) as stub:
+        resolver = DNSResolver(nameservers=[stub.nameserver])
+        first = resolver.resolve("www.example.test")
+        second = resolver.resolve("WWW.Example.test.")
+        assert first["success"] and first["cache"] == "miss" and first["addresses"][0].startswith("10.")
+        assert second["cache"] == "hit" and second["addresses"] == first["addresses"] and second["ttl"] <= 1
+        assert stub.queries == 1
+
+        time.sleep(1.1)
+        assert resolver.resolve("www.example.test")["cache"] == "miss" and stub.queries == 2
+
+        ipv6 = resolver.resolve("www.example.test", "aaaa")
+        assert ipv6["success"] and ipv6["record_type"] == "AAAA" and ipv6["addresses"][0].startswith("fd00::")
+        assert resolver.resolve("10.1.2.3")["addresses"] == ["10.1.2.3"] and stub.queries == 3
+        assert not resolver.resolve("www.example.test", "HINFO")["success"]
+    print("✓ Repeat lookups are served until the TTL runs out")
+
+
+def test_negative_cache_and_tcp_fallback():
+    """Test NXDOMAIN/NODATA caching with the SOA TTL and the TCP retry for truncated replies"""
+    print("Testing negative caching and TCP fallback...")
+
+    with StubDNSServer(negative_ttl=1) as stub:
+        resolver = DNSResolver(nameservers=[stub.nameserver], negative_ttl=300)
+        missing = resolver.resolve("nx-host.example.test")
+        assert not missing["success"] and "NXDOMAIN" in missing["error"] and missing["ttl"] == 1
+        assert resolver.resolve("nx-host.example.test")["cache"] == "hit" and stub.queries == 1
+
+        no_data = resolver.resolve("www.example.test", "MX")
+        assert not no_data["success"] and "No MX records" in no_data["error"]
+        assert resolver.cache_info()["negative_hits"] == 1
+
+        large = resolver.resolve("big-answer.example.test")
+        assert large["success"] and stub.tcp_queries == 1
+    print("✓ Negative answers are cached and truncated replies are retried over TCP")
+
+
+def test_hosts_file_and_system_resolver_fallback():
+    """Test that names only the local resolver knows resolve and are not cached as missing"""
+    print("Testing /etc/hosts and system resolver fallback...")
+
+    with StubDNSServer() as stub, tempfile.NamedTemporaryFile("w", suffix=".hosts") as hosts_file:
+        hosts_file.write("127.0.0.1 localhost\n::1 localhost ip6-localhost\n10.1.2.3 Intranet-App.corp.test intranet-app # office\n")
+        hosts_file.flush()
+        resolver = DNSResolver(nameservers=[stub.nameserver], system_fallback=True, hosts_file=hosts_file.name)
+
+        assert resolver.resolve("localhost")["addresses"] == ["127.0.0.1"]
+        assert resolver.resolve("localhost", "AAAA")["addresses"] == ["::1"]
+        assert resolver.resolve("intranet-app.corp.test.")["addresses"] == ["10.1.2.3"]
+        assert stub.queries == 0
+
+        # "nx-wiki" gets NXDOMAIN from the nameserver but resolves through a search domain
+        with patch("search_server.dns_resolver.socket.getaddrinfo", return_value=[(2, 1, 6, "", ("10.4.4.4", 0))]):
+            wiki = resolver.resolve("nx-wiki")
+        assert wiki["success"] and wiki["addresses"] == ["10.4.4.4"] and wiki["ttl"] == 60
+
+        with patch("search_server.dns_resolver.socket.getaddrinfo", side_effect=socket.gaierror("not found")):
+            missing = resolver.resolve("nx-missing.example.test")
+        assert not missing["success"] and "NXDOMAIN" in missing["error"]
+        assert resolver.resolve("nx-missing.example.test")["cache"] == "hit"
+
+    assert DNSResolver(nameservers=None).system_fallback
+    assert not DNSResolver(nameservers=["127.0.0.1"]).system_fallback
+    print("✓ Hosts entries and search-domain names resolve like with the system resolver")
+
+
+def test_timeout_and_failover():
+    """Test that a silent nameserver times out and the next one is tried"""
+    print("Testing upstream timeouts...")
+
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(("127.0.0.1", 0))
+    dead = f"127.0.0.1:{silent.getsockname()[1]}"
+    try:
+        with StubDNSServer() as stub:
+            resolver = DNSResolver(nameservers=[dead, stub.nameserver], timeout=0.2, attempts=1)
+            assert resolver.resolve("www.example.test")["success"]
+
+        resolver = DNSResolver(nameservers=[dead], timeout=0.2, attempts=2)
+        started = time.monotonic()
+        result = resolver.resolve("www.example.test")
+        elapsed = time.monotonic() - started
+        assert not result["success"] and "timed out" in result["error"]
+        assert 0.35 < elapsed < 1.0
+        assert resolver.resolve("www.example.test")["cache"] == "miss"  # failures are not cached
+    finally:
+        silent.close()
+    print("✓ Lookups give up after timeout x attempts")
+
+
+def test_batch_resolution_over_http():
+    """Test single and batch requests to the DNS server and its metrics endpoint"""
+    print("Testing batch resolution over HTTP...")
+
+    with StubDNSServer(latency_ms=50) as stub:
+        server = MCPServer(log_level="WARNING")
+        server.resolver = DNSResolver(nameservers=[stub.nameserver], max_concurrency=32)
+        DNSRequestHandler.set_resolve_func(server.resolve)
+        DNSRequestHandler.set_batch_func(server.resolve_batch)
+        DNSRequestHandler.set_metrics_func(server.resolver.cache_info)
+        httpd = ThreadedHTTPServer(("127.0.0.1", 0), DNSRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        try:
+            single = requests.post(base_url, json={"parameters": {"fqdn": "www.example.test"}}, timeout=5).json()
+            assert single["result"]["success"] and single["result"]["ipv4_addresses"] == single["result"]["addresses"]
+
+            names = [f"host-{i}.example.test" for i in range(30)] + ["nx-gone.example.test", "host-0.example.test"]
+            started = time.monotonic()
+            response = requests.post(base_url, json={"fqdns": names, "record_types": ["A", "AAAA"]}, timeout=10)
+            elapsed = time.monotonic() - started
+            batch = response.json()["result"]
+            assert [r["fqdn"] for r in batch["results"][::2]] == names
+            assert [r["record_type"] for r in batch["results"][:2]] == ["A", "AAAA"]
+            assert batch["summary"] == {"lookups": 64, "succeeded": 62, "failed": 2}
+            assert batch["results"][-1]["cache"] == "shared"
+            assert elapsed < 0.5  # 62 upstream queries at 50ms each, resolved concurrently
+
+            assert requests.post(base_url, json={"fqdns": []}, timeout=5).status_code == 400
+            metrics = requests.get(f"{base_url}/metrics", timeout=5).json()["result"]
+            assert metrics["entries"] == 63 and metrics["queries"] == stub.queries == 63
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            server.resolver.close()
+    print("✓ A batch of names resolves in about one round trip")
+
+
+def test_answers_are_not_cached_again_by_mcp_clients():
+    """Test that the DNS server's cache policy leaves record TTLs to its resolver"""
+    print("Testing the DNS cache policy...")
+
+    service = {"id": "dns-1", "type": "mcp_dns", "metadata": {"cache_policy": CACHE_POLICY}}
+    for action in ["resolve", "batch_resolve"]:
+        assert cache_ttl(service, action) is None
+        assert is_idempotent(service, action)
+    print("✓ MCP clients do not cache DNS answers but may hedge lookups")
+
+
+def test_dns_benchmark():
+    """Test the resolver benchmark on a small workload"""
+    print("Testing DNS benchmark...")
+
+    summary = run_dns_benchmark(num_lookups=600, unique_names=60, latency_ms=1.0, batch_size=50)
+    modes = summary["modes"]
+
+    assert all(report["resolved"] == modes["batch_cached"]["resolved"] for report in modes.values())
+    assert modes["sequential_uncached"]["upstream_queries"] == 600
+    assert modes["batch_cached"]["upstream_queries"] == 60
+    assert modes["batch_cached"]["lookups_per_second"] > modes["sequential_uncached"]["lookups_per_second"]
+    print("✓ Benchmark compares the resolution modes")
+
+
+if __name__ == "__main__":
+    test_positive_cache_respects_ttl()
+    test_negative_cache_and_tcp_fallback()
+    test_hosts_file_and_system_resolver_fallback()
+    test_timeout_and_failover()
+    test_batch_resolution_over_http()
+    test_answers_are_not_cached_again_by_mcp_clients()
+    test_dns_benchmark()
+    print("\nAll DNS resolver tests passed!")
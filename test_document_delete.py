@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script to verify per-document delete and replace in the vector store
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import uuid
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from rag_component.vector_store_manager import VectorStoreManager
+from rag_component.file_storage_manager import FileStorageManager
+from rag_component.main import RAGOrchestrator
+
+
+class _StubQdrantStore:
+    """Minimal stand-in for the LangChain wrapper; only the payload key is needed"""
+    metadata_payload_key = "metadata"
+
+
+def _make_qdrant_manager():
+    """Create a VectorStoreManager backed by an in-memory Qdrant collection"""
+    manager = VectorStoreManager.__new__(VectorStoreManager)
+    manager.store_type = "qdrant"
+    manager.collection_name = "documents"
+    manager.client = QdrantClient(":memory:")
+    manager.vector_store = _StubQdrantStore()
+    manager.client.create_collection(
+        collection_name="documents",
+        vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE),
+    )
+    return manager
+
+
+def _add_chunks(manager, file_id, source, count, extra_metadata=None):
+    points = []
+    for i in range(count):
+        metadata = {"file_id": file_id, "source": source, "chunk": i}
+        metadata.update(extra_metadata or {})
+        points.append(models.PointStruct(
+            id=str(uuid.uuid4()),
+            vector=[1.0, float(i)],
+            payload={"page_content": f"{source} chunk {i}", "metadata": metadata},
+        ))
+    manager.client.upsert(collection_name="documents", points=points)
+    return [str(point.id) for point in points]
+
+
+def test_delete_by_file_id_and_source():
+    """Test filter-based deletes only remove the selected document"""
+    print("Testing delete by file_id and source...")
+
+    manager = _make_qdrant_manager()
+    _add_chunks(manager, "file-a", "a.pdf", 3)
+    _add_chunks(manager, "file-b", "b.pdf", 2)
+
+    assert manager.delete_documents(file_id="file-a") == 3
+    assert manager.find_chunks(file_id="file-a") == []
+    assert len(manager.find_chunks(file_id="file-b")) == 2
+
+    assert manager.delete_documents(source="b.pdf") == 2
+    assert manager.client.count("documents").count == 0
+    print("✓ Filter-based deletes remove only the selected document")
+
+
+def test_delete_by_chunk_ids():
+    """Test id-based deletes"""
+    print("Testing delete by chunk ids...")
+
+    manager = _make_qdrant_manager()
+    ids = _add_chunks(manager, "file-a", "a.pdf", 3)
+
+    assert manager.delete_documents(ids=ids[:2]) == 2
+    remaining = manager.find_chunks(file_id="file-a")
+    assert [chunk_id for chunk_id, _ in remaining] == [ids[2]]
+
+    try:
+        manager.delete_documents()
+    except ValueError:
+        print("✓ Id-based deletes work and an empty selector is rejected")
+        return
+    raise AssertionError("delete_documents() without a selector should raise ValueError")
+
+
+def test_orchestrator_delete_removes_stored_files():
+    """Test that deleting a document also removes the original and converted Markdown"""
+    print("Testing stored file cleanup on delete...")
+
+    storage_dir = tempfile.mkdtemp()
+    markdown_dir = tempfile.mkdtemp()
+    try:
+        original = os.path.join(storage_dir, "file-a", "a.pdf")
+        os.makedirs(os.path.dirname(original))
+        open(original, "w").close()
+        markdown = os.path.join(markdown_dir, "md-uuid", "a.md")
+        os.makedirs(os.path.dirname(markdown))
+        open(markdown, "w").close()
+
+        manager = _make_qdrant_manager()
+        _add_chunks(manager, "file-a", "a.pdf", 2, {"markdown_file_path": markdown})
+        _add_chunks(manager, "file-b", "b.pdf", 1)
+
+        orchestrator = RAGOrchestrator.__new__(RAGOrchestrator)
+        orchestrator.vector_store_manager = manager
+
+        with patch("rag_component.file_storage_manager.RAG_FILE_STORAGE_DIR", storage_dir), \
+                patch("rag_component.file_storage_manager.RAG_MARKDOWN_STORAGE_DIR", markdown_dir):
+            result = orchestrator.delete_document(file_id="file-a")
+
+        assert result["deleted_chunks"] == 2
+        assert not os.path.exists(os.path.join(storage_dir, "file-a"))
+        assert not os.path.exists(os.path.join(markdown_dir, "md-uuid"))
+        assert manager.client.count("documents").count == 1
+        print("✓ Stored original and Markdown removed with the document")
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+        shutil.rmtree(markdown_dir, ignore_errors=True)
+
+
+def test_replace_keeps_old_version_on_failure():
+    """Test that a failed replace leaves the old version in place"""
+    print("Testing replace rollback...")
+
+    manager = _make_qdrant_manager()
+    _add_chunks(manager, "file-a", "a.pdf", 2)
+
+    orchestrator = RAGOrchestrator.__new__(RAGOrchestrator)
+    orchestrator.vector_store_manager = manager
+
+    storage_dir = tempfile.mkdtemp()
+    try:
+        with patch("rag_component.file_storage_manager.RAG_FILE_STORAGE_DIR", storage_dir), \
+                patch.object(RAGOrchestrator, "ingest_documents_from_upload", return_value=False):
+            try:
+                orchestrator.replace_document("file-a", "/tmp/new.pdf", "new.pdf")
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("replace_document should raise when ingestion fails")
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+
+    assert len(manager.find_chunks(file_id="file-a")) == 2
+    print("✓ Old version kept when the new version fails to ingest")
+
+
+def test_file_storage_rejects_unsafe_ids():
+    """Test that file IDs cannot escape the storage directory"""
+    print("Testing file ID validation...")
+
+    storage_dir = tempfile.mkdtemp()
+    try:
+        manager = FileStorageManager(storage_dir)
+        for bad_id in ["../etc", "..", "a/b"]:
+            try:
+                manager.delete_file(bad_id)
+            except ValueError:
+                continue
+            raise AssertionError(f"File ID should have been rejected: {bad_id}")
+        assert manager.delete_file("missing") is False
+        print("✓ Unsafe file IDs rejected")
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_delete_by_file_id_and_source()
+    test_delete_by_chunk_ids()
+    test_orchestrator_delete_removes_stored_files()
+    test_replace_keeps_old_version_on_failure()
+    test_file_storage_rejects_unsafe_ids()
+    print("\nAll document delete tests passed!")
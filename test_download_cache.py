@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the content-addressed download cache
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from download_server.download_cache import DownloadCache
+from download_server.download_mcp_server import MCPDownloadServer
+
+
+class StandInOrigin(ThreadingMixIn, HTTPServer):
+    """Origin server that counts requests and honours If-None-Match"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInOriginHandler)
+        self.pages = {}
+        self.requests = []
+        self.delay = 0.0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def count(self, path, status=None):
+        return sum(1 for p, s in self.requests if p == path and (status is None or s == status))
+
+
+class StandInOriginHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = self.server.pages[self.path]
+        etag = f'"{hash(body) & 0xffffffff:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.requests.append((self.path, 304))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.server.requests.append((self.path, 200))
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_hits_and_conditional_revalidation():
+    """Test that fresh entries are served locally and stale ones revalidated with a conditional GET"""
+    print("Testing cache hits and revalidation...")
+
+    with StandInOrigin() as origin, tempfile.TemporaryDirectory() as temp_dir:
+        origin.pages["/page"] = b"<p>version one</p>"
+        cache = DownloadCache(temp_dir, ttl_seconds=60)
+
+        first = cache.get(origin.url("/page"))
+        second = cache.get(origin.url("/page"))
+        assert (first["cache"], second["cache"]) == ("miss", "hit")
+        assert first["file_path"] == second["file_path"] and first["file_path"].endswith(".html")
+        assert origin.count("/page") == 1
+
+        # Stale entry, unchanged at the origin: 304 and the same file
+        cache.ttl_seconds = 0
+        third = cache.get(origin.url("/page"))
+        assert third["cache"] == "revalidated" and third["file_path"] == first["file_path"]
+        assert origin.count("/page", 304) == 1
+
+        # Stale entry, changed at the origin: a new body under its own digest
+        origin.pages["/page"] = b"<p>version two</p>"
+        fourth = cache.get(origin.url("/page"))
+        assert fourth["cache"] == "miss" and fourth["sha256"] != first["sha256"]
+        with open(fourth["file_path"], "rb") as f:
+            assert f.read() == b"<p>version two</p>"
+        cache.close()
+    print("✓ Fresh entries are hits, stale ones are revalidated")
+
+
+def test_identical_content_is_stored_once():
+    """Test that different URLs with the same body share one blob"""
+    print("Testing content addressing...")
+
+    with StandInOrigin() as origin, tempfile.TemporaryDirectory() as temp_dir:
+        origin.pages["/a"] = origin.pages["/b?utm=1"] = b"<p>same body</p>"
+        cache = DownloadCache(temp_dir)
+
+        a = cache.get(origin.url("/a"))
+        b = cache.get(origin.url("/b?utm=1"))
+        assert a["file_path"] == b["file_path"]
+        assert cache.total_bytes() == len(b"<p>same body</p>")
+        blobs = [name for _, _, files in os.walk(cache.blob_dir) for name in files]
+        assert len(blobs) == 1
+        cache.close()
+    print("✓ Identical bodies are stored once")
+
+
+def test_concurrent_requests_share_one_fetch():
+    """Test single-flight: concurrent requests for one URL cause a single origin request"""
+    print("Testing single-flight...")
+
+    with StandInOrigin() as origin, tempfile.TemporaryDirectory() as temp_dir:
+        origin.pages["/slow"] = b"<p>slow page</p>"
+        origin.delay = 0.3
+        cache = DownloadCache(temp_dir)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.get(origin.url("/slow")), range(8)))
+
+        assert origin.count("/slow") == 1
+        assert len({r["file_path"] for r in results}) == 1
+        assert sorted(r["cache"] for r in results).count("miss") == 1
+        assert cache.stats["shared"] + cache.stats["hits"] == 7
+        cache.close()
+    print("✓ Concurrent requests are collapsed into one fetch")
+
+
+def test_lru_eviction_and_server_integration():
+    """Test the disk-size limit and that the download server reuses cached files"""
+    print("Testing LRU eviction and server integration...")
+
+    with StandInOrigin() as origin, tempfile.TemporaryDirectory() as temp_dir:
+        for name in "abc":
+            origin.pages[f"/{name}"] = name.encode() * 100
+        cache = DownloadCache(os.path.join(temp_dir, "lru"), max_bytes=250)
+        cache.eviction_grace_seconds = 0
+
+        a = cache.get(origin.url("/a"))
+        cache.get(origin.url("/b"))
+        time.sleep(0.01)
+        cache.get(origin.url("/a"))  # a is now more recently used than b
+        cache.get(origin.url("/c"))
+
+        assert cache.total_bytes() == 200 and cache.stats["evicted"] == 1
+        assert os.path.exists(a["file_path"])
+        assert cache.get(origin.url("/b"))["cache"] == "miss"
+        cache.close()
+
+        # The server used to create page_1.html, page_2.html, ... for every repeat download
+        server = MCPDownloadServer(download_dir=os.path.join(temp_dir, "downloads"), log_level="WARNING")
+        paths = {server.download_file(origin.url("/a"))[1] for _ in range(3)}
+        assert len(paths) == 1 and origin.count("/a") == 2
+        assert server.download_and_extract(origin.url("/a"))["cache"] == "hit"
+        server.cache.close()
+    print("✓ Least recently used bodies are evicted and repeat downloads reuse one file")
+
+
+if __name__ == "__main__":
+    test_hits_and_conditional_revalidation()
+    test_identical_content_is_stored_once()
+    test_concurrent_requests_share_one_fetch()
+    test_lru_eviction_and_server_integration()
+    print("\nAll download cache tests passed!")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Test script to verify zero-downtime embedding migration through a shadow collection and alias swap
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from rag_component import embedding_migration
+from rag_component.embedding_migration import EmbeddingMigration, resolve_collection
+from rag_component.vector_store_manager import VectorStoreManager
+
+
+def _make_legacy_collection(count=12, size=4):
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="documents",
+        vectors_config=models.VectorParams(size=size, distance=models.Distance.COSINE),
+    )
+    embeddings = DeterministicFakeEmbedding(size=size)
+    client.upsert(collection_name="documents", points=[
+        models.PointStruct(
+            id=i + 1,
+            vector=embeddings.embed_query(f"chunk {i}"),
+            payload={"page_content": f"chunk {i}", "metadata": {"file_id": f"f{i}"}},
+        )
+        for i in range(count)
+    ])
+    return client
+
+
+def _run_migration(client, size, **kwargs):
+    identity = embedding_migration.embedding_identity("test", f"fake-{size}")
+    migration = EmbeddingMigration(
+        client, "documents", DeterministicFakeEmbedding(size=size), identity,
+        batch_size=5, max_points_per_second=0, freeze_drain_seconds=0, **kwargs
+    )
+    assert migration.run()
+    return migration
+
+
+def test_legacy_collection_migrates_to_alias():
+    """Test that a plain collection is rebuilt with the new model and replaced by an alias"""
+    print("Testing migration of a pre-existing collection...")
+
+    state_dir = tempfile.mkdtemp()
+    try:
+        with patch.object(embedding_migration, "RAG_MIGRATION_STATE_FILE", os.path.join(state_dir, "state.json")):
+            client = _make_legacy_collection()
+            migration = _run_migration(client, size=6)
+
+            physical = resolve_collection(client, "documents")
+            assert physical == migration.target_collection != "documents"
+            assert client.get_collection("documents").config.params.vectors.size == 6
+            assert client.count("documents").count == 12
+            point = client.retrieve("documents", ids=[3], with_payload=True)[0]
+            assert point.payload["metadata"]["file_id"] == "f2"
+
+            assert embedding_migration.get_collection_embedding(physical)["model"] == "fake-6"
+            status = embedding_migration.get_migration_status()
+            assert status["status"] == "completed" and status["progress"] == 1.0
+            print("✓ Collection rebuilt and served through an alias")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def test_second_migration_swaps_alias_atomically():
+    """Test that a later migration is a pure alias swap and drops the old collection"""
+    print("Testing alias-to-alias migration...")
+
+    state_dir = tempfile.mkdtemp()
+    try:
+        with patch.object(embedding_migration, "RAG_MIGRATION_STATE_FILE", os.path.join(state_dir, "state.json")):
+            client = _make_legacy_collection()
+            first = _run_migration(client, size=6)
+
+            with patch.object(client, "delete_collection", wraps=client.delete_collection) as delete_collection, \
+                    patch.object(client, "update_collection_aliases", wraps=client.update_collection_aliases) as update_aliases:
+                second = _run_migration(client, size=8, target_collection="documents__fake_8_next")
+
+            operations = update_aliases.call_args.kwargs["change_aliases_operations"]
+            assert len(operations) == 2, "Alias delete and create should be one request"
+            # The old collection is only dropped after the alias points at the new one
+            assert delete_collection.call_args.kwargs["collection_name"] == first.target_collection
+            assert resolve_collection(client, "documents") == second.target_collection
+            assert not client.collection_exists(first.target_collection)
+            assert client.get_collection("documents").config.params.vectors.size == 8
+            print("✓ Alias swapped atomically")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def test_changes_during_migration_are_caught_up():
+    """Test that chunks added or deleted while the shadow is built end up in the new collection"""
+    print("Testing catch-up of concurrent changes...")
+
+    class ChangingEmbeddings(DeterministicFakeEmbedding):
+        """Adds and deletes a source chunk the first time it is called"""
+        changed: bool = False
+
+        def embed_documents(self, texts):
+            if not self.changed:
+                self.changed = True
+                client.upsert(collection_name="documents", points=[models.PointStruct(
+                    id=100, vector=[1.0, 0.0, 0.0, 0.0], payload={"page_content": "late chunk", "metadata": {}},
+                )])
+                client.delete(collection_name="documents", points_selector=models.PointIdsList(points=[12]))
+            return super().embed_documents(texts)
+
+    state_dir = tempfile.mkdtemp()
+    try:
+        with patch.object(embedding_migration, "RAG_MIGRATION_STATE_FILE", os.path.join(state_dir, "state.json")):
+            client = _make_legacy_collection()
+            identity = embedding_migration.embedding_identity("test", "fake-6")
+            migration = EmbeddingMigration(
+                client, "documents", ChangingEmbeddings(size=6), identity, batch_size=5, max_points_per_second=0,
+                freeze_drain_seconds=0
+            )
+            assert migration.run()
+
+            ids = {point.id for point in client.scroll("documents", limit=100)[0]}
+            assert 100 in ids and 12 not in ids
+            assert len(ids) == 12
+            print("✓ Concurrent adds and deletes caught up before the swap")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def test_model_change_keeps_serving_old_model():
+    """Test that a model change serves the old model and starts a migration instead of deleting"""
+    print("Testing serving model selection...")
+
+    class FakeEmbeddingManager:
+        def __init__(self, provider=None, model_name=None):
+            self.provider = provider or "test"
+            self.model_name = model_name or "fake-6"
+            self.embeddings = DeterministicFakeEmbedding(size=int(self.model_name.split("-")[1]))
+
+    state_dir = tempfile.mkdtemp()
+    try:
+        with patch.object(embedding_migration, "RAG_MIGRATION_STATE_FILE", os.path.join(state_dir, "state.json")), \
+                patch("rag_component.vector_store_manager.EmbeddingManager", FakeEmbeddingManager), \
+                patch.object(embedding_migration, "start_background_migration") as start_migration:
+            client = _make_legacy_collection()
+            embedding_migration.record_collection_embedding(
+                "documents", embedding_migration.embedding_identity("test", "fake-4"), 4
+            )
+
+            manager = VectorStoreManager.__new__(VectorStoreManager)
+            manager.store_type = "qdrant"
+            manager.collection_name = "documents"
+            manager.embedding_manager = FakeEmbeddingManager()
+            manager._select_serving_embeddings(client, client.get_collection("documents"))
+
+            assert manager.embedding_manager.model_name == "fake-4"
+            assert client.count("documents").count == 12
+            args = start_migration.call_args.args
+            assert args[1] == "documents" and args[3]["model"] == "fake-6"
+            print("✓ Old model keeps serving while the migration starts")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+def test_swap_runs_under_frozen_writes_and_verified_counts():
+    """Test that the swap happens with writes frozen and is aborted if the point counts do not match"""
+    print("Testing write freeze and count verification before the swap...")
+
+    state_dir = tempfile.mkdtemp()
+    try:
+        with patch.object(embedding_migration, "RAG_MIGRATION_STATE_FILE", os.path.join(state_dir, "state.json")):
+            client = _make_legacy_collection()
+            # Chunks without text are not migrated and must not fail the verification
+            client.upsert(collection_name="documents", points=[models.PointStruct(
+                id=50, vector=[0.0, 1.0, 0.0, 0.0], payload={"page_content": "", "metadata": {}},
+            )])
+
+            flags = []
+            original_swap = EmbeddingMigration._swap_alias
+
+            def recording_swap(self, source_count):
+                migration = embedding_migration.load_state()["migration"]
+                flags.append((migration["writes_frozen"], migration["swapping"], source_count))
+                return original_swap(self, source_count)
+
+            with patch.object(EmbeddingMigration, "_swap_alias", recording_swap):
+                _run_migration(client, size=6)
+            assert flags == [(True, True, 13)]
+            assert client.count("documents").count == 12
+            status = embedding_migration.get_migration_status()
+            assert not status["writes_frozen"] and not status["swapping"]
+            print("✓ Alias swapped with writes frozen and counts verified")
+
+            client = _make_legacy_collection()
+            original_copy = EmbeddingMigration._copy_missing
+
+            def leaking_copy(self, phase):
+                original_copy(self, phase)
+                if phase == "final_catch_up":
+                    # A write that ignored the freeze lands after every final catch-up
+                    client.upsert(collection_name="documents", points=[models.PointStruct(
+                        id=200 + len(client.scroll("documents", limit=100)[0]), vector=[1.0, 0.0, 0.0, 0.0],
+                        payload={"page_content": "leaked chunk", "metadata": {}},
+                    )])
+
+            identity = embedding_migration.embedding_identity("test", "fake-6")
+            migration = EmbeddingMigration(
+                client, "documents", DeterministicFakeEmbedding(size=6), identity,
+                batch_size=5, max_points_per_second=0, freeze_drain_seconds=0
+            )
+            with patch.object(EmbeddingMigration, "_copy_missing", leaking_copy):
+                assert not migration.run()
+            assert resolve_collection(client, "documents") == "documents"
+            assert client.count("documents").count == 12 + embedding_migration.MIGRATION_VERIFY_ROUNDS
+            status = embedding_migration.get_migration_status()
+            assert status["status"] == "failed" and not status["writes_frozen"]
+            assert embedding_migration.wait_for_migration_swap("documents", writing=True)
+            print("✓ Mismatched counts abort the migration and keep the source")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_legacy_collection_migrates_to_alias()
+    test_second_migration_swaps_alias_atomically()
+    test_changes_during_migration_are_caught_up()
+    test_model_change_keeps_serving_old_model()
+    test_swap_runs_under_frozen_writes_and_verified_counts()
+    print("\nAll embedding migration tests passed!")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script to verify per-stage ingestion metrics and the ingestion benchmark
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document as LCDocument
+
+from rag_component.document_loader import DocumentLoader
+from rag_component.ingestion_benchmark import run_ingestion_benchmark, write_synthetic_corpus
+from rag_component.ingestion_metrics import IngestionMetrics
+from rag_component.qdrant_bulk_uploader import QdrantBulkUploader
+
+
+class CountingEmbeddings:
+    """Deterministic embeddings that only count calls"""
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+
+def test_stage_totals_and_rates():
+    """Test that stages accumulate time and counters and derive throughput"""
+    print("Testing stage accounting...")
+
+    updates = []
+    metrics = IngestionMetrics(run_id="run-1", on_update=updates.append, update_interval=0.0)
+    with metrics.stage("parse.TextLoader", docs=2, bytes=2000):
+        time.sleep(0.01)
+    metrics.add("split", seconds=0.02, docs=2, chunks=8)
+    metrics.add("split", seconds=0.02, docs=1, chunks=4)
+    metrics.count(files=2, docs=3, chunks=12, bytes=2000)
+    metrics.record_batch(8)
+    metrics.record_batch(4)
+    metrics.set_queue_depth("files_pending", 5)
+    metrics.set_queue_depth("files_pending", 1)
+    summary = metrics.finish()
+
+    assert summary["run_id"] == "run-1" and summary["status"] == "completed"
+    assert summary["totals"] == {"files": 2, "docs": 3, "chunks": 12, "bytes": 2000}
+    assert summary["stages"]["parse.TextLoader"]["seconds"] >= 0.01
+    assert summary["stages"]["split"]["calls"] == 2
+    assert summary["stages"]["split"]["chunks"] == 12
+    assert abs(summary["stages"]["split"]["chunks_per_second"] - 300.0) < 1e-6
+    assert summary["embedding_batches"] == {"count": 2, "mean_size": 6.0, "min_size": 4, "max_size": 8}
+    assert summary["queue_depths"]["files_pending"] == {"current": 1, "max": 5}
+    assert summary["throughput"]["chunks_per_second"] > 0
+    # Live updates are pushed while the run progresses and once more when it finishes
+    assert updates and updates[-1]["status"] == "completed"
+    assert "split" in metrics.format_breakdown()
+    print("✓ Stage totals, rates, batch sizes and queue depths are reported")
+
+
+def test_failing_update_callback_does_not_break_ingestion():
+    """Test that job status reporting errors are swallowed"""
+    print("Testing failing update callback...")
+
+    def broken_callback(summary):
+        raise ConnectionError("redis is down")
+
+    metrics = IngestionMetrics(on_update=broken_callback, update_interval=0.0)
+    metrics.add("split", seconds=0.01, chunks=1)
+    assert metrics.finish()["stages"]["split"]["chunks"] == 1
+    print("✓ A failing update callback is ignored")
+
+
+def test_status_reflects_failures():
+    """Test that the final status is derived from the failure counters"""
+    print("Testing run status with failures...")
+
+    metrics = IngestionMetrics()
+    assert metrics.summary()["status"] == "running"
+    metrics.count(files=2)
+    metrics.record_failure()
+    summary = metrics.finish()
+    assert summary["status"] == "completed_with_errors" and summary["failed_files"] == 1
+    assert "1 files failed" in metrics.format_breakdown()
+
+    metrics = IngestionMetrics()
+    metrics.record_failure(files=2)
+    assert metrics.finish()["status"] == "failed"
+
+    metrics = IngestionMetrics()
+    metrics.count(files=3)
+    summary = metrics.finish(error="vector store unavailable")
+    assert summary["status"] == "failed" and summary["error"] == "vector store unavailable"
+    print("✓ Failed and partially failed runs are not reported as completed")
+
+
+def test_loader_and_uploader_record_stages():
+    """Test that the document loader and the bulk uploader feed the metrics"""
+    print("Testing loader and uploader instrumentation...")
+
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models as qdrant_models
+
+    metrics = IngestionMetrics()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = write_synthetic_corpus(temp_dir, 1, doc_size=3)[0]
+        docs = DocumentLoader().load_document(file_path, metrics=metrics)
+    assert metrics.summary()["stages"]["parse.TextLoader"]["docs"] == len(docs) == 1
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection(
+        collection_name="metrics",
+        vectors_config=qdrant_models.VectorParams(size=4, distance=qdrant_models.Distance.COSINE)
+    )
+    uploader = QdrantBulkUploader(
+        client, "metrics", embeddings=CountingEmbeddings(), batch_size=3, parallelism=1, metrics=metrics
+    )
+    uploader.upload_documents([LCDocument(page_content=f"chunk {i}") for i in range(7)])
+
+    summary = metrics.summary()
+    assert summary["stages"]["embed"]["chunks"] == 7
+    assert summary["stages"]["upsert"]["chunks"] == 7
+    assert summary["embedding_batches"]["count"] == 3
+    assert summary["embedding_batches"]["max_size"] == 3
+    assert summary["queue_depths"]["upload_in_flight"]["max"] >= 1
+    assert client.count("metrics").count == 7
+    print("✓ Parse, embed and upsert stages are recorded")
+
+
+def test_ingestion_benchmark_breakdown():
+    """Test the end-to-end ingestion benchmark against the stand-in embedding server"""
+    print("Testing ingestion benchmark...")
+
+    summary = run_ingestion_benchmark(num_docs=20, doc_size=6, batch_size=8)
+
+    assert summary["totals"]["files"] == 20
+    assert summary["totals"]["chunks"] >= 20
+    for stage in ["parse.TextLoader", "split", "metadata", "index", "embed", "upsert"]:
+        assert stage in summary["stages"], stage
+    assert summary["embedding_batches"]["max_size"] <= 8
+    assert summary["embedding_requests"] >= summary["embedding_batches"]["count"]
+    assert summary["config"]["docs"] == 20
+    assert "index" in summary["breakdown"]
+    print("✓ Benchmark reports the per-stage breakdown")
+
+
+if __name__ == "__main__":
+    test_stage_totals_and_rates()
+    test_status_reflects_failures()
+    test_failing_update_callback_does_not_break_ingestion()
+    test_loader_and_uploader_record_stages()
+    test_ingestion_benchmark_breakdown()
+    print("\nAll ingestion metrics tests passed!")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script to verify client-side load balancing across registered instances of an MCP service type
+"""
+
+import sys
+import os
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import utils.mcp_load_balancer as mcp_load_balancer
+from utils.mcp_load_balancer import LoadBalancer
+from utils.mcp_resilience import CircuitBreakerRegistry, ResilientCaller
+from utils.mcp_transport import MCPTransport
+from langgraph_agent.async_mcp_client import AsyncMCPClient
+from test_async_agent import StubMCPService
+from test_mcp_resilience import dead_service
+
+
+def instances(*ids):
+    return [{"id": service_id, "type": "echo", "host": "h", "port": 1, "metadata": {}} for service_id in ids]
+
+
+def test_power_of_two_choices_scoring():
+    """Test that picks follow outstanding requests and latency EWMA, and new instances get traffic"""
+    print("Testing power-of-two-choices scoring...")
+
+    balancer = LoadBalancer(random.Random(7))
+    a, b = instances("a", "b")
+    balancer.end(a, 10)
+    balancer.end(b, 100)
+    assert all(balancer.rank([a, b])[0] is a for _ in range(10))
+
+    # Busy instances lose to idle ones even when faster
+    for _ in range(20):
+        balancer.begin(a)
+    assert balancer.rank([a, b])[0] is b
+
+    # A new replica is scored with the average latency and has nothing outstanding
+    (c,) = instances("c")
+    assert balancer.rank([a, b, c])[-1] is a
+    assert Counter(balancer.rank([a, b, c])[0]["id"] for _ in range(50))["c"] > 0
+
+    # Failing fast does not look fast
+    (d,) = instances("d")
+    balancer.end(d, 1, failed=True)
+    assert balancer.snapshot()["d"]["ewma_ms"] >= mcp_load_balancer.FAILURE_PENALTY_MS
+    print(f"✓ Scores: {balancer.snapshot()}")
+
+
+def test_replicas_share_traffic():
+    """Test that concurrent calls spread over replicas and a slow replica gets less traffic"""
+    print("Testing traffic spreading...")
+
+    with StubMCPService(latency=0.02) as r0, StubMCPService(latency=0.02) as r1, StubMCPService(latency=0.2) as slow:
+        transport = MCPTransport()
+        caller = ResilientCaller(CircuitBreakerRegistry())
+        replicas = [r0.service("r0"), r1.service("r1"), slow.service("slow")]
+
+        def worker(n):
+            for i in range(n):
+                caller.call_any(replicas, "echo", {"i": i}, transport.call)
+
+        threads = [threading.Thread(target=worker, args=(15,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        transport.close()
+        snapshot = caller.balancer.snapshot()
+
+    assert r0.calls + r1.calls + slow.calls == 60
+    assert r0.calls > 10 and r1.calls > 10 and slow.calls < min(r0.calls, r1.calls)
+    assert all(entry["outstanding"] == 0 for entry in snapshot.values())
+    print(f"✓ 60 calls: r0={r0.calls}, r1={r1.calls}, slow={slow.calls}")
+
+
+def test_instance_churn():
+    """Test that registry changes take effect at once and departed instances are forgotten"""
+    print("Testing instance churn...")
+
+    with StubMCPService() as first, StubMCPService() as second:
+        transport = MCPTransport()
+        caller = ResilientCaller(CircuitBreakerRegistry())
+        old = first.service("old")
+        new = second.service("new")
+
+        for i in range(5):
+            caller.call_any([old], "echo", {"i": i}, transport.call)
+        # A replica registers: it starts getting traffic
+        for i in range(20):
+            caller.call_any([old, new], "echo", {"i": i}, transport.call)
+        assert second.calls > 0
+        # The first one deregisters: it gets nothing more
+        calls_before = first.calls
+        for i in range(5):
+            caller.call_any([new], "echo", {"i": i}, transport.call)
+        assert first.calls == calls_before
+        transport.close()
+
+    with patch.object(mcp_load_balancer.time, "monotonic", return_value=time.monotonic() + 2 * mcp_load_balancer.STALE_SECONDS):
+        caller.balancer._prune(mcp_load_balancer.time.monotonic())
+    assert caller.balancer.snapshot() == {}
+    print(f"✓ The new replica took {second.calls - 5} of 20 calls and the old one was forgotten")
+
+
+def test_dead_replica_is_skipped():
+    """Test that the balancer and breakers together keep traffic away from a dead replica"""
+    print("Testing a dead replica...")
+
+    with StubMCPService() as stub:
+        transport = MCPTransport(timeout=2)
+        caller = ResilientCaller(CircuitBreakerRegistry(min_calls=3, open_seconds=60))
+        replicas = [dead_service(), stub.service("live")]
+        results = [caller.call_any(replicas, "echo", {"i": i}, transport.call) for i in range(30)]
+        transport.close()
+
+    failures = sum(1 for result in results if result["status"] != "success")
+    assert failures <= 3, failures
+    print(f"✓ {failures} of 30 calls hit the dead replica before it was avoided")
+
+
+def test_planned_calls_spread_over_replicas():
+    """Test that tool calls the planner addressed to one instance are spread over its replicas"""
+    print("Testing planned tool calls...")
+
+    with StubMCPService(latency=0.05) as stub:
+        services = [stub.service(f"echo-{i}") for i in range(3)]
+        tool_calls = [{"service_id": "echo-0", "method": "echo", "params": {"i": i}} for i in range(12)]
+
+        async def run():
+            client = AsyncMCPClient()
+            results = await client.execute_tool_calls(tool_calls, services)
+            await client.close()
+            return results
+
+        with patch("utils.mcp_resilience._caller", ResilientCaller(CircuitBreakerRegistry())):
+            results = asyncio.run(run())
+
+    counts = Counter(result["service_id"] for result in results)
+    assert all(result["status"] == "success" for result in results)
+    assert len(counts) == 3, counts
+    print(f"✓ 12 calls planned for echo-0 were served by {dict(counts)}")
+
+
+if __name__ == "__main__":
+    test_power_of_two_choices_scoring()
+    test_replicas_share_traffic()
+    test_instance_churn()
+    test_dead_replica_is_skipped()
+    test_planned_calls_spread_over_replicas()
+    print("\nAll MCP load balancer tests passed!")
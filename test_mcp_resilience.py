@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script to verify MCP circuit breakers, failover to healthy instances and hedged requests
+"""
+
+import sys
+import os
+import asyncio
+import socket
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.mcp_resilience import CircuitBreaker, CircuitBreakerRegistry, ResilientCaller, CLOSED, OPEN, HALF_OPEN
+from utils.mcp_transport import MCPTransport
+from langgraph_agent.async_mcp_client import AsyncMCPClient
+from test_async_agent import StubMCPService
+
+IDEMPOTENT = {"cache_policy": {"echo": {"cacheable": True, "ttl_seconds": 60}, "write": {"cacheable": False}}}
+
+
+def dead_service(service_id="dead"):
+    """A service whose port refuses connections"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return {"id": service_id, "host": "127.0.0.1", "port": port, "type": "echo", "metadata": {}}
+
+
+def test_breaker_states():
+    """Test opening on failure rate and slow calls, half-open probing and 4xx handling"""
+    print("Testing circuit breaker states...")
+
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, slow_call_ms=100, open_seconds=0.2)
+    for failed in (False, True, False):
+        breaker.record(failed, 10)
+    assert breaker.state == CLOSED  # fewer than min_calls
+    breaker.record(False, 150)  # slow: counts as a failure
+    assert breaker.state == OPEN and not breaker.acquire()
+
+    time.sleep(0.25)
+    assert breaker.acquire() and breaker.state == HALF_OPEN
+    assert not breaker.acquire()  # one probe at a time
+    breaker.record(True, 10)
+    assert breaker.state == OPEN and breaker.snapshot()["times_opened"] == 2
+
+    time.sleep(0.25)
+    assert breaker.acquire()
+    breaker.record(False, 500)  # a slow but successful probe still closes the breaker
+    assert breaker.state == CLOSED and breaker.acquire()
+
+    # By default only errors and timeouts count: slow, healthy services stay reachable
+    default = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5)
+    for _ in range(10):
+        default.record(False, 25000)
+    assert default.state == CLOSED and default.snapshot()["recent_failures"] == 0
+
+    registry = CircuitBreakerRegistry(min_calls=2, failure_rate=0.5)
+    service = {"id": "svc", "type": "echo", "host": "h", "port": 1}
+    for _ in range(5):
+        registry.record(service, {"status": "error", "error": "HTTP 404: unknown action"}, 5)
+    assert registry.snapshot()["svc"]["state"] == CLOSED and registry.snapshot()["svc"]["type"] == "echo"
+    print("✓ Breakers open on errors (and opt-in slow calls), probe when half-open and ignore HTTP 4xx")
+
+
+def test_failover_to_healthy_instance():
+    """Test that calls skip an instance with an open breaker and fail fast when none is healthy"""
+    print("Testing failover...")
+
+    with StubMCPService() as stub:
+        transport = MCPTransport(timeout=2)
+        caller = ResilientCaller(CircuitBreakerRegistry(min_calls=3, open_seconds=60), balance=False)
+        dead = dead_service()
+        healthy = stub.service("echo-0")
+
+        results = [caller.call(dead, "echo", {"i": i}, transport.call, [dead, healthy]) for i in range(6)]
+        snapshot = caller.breakers.snapshot()
+        transport.close()
+
+    assert [result["status"] for result in results[:3]] == ["error"] * 3
+    assert all(result["status"] == "success" and result["service_id"] == "echo-0" for result in results[3:])
+    assert snapshot["dead"]["state"] == OPEN and snapshot["dead"]["retry_in_seconds"] > 0
+    assert snapshot["echo-0"]["state"] == CLOSED and stub.calls == 3
+
+    started = time.monotonic()
+    refused = caller.call(dead, "echo", {}, transport.call, [dead])
+    assert refused["status"] == "error" and "Circuit breaker open" in refused["error"]
+    assert time.monotonic() - started < 0.05
+    print("✓ 3 failures opened the breaker; later calls went to the healthy instance")
+
+
+def test_hedged_requests():
+    """Test that slow idempotent calls are hedged to another instance and others are not"""
+    print("Testing hedged requests...")
+
+    with StubMCPService(latency=0.6) as slow, StubMCPService() as fast:
+        transport = MCPTransport()
+        caller = ResilientCaller(CircuitBreakerRegistry(), hedge_enabled=True, hedge_delay_ms=50, balance=False)
+        primary = slow.service("slow", **IDEMPOTENT)
+        candidates = [primary, fast.service("fast", **IDEMPOTENT)]
+
+        started = time.monotonic()
+        hedged = caller.call(primary, "echo", {"q": 1}, transport.call, candidates)
+        hedged_ms = (time.monotonic() - started) * 1000
+
+        started = time.monotonic()
+        not_hedged = caller.call(primary, "write", {"q": 1}, transport.call, candidates)
+        not_hedged_ms = (time.monotonic() - started) * 1000
+        time.sleep(0.7)  # let the abandoned slow request finish
+        transport.close()
+
+    assert hedged["status"] == "success" and hedged["hedged"] and hedged["service_id"] == "fast"
+    assert hedged_ms < 400, hedged_ms
+    assert not_hedged["service_id"] == "slow" and "hedged" not in not_hedged and not_hedged_ms >= 600
+    assert fast.calls == 1 and slow.calls == 2
+    print(f"✓ Hedged call answered in {hedged_ms:.0f}ms instead of 600ms")
+
+
+def test_hedge_delay_follows_p95():
+    """Test that the hedge delay comes from the instance's recent latencies"""
+    print("Testing p95 hedge delay...")
+
+    caller = ResilientCaller(CircuitBreakerRegistry(), hedge_enabled=True, hedge_delay_ms=1000, hedge_min_delay_ms=50)
+    service = {"id": "svc", "type": "echo", "host": "h", "port": 1}
+    assert caller._hedge_delay(service) == 1.0  # no history yet
+    for latency in list(range(1, 20)) + [400]:
+        caller.breakers.record(service, {"status": "success"}, latency * 10)
+    assert caller._hedge_delay(service) == 0.19
+    print("✓ Hedge delay is the p95 latency (190ms) once there is history")
+
+
+def test_async_hedge_cancels_loser():
+    """Test hedging with the async client: the fast instance wins and the slow request is cancelled"""
+    print("Testing async hedged requests...")
+
+    with StubMCPService(latency=0.6) as slow, StubMCPService() as fast:
+        caller = ResilientCaller(CircuitBreakerRegistry(), hedge_enabled=True, hedge_delay_ms=50, balance=False)
+        primary = slow.service("slow", **IDEMPOTENT)
+        candidates = [primary, fast.service("fast", **IDEMPOTENT)]
+
+        async def run():
+            client = AsyncMCPClient()
+            started = time.monotonic()
+            result = await caller.acall(primary, "echo", {"q": 1}, client.call_service, candidates)
+            elapsed = time.monotonic() - started
+            await client.close()
+            return result, elapsed
+
+        result, elapsed = asyncio.run(run())
+        snapshot = caller.breakers.snapshot()
+
+    assert result["service_id"] == "fast" and result["hedged"] and elapsed < 0.4
+    # The cancelled request is not held against the slow instance
+    assert snapshot["slow"]["recent_calls"] == 0 and snapshot["fast"]["recent_calls"] == 1
+    print(f"✓ Async hedge answered in {elapsed * 1000:.0f}ms and cancelled the slow request")
+
+
+if __name__ == "__main__":
+    test_breaker_states()
+    test_failover_to_healthy_instance()
+    test_hedged_requests()
+    test_hedge_delay_follows_p95()
+    test_async_hedge_cancels_loser()
+    print("\nAll MCP resilience tests passed!")
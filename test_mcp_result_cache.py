@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the MCP result cache: registry cache policies, TTLs, in-flight dedup and cache annotations
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import utils.mcp_result_cache as mcp_result_cache
+from utils.mcp_result_cache import MCPResultCache, cache_key, cache_ttl, describe_cache_status
+from utils.mcp_resilience import is_idempotent
+from search_server.mcp_search_server import CACHE_POLICY as SEARCH_CACHE_POLICY
+from utils.mcp_transport import MCPTransport
+from langgraph_agent.async_mcp_client import AsyncMCPClient
+from langgraph_agent.langgraph_agent import make_result_enhancer
+from test_async_agent import StubMCPService
+
+POLICY = {"echo": {"cacheable": True, "ttl_seconds": 60}, "fail": {"cacheable": True, "ttl_seconds": 60},
+          "write": {"cacheable": False}}
+
+
+def test_cache_policy_and_keys():
+    """Test reading TTLs from registry metadata and canonical call keys"""
+    print("Testing cache policies and keys...")
+
+    service = {"id": "sql-1", "type": "mcp_sql", "metadata": {"cache_policy": {
+        "get_schema": {"cacheable": True, "ttl_seconds": 600},
+        "execute_sql": {"cacheable": False},
+        "*": {"cacheable": True, "ttl_seconds": 30}
+    }}}
+    assert cache_ttl(service, "get_schema") == 600 and cache_ttl(service, "/get_schema") == 600
+    assert cache_ttl(service, "execute_sql") is None
+    assert cache_ttl(service, "anything_else") == 30
+    assert cache_ttl({"id": "x", "metadata": {}}, "get_schema") is None
+
+    # Instances of one service type share keys; parameter order does not matter
+    other_instance = {**service, "id": "sql-2"}
+    assert cache_key(service, "q", {"a": 1, "b": [1, 2]}) == cache_key(other_instance, "q", {"b": [1, 2], "a": 1})
+    assert cache_key(service, "q", {"a": 1}) != cache_key(service, "q", {"a": 2})
+    assert cache_key(service, "q", {"a": 1}) != cache_key({**service, "type": "rag"}, "q", {"a": 1})
+    print("✓ Per-action TTLs come from cache_policy and keys ignore parameter order and instance")
+
+
+def test_hits_expiry_and_errors():
+    """Test cache hits, TTL expiry, LRU eviction and that errors and uncacheable actions are not cached"""
+    print("Testing cache hits and expiry...")
+
+    with StubMCPService() as stub:
+        transport = MCPTransport()
+        cache = MCPResultCache(max_entries=2)
+        service = stub.service("echo-0", cache_policy=POLICY)
+        short = stub.service("echo-1", cache_policy={"*": {"cacheable": True, "ttl_seconds": 0.2}})
+        short["type"] = "short"
+
+        def call(svc, action, parameters):
+            return cache.call(svc, action, parameters, lambda: transport.call(svc, action, parameters))
+
+        first = call(service, "echo", {"q": 1})
+        second = call(service, "echo", {"q": 1})
+        assert stub.calls == 1
+        assert first["cache"] == {"hit": False, "ttl_seconds": 60}
+        assert second["cache"]["hit"] and second["cache"]["age_seconds"] >= 0 and second["cache"]["cached_at"]
+        assert second["result"] == first["result"]
+
+        for _ in range(2):
+            call(service, "write", {"q": 1})
+            call(service, "fail", {"q": 1})
+        assert stub.calls == 5
+        assert "cache" not in call(service, "write", {"q": 1})
+
+        call(short, "echo", {"q": 1})
+        time.sleep(0.25)
+        assert not call(short, "echo", {"q": 1})["cache"]["hit"]
+
+        # Two entries at most: the least recently used one is evicted
+        call(service, "echo", {"q": 2})
+        call(service, "echo", {"q": 3})
+        assert not call(service, "echo", {"q": 1})["cache"]["hit"]
+        transport.close()
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["entries"] == 2 and stats["evictions"] >= 1
+    print(f"✓ Cache stats: {stats}")
+
+
+def test_identical_calls_in_flight_share_one_request():
+    """Test that identical calls made while the first is running wait for it"""
+    print("Testing in-flight dedup...")
+
+    with StubMCPService(latency=0.3) as stub:
+        transport = MCPTransport()
+        cache = MCPResultCache()
+        service = stub.service("echo-0", cache_policy=POLICY)
+        results = []
+
+        def worker():
+            results.append(cache.call(service, "echo", {"q": "same"},
+                                      lambda: transport.call(service, "echo", {"q": "same"})))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        transport.close()
+
+    assert stub.calls == 1 and len(results) == 5
+    assert sum(1 for result in results if result["cache"].get("deduplicated")) == 4
+    assert all(result["result"] == results[0]["result"] for result in results)
+    print("✓ 5 concurrent identical calls made 1 request")
+
+
+def test_async_client_dedups_calls_planned_in_one_step():
+    """Test that the async client calls the service once for duplicate tool calls in one plan"""
+    print("Testing async in-run dedup...")
+
+    with StubMCPService(latency=0.1) as stub, patch.object(mcp_result_cache, "_cache", MCPResultCache()):
+        services = [stub.service("echo-0", cache_policy=POLICY)]
+        tool_calls = [{"service_id": "echo-0", "method": "echo", "params": {"q": "same"}}] * 3
+        tool_calls.append({"service_id": "echo-0", "method": "write", "params": {"q": "same"}})
+
+        async def run():
+            client = AsyncMCPClient()
+            results = await client.execute_tool_calls(tool_calls, services)
+            again = await client.execute_tool_calls(tool_calls[:1], services)
+            await client.close()
+            return results, again
+
+        results, again = asyncio.run(run())
+
+    assert stub.calls == 2  # one echo, one write
+    assert [result["cache"].get("deduplicated", False) for result in results[:3]] == [False, True, True]
+    assert "cache" not in results[3] and again[0]["cache"]["hit"]
+    print("✓ 3 identical planned calls made 1 request and the next run was served from the cache")
+
+
+def test_annotations_reach_synthesis():
+    """Test that enhanced results keep the cache annotation and cached entries are not modified by callers"""
+    print("Testing cache annotations...")
+
+    cache = MCPResultCache()
+    service = {"id": "echo-0", "type": "echo", "metadata": {"cache_policy": POLICY}}
+    fetch = lambda: {"service_id": "echo-0", "status": "success", "result": {"results": [{"content": "a"}]}}
+    cache.call(service, "echo", {}, fetch)
+    hit = cache.call(service, "echo", {}, fetch)
+    hit["result"]["results"].append({"content": "changed by a caller"})
+
+    enhanced = make_result_enhancer(None)({"service_id": "echo-0"}, hit)
+    assert enhanced["cache"]["hit"] and enhanced["type"] == "generic_enhanced"
+    assert describe_cache_status(enhanced).startswith(" (cached result, fetched ")
+    assert describe_cache_status({"cache": {"hit": False}}) == "" and describe_cache_status("text") == ""
+    assert len(cache.call(service, "echo", {}, fetch)["result"]["results"]) == 1
+    print(f"✓ Synthesis sees{describe_cache_status(enhanced)}")
+
+
+def test_failed_actions_are_not_cached():
+    """Test that results reporting a failed action are not cached and search results are left to the server"""
+    print("Testing failed action results...")
+
+    cache = MCPResultCache()
+    service = {"id": "echo-0", "type": "echo", "metadata": {"cache_policy": POLICY}}
+    calls = []
+    failed = lambda: calls.append(1) or {"status": "success", "result": {"success": False, "error": "rate limited"}}
+    for _ in range(2):
+        cache.call(service, "echo", {"q": "failed"}, failed)
+        cache.call(service, "echo", {"q": "top-level"}, lambda: calls.append(1) or {"status": "success", "success": False})
+    assert len(calls) == 4 and cache.stats()["entries"] == 0
+
+    search = {"id": "search-0", "type": "mcp_search", "metadata": {"cache_policy": SEARCH_CACHE_POLICY}}
+    assert cache_ttl(search, "web_search") is None and is_idempotent(search, "web_search")
+    print("✓ Failed searches are not cached and search results are cached by the server only")
+
+
+if __name__ == "__main__":
+    test_cache_policy_and_keys()
+    test_hits_expiry_and_errors()
+    test_identical_calls_in_flight_share_one_request()
+    test_async_client_dedups_calls_planned_in_one_step()
+    test_annotations_reach_synthesis()
+    test_failed_actions_are_not_cached()
+    print("\nAll MCP result cache tests passed!")
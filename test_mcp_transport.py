@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the pooled MCP transport: HTTP keep-alive, framed and one-shot TCP, metrics
+"""
+
+import sys
+import os
+import asyncio
+import json
+import socketserver
+import threading
+from unittest.mock import patch
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.mcp_transport import (
+    FramedTCPRequestHandler,
+    MCPTransport,
+    encode_frame,
+    make_framed_tcp_server,
+    read_frame,
+)
+from langgraph_agent.async_mcp_client import AsyncMCPClient
+from test_async_agent import StubMCPHandler, StubMCPService
+
+BIG_TEXT = "x" * (1024 * 1024)
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def tcp_service(server, protocol):
+    return {"id": protocol, "host": "127.0.0.1", "port": server.server_address[1], "metadata": {"protocol": protocol}}
+
+
+def handle_call(action, parameters):
+    if action == "big":
+        return {"text": BIG_TEXT}
+    return {"echo": parameters}
+
+
+class CountingHandler(StubMCPHandler):
+    """Counts the TCP connections the stub accepts"""
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections = getattr(self.server, "connections", 0) + 1
+
+
+def counting_stub():
+    stub = StubMCPService()
+    stub.RequestHandlerClass = CountingHandler
+    return stub
+
+
+class OneFrameHandler(FramedTCPRequestHandler):
+    """Answers one frame, then closes the connection (like a service closing idle connections)"""
+
+    def handle(self):
+        request = json.loads(read_frame(self.request))
+        self.request.sendall(encode_frame(self.server.handle_call(request["action"], request["parameters"])))
+
+
+class DropSecondFrameHandler(FramedTCPRequestHandler):
+    """Answers the first frame of a connection, then reads the second one and closes without answering"""
+
+    def handle(self):
+        request = json.loads(read_frame(self.request))
+        self.request.sendall(encode_frame(self.server.handle_call(request["action"], request["parameters"])))
+        if read_frame(self.request) is not None:
+            with self.server.lock:
+                self.server.dropped += 1
+
+
+class OneShotHandler(socketserver.BaseRequestHandler):
+    """One-shot tcp service with a large reply, keeping the connection open after it"""
+
+    def handle(self):
+        request = json.loads(self.request.recv(65536))
+        self.request.sendall(json.dumps({"text": BIG_TEXT, "echo": request["parameters"]}).encode())
+        self.request.recv(1)  # wait for the client to close
+
+
+def test_http_keepalive_and_metrics():
+    """Test that HTTP calls reuse one connection and record latency and bytes"""
+    print("Testing HTTP keep-alive...")
+
+    with counting_stub() as stub, counting_stub() as unpooled_stub:
+        pooled = MCPTransport()
+        unpooled = MCPTransport(keepalive=False)
+        service = stub.service("echo")
+        results = [pooled.call(service, "echo", {"i": i}) for i in range(20)]
+        for i in range(5):
+            unpooled.call(unpooled_stub.service("echo"), "echo", {"i": i})
+        failed = pooled.call(service, "fail", {})
+        stats = pooled.stats()["echo"]
+        pooled.close()
+        unpooled.close()
+
+    assert [result["result"]["result"]["echo"]["i"] for result in results] == list(range(20))
+    assert results[0]["status"] == "success" and results[0]["service_id"] == "echo"
+    assert failed["status"] == "error" and failed["error"].startswith("HTTP 500")
+    assert stub.connections == 1 and unpooled_stub.connections == 5
+    assert stats["calls"] == 21 and stats["errors"] == 1 and stats["protocol"] == "http"
+    assert stats["bytes_sent"] > 21 * 50 and stats["bytes_received"] > 20 * 30
+    assert 0 < stats["avg_ms"] <= stats["max_ms"]
+    print(f"✓ 21 calls over {stub.connections} connection, avg {stats['avg_ms']}ms")
+
+
+def test_framed_tcp_large_messages_and_reuse():
+    """Test the framed protocol with a 1 MB reply, connection reuse and reconnects"""
+    print("Testing framed TCP...")
+
+    server = start(make_framed_tcp_server(("127.0.0.1", 0), handle_call))
+    closing = start(socketserver.ThreadingTCPServer(("127.0.0.1", 0), OneFrameHandler))
+    closing.daemon_threads = True
+    closing.handle_call = handle_call
+    try:
+        transport = MCPTransport()
+        service = tcp_service(server, "tcp-framed")
+        big = transport.call(service, "big", {})
+        echoes = [transport.call(service, "echo", {"i": i}) for i in range(10)]
+        closing_service = tcp_service(closing, "tcp-framed")
+        # The close may race with the next request, which is then only resent for an idempotent action
+        closing_service["metadata"]["cache_policy"] = {"echo": {"idempotent": True}}
+        reconnects = [transport.call(closing_service, "echo", {"i": i}) for i in range(3)]
+        stats = transport.stats()["tcp-framed"]
+        transport.close()
+    finally:
+        stop(server)
+        stop(closing)
+
+    assert big["status"] == "success" and big["result"]["text"] == BIG_TEXT
+    assert [result["result"]["echo"]["i"] for result in echoes] == list(range(10))
+    assert stats["connections_opened"] == 1 and stats["bytes_received"] > len(BIG_TEXT)
+    # Each pooled connection was closed by the service; the transport reconnected transparently
+    assert [result["result"]["echo"]["i"] for result in reconnects] == [0, 1, 2]
+    print("✓ 1 MB reply read in full and 11 calls shared one connection")
+
+
+def test_lost_requests_are_resent_only_when_idempotent():
+    """Test that a request lost on a pooled connection after it was sent is not run twice"""
+    print("Testing resends of lost framed TCP requests...")
+
+    server = start(socketserver.ThreadingTCPServer(("127.0.0.1", 0), DropSecondFrameHandler))
+    server.daemon_threads = True
+    server.handle_call = handle_call
+    server.lock = threading.Lock()
+    server.dropped = 0
+    try:
+        transport = MCPTransport()
+        service = tcp_service(server, "tcp-framed")
+        assert transport.call(service, "charge", {"i": 0})["status"] == "success"
+        lost = transport.call(service, "charge", {"i": 1})
+        dropped_once = server.dropped
+
+        service["metadata"]["cache_policy"] = {"echo": {"cacheable": False, "idempotent": True}}
+        assert transport.call(service, "echo", {"i": 2})["status"] == "success"
+        resent = transport.call(service, "echo", {"i": 3})
+        transport.close()
+    finally:
+        stop(server)
+
+    # The non-idempotent action reached the service once and was not resent
+    assert lost["status"] == "error" and dropped_once == 1
+    assert resent["status"] == "success" and resent["result"]["echo"] == {"i": 3}
+    print("✓ Only idempotent actions are resent on a fresh connection")
+
+
+def test_one_shot_tcp_reads_whole_reply():
+    """Test that the one-shot tcp protocol is no longer cut at 4096 bytes"""
+    print("Testing one-shot TCP replies...")
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), OneShotHandler)
+    server.daemon_threads = True
+    start(server)
+    try:
+        transport = MCPTransport(timeout=5)
+        result = transport.call(tcp_service(server, "tcp"), "echo", {"q": 1})
+        transport.close()
+    finally:
+        stop(server)
+
+    assert result["status"] == "success", result.get("error")
+    assert result["result"]["text"] == BIG_TEXT and result["result"]["echo"] == {"q": 1}
+    print("✓ 1 MB one-shot reply parsed without waiting for the connection to close")
+
+
+def test_http2_falls_back_without_h2():
+    """Test that http2 services still work over HTTP/1.1 when h2 is not installed"""
+    print("Testing HTTP/2 fallback...")
+
+    with counting_stub() as stub, patch.dict(sys.modules, {"h2": None}):
+        transport = MCPTransport()
+        service = stub.service("echo", protocol="http2")
+        results = [transport.call(service, "echo", {"i": i}) for i in range(3)]
+        stats = transport.stats()["echo"]
+        transport.close()
+
+    assert all(result["status"] == "success" for result in results)
+    assert stats["protocol"] == "http2" and stub.connections == 1
+    print("✓ http2 services fall back to pooled HTTP/1.1")
+
+
+def test_async_client_tcp_protocols():
+    """Test the async client with framed TCP and large one-shot TCP replies"""
+    print("Testing async client TCP protocols...")
+
+    framed = start(make_framed_tcp_server(("127.0.0.1", 0), handle_call))
+    one_shot = socketserver.ThreadingTCPServer(("127.0.0.1", 0), OneShotHandler)
+    one_shot.daemon_threads = True
+    start(one_shot)
+    try:
+        async def run():
+            client = AsyncMCPClient(timeout=5)
+            results = await asyncio.gather(
+                client.call_service(tcp_service(framed, "tcp-framed"), "big", {}),
+                client.call_service(tcp_service(framed, "tcp-framed"), "echo", {"a": 1}),
+                client.call_service(tcp_service(one_shot, "tcp"), "echo", {"b": 2}),
+            )
+            await client.close()
+            return results
+
+        big, echo, legacy = asyncio.run(run())
+    finally:
+        stop(framed)
+        stop(one_shot)
+
+    assert big["status"] == "success" and big["result"]["text"] == BIG_TEXT
+    assert echo["result"] == {"echo": {"a": 1}}
+    assert legacy["status"] == "success" and legacy["result"]["echo"] == {"b": 2}
+    print("✓ The async client reads framed and large one-shot replies in full")
+
+
+if __name__ == "__main__":
+    test_http_keepalive_and_metrics()
+    test_framed_tcp_large_messages_and_reuse()
+    test_lost_requests_are_resent_only_when_idempotent()
+    test_one_shot_tcp_reads_whole_reply()
+    test_http2_falls_back_without_h2()
+    test_async_client_tcp_protocols()
+    print("\nAll MCP transport tests passed!")
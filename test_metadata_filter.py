@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script to verify metadata filter translation for Qdrant and Chroma
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rag_component.metadata_filter import (
+    normalize_filter,
+    to_chroma_filter,
+    to_qdrant_filter,
+)
+from rag_component.vector_store_manager import VectorStoreManager
+
+
+def test_chroma_translation():
+    """Test the Chroma where-clause translation"""
+    print("Testing Chroma filter translation...")
+
+    assert to_chroma_filter(None) is None
+    assert to_chroma_filter({}) is None
+    assert to_chroma_filter({"file_id": "abc"}) == {"file_id": {"$eq": "abc"}}
+
+    where = to_chroma_filter({
+        "upload_method": ["Web upload", "Local"],
+        "ingested_at": {"gte": 100, "lt": 200},
+    })
+    assert where == {"$and": [
+        {"upload_method": {"$in": ["Web upload", "Local"]}},
+        {"ingested_at": {"$gte": 100.0}},
+        {"ingested_at": {"$lt": 200.0}},
+    ]}, where
+    print("✓ Chroma filters translated correctly")
+
+
+def test_qdrant_translation():
+    """Test the Qdrant Filter translation"""
+    print("Testing Qdrant filter translation...")
+
+    assert to_qdrant_filter(None) is None
+
+    qdrant_filter = to_qdrant_filter({
+        "file_id": "abc",
+        "upload_method": ["Web upload"],
+        "ingested_at": {"gte": "2024-01-01"},
+    })
+    keys = [condition.key for condition in qdrant_filter.must]
+    assert keys == ["metadata.file_id", "metadata.upload_method", "metadata.ingested_at"], keys
+    assert qdrant_filter.must[0].match.value == "abc"
+    assert qdrant_filter.must[1].match.any == ["Web upload"]
+    assert qdrant_filter.must[2].range.gte == 1704067200.0
+    print("✓ Qdrant filters translated correctly")
+
+
+def test_invalid_filters():
+    """Test that malformed filters are rejected"""
+    print("Testing invalid filter rejection...")
+
+    for bad_filter in [
+        "file_id=abc",
+        {"bad key": "x"},
+        {"file_id": []},
+        {"ingested_at": {"between": [1, 2]}},
+        {"ingested_at": {"gte": "yesterday"}},
+        {"file_id": {"nested": {"x": 1}}},
+    ]:
+        try:
+            normalize_filter(bad_filter)
+        except ValueError:
+            continue
+        raise AssertionError(f"Filter should have been rejected: {bad_filter!r}")
+    print("✓ Invalid filters rejected")
+
+
+def test_qdrant_filtered_search():
+    """Test that the translated filter restricts an in-memory Qdrant search"""
+    print("Testing filtered search against in-memory Qdrant...")
+
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="docs",
+        vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE),
+    )
+    client.upsert(collection_name="docs", points=[
+        models.PointStruct(id=1, vector=[1.0, 0.0], payload={"metadata": {"file_id": "a", "ingested_at": 10.0}}),
+        models.PointStruct(id=2, vector=[1.0, 0.1], payload={"metadata": {"file_id": "b", "ingested_at": 20.0}}),
+    ])
+
+    hits = client.query_points(
+        collection_name="docs",
+        query=[1.0, 0.0],
+        query_filter=to_qdrant_filter({"file_id": "b"}),
+        limit=5,
+    ).points
+    assert [hit.id for hit in hits] == [2]
+
+    hits = client.query_points(
+        collection_name="docs",
+        query=[1.0, 0.0],
+        query_filter=to_qdrant_filter({"ingested_at": {"lt": 15}}),
+        limit=5,
+    ).points
+    assert [hit.id for hit in hits] == [1]
+    print("✓ Filtered Qdrant search returns only matching points")
+
+
+def test_filter_without_native_support_is_rejected():
+    """Test that a store without native filters rejects filtered queries instead of ignoring the filter"""
+    print("Testing stores without native filters...")
+
+    manager = VectorStoreManager.__new__(VectorStoreManager)
+    manager.store_type = "faiss"
+    assert manager._native_filter(None) is None
+    try:
+        manager._native_filter({"file_id": "a"})
+        assert False, "filter should be rejected"
+    except ValueError as e:
+        assert "faiss" in str(e)
+    print("✓ Filtered queries are rejected by stores without native filters")
+
+
+if __name__ == "__main__":
+    test_chroma_translation()
+    test_qdrant_translation()
+    test_invalid_filters()
+    test_qdrant_filtered_search()
+    test_filter_without_native_support_is_rejected()
+    print("\nAll metadata filter tests passed!")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the planner cache: exact and similarity matches, TTL, invalidation and DedicatedMCPModel use
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.planner_cache import PlannerCache, get_planner_cache, normalize_request, services_fingerprint
+from utils.deadline_llm import DeadlineChatOpenAI
+from models.dedicated_mcp_model import DedicatedMCPModel
+
+TEMPLATE = "Plan MCP calls for {user_request} using {mcp_services_json}"
+SERVICES = [
+    {"id": "sql-1", "host": "127.0.0.1", "port": 8092, "type": "mcp_sql", "metadata": {"capabilities": ["execute_sql"]}},
+    {"id": "search-1", "host": "127.0.0.1", "port": 8090, "type": "mcp_search", "metadata": {}}
+]
+
+
+class CountingPlanner:
+    """Stands in for the planner LLM call and counts how often it is made"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, request="request"):
+        self.calls += 1
+        return {"tool_calls": [{"service_id": "sql-1", "method": "execute_sql", "params": {"request": request}}],
+                "is_final_answer": False}
+
+
+def word_embedding(text):
+    """Bag-of-words embedding over a tiny vocabulary, enough to tell requests apart"""
+    vocabulary = ["sales", "revenue", "region", "by", "weather", "today", "show"]
+    return [float(text.split().count(word)) for word in vocabulary] + [0.01]
+
+
+def test_repeated_requests_reuse_the_plan():
+    """Test that identical requests, after normalization, are planned once"""
+    print("Testing exact matches...")
+
+    cache = PlannerCache(ttl_seconds=60)
+    planner = CountingPlanner()
+
+    assert normalize_request("  Show SALES by   region?! ") == "show sales by region"
+    first = cache.plan(TEMPLATE, SERVICES, "Show sales by region", planner)
+    first["tool_calls"].clear()  # callers get their own copy
+    second = cache.plan(TEMPLATE, SERVICES, "  show sales BY region? ", planner)
+    reordered = cache.plan(TEMPLATE, list(reversed(SERVICES)), "show sales by region", planner)
+    assert planner.calls == 1
+    assert len(second["tool_calls"]) == 1 and reordered == second
+
+    cache.plan(TEMPLATE, SERVICES, "Show revenue by region", planner)
+    stats = cache.stats()
+    assert planner.calls == 2 and stats["exact_hits"] == 2 and stats["saved_calls"] == 2 and stats["misses"] == 2
+    print(f"✓ {stats['saved_calls']} planner calls saved out of {stats['saved_calls'] + stats['misses']} requests")
+
+
+def test_plans_expire_and_fallbacks_are_not_cached():
+    """Test the TTL, LRU eviction and that error fallbacks are planned again"""
+    print("Testing expiry and uncacheable results...")
+
+    cache = PlannerCache(ttl_seconds=0.2, max_entries=2)
+    planner = CountingPlanner()
+    cache.plan(TEMPLATE, SERVICES, "show sales", planner)
+    cache.plan(TEMPLATE, SERVICES, "show sales", planner)
+    time.sleep(0.3)
+    cache.plan(TEMPLATE, SERVICES, "show sales", planner)
+    assert planner.calls == 2 and cache.stats()["expirations"] == 1
+
+    for request in ["a", "b", "c"]:
+        cache.plan(TEMPLATE, SERVICES, request, planner)
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] >= 1
+
+    fallback_calls = []
+    is_plan = DedicatedMCPModel._is_plan
+    for _ in range(2):
+        cache.plan(TEMPLATE, SERVICES, "broken", lambda: fallback_calls.append(1) or {"suggested_queries": [], "analysis": "Error"},
+                   cacheable=is_plan)
+    assert len(fallback_calls) == 2
+
+    disabled = PlannerCache(enabled=False)
+    disabled.plan(TEMPLATE, SERVICES, "show sales", planner)
+    disabled.plan(TEMPLATE, SERVICES, "show sales", planner)
+    assert planner.calls == 7 and disabled.stats()["entries"] == 0
+    print("✓ Plans expire, are evicted and only parsed plans are kept")
+
+
+def test_catalog_prompt_and_model_changes_invalidate():
+    """Test that a new service catalog drops old plans and prompt or model changes never share plans"""
+    print("Testing invalidation...")
+
+    cache = PlannerCache(ttl_seconds=60)
+    planner = CountingPlanner()
+    cache.plan(TEMPLATE, SERVICES, "show sales", planner)
+    cache.plan(TEMPLATE, SERVICES, "list regions", planner)
+
+    changed = SERVICES + [{"id": "rag-1", "host": "127.0.0.1", "port": 8091, "type": "rag", "metadata": {}}]
+    assert services_fingerprint(changed) != services_fingerprint(SERVICES)
+    cache.plan(TEMPLATE, changed, "show sales", planner)
+    assert planner.calls == 3 and cache.stats()["invalidations"] == 2 and cache.stats()["entries"] == 1
+
+    cache.plan(TEMPLATE + " Answer in English.", changed, "show sales", planner)
+    cache.plan(TEMPLATE, changed, "show sales", planner, model="another-model")
+    cache.plan(TEMPLATE, changed, "show sales", planner)
+    assert planner.calls == 5 and cache.stats()["exact_hits"] == 1
+
+    cache.invalidate()
+    cache.plan(TEMPLATE, changed, "show sales", planner)
+    assert planner.calls == 6
+    print("✓ Catalog, prompt and model changes invalidate cached plans")
+
+
+def test_similar_requests_reuse_the_plan():
+    """Test embedding similarity matches above the threshold only"""
+    print("Testing similarity matches...")
+
+    cache = PlannerCache(ttl_seconds=60, similarity_threshold=0.9, embed=word_embedding)
+    planner = CountingPlanner()
+    cache.plan(TEMPLATE, SERVICES, "show sales by region", planner)
+    cache.plan(TEMPLATE, SERVICES, "show me the sales by region", planner)  # close enough
+    cache.plan(TEMPLATE, SERVICES, "weather today", planner)  # unrelated
+    stats = cache.stats()
+    assert planner.calls == 2 and stats["similar_hits"] == 1 and stats["saved_calls"] == 1
+
+    def failing_embedding(text):
+        raise RuntimeError("embedding service down")
+
+    failing = PlannerCache(ttl_seconds=60, embed=failing_embedding)
+    failing.plan(TEMPLATE, SERVICES, "show sales", planner)
+    failing.plan(TEMPLATE, SERVICES, "show sales", planner)
+    assert planner.calls == 3 and failing.stats()["embedding_errors"] == 1 and failing.stats()["exact_hits"] == 1
+    print("✓ Near-identical requests share a plan; embedding failures fall back to exact matches")
+
+
+def test_dedicated_model_uses_the_planner_cache():
+    """Test that DedicatedMCPModel plans a repeated request once"""
+    print("Testing DedicatedMCPModel with the planner cache...")
+
+    cache = get_planner_cache()
+    saved_before = cache.stats()["saved_calls"]
+
+    model = DedicatedMCPModel.__new__(DedicatedMCPModel)
+    model.llm = DeadlineChatOpenAI(model="planner-model", api_key="sk-fake-key", base_url="http://127.0.0.1:1/v1")
+    model.system_prompt_template = TEMPLATE + " (model test)"
+    planner = CountingPlanner()
+    model._analyze_request_for_mcp_services = lambda user_request, mcp_servers: planner(user_request)
+    model._analyze_request_for_mcp_services_with_custom_prompt = lambda user_request, mcp_servers, prompt: planner(user_request)
+
+    for _ in range(3):
+        result = model.analyze_request_for_mcp_services("Show sales by region", SERVICES)
+    model.analyze_request_for_mcp_services_with_custom_prompt("Show sales by region", SERVICES, "Custom {user_request}")
+    assert result["tool_calls"][0]["params"]["request"] == "Show sales by region"
+    assert planner.calls == 2 and cache.stats()["saved_calls"] - saved_before == 2
+    assert model._planner_model_name() == "DeadlineChatOpenAI:planner-model"
+    print("✓ The model reused its plan for the repeated request")
+
+
+if __name__ == "__main__":
+    test_repeated_requests_reuse_the_plan()
+    test_plans_expire_and_fallbacks_are_not_cached()
+    test_catalog_prompt_and_model_changes_invalidate()
+    test_similar_requests_reuse_the_plan()
+    test_dedicated_model_uses_the_planner_cache()
+    print("\nAll planner cache tests passed!")
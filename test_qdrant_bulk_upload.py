@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the Qdrant bulk upload path and the shared client cache
+"""
+
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.documents import Document as LCDocument
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from rag_component.qdrant_bulk_uploader import QdrantBulkUploader
+from rag_component.qdrant_connection import get_qdrant_client, reset_qdrant_client
+
+
+class RecordingClient:
+    """Wraps a Qdrant client and records every upsert call"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+        # The in-memory client is not thread-safe, unlike a real Qdrant server
+        self.lock = threading.Lock()
+
+    def upsert(self, collection_name, points, wait=True):
+        with self.lock:
+            self.calls.append((len(points), wait))
+            return self.client.upsert(collection_name=collection_name, points=points, wait=wait)
+
+
+def _make_collection(size=8, named=False):
+    client = QdrantClient(":memory:")
+    params = models.VectorParams(size=size, distance=models.Distance.COSINE)
+    client.create_collection(
+        collection_name="documents",
+        vectors_config={"dense": params} if named else params,
+    )
+    return client
+
+
+def test_upload_documents_in_parallel_batches():
+    """Test that documents are embedded and uploaded in bounded batches"""
+    print("Testing parallel batched upload...")
+
+    client = _make_collection()
+    recorder = RecordingClient(client)
+    uploader = QdrantBulkUploader(
+        client=recorder,
+        collection_name="documents",
+        embeddings=DeterministicFakeEmbedding(size=8),
+        batch_size=10,
+        parallelism=3,
+    )
+
+    documents = [LCDocument(page_content=f"chunk {i}", metadata={"file_id": "f", "i": i}) for i in range(95)]
+    documents.append(LCDocument(page_content="   ", metadata={}))
+    ids = uploader.upload_documents(documents)
+
+    assert len(ids) == 95, "Empty documents should be skipped"
+    assert client.count("documents").count == 95
+    # 10 batches sent without waiting, plus one wait=True barrier at the end
+    assert [wait for _, wait in recorder.calls].count(False) == 10
+    assert recorder.calls[-1] == (1, True)
+    assert max(size for size, _ in recorder.calls) <= 10
+
+    point = client.retrieve("documents", ids=[ids[0]], with_payload=True)[0]
+    assert point.payload["page_content"] == "chunk 0"
+    assert point.payload["metadata"]["file_id"] == "f"
+    assert uploader.last_stats["points"] == 95
+    print("✓ Documents uploaded in parallel batches with a final barrier")
+
+
+def test_batches_respect_byte_limit():
+    """Test that upsert requests are split to stay under the byte limit"""
+    print("Testing byte-bounded requests...")
+
+    client = _make_collection()
+    recorder = RecordingClient(client)
+    uploader = QdrantBulkUploader(
+        client=recorder,
+        collection_name="documents",
+        embeddings=DeterministicFakeEmbedding(size=8),
+        batch_size=50,
+        max_batch_bytes=2000,
+        parallelism=1,
+    )
+
+    documents = [LCDocument(page_content="x" * 500, metadata={}) for _ in range(20)]
+    uploader.upload_documents(documents)
+
+    non_barrier = [size for size, wait in recorder.calls if not wait]
+    assert len(non_barrier) > 1
+    assert max(non_barrier) <= 3
+    assert client.count("documents").count == 20
+    print("✓ Requests split by estimated size")
+
+
+def test_upload_precomputed_points_to_named_vector():
+    """Test uploading precomputed vectors without any embedding calls"""
+    print("Testing precomputed point upload...")
+
+    client = _make_collection(size=3, named=True)
+    uploader = QdrantBulkUploader(client=client, collection_name="documents", vector_name="dense", batch_size=4)
+    points = ({"id": i, "vector": [1.0, 0.0, float(i)], "payload": {"n": i}} for i in range(10))
+
+    assert uploader.upload_points(points) == 10
+    assert client.count("documents").count == 10
+    print("✓ Precomputed points uploaded")
+
+
+def test_shared_client_is_reused():
+    """Test that the same connection settings return the same client"""
+    print("Testing shared client cache...")
+
+    first = get_qdrant_client("http://qdrant.invalid:6333", "key", prefer_grpc=False)
+    second = get_qdrant_client("http://qdrant.invalid:6333", "key", prefer_grpc=False)
+    other = get_qdrant_client("http://qdrant.invalid:6333", "other-key", prefer_grpc=False)
+    assert first is second
+    assert first is not other
+
+    reset_qdrant_client("http://qdrant.invalid:6333", "key", prefer_grpc=False)
+    assert get_qdrant_client("http://qdrant.invalid:6333", "key", prefer_grpc=False) is not first
+    print("✓ Clients shared per process and connection settings")
+
+
+if __name__ == "__main__":
+    test_upload_documents_in_parallel_batches()
+    test_batches_respect_byte_limit()
+    test_upload_precomputed_points_to_named_vector()
+    test_shared_client_is_reused()
+    print("\nAll Qdrant bulk upload tests passed!")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the offline retrieval benchmark
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from rag_component.embedding_manager import LMStudioEmbeddings
+from rag_component.retrieval_benchmark import (
+    StandInEmbeddingServer,
+    build_synthetic_corpus,
+    ranking_metrics,
+    run_benchmark,
+    stand_in_embedding,
+)
+
+
+def test_stand_in_embeddings_are_deterministic():
+    """Test that the stand-in server returns stable, normalized embeddings over HTTP"""
+    print("Testing stand-in embedding server...")
+
+    with StandInEmbeddingServer(dimension=32) as server:
+        embeddings = LMStudioEmbeddings(model="stand-in", base_url=server.base_url)
+        first = embeddings.embed_documents(["Brent oil price", "company phone number"])
+        second = embeddings.embed_query("Brent oil price")
+
+    assert len(first) == 2 and len(first[0]) == 32
+    assert first[0] == second == stand_in_embedding("Brent oil price", "stand-in", 32)
+    assert abs(np.linalg.norm(first[0]) - 1.0) < 1e-9
+    assert server.request_count == 2
+    print("✓ Stand-in embeddings are deterministic and normalized")
+
+
+def test_ranking_metrics():
+    """Test recall@k and MRR on a hand-checked example"""
+    print("Testing ranking metrics...")
+
+    ranked = [["a", "b", "c"], ["c", "b", "a"], ["x", "y", "z"]]
+    relevant = [["a"], ["b"], ["a"]]
+    metrics = ranking_metrics(ranked, relevant, ks=[1, 2])
+
+    assert metrics["recall@1"] == round(1 / 3, 4)
+    assert metrics["recall@2"] == round(2 / 3, 4)
+    assert metrics["mrr"] == round((1 + 0.5 + 0) / 3, 4)
+    print("✓ Ranking metrics computed correctly")
+
+
+def test_synthetic_corpus_is_reproducible():
+    """Test that the synthetic scaling set is identical for the same seed"""
+    print("Testing synthetic corpus generation...")
+
+    docs_a, queries_a = build_synthetic_corpus(30, 10, seed=7)
+    docs_b, queries_b = build_synthetic_corpus(30, 10, seed=7)
+    assert [d.page_content for d in docs_a] == [d.page_content for d in docs_b]
+    assert queries_a == queries_b and len(queries_a) == 10
+    assert len({d.metadata["source"] for d in docs_a}) == 30
+    print("✓ Synthetic corpus is reproducible")
+
+
+def test_benchmark_report():
+    """Test an end-to-end benchmark run against in-memory Qdrant"""
+    print("Testing end-to-end benchmark run...")
+
+    report = run_benchmark(synthetic_docs=20, synthetic_queries=10, ks=[1, 5], warmup=1)
+
+    assert report["corpus"]["queries"] >= 10
+    for stage in ["retrieve", "rerank", "total"]:
+        latency = report["latency"][stage]
+        assert latency["count"] == report["corpus"]["queries"]
+        assert latency["p50_ms"] <= latency["p95_ms"] <= latency["p99_ms"]
+    for stage in ["retrieve", "rerank"]:
+        assert 0.0 <= report["quality"][stage]["recall@1"] <= report["quality"][stage]["recall@5"] <= 1.0
+    # A lexical stand-in embedding must find most of the labelled documents
+    assert report["quality"]["retrieve"]["recall@5"] >= 0.5
+    print("✓ Benchmark report contains recall, MRR and latency percentiles")
+
+
+if __name__ == "__main__":
+    test_stand_in_embeddings_are_deterministic()
+    test_ranking_metrics()
+    test_synthetic_corpus_is_reproducible()
+    test_benchmark_report()
+    print("\nAll retrieval benchmark tests passed!")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Test script to verify search result caching and client-side rate limiting of the search server
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from search_server.rate_limiter import TokenBucket
+from search_server.search_cache import SearchResultCache
+from search_server.mcp_search_server import MCPSearchServer, SearchRequestHandler, ThreadedHTTPServer
+
+
+class StandInBrave(ThreadingHTTPServer):
+    """Brave Search stand-in that answers 429 when requests arrive faster than its plan allows"""
+
+    daemon_threads = True
+
+    def __init__(self, min_interval=0.0, latency=0.05, pages=None):
+        super().__init__(("127.0.0.1", 0), StandInBraveHandler)
+        self.min_interval = min_interval
+        self.latency = latency
+        self.pages = pages or {}  # query -> result URLs (default: one result per query)
+        self.lock = threading.Lock()
+        self.queries = []
+        self.last_request = None
+        self.rejected = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/res/v1/web/search"
+
+
+class StandInBraveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        now = time.monotonic()
+        with server.lock:
+            # Allow 10ms of scheduling jitter
+            too_fast = server.last_request is not None and now - server.last_request < server.min_interval - 0.01
+            server.last_request = now
+            if too_fast:
+                server.rejected += 1
+            else:
+                server.queries.append(query)
+        if too_fast:
+            body = b'{"error": "rate limited"}'
+            self.send_response(429)
+        else:
+            time.sleep(server.latency)
+            urls = server.pages.get(query['q'][0], ["https://example.com"])
+            body = json.dumps({"web": {"results": [
+                {"title": f"Result for {query['q'][0]}", "url": url, "description": "d"} for url in urls
+            ]}}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(brave, **kwargs):
+    server = MCPSearchServer(log_level="WARNING", api_url=brave.url, **kwargs)
+    server.brave_api_key = "test-key"
+    return server
+
+
+def test_token_bucket_queues_in_order():
+    """Test that the bucket spaces out callers and refuses waits beyond the limit"""
+    print("Testing token bucket...")
+
+    bucket = TokenBucket(rate=20, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[0] == waits[1] == 0.0
+    assert 0.04 < waits[2] <= 0.05 and 0.09 < waits[3] <= 0.1
+    assert bucket.reserve(max_wait=0.1) is None
+
+    bucket.pause(1.0)
+    assert bucket.reserve() > 1.0
+    assert TokenBucket(rate=0).reserve() == 0.0
+    print("✓ Callers queue in arrival order")
+
+
+def test_cache_hits_and_normalization():
+    """Test that normalized repeat queries are served from the cache and failures are not cached"""
+    print("Testing search result cache...")
+
+    with StandInBrave() as brave:
+        server = make_server(brave, rate_limit=0)
+        first = server.perform_search("Python  Asyncio")
+        again = server.perform_search("python asyncio")
+        other = server.perform_search("python asyncio", {"count": 5})
+
+        assert first == again and first[0]
+        assert len(brave.queries) == 2  # the count parameter makes a different cache entry
+        assert brave.queries[1]["count"] == ["5"] and other[0]
+
+        server.brave_api_key = None
+        assert not server.perform_search("python asyncio")[0]
+
+        expiring = SearchResultCache(ttl_seconds=0.05)
+        calls = []
+        fetch = lambda: calls.append(1) or (True, [], None)
+        expiring.get_or_fetch("k", fetch)
+        assert expiring.get_or_fetch("k", fetch)[1] == "hit"
+        time.sleep(0.06)
+        assert expiring.get_or_fetch("k", fetch)[1] == "miss" and len(calls) == 2
+
+        failing = SearchResultCache()
+        failing.get_or_fetch("k", lambda: (False, [], "boom"))
+        assert failing.get_or_fetch("k", lambda: (True, [], None))[1] == "miss"
+        server.session.close()
+    print("✓ Repeated queries skip the upstream API")
+
+
+def test_single_flight_collapses_identical_queries():
+    """Test that concurrent identical queries share one upstream request"""
+    print("Testing single-flight collapsing...")
+
+    with StandInBrave(latency=0.3) as brave:
+        server = make_server(brave, rate_limit=0)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: server.perform_search("same query"), range(8)))
+
+        assert len(brave.queries) == 1
+        assert all(result == results[0] and result[0] for result in results)
+        lookups = server.get_metrics()["cache"]
+        assert lookups["miss"] == 1 and lookups["shared"] == 7
+        server.session.close()
+    print("✓ 8 concurrent searches made 1 upstream request")
+
+
+def test_rate_limit_queues_instead_of_429():
+    """Test that a burst of distinct queries stays within the plan and metrics are served over HTTP"""
+    print("Testing client-side rate limiting...")
+
+    with StandInBrave(min_interval=0.1, latency=0.01) as brave:
+        server = make_server(brave, rate_limit=10, rate_burst=1, max_queue_wait=0.35)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda i: server.perform_search(f"query {i}"), range(6)))
+
+        assert brave.rejected == 0
+        succeeded = [result for result in results if result[0]]
+        refused = [result for result in results if not result[0]]
+        assert len(succeeded) == 4 and len(refused) == 2  # waits beyond 0.35s are refused
+        assert all("rate limit queue is full" in result[2] for result in refused)
+
+        SearchRequestHandler.set_search_func(server.perform_search)
+        SearchRequestHandler.set_metrics_func(server.get_metrics)
+        httpd = ThreadedHTTPServer(("127.0.0.1", 0), SearchRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        try:
+            response = requests.post(base_url, json={"parameters": {"query": "query 0"}}, timeout=5).json()
+            assert response["result"]["success"] and response["result"]["results"][0]["title"] == "Result for query 0"
+            metrics = requests.get(f"{base_url}/metrics", timeout=5).json()["result"]
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            server.session.close()
+
+        assert metrics["cache"]["hit"] == 1 and metrics["cache"]["hit_rate"] == round(1 / 7, 4)
+        assert metrics["rate_limiter"]["rejected"] == 2 and metrics["rate_limiter"]["max_wait_ms"] >= 250
+        assert metrics["upstream"]["calls"] == 4 and metrics["upstream"]["rate_limited"] == 0
+        assert metrics["upstream"]["latency_p50_ms"] > 0
+    print("✓ Searches wait for a slot and no request is rejected upstream")
+
+
+def test_429_pauses_all_searches():
+    """Test that a 429 holds back later searches for Retry-After instead of hammering the API"""
+    print("Testing 429 handling...")
+
+    with StandInBrave(min_interval=0.2, latency=0.01) as brave:
+        # The client believes it may send 20 per second; the API allows 5
+        server = make_server(brave, rate_limit=20, rate_burst=1, base_delay=0.2, max_queue_wait=2)
+        started = time.monotonic()
+        first = server.perform_search("first")
+        second = server.perform_search("second")
+        elapsed = time.monotonic() - started
+
+        assert first[0] and second[0]
+        assert brave.rejected == 1 and elapsed >= 0.2
+        assert server.get_metrics()["upstream"]["rate_limited"] == 1
+        server.session.close()
+    print("✓ The retry waited in the rate limiter queue")
+
+
+if __name__ == "__main__":
+    test_token_bucket_queues_in_order()
+    test_cache_hits_and_normalization()
+    test_single_flight_collapses_identical_queries()
+    test_rate_limit_queues_instead_of_429()
+    test_429_pauses_all_searches()
+    print("\nAll search cache tests passed!")
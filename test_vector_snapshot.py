@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script to verify vector snapshot export, checksum verification and restore
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from rag_component import vector_snapshot
+
+
+def _make_source_collection(count=25):
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="documents",
+        vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE),
+    )
+    rng = np.random.default_rng(0)
+    client.upsert(collection_name="documents", points=[
+        models.PointStruct(
+            id=i + 1,
+            vector=rng.random(4).tolist(),
+            payload={"page_content": f"chunk {i}", "metadata": {"file_id": f"f{i % 3}", "tags": ["a", "b"]}},
+        )
+        for i in range(count)
+    ])
+    return client
+
+
+def test_export_writes_chunked_snapshot():
+    """Test that export writes memory-mappable chunks and a manifest"""
+    print("Testing snapshot export...")
+
+    snapshot_dir = tempfile.mkdtemp()
+    try:
+        manifest = vector_snapshot.export_qdrant_collection(
+            _make_source_collection(), "documents", snapshot_dir, chunk_size=10
+        )
+        assert manifest["count"] == 25
+        assert manifest["dimension"] == 4
+        assert manifest["distance"] == "Cosine"
+        assert [chunk["count"] for chunk in manifest["chunks"]] == [10, 10, 5]
+
+        vectors = np.load(os.path.join(snapshot_dir, "vectors-00000.npy"), mmap_mode="r")
+        assert vectors.shape == (10, 4) and vectors.dtype == np.float32
+        assert vector_snapshot.verify_snapshot(snapshot_dir)["count"] == 25
+        print("✓ Snapshot exported in chunks with a verified manifest")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def test_corrupted_snapshot_is_rejected():
+    """Test that checksum mismatches stop a restore before anything is written"""
+    print("Testing checksum verification...")
+
+    snapshot_dir = tempfile.mkdtemp()
+    try:
+        vector_snapshot.export_qdrant_collection(_make_source_collection(), "documents", snapshot_dir, chunk_size=10)
+        with open(os.path.join(snapshot_dir, "payloads-00001.jsonl"), "a", encoding="utf-8") as f:
+            f.write("\n")
+
+        target = QdrantClient(":memory:")
+        try:
+            vector_snapshot.import_into_qdrant(snapshot_dir, target, "restored")
+        except ValueError as e:
+            assert "Checksum mismatch" in str(e)
+        else:
+            raise AssertionError("Corrupted snapshot should have been rejected")
+        assert not target.collection_exists("restored")
+        print("✓ Corrupted snapshot rejected")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def test_restore_into_qdrant_roundtrip():
+    """Test that a restored Qdrant collection returns the same search results"""
+    print("Testing Qdrant restore...")
+
+    snapshot_dir = tempfile.mkdtemp()
+    try:
+        source = _make_source_collection()
+        vector_snapshot.export_qdrant_collection(source, "documents", snapshot_dir, chunk_size=10)
+
+        target = QdrantClient(":memory:")
+        restored = vector_snapshot.import_into_qdrant(snapshot_dir, target, "restored", batch_size=8, parallelism=1)
+        assert restored == 25
+        assert target.count("restored").count == 25
+
+        query = [0.1, 0.9, 0.3, 0.5]
+        expected = [hit.id for hit in source.query_points("documents", query=query, limit=5).points]
+        actual = target.query_points("restored", query=query, limit=5, with_payload=True).points
+        assert [hit.id for hit in actual] == expected
+        assert actual[0].payload["metadata"]["tags"] == ["a", "b"]
+
+        target.create_collection("euclid", vectors_config=models.VectorParams(size=4, distance=models.Distance.EUCLID))
+        try:
+            vector_snapshot.import_into_qdrant(snapshot_dir, target, "euclid")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("A collection with another distance should be rejected")
+        print("✓ Qdrant restore matches the source collection")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def test_restore_into_chroma():
+    """Test restoring a snapshot into Chroma with the snapshot's distance and dimension"""
+    print("Testing Chroma restore...")
+
+    import chromadb
+
+    snapshot_dir = tempfile.mkdtemp()
+    export_dir = tempfile.mkdtemp()
+    try:
+        manifest = vector_snapshot.export_qdrant_collection(
+            _make_source_collection(), "documents", snapshot_dir, chunk_size=10
+        )
+        client = chromadb.EphemeralClient()
+
+        mismatched = [client.get_or_create_collection("restored_snapshot_l2")]
+        mismatched.append(client.get_or_create_collection(
+            "restored_snapshot_dim", metadata=vector_snapshot.chroma_collection_metadata(manifest)
+        ))
+        mismatched[1].add(ids=["other"], embeddings=[[1.0, 0.0]])
+        for target in mismatched:
+            try:
+                vector_snapshot.import_into_chroma(snapshot_dir, target)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"{target.name} does not match the snapshot and should be rejected")
+
+        collection = client.get_or_create_collection(
+            "restored_snapshot_test", metadata=vector_snapshot.chroma_collection_metadata(manifest)
+        )
+        assert vector_snapshot.import_into_chroma(snapshot_dir, collection, batch_size=7) == 25
+        record = collection.get(ids=["1"], include=["documents", "metadatas"])
+        assert record["documents"] == ["chunk 0"]
+        assert record["metadatas"][0]["tags"] == '["a", "b"]'
+        assert vector_snapshot.export_chroma_collection(collection, export_dir)["distance"] == "Cosine"
+        print("✓ Chroma restore keeps the cosine distance and rejects mismatched collections")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_export_writes_chunked_snapshot()
+    test_corrupted_snapshot_is_rejected()
+    test_restore_into_qdrant_roundtrip()
+    test_restore_into_chroma()
+    print("\nAll vector snapshot tests passed!")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the streaming download -> summarize -> rank pipeline
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rag_component.reranker import Reranker
+from rag_component.retrieval_benchmark import StandInEmbeddingServer
+from rag_component.web_result_pipeline import IncrementalTopK, run_pipeline
+
+
+def test_incremental_top_k():
+    """Test that only the K best items are kept, ties going to earlier items"""
+    print("Testing incremental top-K...")
+
+    ranking = IncrementalTopK(3)
+    for order, score in enumerate([0.2, 0.9, 0.5, 0.9, 0.1, 0.7]):
+        ranking.push(score, f"item{order}", order)
+
+    assert ranking.items() == ["item1", "item3", "item5"]
+    assert ranking.count_at_least(0.8) == 2
+    print("✓ Top-K keeps the best items in order")
+
+
+def test_summaries_start_before_all_downloads_finish():
+    """Test that a fast page is summarized while slow downloads are still running"""
+    print("Testing per-page streaming...")
+
+    slow_download_done = threading.Event()
+    summarized_while_downloading = []
+
+    def download(item):
+        if item == "slow":
+            time.sleep(0.3)
+            slow_download_done.set()
+        return {"content": item}
+
+    def summarize(item, downloaded):
+        summarized_while_downloading.append((item, not slow_download_done.is_set()))
+        return {"url": item, "summary": downloaded["content"]}
+
+    results, stats = run_pipeline(
+        ["slow", "fast"], download, summarize, score=lambda r: 1.0 if r["url"] == "fast" else 0.5,
+        top_k=2, parallelism=2
+    )
+
+    assert ("fast", True) in summarized_while_downloading
+    assert [r["url"] for r in results] == ["fast", "slow"]
+    assert results[0]["relevance_score"] == 1.0
+    assert stats["summarized"] == 2 and not stats["early_return"]
+    print("✓ Each page is summarized as soon as its own download completes")
+
+
+def test_early_return_after_budget():
+    """Test that the call returns once K good results exist and the budget has expired"""
+    print("Testing early return...")
+
+    release = threading.Event()
+
+    def download(item):
+        if item.startswith("stuck"):
+            release.wait(5)
+        return item
+
+    started = time.monotonic()
+    results, stats = run_pipeline(
+        ["a", "b", "stuck1", "stuck2"],
+        download,
+        summarize=lambda item, downloaded: {"url": item},
+        score=lambda r: 0.9,
+        top_k=2,
+        parallelism=4,
+        time_budget=0.2,
+        min_score=0.8
+    )
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert stats["early_return"]
+    assert 0.2 <= elapsed < 2.0
+    assert [r["url"] for r in results] == ["a", "b"]
+
+    # Low scores never trigger the early return: every result is awaited
+    results, stats = run_pipeline(
+        ["a", "b", "c"], lambda item: item, lambda item, d: {"url": item}, score=lambda r: 0.1,
+        top_k=2, time_budget=0.01, min_score=0.8
+    )
+    assert not stats["early_return"] and stats["summarized"] == 3
+    print("✓ Early return only happens with enough high-scoring results after the budget")
+
+
+def test_failures_are_skipped():
+    """Test that a failing download or summary does not abort the pipeline"""
+    print("Testing failure handling...")
+
+    def download(item):
+        if item == "broken":
+            raise ConnectionError("download failed")
+        return item
+
+    results, stats = run_pipeline(
+        ["ok", "broken", "empty"], download,
+        summarize=lambda item, d: None if item == "empty" else {"url": item},
+        score=lambda r: 0.5, top_k=5
+    )
+    assert [r["url"] for r in results] == ["ok"]
+    assert stats["downloaded"] == 2
+    print("✓ Failed items are skipped")
+
+
+def test_reranker_scores_incrementally():
+    """Test in-process reranking of single texts against a pre-embedded query"""
+    print("Testing incremental reranker scoring...")
+
+    with StandInEmbeddingServer(dimension=64) as server:
+        reranker = Reranker()
+        reranker.base_url = server.base_url
+        query_embedding = reranker.embed_text("brent crude oil price")
+        relevant = reranker.score_text(query_embedding, "Brent crude oil price rose to 80 dollars")
+        unrelated = reranker.score_text(query_embedding, "Opening hours of the city library")
+
+    assert relevant > unrelated
+    assert server.request_count == 3
+    print("✓ Summaries are scored one by one against the cached query embedding")
+
+
+if __name__ == "__main__":
+    test_incremental_top_k()
+    test_summaries_start_before_all_downloads_finish()
+    test_early_return_after_budget()
+    test_failures_are_skipped()
+    test_reranker_scores_incrementally()
+    print("\nAll web result pipeline tests passed!")
@@ -0,0 +1,172 @@
+"""
+Per-request deadlines shared by the gateway, the agent, MCP calls, LLM calls and MCP servers.
+
+The gateway gives every agent request a deadline (absolute Unix time) and sends it along in the
+X-Request-Deadline header. The agent service passes it to run_enhanced_agent, which makes it the
+current deadline of every graph node; MCP and LLM calls made during the run take their timeouts
+from the time left, and MCP calls forward the deadline to the service (header and "deadline" in
+the payload) so the service can give up on work nobody is waiting for any more.
+
+Deadlines are absolute times so they survive hops unchanged; hosts are expected to keep their
+clocks in sync (NTP). Work with no deadline set keeps its own static timeouts.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Dict, Iterator, Mapping, Optional
+
+DEADLINE_HEADER = "X-Request-Deadline"
+# Budget in seconds a client may ask the gateway for (capped by AGENT_REQUEST_TIMEOUT_SECONDS)
+TIMEOUT_HEADER = "X-Request-Timeout"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work would start, or is still running, after the request deadline"""
+
+
+def deadline_after(seconds: float) -> float:
+    """Deadline the given number of seconds from now."""
+    return time.time() + seconds
+
+
+def current_deadline() -> Optional[float]:
+    """Deadline of the request being processed, or None."""
+    return _deadline.get()
+
+
+def set_deadline(deadline: Optional[float]) -> Token:
+    """
+    Make a deadline current for the rest of this context (e.g. a thread serving one request).
+
+    Returns:
+        Token for ContextVar.reset
+    """
+    return _deadline.set(deadline)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]) -> Iterator[Optional[float]]:
+    """Make a deadline current inside the with block; None keeps the outer deadline."""
+    if deadline is None:
+        yield current_deadline()
+        return
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds(deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Time left before a deadline.
+
+    Args:
+        deadline: Deadline to check (default: the current one)
+
+    Returns:
+        Seconds left (negative once passed), or None without a deadline
+    """
+    deadline = deadline if deadline is not None else current_deadline()
+    return None if deadline is None else deadline - time.time()
+
+
+def deadline_passed(deadline: Optional[float] = None) -> bool:
+    """Whether the deadline (default: the current one) has passed."""
+    remaining = remaining_seconds(deadline)
+    return remaining is not None and remaining <= 0
+
+
+def check_deadline(what: str = "work") -> None:
+    """
+    Raise DeadlineExceeded when the current deadline has passed.
+
+    Args:
+        what: What was about to start, for the error message
+    """
+    remaining = remaining_seconds()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded {-remaining:.1f}s before {what}")
+
+
+def bounded_timeout(default: float, what: str = "call") -> float:
+    """
+    Timeout for a blocking call: its usual timeout, or less when the deadline is closer.
+
+    Args:
+        default: The call's usual timeout in seconds
+        what: What the timeout is for, for the error message
+
+    Returns:
+        Timeout in seconds
+
+    Raises:
+        DeadlineExceeded: When the deadline has already passed
+    """
+    check_deadline(what)
+    remaining = remaining_seconds()
+    return default if remaining is None else min(default, remaining)
+
+
+def parse_deadline(value: Any) -> Optional[float]:
+    """Deadline from a header or payload value, or None when missing or invalid."""
+    try:
+        deadline = float(value)
+    except (TypeError, ValueError):
+        return None
+    return deadline if deadline > 0 else None
+
+
+def request_deadline(headers: Mapping[str, str], payload: Optional[Dict[str, Any]] = None,
+                     default_timeout: Optional[float] = None, max_timeout: Optional[float] = None) -> Optional[float]:
+    """
+    Deadline of an incoming request.
+
+    Args:
+        headers: Request headers (X-Request-Deadline, or X-Request-Timeout in seconds)
+        payload: MCP request payload, which may carry "deadline"
+        default_timeout: Budget in seconds when the request sets none
+        max_timeout: Longest budget allowed from now
+
+    Returns:
+        Absolute deadline, or None when the request sets none and there is no default
+    """
+    deadline = parse_deadline(headers.get(DEADLINE_HEADER))
+    if deadline is None and isinstance(payload, dict):
+        deadline = parse_deadline(payload.get("deadline"))
+    if deadline is None:
+        timeout = parse_deadline(headers.get(TIMEOUT_HEADER)) or default_timeout
+        deadline = deadline_after(timeout) if timeout else None
+    if deadline is not None and max_timeout:
+        deadline = min(deadline, deadline_after(max_timeout))
+    return deadline
+
+
+def deadline_headers(deadline: Optional[float] = None) -> Dict[str, str]:
+    """Headers forwarding a deadline (default: the current one); empty without a deadline."""
+    deadline = deadline if deadline is not None else current_deadline()
+    return {DEADLINE_HEADER: f"{deadline:.3f}"} if deadline is not None else {}
+
+
+async def run_before_deadline(awaitable: Awaitable, deadline: Optional[float] = None, what: str = "request"):
+    """
+    Await work, cancelling it when the deadline (default: the current one) passes.
+
+    Raises:
+        DeadlineExceeded: When the deadline passed before or while the work ran
+    """
+    remaining = remaining_seconds(deadline)
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(f"Deadline exceeded {-remaining:.1f}s before {what}")
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded while processing {what}") from None
@@ -0,0 +1,36 @@
+"""
+LLM calls that respect the current request deadline (utils.deadline): a ChatOpenAI whose
+timeout is the time left, and a tenacity stop condition for retried LLM calls.
+"""
+
+from typing import Any, Optional
+
+from langchain_openai import ChatOpenAI
+from tenacity import retry_if_not_exception_type
+
+from utils.deadline import DeadlineExceeded, bounded_timeout, remaining_seconds
+
+
+class DeadlineChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI for agent components: inside a request with a deadline, every call (invoke,
+    stream and their async versions) is given the time left as its timeout, and raises
+    DeadlineExceeded instead of starting once the deadline has passed. Without a deadline it
+    behaves exactly like ChatOpenAI.
+    """
+
+    def _get_request_payload(self, input_: Any, *, stop: Optional[list] = None, **kwargs: Any) -> dict:
+        if remaining_seconds() is not None and 'timeout' not in kwargs:
+            default = self.request_timeout if isinstance(self.request_timeout, (int, float)) else float('inf')
+            kwargs['timeout'] = bounded_timeout(default, "calling the LLM")
+        return super()._get_request_payload(input_, stop=stop, **kwargs)
+
+
+def stop_at_deadline(retry_state: Any) -> bool:
+    """Tenacity stop condition: give up when the deadline would pass during the wait before the retry."""
+    remaining = remaining_seconds()
+    return remaining is not None and remaining <= (retry_state.upcoming_sleep or 0)
+
+
+# Retry options for @retry on LLM calls: never retry work the deadline has cut off
+deadline_retry = retry_if_not_exception_type(DeadlineExceeded)
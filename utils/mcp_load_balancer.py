@@ -0,0 +1,131 @@
+"""
+Client-side load balancing across the registered instances of an MCP service type.
+
+Instances are picked by power-of-two-choices: two random candidates are compared and the one
+with the lower (outstanding requests + 1) * latency EWMA wins. Outstanding requests react at
+once to a busy instance, the EWMA to a slow one, and random sampling keeps many agent workers
+from all piling onto the same "best" instance.
+
+Candidates are always the instances the registry currently lists, so new replicas get traffic
+as soon as they register (an instance without latency history is scored with the average of the
+others) and deregistered ones stop getting it. Statistics of instances that have not been seen
+for a while are dropped.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Weight of the newest latency sample in the EWMA
+EWMA_ALPHA = 0.3
+# Latency charged for a failed call, so an instance failing fast does not look fast
+FAILURE_PENALTY_MS = 1000.0
+# Statistics of instances missing from the registry for this long are dropped
+STALE_SECONDS = 600.0
+
+
+class LoadBalancer:
+    """Picks MCP service instances by outstanding requests and latency. Safe to share between threads."""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        """
+        Args:
+            rng: Random generator used for sampling (for reproducible tests)
+        """
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._last_prune = time.monotonic()
+
+    def _entry(self, service_id: str) -> Dict[str, Any]:
+        # Called with the lock held
+        entry = self._stats.get(service_id)
+        if entry is None:
+            entry = self._stats[service_id] = {"outstanding": 0, "ewma_ms": None, "calls": 0, "seen": time.monotonic()}
+        return entry
+
+    def _score(self, entry: Dict[str, Any], default_ms: float) -> float:
+        ewma = entry["ewma_ms"] if entry["ewma_ms"] is not None else default_ms
+        return (entry["outstanding"] + 1) * max(ewma, 1.0)
+
+    def rank(self, services: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Order instances of one service type for a call.
+
+        Args:
+            services: Instances currently listed by the registry
+
+        Returns:
+            The same instances: the power-of-two-choices pick first, then the others from least
+            to most loaded (fallbacks when the pick's circuit breaker is open)
+        """
+        if len(services) < 2:
+            return list(services)
+        now = time.monotonic()
+        with self._lock:
+            entries = {}
+            for service in services:
+                entry = entries[service['id']] = self._entry(service['id'])
+                entry["seen"] = now
+            known = [entry["ewma_ms"] for entry in entries.values() if entry["ewma_ms"] is not None]
+            default_ms = sum(known) / len(known) if known else 1.0
+            scores = {service_id: self._score(entry, default_ms) for service_id, entry in entries.items()}
+            if now - self._last_prune > STALE_SECONDS:
+                self._prune(now)
+
+        first, second = self._rng.sample(services, 2)
+        pick = first if scores[first['id']] <= scores[second['id']] else second
+        rest = sorted((service for service in services if service is not pick), key=lambda service: scores[service['id']])
+        return [pick] + rest
+
+    def begin(self, service: Dict[str, Any]) -> None:
+        """Count a call to the instance as outstanding."""
+        with self._lock:
+            entry = self._entry(service['id'])
+            entry["outstanding"] += 1
+            entry["seen"] = time.monotonic()
+
+    def end(self, service: Dict[str, Any], duration_ms: Optional[float] = None, failed: bool = False) -> None:
+        """
+        Finish a call started with begin.
+
+        Args:
+            service: Instance called
+            duration_ms: Call duration, or None for an abandoned call (no latency sample)
+            failed: Whether the service failed
+        """
+        with self._lock:
+            entry = self._entry(service['id'])
+            entry["outstanding"] = max(0, entry["outstanding"] - 1)
+            if duration_ms is None:
+                return
+            entry["calls"] += 1
+            sample = max(duration_ms, FAILURE_PENALTY_MS) if failed else duration_ms
+            entry["ewma_ms"] = sample if entry["ewma_ms"] is None else (
+                EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * entry["ewma_ms"]
+            )
+
+    def _prune(self, now: float) -> None:
+        # Called with the lock held
+        self._last_prune = now
+        for service_id in [sid for sid, entry in self._stats.items()
+                           if entry["outstanding"] == 0 and now - entry["seen"] > STALE_SECONDS]:
+            del self._stats[service_id]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load of every known instance.
+
+        Returns:
+            Dictionary of service id -> outstanding, ewma_ms and calls
+        """
+        with self._lock:
+            return {
+                service_id: {
+                    "outstanding": entry["outstanding"],
+                    "ewma_ms": round(entry["ewma_ms"], 1) if entry["ewma_ms"] is not None else None,
+                    "calls": entry["calls"]
+                }
+                for service_id, entry in self._stats.items()
+            }
@@ -0,0 +1,487 @@
+"""
+Circuit breakers and hedged requests for MCP service calls.
+
+Every service instance (registry id) has a circuit breaker fed with the outcome and latency of
+its calls. When too many recent calls failed (errors and timeouts; slow successful calls only
+with MCP_CIRCUIT_BREAKER_SLOW_CALL_MS set), the breaker opens and calls go to
+another instance of the same service type, or fail at once instead of waiting for the timeout.
+After MCP_CIRCUIT_BREAKER_OPEN_SECONDS one probe call is let through (half-open); a successful
+probe closes the breaker, however long it took, and a failed one re-opens it. HTTP 4xx replies are the caller's fault and do not count, nor
+do calls cut short by the request deadline (utils.deadline).
+
+With MCP_HEDGE_ENABLED, idempotent actions that have not answered after the instance's p95
+latency are also sent to another healthy instance of the same type; the first success wins.
+Actions are idempotent when the service's cache_policy marks them cacheable, or declares
+"idempotent": True for them (see utils.mcp_result_cache).
+
+With MCP_LOAD_BALANCING, the instance a call goes to is picked among all registered instances of
+the service type by utils.mcp_load_balancer, so started replicas share the traffic.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.settings import (
+    MCP_CIRCUIT_BREAKER_ENABLED,
+    MCP_CIRCUIT_BREAKER_WINDOW,
+    MCP_CIRCUIT_BREAKER_MIN_CALLS,
+    MCP_CIRCUIT_BREAKER_FAILURE_RATE,
+    MCP_CIRCUIT_BREAKER_SLOW_CALL_MS,
+    MCP_CIRCUIT_BREAKER_OPEN_SECONDS,
+    MCP_HEDGE_ENABLED,
+    MCP_HEDGE_DELAY_MS,
+    MCP_HEDGE_MIN_DELAY_MS,
+    MCP_LOAD_BALANCING
+)
+from utils.mcp_load_balancer import LoadBalancer
+from utils.mcp_result_cache import cache_rule
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latency history per instance used for the hedge delay
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 5
+
+
+def is_idempotent(service: Dict[str, Any], action: Optional[str]) -> bool:
+    """
+    Whether an action may safely be sent to two instances.
+
+    Args:
+        service: Service dictionary from the registry
+        action: Action name
+
+    Returns:
+        True when the service's cache_policy marks the action cacheable or idempotent
+    """
+    rule = cache_rule(service, action)
+    return rule is not None and bool(rule.get('idempotent', rule.get('cacheable', True)))
+
+
+def is_deadline_error(result: Any) -> bool:
+    """Whether a call result is an error caused by the request deadline rather than the service."""
+    return isinstance(result, dict) and result.get('status') == 'error' and (
+        str(result.get('error', '')).startswith(('Deadline exceeded', 'HTTP 408'))
+    )
+
+
+def is_service_failure(result: Any) -> bool:
+    """Whether a call result says the service failed (errors other than HTTP 4xx replies and deadline errors)."""
+    if not isinstance(result, dict) or result.get('status') != 'error':
+        return False
+    error = str(result.get('error', ''))
+    return not error.startswith('HTTP 4') and not is_deadline_error(result)
+
+
+class CircuitBreaker:
+    """
+    Breaker for one service instance, based on the failure rate of its recent calls (errors and
+    timeouts, plus slow calls when slow_call_ms is set). Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        window: int = MCP_CIRCUIT_BREAKER_WINDOW,
+        min_calls: int = MCP_CIRCUIT_BREAKER_MIN_CALLS,
+        failure_rate: float = MCP_CIRCUIT_BREAKER_FAILURE_RATE,
+        slow_call_ms: float = MCP_CIRCUIT_BREAKER_SLOW_CALL_MS,
+        open_seconds: float = MCP_CIRCUIT_BREAKER_OPEN_SECONDS
+    ):
+        """
+        Args:
+            window: Recent calls the failure rate is computed over
+            min_calls: Calls needed in the window before the breaker can open
+            failure_rate: Share of failed (or slow) calls that opens the breaker
+            slow_call_ms: Successful calls slower than this count as failures; 0 disables this
+            open_seconds: Time the breaker stays open before a probe call
+        """
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._outcomes: deque = deque(maxlen=window)
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+
+    def acquire(self) -> bool:
+        """
+        Ask to call the instance. In the half-open state only one probe call is allowed at a time.
+
+        Returns:
+            True when the call may go ahead; the caller must then call record or release
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back an acquired call that was abandoned before it finished."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, failed: bool, duration_ms: float) -> None:
+        """
+        Record the outcome of an acquired call.
+
+        Args:
+            failed: Whether the service failed
+            duration_ms: Call duration
+        """
+        bad = failed or 0 < self.slow_call_ms <= duration_ms
+        with self._lock:
+            if not failed:
+                self._latencies.append(duration_ms)
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                # The probe only has to show the instance answers again; slow is fine
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    logger.info("[CIRCUIT_BREAKER] Probe call succeeded, breaker closed")
+            elif self.state == CLOSED:
+                self._outcomes.append(bad)
+                failures = sum(self._outcomes)
+                if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self) -> None:
+        # Called with the lock held
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        logger.warning(f"[CIRCUIT_BREAKER] Breaker opened for {self.open_seconds}s")
+
+    def p95_ms(self) -> Optional[float]:
+        """95th percentile latency of recent successful calls, or None without enough history."""
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Breaker state for monitoring.
+
+        Returns:
+            Dictionary with state, recent_calls, recent_failures, times_opened, p95_ms and,
+            while open, retry_in_seconds
+        """
+        p95 = self.p95_ms()
+        with self._lock:
+            snapshot = {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(self._outcomes),
+                "times_opened": self._times_opened,
+                "p95_ms": round(p95, 1) if p95 is not None else None
+            }
+            if self.state == OPEN:
+                snapshot["retry_in_seconds"] = round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+            return snapshot
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers of all MCP service instances, keyed by service id"""
+
+    def __init__(self, enabled: bool = MCP_CIRCUIT_BREAKER_ENABLED, **breaker_options):
+        """
+        Args:
+            enabled: When False calls are never refused (latencies are still tracked for hedging)
+            **breaker_options: CircuitBreaker arguments
+        """
+        self.enabled = enabled
+        self._breaker_options = breaker_options
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._services: Dict[str, Dict[str, Any]] = {}
+
+    def breaker(self, service: Dict[str, Any]) -> CircuitBreaker:
+        """Get the breaker of a service instance, creating it on first use."""
+        with self._lock:
+            breaker = self._breakers.get(service['id'])
+            if breaker is None:
+                breaker = self._breakers[service['id']] = CircuitBreaker(**self._breaker_options)
+                self._services[service['id']] = {"type": service.get('type'), "host": service.get('host'), "port": service.get('port')}
+            return breaker
+
+    def acquire(self, service: Dict[str, Any]) -> bool:
+        """Whether a call to the instance may go ahead (see CircuitBreaker.acquire)."""
+        return self.breaker(service).acquire() or not self.enabled
+
+    def allows(self, service: Dict[str, Any]) -> bool:
+        """Whether the instance's breaker is closed (without taking a half-open probe slot)."""
+        return not self.enabled or self.breaker(service).state == CLOSED
+
+    def record(self, service: Dict[str, Any], result: Any, duration_ms: float) -> None:
+        """Feed a call result into the instance's breaker."""
+        self.breaker(service).record(is_service_failure(result), duration_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        State of every breaker.
+
+        Returns:
+            Dictionary of service id -> type, host, port and CircuitBreaker.snapshot() fields
+        """
+        with self._lock:
+            items = list(self._breakers.items())
+            services = dict(self._services)
+        return {service_id: {**services[service_id], **breaker.snapshot()} for service_id, breaker in items}
+
+
+def _breaker_open_result(service: Dict[str, Any], action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "service_id": service['id'],
+        "action": action,
+        "parameters": parameters,
+        "status": "error",
+        "error": f"Circuit breaker open for {service.get('type') or 'service'} instances ({service['id']})",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+class ResilientCaller:
+    """
+    Sends MCP calls to the least loaded instance of the service type, through the circuit
+    breakers, failing over to healthy instances and hedging slow idempotent calls.
+    call is for threads, acall for asyncio.
+    """
+
+    def __init__(
+        self,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        hedge_enabled: bool = MCP_HEDGE_ENABLED,
+        hedge_delay_ms: float = MCP_HEDGE_DELAY_MS,
+        hedge_min_delay_ms: float = MCP_HEDGE_MIN_DELAY_MS,
+        balancer: Optional[LoadBalancer] = None,
+        balance: bool = MCP_LOAD_BALANCING
+    ):
+        """
+        Args:
+            breakers: Breaker registry (default: a new one)
+            hedge_enabled: Send slow idempotent calls to a second instance
+            hedge_delay_ms: Hedge delay for instances without latency history
+            hedge_min_delay_ms: Lower bound for the p95-based hedge delay
+            balancer: Load balancer (default: a new one)
+            balance: Spread calls over the instances of a type; when False the requested instance
+                is called unless its breaker is open
+        """
+        self.breakers = breakers or CircuitBreakerRegistry()
+        self.balancer = balancer or LoadBalancer()
+        self.balance = balance
+        self.hedge_enabled = hedge_enabled
+        self.hedge_delay_ms = hedge_delay_ms
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _plan(self, service: Dict[str, Any], action: str, candidates: Optional[List[Dict[str, Any]]]):
+        # The instance to call first (breaker acquired), and healthy instances to hedge to
+        same_type = [
+            other for other in (candidates or [])
+            if other['id'] != service['id'] and other.get('type') == service.get('type')
+        ]
+        instances = [service] + same_type
+        if self.balance:
+            instances = self.balancer.rank(instances)
+        primary = None
+        for instance in instances:
+            if self.breakers.acquire(instance):
+                primary = instance
+                break
+        if primary is None:
+            return None, []
+        if primary is not instances[0]:
+            logger.warning(f"[CIRCUIT_BREAKER] {instances[0]['id']} is unavailable, calling {primary['id']} instead")
+        hedges = []
+        if self.hedge_enabled and is_idempotent(primary, action):
+            hedges = [other for other in instances if other is not primary and self.breakers.allows(other)]
+        return primary, hedges
+
+    def _hedge_delay(self, service: Dict[str, Any]) -> float:
+        p95 = self.breakers.breaker(service).p95_ms()
+        delay_ms = self.hedge_delay_ms if p95 is None else max(p95, self.hedge_min_delay_ms)
+        return delay_ms / 1000
+
+    def call_any(self, services: List[Dict[str, Any]], action: str, parameters: Dict[str, Any],
+                 call: Callable[[Dict[str, Any], str, Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Call one of several interchangeable instances (e.g. every "rag" instance from the registry).
+
+        Args:
+            services: Instances of one service type; must not be empty
+            action: Action to perform
+            parameters: Action parameters
+            call: Function (service, action, parameters) -> result dictionary
+
+        Returns:
+            Result dictionary of the instance that was called
+        """
+        return self.call(services[0], action, parameters, call, services)
+
+    def call(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any],
+             call: Callable[[Dict[str, Any], str, Dict[str, Any]], Dict[str, Any]],
+             candidates: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Call a service instance, or the least loaded instance of its type, through its circuit breaker.
+
+        Args:
+            service: Service instance the planner chose
+            action: Action to perform
+            parameters: Action parameters
+            call: Function (service, action, parameters) -> result dictionary
+            candidates: Other known services; instances of the same type are used for failover and hedging
+
+        Returns:
+            Result dictionary; "hedged": True when the result came from a hedge request
+        """
+        primary, hedges = self._plan(service, action, candidates)
+        if primary is None:
+            return _breaker_open_result(service, action, parameters)
+        if not hedges:
+            return self._timed_call(primary, action, parameters, call)
+
+        executor = self._hedge_executor()
+        first = executor.submit(contextvars.copy_context().run, self._timed_call, primary, action, parameters, call)
+        done, _ = wait([first], timeout=self._hedge_delay(primary))
+        if done:
+            return first.result()
+
+        hedge_service = hedges[0]
+        self.breakers.breaker(hedge_service).acquire()
+        logger.info(f"[MCP_HEDGE] {primary['id']} is slow for {action}, hedging to {hedge_service['id']}")
+        second = executor.submit(contextvars.copy_context().run, self._timed_call, hedge_service, action, parameters, call)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result.get('status') == 'success':
+                    return {**result, "hedged": True} if future is second else result
+        # Both failed: report the instance the planner chose
+        return first.result()
+
+    async def acall(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any],
+                    call: Callable[[Dict[str, Any], str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                    candidates: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Asyncio version of call: call is a coroutine function. The losing request of a hedge is cancelled.
+        """
+        primary, hedges = self._plan(service, action, candidates)
+        if primary is None:
+            return _breaker_open_result(service, action, parameters)
+        if not hedges:
+            return await self._atimed_call(primary, action, parameters, call)
+
+        first = asyncio.ensure_future(self._atimed_call(primary, action, parameters, call))
+        done, _ = await asyncio.wait({first}, timeout=self._hedge_delay(primary))
+        if done:
+            return first.result()
+
+        hedge_service = hedges[0]
+        self.breakers.breaker(hedge_service).acquire()
+        logger.info(f"[MCP_HEDGE] {primary['id']} is slow for {action}, hedging to {hedge_service['id']}")
+        second = asyncio.ensure_future(self._atimed_call(hedge_service, action, parameters, call))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.get('status') == 'success':
+                        return {**result, "hedged": True} if task is second else result
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _finish(self, service, result, started):
+        if is_deadline_error(result):
+            # The request ran out of time: says nothing about the instance
+            self.breakers.breaker(service).release()
+            self.balancer.end(service)
+            return
+        duration_ms = (time.monotonic() - started) * 1000
+        self.breakers.record(service, result, duration_ms)
+        self.balancer.end(service, duration_ms, failed=is_service_failure(result))
+
+    def _timed_call(self, service, action, parameters, call):
+        started = time.monotonic()
+        self.balancer.begin(service)
+        result = {"status": "error"}  # recorded as a failure if call raises
+        try:
+            result = call(service, action, parameters)
+            return result
+        finally:
+            self._finish(service, result, started)
+
+    async def _atimed_call(self, service, action, parameters, call):
+        started = time.monotonic()
+        self.balancer.begin(service)
+        try:
+            result = await call(service, action, parameters)
+        except asyncio.CancelledError:
+            # Lost a hedge race: not the instance's fault
+            self.breakers.breaker(service).release()
+            self.balancer.end(service)
+            raise
+        except Exception:
+            self._finish(service, {"status": "error"}, started)
+            raise
+        self._finish(service, result, started)
+        return result
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mcp-hedge")
+            return self._executor
+
+
+_caller: Optional[ResilientCaller] = None
+_caller_lock = threading.Lock()
+
+
+def get_resilient_caller() -> ResilientCaller:
+    """Get the process-wide resilient MCP caller, creating it on first use."""
+    global _caller
+    with _caller_lock:
+        if _caller is None:
+            _caller = ResilientCaller()
+        return _caller
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Get the process-wide MCP circuit breakers."""
+    return get_resilient_caller().breakers
+
+
+def get_load_balancer() -> LoadBalancer:
+    """Get the process-wide MCP load balancer."""
+    return get_resilient_caller().balancer
@@ -0,0 +1,285 @@
+"""
+Result cache for idempotent MCP tool calls.
+
+Services declare which actions may be cached, and for how long, in their registry metadata:
+
+    "cache_policy": {
+        "get_schema": {"cacheable": True, "ttl_seconds": 600},
+        "*": {"cacheable": True, "ttl_seconds": 300},      # any other action
+        "execute_sql": {"cacheable": False}
+    }
+
+Results are keyed by (service type, action, canonicalized parameters), so every instance of a
+service type shares entries. Identical calls made while the first one is still running (e.g. the
+same call planned twice in one step, or by concurrent runs) wait for it instead of calling the
+service again. Actions without a policy are never cached.
+
+Results coming through the cache carry a "cache" annotation, so synthesis can tell fresh data
+from cached data:
+    {"hit": False, "ttl_seconds": 300}                                  fetched by this call
+    {"hit": False, "deduplicated": True, "ttl_seconds": 300}            shared with an identical call in flight
+    {"hit": True, "age_seconds": 42.0, "cached_at": "...Z", "ttl_seconds": 300}
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.settings import MCP_RESULT_CACHE_ENABLED, MCP_RESULT_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+def cache_rule(service: Dict[str, Any], action: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Look up the cache_policy entry the service declares for an action.
+
+    Args:
+        service: Service dictionary from the registry
+        action: Action name
+
+    Returns:
+        The action's entry (or the "*" entry), or None when there is none
+    """
+    policy = (service.get('metadata') or {}).get('cache_policy')
+    if not isinstance(policy, dict):
+        return None
+    rule = policy.get((action or '').lstrip('/'), policy.get('*'))
+    return rule if isinstance(rule, dict) else None
+
+
+def cache_ttl(service: Dict[str, Any], action: Optional[str]) -> Optional[float]:
+    """
+    Look up the cache TTL the service declares for an action.
+
+    Returns:
+        TTL in seconds, or None when the action must not be cached
+    """
+    rule = cache_rule(service, action)
+    if rule is None or not rule.get('cacheable', True):
+        return None
+    try:
+        ttl = float(rule.get('ttl_seconds', 0))
+    except (TypeError, ValueError):
+        return None
+    return ttl if ttl > 0 else None
+
+
+def is_successful_result(result: Any) -> bool:
+    """
+    Whether a call result may be cached: the call succeeded and so did the action.
+
+    Services such as the search server answer HTTP 200 with "success": False in the result
+    when their backend fails, so the transport-level status alone is not enough.
+    """
+    if not isinstance(result, dict) or result.get("status") != "success" or result.get("success") is False:
+        return False
+    inner = result.get("result")
+    return not (isinstance(inner, dict) and inner.get("success") is False)
+
+
+def cache_key(service: Dict[str, Any], action: Optional[str], parameters: Dict[str, Any]) -> str:
+    """
+    Key of a tool call: service type, action and parameters with sorted keys.
+
+    Returns:
+        Hex digest identifying the call
+    """
+    canonical = json.dumps(
+        [service.get('type') or service.get('id'), (action or '').lstrip('/'), parameters],
+        sort_keys=True, separators=(',', ':'), default=str, ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def describe_cache_status(result: Any) -> str:
+    """
+    Short freshness note for a result, for the synthesis prompt.
+
+    Returns:
+        e.g. " (cached result, fetched 5 min ago)", or "" for fresh or uncached results
+    """
+    cache = result.get('cache') if isinstance(result, dict) else None
+    if not isinstance(cache, dict) or not cache.get('hit'):
+        return ""
+    age = cache.get('age_seconds', 0)
+    age_text = f"{int(age)} s" if age < 60 else f"{int(age // 60)} min"
+    return f" (cached result, fetched {age_text} ago)"
+
+
+class _Flight:
+    """A call in progress that identical calls can wait for"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class MCPResultCache:
+    """
+    In-memory LRU cache of successful MCP tool call results with per-action TTLs.
+    Safe to share between threads; acall is the asyncio version of call. Every caller gets its own
+    copy of a cached result, since result enhancers modify nested values in place.
+    """
+
+    def __init__(self, max_entries: int = MCP_RESULT_CACHE_MAX_ENTRIES, enabled: bool = MCP_RESULT_CACHE_ENABLED):
+        """
+        Args:
+            max_entries: Results kept before the least recently used is evicted
+            enabled: When False every call goes straight to the service
+        """
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[Any, asyncio.Future] = {}
+        self._counters = {"hits": 0, "misses": 0, "deduplicated": 0, "evictions": 0}
+
+    def call(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any],
+             fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the cached result of a tool call, or fetch it.
+
+        Args:
+            service: Service dictionary from the registry
+            action: Action to perform
+            parameters: Action parameters
+            fetch: Calls the service and returns its result dictionary
+
+        Returns:
+            The result, with a "cache" annotation when the action is cacheable
+        """
+        ttl = cache_ttl(service, action) if self.enabled else None
+        if ttl is None:
+            return fetch()
+
+        key = cache_key(service, action, parameters)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.result is not None:
+                return self._shared(flight.result, ttl)
+            return self.call(service, action, parameters, fetch)
+
+        try:
+            flight.result = fetch()
+        finally:
+            with self._lock:
+                del self._flights[key]
+                self._store(key, flight.result, ttl)
+            flight.done.set()
+        return {**flight.result, "cache": {"hit": False, "ttl_seconds": ttl}}
+
+    async def acall(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any],
+                    fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Asyncio version of call: fetch is a coroutine function.
+        """
+        ttl = cache_ttl(service, action) if self.enabled else None
+        if ttl is None:
+            return await fetch()
+
+        key = cache_key(service, action, parameters)
+        flight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            flight = self._async_flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._async_flights[flight_key] = asyncio.get_running_loop().create_future()
+
+        if not leader:
+            result = await asyncio.shield(flight)
+            if result is not None:
+                return self._shared(result, ttl)
+            return await self.acall(service, action, parameters, fetch)
+
+        result = None
+        try:
+            result = await fetch()
+        finally:
+            with self._lock:
+                del self._async_flights[flight_key]
+                self._store(key, result, ttl)
+            flight.set_result(result)
+        return {**result, "cache": {"hit": False, "ttl_seconds": ttl}}
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry["stored"]
+        if age >= entry["ttl"]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return {**copy.deepcopy(entry["result"]), "cache": {
+            "hit": True, "age_seconds": round(age, 1), "cached_at": entry["cached_at"], "ttl_seconds": entry["ttl"]
+        }}
+
+    def _store(self, key: str, result: Optional[Dict[str, Any]], ttl: float) -> None:
+        # Called with the lock held; only successful results are kept
+        self._counters["misses"] += 1
+        if not is_successful_result(result):
+            return
+        self._entries[key] = {
+            "result": copy.deepcopy(result), "ttl": ttl, "stored": time.monotonic(),
+            "cached_at": datetime.utcnow().isoformat() + "Z"
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _shared(self, result: Dict[str, Any], ttl: float) -> Dict[str, Any]:
+        with self._lock:
+            self._counters["deduplicated"] += 1
+        return {**copy.deepcopy(result), "cache": {"hit": False, "deduplicated": True, "ttl_seconds": ttl}}
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache counters.
+
+        Returns:
+            Dictionary with hits, misses, deduplicated, evictions and entries
+        """
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+
+_cache: Optional[MCPResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_mcp_result_cache() -> MCPResultCache:
+    """Get the process-wide MCP result cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MCPResultCache()
+        return _cache
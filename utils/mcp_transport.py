@@ -0,0 +1,479 @@
+"""
+Transport for calls to MCP services.
+
+Used by DedicatedMCPModel._call_mcp_service, so the agent, the RAG orchestrator and the gateway
+all share it. The protocol comes from the service's registry metadata ("protocol"):
+- http (default): one requests.Session per service, keeping up to MCP_TRANSPORT_POOL_MAXSIZE
+  keep-alive connections open, instead of a new TCP connection for every call;
+- http2: HTTP/2 with prior knowledge through httpx (needs the h2 package; falls back to http);
+  all calls to the service are multiplexed over one connection;
+- tcp-framed: each message is a 4-byte big-endian length followed by that many bytes of UTF-8
+  JSON. Frames are read in full whatever their size and connections are pooled and reused.
+  A request lost on a pooled connection is only resent if it was not sent yet or the service's
+  cache_policy marks the action idempotent. Servers can use FramedTCPRequestHandler /
+  make_framed_tcp_server;
+- tcp: the original one-shot protocol (JSON in, JSON out, one connection per call). The reply is
+  read until it is complete JSON or the service closes the connection, not cut at 4096 bytes.
+
+Every call records its latency and the bytes sent and received for its service (see stats()).
+Inside a request with a deadline (utils.deadline) the timeout is cut to the time left, and the
+deadline is sent along (X-Request-Deadline header and "deadline" in the payload).
+"""
+
+import json
+import logging
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import MCP_SERVICE_CALL_TIMEOUT, MCP_TRANSPORT_KEEPALIVE, MCP_TRANSPORT_POOL_MAXSIZE
+from utils.deadline import (
+    DeadlineExceeded, bounded_timeout, current_deadline, deadline_headers, deadline_passed, deadline_scope, parse_deadline
+)
+
+from utils.mcp_resilience import is_idempotent
+
+logger = logging.getLogger(__name__)
+
+# Length prefix of a tcp-framed message
+FRAME_HEADER = struct.Struct("!I")
+
+_READ_CHUNK = 65536
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def request_payload(action: str, parameters: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    """
+    Payload of an MCP call, carrying the current request deadline if there is one.
+
+    Args:
+        action: Action to perform
+        parameters: Action parameters
+        **extra: Additional fields (e.g. service_id for the TCP protocols)
+
+    Returns:
+        Payload dictionary
+    """
+    payload = {**extra, "action": action, "parameters": parameters, "timestamp": _timestamp()}
+    deadline = current_deadline()
+    if deadline is not None:
+        payload["deadline"] = deadline
+    return payload
+
+
+def timeout_error(timeout: float, default: float, tcp: bool = False) -> str:
+    """Error message for a call that timed out after timeout seconds (default: its usual timeout)."""
+    if timeout < default:
+        return f"Deadline exceeded: no response within the {timeout:.1f}s left of the request"
+    return "TCP request timed out" if tcp else "Request timed out"
+
+
+def encode_frame(message: Any) -> bytes:
+    """
+    Encode a message for the tcp-framed protocol.
+
+    Args:
+        message: JSON-serializable message
+
+    Returns:
+        Length prefix followed by the UTF-8 JSON body
+    """
+    body = json.dumps(message).encode('utf-8')
+    if len(body) >= 2 ** 32:
+        raise ValueError(f"Message of {len(body)} bytes is too large for one frame")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], min(size - received, _READ_CHUNK))
+        if count == 0:
+            raise ConnectionError(f"Connection closed after {received} of {size} bytes")
+        received += count
+    return bytes(buffer)
+
+
+def read_frame(sock: socket.socket) -> Optional[bytes]:
+    """
+    Read one tcp-framed message body.
+
+    Args:
+        sock: Connected socket
+
+    Returns:
+        The message body, or None if the peer closed the connection before a new frame
+    """
+    first = sock.recv(FRAME_HEADER.size)
+    if not first:
+        return None
+    header = first if len(first) == FRAME_HEADER.size else first + _recv_exactly(sock, FRAME_HEADER.size - len(first))
+    (size,) = FRAME_HEADER.unpack(header)
+    return _recv_exactly(sock, size)
+
+
+def parse_complete_json(buffer: bytes) -> Tuple[bool, Any]:
+    """
+    Try to parse a possibly incomplete JSON reply of the one-shot tcp protocol.
+
+    Returns:
+        Tuple of (complete, parsed value)
+    """
+    # Only a reply ending like an object or array can be complete; avoids re-parsing every chunk
+    if buffer.rstrip()[-1:] not in (b'}', b']'):
+        return False, None
+    try:
+        return True, json.loads(buffer)
+    except ValueError:
+        return False, None
+
+
+def read_json_reply(sock: socket.socket) -> Tuple[Any, int]:
+    """
+    Read a one-shot tcp reply: until it is complete JSON or the service closes the connection.
+
+    Returns:
+        Tuple of (parsed reply, bytes received)
+    """
+    buffer = bytearray()
+    while True:
+        chunk = sock.recv(_READ_CHUNK)
+        if not chunk:
+            break
+        buffer += chunk
+        complete, value = parse_complete_json(buffer)
+        if complete:
+            return value, len(buffer)
+    return json.loads(bytes(buffer).decode('utf-8')), len(buffer)
+
+
+class FramedTCPRequestHandler(socketserver.BaseRequestHandler):
+    """
+    Server side of the tcp-framed protocol: answers each request frame with
+    self.server.handle_call(action, parameters) until the client closes the connection.
+    Requests arriving after their deadline are refused; otherwise the deadline is current
+    (utils.deadline) while handle_call runs.
+    """
+
+    def handle(self):
+        while True:
+            try:
+                frame = read_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            if frame is None:
+                return
+            try:
+                request = json.loads(frame)
+                deadline = parse_deadline(request.get("deadline"))
+                if deadline_passed(deadline):
+                    response = {"success": False, "error": "Deadline exceeded before the request was processed"}
+                else:
+                    with deadline_scope(deadline):
+                        response = self.server.handle_call(request.get("action"), request.get("parameters") or {})
+            except Exception as e:
+                logger.error(f"Error handling framed TCP request: {str(e)}")
+                response = {"success": False, "error": str(e)}
+            self.request.sendall(encode_frame(response))
+
+
+def make_framed_tcp_server(address: Tuple[str, int], handle_call: Callable[[str, Dict[str, Any]], Any]) -> socketserver.ThreadingTCPServer:
+    """
+    Create a threaded tcp-framed server (call serve_forever() to run it).
+
+    Args:
+        address: (host, port) to listen on
+        handle_call: Function (action, parameters) -> JSON-serializable result
+
+    Returns:
+        The server
+    """
+    server = socketserver.ThreadingTCPServer(address, FramedTCPRequestHandler)
+    server.daemon_threads = True
+    server.handle_call = handle_call
+    return server
+
+
+class MCPTransport:
+    """
+    Calls MCP services over pooled keep-alive connections and records per-service metrics.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        timeout: float = MCP_SERVICE_CALL_TIMEOUT,
+        pool_maxsize: int = MCP_TRANSPORT_POOL_MAXSIZE,
+        keepalive: bool = MCP_TRANSPORT_KEEPALIVE
+    ):
+        """
+        Args:
+            timeout: Seconds allowed per MCP call
+            pool_maxsize: Idle connections kept per service
+            keepalive: Reuse connections between calls
+        """
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, int], requests.Session] = {}
+        self._http2_clients: Dict[Tuple[str, int], Any] = {}
+        self._idle_sockets: Dict[Tuple[str, int], List[socket.socket]] = {}
+        self._sockets_opened: Dict[Tuple[str, int], int] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def call(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call one MCP service.
+
+        Args:
+            service: Service dictionary from the registry (id, host, port, metadata)
+            action: Action to perform (also the HTTP path)
+            parameters: Action parameters
+
+        Returns:
+            Result dictionary with status "success" (and result) or "error" (and error)
+        """
+        protocol = ((service.get('metadata') or {}).get('protocol') or 'http').lower()
+        base = {"service_id": service['id'], "action": action, "parameters": parameters}
+        try:
+            timeout = bounded_timeout(self.timeout, f"calling {service['id']}")
+        except DeadlineExceeded as e:
+            return {**base, "status": "error", "error": str(e), "timestamp": _timestamp()}
+        started = time.monotonic()
+        sent = received = 0
+        try:
+            if protocol == 'tcp-framed':
+                result_data, sent, received = self._call_framed_tcp(service, action, parameters, timeout)
+            elif protocol == 'tcp':
+                result_data, sent, received = self._call_tcp(service, action, parameters, timeout)
+            else:
+                if protocol not in ('http', 'http2'):
+                    logger.warning(f"Unknown protocol '{protocol}' for service {service['id']}, defaulting to HTTP")
+                status_code, body, sent = self._call_http(service, action, parameters, timeout, http2=protocol == 'http2')
+                received = len(body)
+                if status_code != 200:
+                    error = f"HTTP {status_code}: {body.decode('utf-8', errors='replace')}"
+                    self._record(service, protocol, started, sent, received, error=True)
+                    return {**base, "status": "error", "error": error, "timestamp": _timestamp()}
+                result_data = json.loads(body)
+            self._record(service, protocol, started, sent, received)
+            return {**base, "status": "success", "result": result_data, "timestamp": _timestamp()}
+        except (requests.exceptions.Timeout, socket.timeout):
+            error = timeout_error(timeout, self.timeout, tcp=protocol.startswith('tcp'))
+        except requests.exceptions.RequestException as e:
+            error = f"HTTP request failed: {str(e)}"
+        except json.JSONDecodeError as e:
+            error = f"Invalid JSON response: {str(e)}"
+        except OSError as e:
+            error = f"TCP connection failed: {str(e)}"
+        except Exception as e:
+            error = _httpx_error_message(e, timeout, self.timeout) or f"Unexpected error calling MCP service: {str(e)}"
+        self._record(service, protocol, started, sent, received, error=True)
+        return {**base, "status": "error", "error": error, "timestamp": _timestamp()}
+
+    # HTTP
+
+    def _session(self, key: Tuple[str, int]) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if not self.keepalive:
+                    session.headers['Connection'] = 'close'
+                self._sessions[key] = session
+            return session
+
+    def _http2_client(self, key: Tuple[str, int]):
+        with self._lock:
+            if key not in self._http2_clients:
+                try:
+                    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+                    import httpx
+                    self._http2_clients[key] = httpx.Client(
+                        http1=False, http2=True, timeout=self.timeout,
+                        limits=httpx.Limits(max_keepalive_connections=self.pool_maxsize)
+                    )
+                except ImportError:
+                    logger.warning(f"HTTP/2 needs the httpx and h2 packages; using HTTP/1.1 for {key[0]}:{key[1]}")
+                    self._http2_clients[key] = None
+            return self._http2_clients[key]
+
+    def _call_http(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any], timeout: float,
+                   http2: bool = False) -> Tuple[int, bytes, int]:
+        key = (service['host'], service['port'])
+        endpoint = f"http://{service['host']}:{service['port']}"
+        if action:
+            endpoint = f"{endpoint}/{action.lstrip('/')}"  # Ensure action doesn't start with extra slash
+        payload = json.dumps(request_payload(action, parameters)).encode('utf-8')
+        headers = {'Content-Type': 'application/json', **deadline_headers()}
+
+        client = self._http2_client(key) if http2 else None
+        if client is not None:
+            response = client.post(endpoint, content=payload, headers=headers, timeout=timeout)
+            return response.status_code, response.content, len(payload)
+
+        response = self._session(key).post(endpoint, data=payload, headers=headers, timeout=timeout)
+        return response.status_code, response.content, len(payload)
+
+    # TCP
+
+    def _open_socket(self, key: Tuple[str, int], timeout: float) -> socket.socket:
+        sock = socket.create_connection(key, timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self._sockets_opened[key] = self._sockets_opened.get(key, 0) + 1
+        return sock
+
+    def _checkout_socket(self, key: Tuple[str, int], timeout: float) -> Tuple[socket.socket, bool]:
+        while True:
+            with self._lock:
+                idle = self._idle_sockets.get(key)
+                if not idle:
+                    break
+                sock = idle.pop()
+            # An idle connection is only readable if the service closed it
+            if not select.select([sock], [], [], 0)[0]:
+                return sock, True
+            sock.close()
+        return self._open_socket(key, timeout), False
+
+    def _checkin_socket(self, key: Tuple[str, int], sock: socket.socket) -> None:
+        if self.keepalive:
+            with self._lock:
+                idle = self._idle_sockets.setdefault(key, [])
+                if len(idle) < self.pool_maxsize:
+                    idle.append(sock)
+                    return
+        sock.close()
+
+    def _call_framed_tcp(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any], timeout: float) -> Tuple[Any, int, int]:
+        key = (service['host'], service['port'])
+        frame = encode_frame(request_payload(action, parameters, service_id=service['id']))
+        while True:
+            sock, reused = self._checkout_socket(key, timeout)
+            sent = False
+            try:
+                sock.settimeout(timeout)
+                sock.sendall(frame)
+                sent = True
+                body = read_frame(sock)
+                if body is None:
+                    raise ConnectionError("Connection closed before the response")
+            except ConnectionError as e:
+                sock.close()
+                # The service closed the pooled connection; retry on a fresh one unless the service
+                # may already have run a non-idempotent action
+                if reused and (not sent or is_idempotent(service, action)):
+                    logger.debug(f"Pooled connection to {key[0]}:{key[1]} was closed ({str(e)}), reconnecting")
+                    continue
+                raise
+            except BaseException:
+                sock.close()
+                raise
+            self._checkin_socket(key, sock)
+            return json.loads(body), len(frame), FRAME_HEADER.size + len(body)
+
+    def _call_tcp(self, service: Dict[str, Any], action: str, parameters: Dict[str, Any], timeout: float) -> Tuple[Any, int, int]:
+        key = (service['host'], service['port'])
+        payload = json.dumps(request_payload(action, parameters, service_id=service['id'])).encode('utf-8')
+        with self._open_socket(key, timeout) as sock:
+            sock.sendall(payload)
+            result_data, received = read_json_reply(sock)
+        return result_data, len(payload), received
+
+    # Metrics
+
+    def _record(self, service: Dict[str, Any], protocol: str, started: float, sent: int, received: int, error: bool = False) -> None:
+        elapsed_ms = (time.monotonic() - started) * 1000
+        logger.debug(
+            f"[MCP_TRANSPORT] {service['id']} ({protocol}): {elapsed_ms:.1f}ms, "
+            f"{sent}B sent, {received}B received{' (error)' if error else ''}"
+        )
+        with self._lock:
+            stats = self._stats.setdefault(service['id'], {
+                "host": service['host'], "port": service['port'], "protocol": protocol,
+                "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes_sent": 0, "bytes_received": 0
+            })
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["bytes_sent"] += sent
+            stats["bytes_received"] += received
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-service call metrics.
+
+        Returns:
+            Dictionary of service id -> calls, errors, avg_ms, max_ms, bytes_sent, bytes_received,
+            host, port and protocol; TCP services also report connections_opened
+        """
+        with self._lock:
+            result = {}
+            for service_id, stats in self._stats.items():
+                entry = {k: v for k, v in stats.items() if k != "total_ms"}
+                entry["avg_ms"] = round(stats["total_ms"] / stats["calls"], 1) if stats["calls"] else 0.0
+                entry["max_ms"] = round(stats["max_ms"], 1)
+                if stats["protocol"].startswith("tcp"):
+                    entry["connections_opened"] = self._sockets_opened.get((stats["host"], stats["port"]), 0)
+                result[service_id] = entry
+            return result
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            for client in self._http2_clients.values():
+                if client is not None:
+                    client.close()
+            for idle in self._idle_sockets.values():
+                for sock in idle:
+                    sock.close()
+            self._sessions.clear()
+            self._http2_clients.clear()
+            self._idle_sockets.clear()
+
+
+def _httpx_error_message(error: Exception, timeout: float, default: float) -> Optional[str]:
+    # Errors from the HTTP/2 client, reported like the requests ones
+    try:
+        import httpx
+    except ImportError:
+        return None
+    if isinstance(error, httpx.TimeoutException):
+        return timeout_error(timeout, default)
+    if isinstance(error, httpx.HTTPError):
+        return f"HTTP request failed: {str(error)}"
+    return None
+
+
+_transport: Optional[MCPTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_mcp_transport() -> MCPTransport:
+    """Get the process-wide MCP transport, creating it on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = MCPTransport()
+        return _transport
@@ -0,0 +1,287 @@
+"""
+Cache of planner decisions made by DedicatedMCPModel.
+
+Planning sends the whole mcp_capable_model prompt and the serialized service list to the LLM, so
+repeated requests (e.g. a dashboard re-running the same question) pay for the same call again.
+Plans are keyed by (prompt template hash, services fingerprint, normalized request):
+
+- the template hash covers the prompt text and the planner model, so editing the prompt or
+  switching models never reuses old plans;
+- the services fingerprint covers the service list the planner sees; when a new fingerprint shows
+  up the catalog has changed and plans made for the old one are dropped;
+- the request is compared after Unicode normalization, case folding, collapsing whitespace and
+  dropping trailing punctuation.
+
+With an embedding function (PLANNER_CACHE_SIMILARITY_ENABLED), a request that misses the exact
+key may still reuse the plan of a request planned against the same template and services whose
+embedding is at least PLANNER_CACHE_SIMILARITY_THRESHOLD similar (cosine). Keep the threshold
+high: requests that differ in a single value ("sales in 2023" / "sales in 2024") embed closely.
+
+stats() reports hits by kind and saved_calls, the number of planner LLM calls avoided.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import (
+    PLANNER_CACHE_ENABLED,
+    PLANNER_CACHE_MAX_ENTRIES,
+    PLANNER_CACHE_SIMILARITY_ENABLED,
+    PLANNER_CACHE_SIMILARITY_THRESHOLD,
+    PLANNER_CACHE_TTL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def normalize_request(user_request: str) -> str:
+    """
+    Form of a user request that repeated requests share.
+
+    Returns:
+        The request NFKC-normalized and case-folded, with whitespace collapsed and trailing
+        punctuation removed
+    """
+    text = unicodedata.normalize('NFKC', user_request or '').casefold()
+    return ' '.join(text.split()).rstrip(' .!?;')
+
+
+def template_hash(template: str, model: str = '') -> str:
+    """Hash of a planner prompt template and the model it is sent to."""
+    return _digest([template, model])
+
+
+def services_fingerprint(services: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint of the service list the planner sees; the order services are listed in is ignored.
+
+    Returns:
+        Hex digest that changes whenever a service is added, removed or changes its metadata
+    """
+    return _digest(sorted((_digest(service) for service in services or []), key=str))
+
+
+def _unit(vector: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else None
+
+
+class PlannerCache:
+    """
+    In-memory LRU cache of planner results with a TTL, shared by all planner instances of a process.
+    Safe to share between threads; every caller gets its own copy of a cached plan.
+    """
+
+    def __init__(self, ttl_seconds: float = PLANNER_CACHE_TTL_SECONDS, max_entries: int = PLANNER_CACHE_MAX_ENTRIES,
+                 enabled: bool = PLANNER_CACHE_ENABLED, similarity_threshold: float = PLANNER_CACHE_SIMILARITY_THRESHOLD,
+                 embed: Optional[Callable[[str], List[float]]] = None):
+        """
+        Args:
+            ttl_seconds: How long a plan is reused
+            max_entries: Plans kept before the least recently used is evicted
+            enabled: When False every request is planned by the LLM
+            similarity_threshold: Cosine similarity a request needs to reuse another request's plan
+            embed: Embeds a normalized request; None disables similarity matching
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._fingerprint: Optional[str] = None
+        self._counters = {
+            "exact_hits": 0, "similar_hits": 0, "misses": 0, "invalidations": 0,
+            "expirations": 0, "evictions": 0, "embedding_errors": 0
+        }
+
+    def plan(self, template: str, services: List[Dict[str, Any]], user_request: str, fetch: Callable[[], Any],
+             model: str = '', cacheable: Callable[[Any], bool] = lambda result: isinstance(result, dict)) -> Any:
+        """
+        Return the cached plan for a request, or make one.
+
+        Args:
+            template: Planner prompt template
+            services: Service list given to the planner
+            user_request: The user's request
+            fetch: Calls the planner LLM and returns its parsed result
+            model: Planner model, so plans of different models are kept apart
+            cacheable: Whether a result may be reused (e.g. not an error fallback)
+
+        Returns:
+            The plan
+        """
+        if not self.enabled:
+            return fetch()
+
+        scope = template_hash(template, model)
+        fingerprint = services_fingerprint(services)
+        normalized = normalize_request(user_request)
+        key = _digest([scope, fingerprint, normalized])
+
+        with self._lock:
+            self._check_catalog(fingerprint)
+            entry = self._lookup(key)
+            if entry is not None:
+                self._counters["exact_hits"] += 1
+                self._log_hit(user_request, entry, None)
+                return copy.deepcopy(entry["result"])
+
+        vector = self._embed(normalized)
+        if vector is not None:
+            with self._lock:
+                match, similarity = self._most_similar(scope, fingerprint, vector)
+                if match is not None:
+                    self._counters["similar_hits"] += 1
+                    self._log_hit(user_request, match, similarity)
+                    return copy.deepcopy(match["result"])
+
+        with self._lock:
+            self._counters["misses"] += 1
+        result = fetch()
+        if cacheable(result):
+            with self._lock:
+                self._store(key, scope, fingerprint, normalized, vector, result)
+        return result
+
+    def _check_catalog(self, fingerprint: str) -> None:
+        # Called with the lock held: a new fingerprint means the catalog changed since the last plan
+        if fingerprint == self._fingerprint:
+            return
+        if self._fingerprint is not None:
+            stale = [key for key, entry in self._entries.items() if entry["fingerprint"] != fingerprint]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._counters["invalidations"] += len(stale)
+                logger.info(f"[PLANNER_CACHE] Service catalog changed, dropped {len(stale)} cached plans")
+        self._fingerprint = fingerprint
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is None or self._expired(key, entry):
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _expired(self, key: str, entry: Dict[str, Any]) -> bool:
+        # Called with the lock held; drops the entry when its TTL has run out
+        if time.monotonic() - entry["stored"] < self.ttl_seconds:
+            return False
+        del self._entries[key]
+        self._counters["expirations"] += 1
+        return True
+
+    def _embed(self, normalized: str) -> Optional[List[float]]:
+        if self.embed is None or not normalized:
+            return None
+        try:
+            return _unit([float(x) for x in self.embed(normalized)])
+        except Exception as e:
+            with self._lock:
+                self._counters["embedding_errors"] += 1
+            logger.warning(f"[PLANNER_CACHE] Could not embed request, using exact matches only: {e}")
+            return None
+
+    def _most_similar(self, scope: str, fingerprint: str, vector: List[float]):
+        # Called with the lock held
+        best, best_key, best_similarity = None, None, self.similarity_threshold
+        for key, entry in list(self._entries.items()):
+            if entry["scope"] != scope or entry["fingerprint"] != fingerprint or entry["vector"] is None:
+                continue
+            if len(entry["vector"]) != len(vector) or self._expired(key, entry):
+                continue
+            similarity = sum(a * b for a, b in zip(entry["vector"], vector))
+            if similarity >= best_similarity:
+                best, best_key, best_similarity = entry, key, similarity
+        if best is None:
+            return None, None
+        self._entries.move_to_end(best_key)
+        return best, best_similarity
+
+    def _store(self, key: str, scope: str, fingerprint: str, normalized: str,
+               vector: Optional[List[float]], result: Any) -> None:
+        # Called with the lock held
+        if fingerprint != self._fingerprint:
+            return  # the catalog changed while this plan was being made
+        self._entries[key] = {
+            "result": copy.deepcopy(result), "scope": scope, "fingerprint": fingerprint,
+            "request": normalized, "vector": vector, "stored": time.monotonic()
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _log_hit(self, user_request: str, entry: Dict[str, Any], similarity: Optional[float]) -> None:
+        # Called with the lock held
+        age = time.monotonic() - entry["stored"]
+        match = "same request" if similarity is None else f"'{entry['request']}', similarity {similarity:.3f}"
+        logger.info(f"[PLANNER_CACHE] Reusing plan for '{user_request}' ({match}, planned {age:.0f}s ago); "
+                    f"{self._counters['exact_hits'] + self._counters['similar_hits']} planner calls saved so far")
+
+    def invalidate(self) -> None:
+        """Drop all cached plans, e.g. after services were re-registered with new capabilities."""
+        with self._lock:
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache counters.
+
+        Returns:
+            Dictionary with exact_hits, similar_hits, saved_calls, misses, invalidations,
+            expirations, evictions, embedding_errors, entries and similarity_enabled
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "saved_calls": self._counters["exact_hits"] + self._counters["similar_hits"],
+                "entries": len(self._entries),
+                "similarity_enabled": self.embed is not None
+            }
+
+
+def _embedding_function() -> Callable[[str], List[float]]:
+    # Requests are embedded with the configured embedding model, loaded on first use
+    manager = None
+    manager_lock = threading.Lock()
+
+    def embed(text: str) -> List[float]:
+        nonlocal manager
+        with manager_lock:
+            if manager is None:
+                from rag_component.embedding_manager import EmbeddingManager
+                manager = EmbeddingManager()
+        return manager.embed_text(text)
+
+    return embed
+
+
+_cache: Optional[PlannerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_planner_cache() -> PlannerCache:
+    """Get the process-wide planner cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PlannerCache(embed=_embedding_function() if PLANNER_CACHE_SIMILARITY_ENABLED else None)
+        return _cache
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Export and restore vector store snapshots without re-embedding the corpus.
+
+Examples:
+    python vector_snapshot.py export --store qdrant --collection documents --output ./data/vector_snapshots/documents
+    python vector_snapshot.py verify --input ./data/vector_snapshots/documents
+    python vector_snapshot.py import --store qdrant --collection documents --input ./data/vector_snapshots/documents --recreate
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path so we can import from rag_component
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from rag_component.config import RAG_CHROMA_PERSIST_DIR, RAG_SNAPSHOT_DIR
+from rag_component.qdrant_connection import get_bulk_qdrant_client, get_qdrant_client
+from rag_component import vector_snapshot
+
+
+def get_chroma_collection(collection_name: str, persist_dir: str, metadata=None):
+    """Open (or create, with the given metadata) a persistent Chroma collection."""
+    import chromadb
+    client = chromadb.PersistentClient(path=persist_dir)
+    return client.get_or_create_collection(collection_name, metadata=metadata)
+
+
+def export_command(args):
+    output_dir = args.output or os.path.join(RAG_SNAPSHOT_DIR, args.collection)
+    if args.store == "qdrant":
+        manifest = vector_snapshot.export_qdrant_collection(
+            get_qdrant_client(), args.collection, output_dir, chunk_size=args.chunk_size
+        )
+    else:
+        manifest = vector_snapshot.export_chroma_collection(
+            get_chroma_collection(args.collection, args.chroma_dir), output_dir, chunk_size=args.chunk_size
+        )
+    logging.info(
+        f"Exported {manifest['count']} points ({manifest['dimension']} dims, {len(manifest['chunks'])} chunks) "
+        f"to {output_dir}"
+    )
+
+
+def import_command(args):
+    if args.store == "qdrant":
+        restored = vector_snapshot.import_into_qdrant(
+            args.input,
+            get_bulk_qdrant_client(),
+            args.collection,
+            recreate=args.recreate,
+            batch_size=args.batch_size,
+            parallelism=args.parallelism
+        )
+    else:
+        manifest = vector_snapshot.load_manifest(args.input)
+        collection = get_chroma_collection(
+            args.collection, args.chroma_dir, metadata=vector_snapshot.chroma_collection_metadata(manifest)
+        )
+        restored = vector_snapshot.import_into_chroma(args.input, collection, batch_size=args.batch_size)
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export and restore vector store snapshots')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Export a collection into a snapshot directory")
+    export_parser.add_argument('--store', choices=['qdrant', 'chroma'], default='qdrant')
+    export_parser.add_argument('--collection', default=os.getenv("RAG_COLLECTION_NAME", "documents"))
+    export_parser.add_argument('--output', help="Snapshot directory (default: RAG_SNAPSHOT_DIR/<collection>)")
+    export_parser.add_argument('--chunk-size', type=int, default=None, help="Points per snapshot chunk")
+    export_parser.add_argument('--chroma-dir', default=RAG_CHROMA_PERSIST_DIR)
+
+    import_parser = subparsers.add_parser('import', help="Restore a snapshot into a vector store")
+    import_parser.add_argument('--store', choices=['qdrant', 'chroma'], default='qdrant')
+    import_parser.add_argument('--collection', default=os.getenv("RAG_COLLECTION_NAME", "documents"))
+    import_parser.add_argument('--input', required=True, help="Snapshot directory")
+    import_parser.add_argument('--recreate', action='store_true', help="Drop the Qdrant collection before restoring")
+    import_parser.add_argument('--batch-size', type=int, default=None)
+    import_parser.add_argument('--parallelism', type=int, default=None)
+    import_parser.add_argument('--chroma-dir', default=RAG_CHROMA_PERSIST_DIR)
+
+    verify_parser = subparsers.add_parser('verify', help="Verify snapshot checksums")
+    verify_parser.add_argument('--input', required=True, help="Snapshot directory")
+
+    parser.add_argument('--verbose', '-v', action='store_true', help="Enable verbose logging")
+
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        if args.command == 'export':
+            export_command(args)
+        elif args.command == 'import':
+            start_time = time.time()
+            restored = import_command(args)
+            elapsed = time.time() - start_time
+            logging.info(f"Restored {restored} points in {elapsed:.2f}s ({restored / max(elapsed, 1e-9):.0f} points/s)")
+        else:
+            manifest = vector_snapshot.verify_snapshot(args.input)
+            logging.info(f"Snapshot OK: {manifest['count']} points in {len(manifest['chunks'])} chunks")
+        return 0
+    except Exception as e:
+        logging.error(f"Snapshot {args.command} failed: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())